@@ -47,11 +47,14 @@ from app.models.instruction_reference import InstructionReference
 from app.models.table_stats import TableStats
 from app.models.table_usage_event import TableUsageEvent
 from app.models.table_feedback_event import TableFeedbackEvent
+from app.models.table_co_usage import TableCoUsage
 from app.models.agent_execution import AgentExecution
 from app.models.plan_decision import PlanDecision
 from app.models.tool_execution import ToolExecution
 from app.models.context_snapshot import ContextSnapshot
 from app.models.completion_block import CompletionBlock
+from app.models.completion_digest import CompletionDigest
+from app.models.metadata_resource_term import MetadataResourceTerm
 from app.models.dashboard_layout_version import DashboardLayoutVersion
 from app.models.query import Query
 from app.models.visualization import Visualization
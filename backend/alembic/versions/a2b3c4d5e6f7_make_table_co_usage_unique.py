@@ -0,0 +1,87 @@
+"""make table_co_usage rows unique per org/day/pair
+
+Revision ID: a2b3c4d5e6f7
+Revises: z1a2b3c4d5e6
+Create Date: 2026-10-16 00:00:00.000000
+
+ix_tcousage_org_day_pair was not unique, so two flushes racing to insert the
+same row left duplicates. Duplicates are merged first, then the index is
+replaced by two partial unique indexes (pair rows, and the per-day query
+counter whose table1/table2 are NULL) that co-usage deltas use as their
+ON CONFLICT target.
+"""
+from typing import Sequence, Union
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2b3c4d5e6f7'
+down_revision: Union[str, None] = 'z1a2b3c4d5e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def merge_duplicate_rows():
+    connection = op.get_bind()
+    table = sa.table(
+        'table_co_usage',
+        sa.column('id', sa.String), sa.column('org_id', sa.String), sa.column('day', sa.Date),
+        sa.column('table1', sa.Text), sa.column('table2', sa.Text), sa.column('join_count', sa.BigInteger),
+        sa.column('updated_at', sa.DateTime),
+    )
+    dupes = connection.execute(text("""
+        SELECT org_id, day, table1, table2
+        FROM table_co_usage
+        GROUP BY org_id, day, table1, table2
+        HAVING COUNT(*) > 1
+    """)).fetchall()
+
+    for org_id, day, table1, table2 in dupes:
+        rows = connection.execute(
+            sa.select(table.c.id, table.c.join_count)
+            .where(
+                table.c.org_id == org_id,
+                table.c.day == day,
+                table.c.table1.is_not_distinct_from(table1),
+                table.c.table2.is_not_distinct_from(table2),
+            )
+            .order_by(table.c.id)
+        ).fetchall()
+        keep_id = rows[0].id
+        connection.execute(sa.delete(table).where(table.c.id.in_([row.id for row in rows[1:]])))
+        connection.execute(
+            sa.update(table)
+            .where(table.c.id == keep_id)
+            .values(join_count=sum(row.join_count or 0 for row in rows), updated_at=datetime.utcnow())
+        )
+
+
+def upgrade() -> None:
+    merge_duplicate_rows()
+    op.drop_index('ix_tcousage_org_day_pair', table_name='table_co_usage')
+    op.create_index(
+        'ux_tcousage_pair',
+        'table_co_usage',
+        ['org_id', 'day', 'table1', 'table2'],
+        unique=True,
+        postgresql_where=text('table1 IS NOT NULL'),
+        sqlite_where=text('table1 IS NOT NULL'),
+    )
+    op.create_index(
+        'ux_tcousage_queries',
+        'table_co_usage',
+        ['org_id', 'day'],
+        unique=True,
+        postgresql_where=text('table1 IS NULL'),
+        sqlite_where=text('table1 IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_tcousage_queries', table_name='table_co_usage')
+    op.drop_index('ux_tcousage_pair', table_name='table_co_usage')
+    op.create_index('ix_tcousage_org_day_pair', 'table_co_usage', ['org_id', 'day', 'table1', 'table2'])
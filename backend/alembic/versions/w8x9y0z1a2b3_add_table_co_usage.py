@@ -0,0 +1,101 @@
+"""add table co-usage index for the console joins heatmap
+
+Revision ID: w8x9y0z1a2b3
+Revises: v7w8x9y0z1a2
+Create Date: 2026-10-16 00:00:00.000000
+
+Adds table_co_usage, a per-org/day count of table pairs used together by
+step data models, and backfills it from existing steps. Only the step
+data_model column is read, in batches, so the large data column is never
+loaded.
+"""
+from typing import Sequence, Union
+import uuid
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'w8x9y0z1a2b3'
+down_revision: Union[str, None] = 'v7w8x9y0z1a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def backfill_table_co_usage():
+    from app.services.table_co_usage_service import rows_for_steps
+
+    connection = op.get_bind()
+    result = connection.execution_options(stream_results=True).execute(text("""
+        SELECT r.organization_id, s.created_at, s.data_model
+        FROM steps s
+        JOIN widgets w ON s.widget_id = w.id
+        JOIN reports r ON w.report_id = r.id
+        WHERE s.data_model IS NOT NULL
+    """))
+
+    counts = {}
+    while True:
+        batch = result.fetchmany(1000)
+        if not batch:
+            break
+        for key, delta in rows_for_steps(batch).items():
+            counts[key] = counts.get(key, 0) + delta
+
+    if not counts:
+        return
+
+    now = datetime.utcnow()
+    table = sa.table(
+        'table_co_usage',
+        sa.column('id', sa.String), sa.column('org_id', sa.String), sa.column('day', sa.Date),
+        sa.column('table1', sa.Text), sa.column('table2', sa.Text), sa.column('join_count', sa.BigInteger),
+        sa.column('created_at', sa.DateTime), sa.column('updated_at', sa.DateTime),
+    )
+    rows = [
+        {
+            'id': str(uuid.uuid4()),
+            'org_id': org_id,
+            'day': day,
+            'table1': pair[0] if pair else None,
+            'table2': pair[1] if pair else None,
+            'join_count': count,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for (org_id, day, pair), count in counts.items()
+        if count > 0
+    ]
+    batch_size = 500
+    for i in range(0, len(rows), batch_size):
+        op.bulk_insert(table, rows[i:i + batch_size])
+
+
+def upgrade() -> None:
+    op.create_table(
+        'table_co_usage',
+        sa.Column('id', sa.String(36), primary_key=True, nullable=False),
+        sa.Column('org_id', sa.String(36), sa.ForeignKey('organizations.id'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('table1', sa.Text(), nullable=True),
+        sa.Column('table2', sa.Text(), nullable=True),
+        sa.Column('join_count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_table_co_usage_id', 'table_co_usage', ['id'], unique=True)
+    op.create_index('ix_tcousage_org_day', 'table_co_usage', ['org_id', 'day'])
+    op.create_index('ix_tcousage_org_day_pair', 'table_co_usage', ['org_id', 'day', 'table1', 'table2'])
+
+    backfill_table_co_usage()
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tcousage_org_day_pair', table_name='table_co_usage')
+    op.drop_index('ix_tcousage_org_day', table_name='table_co_usage')
+    op.drop_index('ix_table_co_usage_id', table_name='table_co_usage')
+    op.drop_table('table_co_usage')
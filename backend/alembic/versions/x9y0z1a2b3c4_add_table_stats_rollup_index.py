@@ -0,0 +1,79 @@
+"""add partial unique index on org-level table_stats rollups
+
+Revision ID: x9y0z1a2b3c4
+Revises: w8x9y0z1a2b3
+Create Date: 2026-10-16 00:00:00.000000
+
+Org-level rollups have a NULL report_id, so the existing unique index never
+matched them and concurrent writers could create duplicates. Duplicates are
+merged first, then ux_tabstats_rollup is created so batched stats flushes can
+use it as their ON CONFLICT target.
+"""
+from typing import Sequence, Union
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'x9y0z1a2b3c4'
+down_revision: Union[str, None] = 'w8x9y0z1a2b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def merge_duplicate_rollups():
+    from app.services.table_stats_buffer import merge_duplicate_stats_rows
+
+    connection = op.get_bind()
+    table = sa.table(
+        'table_stats',
+        *(sa.column(name) for name in (
+            'id', 'org_id', 'report_id', 'data_source_id', 'table_fqn', 'datasource_table_id',
+            'usage_count', 'success_count', 'weighted_usage_count',
+            'pos_feedback_count', 'neg_feedback_count', 'weighted_pos_feedback', 'weighted_neg_feedback',
+            'unique_users', 'trusted_usage_count', 'failure_count',
+            'last_used_at', 'last_feedback_at', 'updated_at_stats', 'created_at',
+        ))
+    )
+    dupes = connection.execute(text("""
+        SELECT org_id, data_source_id, table_fqn
+        FROM table_stats
+        WHERE report_id IS NULL AND data_source_id IS NOT NULL
+        GROUP BY org_id, data_source_id, table_fqn
+        HAVING COUNT(*) > 1
+    """)).fetchall()
+
+    for org_id, data_source_id, table_fqn in dupes:
+        rows = connection.execute(
+            sa.select(table).where(
+                table.c.org_id == org_id,
+                table.c.report_id.is_(None),
+                table.c.data_source_id == data_source_id,
+                table.c.table_fqn == table_fqn,
+            )
+        ).fetchall()
+        values, extra_ids = merge_duplicate_stats_rows(rows)
+        keep_id = values.pop('id')
+        connection.execute(sa.delete(table).where(table.c.id.in_(extra_ids)))
+        connection.execute(
+            sa.update(table).where(table.c.id == keep_id).values(**values, updated_at_stats=datetime.utcnow())
+        )
+
+
+def upgrade() -> None:
+    merge_duplicate_rollups()
+    op.create_index(
+        'ux_tabstats_rollup',
+        'table_stats',
+        ['org_id', 'data_source_id', 'table_fqn'],
+        unique=True,
+        postgresql_where=text('report_id IS NULL'),
+        sqlite_where=text('report_id IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_tabstats_rollup', table_name='table_stats')
@@ -0,0 +1,50 @@
+"""add completion_digests
+
+Revision ID: y0z1a2b3c4d5
+Revises: x9y0z1a2b3c4
+Create Date: 2026-10-16 00:00:00.000000
+
+completion_digests stores the rendered conversation-history line of each
+finished completion so the planner's messages section is not rebuilt from
+blocks and tool executions on every loop. It fills lazily; no backfill.
+The tail-window (keyset) query uses ix_completions_report_created, which
+97757b1ff76f already creates.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'y0z1a2b3c4d5'
+down_revision: Union[str, None] = 'x9y0z1a2b3c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'completion_digests',
+        sa.Column('id', sa.String(36), primary_key=True, nullable=False),
+        sa.Column('completion_id', sa.String(36), sa.ForeignKey('completions.id'), nullable=False),
+        sa.Column('report_id', sa.String(36), sa.ForeignKey('reports.id'), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('text_without_data', sa.Text(), nullable=True),
+        sa.Column('mentions', sa.Text(), nullable=True),
+        sa.Column('fingerprint', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('completion_id', name='uq_compdigest_completion'),
+    )
+    op.create_index('ix_completion_digests_id', 'completion_digests', ['id'], unique=True)
+    op.create_index('ix_compdigest_report', 'completion_digests', ['report_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_compdigest_report', table_name='completion_digests')
+    op.drop_index('ix_completion_digests_id', table_name='completion_digests')
+    op.drop_table('completion_digests')
@@ -0,0 +1,42 @@
+"""add metadata_resource_terms search index
+
+Revision ID: z1a2b3c4d5e6
+Revises: y0z1a2b3c4d5
+Create Date: 2026-10-16 00:00:00.000000
+
+Postings of the per-job BM25 index over metadata resources, plus
+metadata_indexing_jobs.search_index_version. Existing jobs are indexed lazily
+on their first search, so there is no backfill here.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'z1a2b3c4d5e6'
+down_revision: Union[str, None] = 'y0z1a2b3c4d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'metadata_resource_terms',
+        sa.Column('metadata_indexing_job_id', sa.String(36), sa.ForeignKey('metadata_indexing_jobs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('term', sa.String(128), nullable=False),
+        sa.Column('metadata_resource_id', sa.String(36), sa.ForeignKey('metadata_resources.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('metadata_indexing_job_id', 'term', 'metadata_resource_id', name='pk_metadata_resource_terms'),
+    )
+    op.create_index('ix_mrterms_resource', 'metadata_resource_terms', ['metadata_resource_id'])
+    with op.batch_alter_table('metadata_indexing_jobs') as batch_op:
+        batch_op.add_column(sa.Column('search_index_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('metadata_indexing_jobs') as batch_op:
+        batch_op.drop_column('search_index_version')
+    op.drop_index('ix_mrterms_resource', table_name='metadata_resource_terms')
+    op.drop_table('metadata_resource_terms')
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import logging
+import time
 from typing import Dict, Optional
 from pydantic import ValidationError
 
@@ -15,7 +16,7 @@ from app.schemas.sse_schema import SSEEvent
 from app.serializers.completion_v2 import serialize_block_v2
 from app.schemas.completion_v2_schema import ArtifactChangeSchema
 from app.streaming.text_streamer import PlanningTextStreamer
-from app.streaming.completion_stream import CompletionEventQueue
+from app.streaming.completion_stream import CompletionEventQueue, completion_streams
 from app.websocket_manager import websocket_manager
 from app.ai.runner.tool_runner import ToolRunner
 from app.ai.runner.policies import RetryPolicy, TimeoutPolicy
@@ -845,12 +846,48 @@ class AgentV2:
                         completion_id=str(self.system_completion.id),
                         agent_execution_id=str(self.current_execution.id),
                         block_id=current_block_id,
+                        throttle_ms=completion_streams.token_flush_ms,
+                        char_threshold=completion_streams.token_flush_chars,
                     )
+                # decision.partial carries the full text so far; send it at most every partial_flush_ms.
+                # Partials skipped inside the window are kept in pending_partial and sent once it closes.
+                last_partial_emit = 0.0
+                last_partial_shape = None
+                pending_partial = None
+
+                async def _emit_partial(decision, seq=None):
+                    nonlocal last_partial_emit, last_partial_shape, pending_partial
+                    if seq is None:
+                        seq = await self.project_manager.next_seq(self.db, self.current_execution)
+                    last_partial_emit = time.monotonic()
+                    last_partial_shape = (decision.plan_type, decision.action.name if decision.action else None)
+                    pending_partial = None
+                    await self._emit_sse_event(SSEEvent.internal(
+                        "decision.partial",
+                        completion_id=str(self.system_completion.id),
+                        agent_execution_id=str(self.current_execution.id),
+                        seq=seq,
+                        data={
+                            "plan_type": decision.plan_type,
+                            "reasoning": decision.reasoning_message,
+                            "assistant": decision.assistant_message,
+                            "final_answer": decision.final_answer,
+                            "action": decision.action.model_dump() if decision.action else None,
+                        }
+                    ))
                 
                 async for evt in self.planner.execute(planner_input, self.sigkill_event):
                     if self.sigkill_event.is_set():
                         break
 
+                    # Trailing flush: send the newest throttled partial once its window has passed
+                    if (
+                        pending_partial is not None
+                        and evt.type != "planner.decision.partial"
+                        and (time.monotonic() - last_partial_emit) * 1000 >= completion_streams.partial_flush_ms
+                    ):
+                        await _emit_partial(pending_partial)
+
                     # Handle typed events
                     if evt.type == "planner.tokens":
                         # Do not forward raw JSON tokens; deltas will be emitted from decision partials
@@ -882,22 +919,22 @@ class AgentV2:
                         reasoning_text = (getattr(decision, "reasoning_message", None) or "").strip()
                         assistant_text = (getattr(decision, "assistant_message", None) or "").strip()
                         final_answer_text = (getattr(decision, "final_answer", None) or "").strip()
+                        partial_shape = (decision.plan_type, decision.action.name if decision.action else None)
+                        now = time.monotonic()
+                        partial_due = (
+                            partial_shape != last_partial_shape
+                            or (now - last_partial_emit) * 1000 >= completion_streams.partial_flush_ms
+                        )
                         if reasoning_text or assistant_text or final_answer_text:
-                            await self._emit_sse_event(SSEEvent(
-                                event="decision.partial",
-                                completion_id=str(self.system_completion.id),
-                                agent_execution_id=str(self.current_execution.id),
-                                seq=event_seq,
-                                data={
-                                    "plan_type": decision.plan_type,
-                                    "reasoning": decision.reasoning_message,
-                                    "assistant": decision.assistant_message,
-                                    "final_answer": decision.final_answer,
-                                    "action": decision.action.model_dump() if decision.action else None,
-                                }
-                            ))
+                            if partial_due:
+                                await _emit_partial(decision, seq=event_seq)
+                            else:
+                                pending_partial = decision
                     
                     elif evt.type == "planner.decision.final":
+                        # Partials still held by the throttle go out before the final decision
+                        if pending_partial is not None:
+                            await _emit_partial(pending_partial)
                         decision = evt.data  # Already validated PlannerDecision from planner_v2
                         # Track whether analysis is complete
                         analysis_done = bool(getattr(decision, "analysis_complete", False))
@@ -1418,6 +1455,10 @@ class AgentV2:
 
                         break
 
+                # Stream ended without a final decision: don't leave the last partial unsent
+                if pending_partial is not None and not self.sigkill_event.is_set():
+                    await _emit_partial(pending_partial)
+
                 # If planner finalized analysis, stop the outer loop as well
                 if analysis_done:
                     break
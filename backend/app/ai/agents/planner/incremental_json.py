@@ -0,0 +1,306 @@
+"""Resumable JSON parser for streaming LLM output.
+
+``partialjson`` re-parses the whole buffer on every chunk, which makes a
+streamed decision quadratic in its length. ``IncrementalJSONParser`` keeps its
+tokenizer state between ``feed()`` calls, so each chunk is scanned once, and
+reports what changed as field-level deltas:
+
+- ``JSONDelta("text", path, appended)`` while a string value grows
+- ``JSONDelta("value", path, value)`` when any value (scalar or container)
+  is complete
+
+``value`` is the live, partially built document: open containers and the
+string currently being read are visible in it, incomplete keys and literals
+(numbers, ``true``/``false``/``null``) are not.
+"""
+
+import re
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+
+class JSONDelta(NamedTuple):
+    kind: str  # "text" | "value"
+    path: Tuple[Any, ...]
+    value: Any
+
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_STRING_RUN = re.compile(r'[^"\\]+')
+_LITERAL_RUN = re.compile(r'[0-9eE+\-.a-z]+')
+_WHITESPACE = ' \t\r\n'
+_LITERALS = {'true': True, 'false': False, 'null': None}
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?$')
+
+
+class _Frame:
+    __slots__ = ("container", "path", "state", "key")
+
+    def __init__(self, container, path, state):
+        self.container = container
+        self.path = path
+        # dict: key_or_end | key | colon | value | comma_or_end
+        # list: value_or_end | value | comma_or_end
+        self.state = state
+        self.key = None
+
+
+class IncrementalJSONParser:
+    """Incremental parser for a single JSON object or array.
+
+    Any text before the first ``{``/``[`` (e.g. a markdown fence) and after
+    the root value closes is ignored. Malformed input sets ``error`` and stops
+    further parsing; ``value`` keeps what was parsed up to that point.
+    """
+
+    def __init__(self) -> None:
+        self.value: Any = None
+        self.done = False
+        self.error: Optional[str] = None
+        self._stack: List[_Frame] = []
+        self._started = False
+        # In-progress scalar
+        self._string_parts: Optional[List[str]] = None
+        self._string_is_key = False
+        self._string_has_surrogate = False
+        self._escape: Optional[str] = None  # None | "" (after backslash) | "uXXX" (collecting \u digits)
+        self._literal: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[JSONDelta]:
+        """Consume ``chunk`` and return the deltas it produced."""
+        deltas: List[JSONDelta] = []
+        if not chunk or self.done or self.error:
+            return deltas
+        i = 0
+        n = len(chunk)
+        while i < n and not self.done and not self.error:
+            if self._string_parts is not None:
+                i = self._read_string(chunk, i, deltas)
+            elif self._literal is not None:
+                i = self._read_literal(chunk, i, deltas)
+            elif not self._started:
+                i = self._find_root(chunk, i)
+            else:
+                i = self._read_structure(chunk, i, deltas)
+        return deltas
+
+    def finish(self) -> List[JSONDelta]:
+        """Flush a trailing literal once the stream has ended."""
+        deltas: List[JSONDelta] = []
+        if self._literal is not None and not self.error:
+            self._end_literal(deltas)
+        return deltas
+
+    # ------------------------------------------------------------------ #
+    # Scanning
+    # ------------------------------------------------------------------ #
+
+    def _find_root(self, chunk: str, i: int) -> int:
+        starts = [p for p in (chunk.find('{', i), chunk.find('[', i)) if p != -1]
+        if not starts:
+            return len(chunk)
+        i = min(starts)
+        self._started = True
+        container = {} if chunk[i] == '{' else []
+        self.value = container
+        self._push(container, ())
+        return i + 1
+
+    def _read_structure(self, chunk: str, i: int, deltas: List[JSONDelta]) -> int:
+        frame = self._stack[-1]
+        ch = chunk[i]
+        if ch in _WHITESPACE:
+            return i + 1
+        is_dict = isinstance(frame.container, dict)
+        state = frame.state
+
+        if ch in '}]' and state in ('key_or_end', 'value_or_end', 'comma_or_end'):
+            if (ch == '}') != is_dict:
+                return self._fail(f"unexpected {ch!r}")
+            self._pop(deltas)
+            return i + 1
+        if state == 'comma_or_end':
+            if ch != ',':
+                return self._fail(f"expected ',' got {ch!r}")
+            frame.state = 'key' if is_dict else 'value'
+            return i + 1
+        if state in ('key_or_end', 'key'):
+            if ch != '"':
+                return self._fail(f"expected key got {ch!r}")
+            self._begin_string(is_key=True)
+            return i + 1
+        if state == 'colon':
+            if ch != ':':
+                return self._fail(f"expected ':' got {ch!r}")
+            frame.state = 'value'
+            return i + 1
+
+        # Expecting a value
+        if ch == '"':
+            self._begin_string(is_key=False)
+            self._attach(frame, "")
+            return i + 1
+        if ch in '{[':
+            container = {} if ch == '{' else []
+            path = self._attach(frame, container)
+            frame.state = 'comma_or_end'
+            self._push(container, path)
+            return i + 1
+        if ch == '-' or ch.isdigit() or ch in 'tfn':
+            self._literal = ''
+            return i
+        return self._fail(f"unexpected {ch!r}")
+
+    def _read_string(self, chunk: str, i: int, deltas: List[JSONDelta]) -> int:
+        appended: List[str] = []
+        n = len(chunk)
+        while i < n:
+            if self._escape is not None:
+                i = self._read_escape(chunk, i, appended)
+                if self.error:
+                    return n
+                continue
+            match = _STRING_RUN.match(chunk, i)
+            if match:
+                appended.append(match.group())
+                i = match.end()
+                continue
+            ch = chunk[i]
+            i += 1
+            if ch == '\\':
+                self._escape = ''
+                continue
+            # Closing quote
+            self._append_string(appended, deltas)
+            self._end_string(deltas)
+            return i
+        self._append_string(appended, deltas)
+        return i
+
+    def _read_escape(self, chunk: str, i: int, appended: List[str]) -> int:
+        if self._escape == '':
+            ch = chunk[i]
+            if ch == 'u':
+                self._escape = 'u'
+            elif ch in _ESCAPES:
+                appended.append(_ESCAPES[ch])
+                self._escape = None
+            else:
+                self._fail(f"invalid escape \\{ch}")
+            return i + 1
+        # Collecting the 4 hex digits of \uXXXX
+        need = 5 - len(self._escape)
+        digits = chunk[i:i + need]
+        self._escape += digits
+        i += len(digits)
+        if len(self._escape) == 5:
+            try:
+                code = int(self._escape[1:], 16)
+            except ValueError:
+                self._fail(f"invalid escape \\{self._escape}")
+                return i
+            if 0xD800 <= code <= 0xDFFF:
+                self._string_has_surrogate = True
+            appended.append(chr(code))
+            self._escape = None
+        return i
+
+    def _read_literal(self, chunk: str, i: int, deltas: List[JSONDelta]) -> int:
+        match = _LITERAL_RUN.match(chunk, i)
+        if match:
+            self._literal += match.group()
+            i = match.end()
+        if i < len(chunk):
+            # Anything else terminates the literal; the terminator is handled by the structure reader
+            self._end_literal(deltas)
+        return i
+
+    # ------------------------------------------------------------------ #
+    # Value assembly
+    # ------------------------------------------------------------------ #
+
+    def _push(self, container, path) -> None:
+        self._stack.append(_Frame(container, path, 'key_or_end' if isinstance(container, dict) else 'value_or_end'))
+
+    def _pop(self, deltas: List[JSONDelta]) -> None:
+        frame = self._stack.pop()
+        deltas.append(JSONDelta("value", frame.path, frame.container))
+        if not self._stack:
+            self.done = True
+
+    def _attach(self, frame: _Frame, value) -> Tuple[Any, ...]:
+        """Place ``value`` in the open container and return its path."""
+        if isinstance(frame.container, dict):
+            frame.container[frame.key] = value
+            return frame.path + (frame.key,)
+        frame.container.append(value)
+        return frame.path + (len(frame.container) - 1,)
+
+    def _current_path(self, frame: _Frame) -> Tuple[Any, ...]:
+        if isinstance(frame.container, dict):
+            return frame.path + (frame.key,)
+        return frame.path + (len(frame.container) - 1,)
+
+    def _begin_string(self, is_key: bool) -> None:
+        self._string_parts = []
+        self._string_is_key = is_key
+        self._string_has_surrogate = False
+
+    def _append_string(self, appended: List[str], deltas: List[JSONDelta]) -> None:
+        if not appended:
+            return
+        text = ''.join(appended)
+        self._string_parts.append(text)
+        if self._string_is_key:
+            return
+        frame = self._stack[-1]
+        current = self._string_value() if self._string_has_surrogate else self._live_string(frame) + text
+        self._set_current(frame, current)
+        deltas.append(JSONDelta("text", self._current_path(frame), text))
+
+    def _end_string(self, deltas: List[JSONDelta]) -> None:
+        value = self._string_value()
+        frame = self._stack[-1]
+        self._string_parts = None
+        if self._string_is_key:
+            frame.key = value
+            frame.state = 'colon'
+            return
+        self._set_current(frame, value)
+        deltas.append(JSONDelta("value", self._current_path(frame), value))
+        frame.state = 'comma_or_end'
+
+    def _end_literal(self, deltas: List[JSONDelta]) -> None:
+        token = self._literal
+        self._literal = None
+        if token in _LITERALS:
+            value = _LITERALS[token]
+        elif _NUMBER.match(token):
+            value = float(token) if any(c in token for c in '.eE') else int(token)
+        else:
+            self._fail(f"invalid literal {token!r}")
+            return
+        frame = self._stack[-1]
+        path = self._attach(frame, value)
+        frame.state = 'comma_or_end'
+        deltas.append(JSONDelta("value", path, value))
+
+    def _string_value(self) -> str:
+        value = ''.join(self._string_parts)
+        if self._string_has_surrogate:
+            value = value.encode('utf-16', 'surrogatepass').decode('utf-16', 'replace')
+        return value
+
+    def _live_string(self, frame: _Frame) -> str:
+        if isinstance(frame.container, dict):
+            return frame.container.get(frame.key) or ''
+        return frame.container[-1]
+
+    def _set_current(self, frame: _Frame, value) -> None:
+        if isinstance(frame.container, dict):
+            frame.container[frame.key] = value
+        else:
+            frame.container[-1] = value
+
+    def _fail(self, message: str) -> int:
+        self.error = message
+        return 0
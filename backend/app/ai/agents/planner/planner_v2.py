@@ -16,7 +16,7 @@ from app.schemas.ai.planner_events import PlannerEvent, PlannerTokenEvent, Plann
 from app.ai.utils.token_counter import count_tokens
 from .planner_state import PlannerState
 from .prompt_builder import PromptBuilder
-from partialjson.json_parser import JSONParser
+from .incremental_json import IncrementalJSONParser, JSONDelta
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -37,7 +37,6 @@ class PlannerV2:
     ) -> None:
         self.llm = LLM(model, usage_session_maker=usage_session_maker)
         self.tool_catalog = tool_catalog
-        self.parser = JSONParser()
         self.prompt_builder = PromptBuilder()
 
     async def execute(
@@ -54,7 +53,9 @@ class PlannerV2:
         prompt = self.prompt_builder.build_prompt(planner_input)
         # Calculate prompt tokens
         prompt_tokens = count_tokens(prompt, getattr(self.llm, "model_name", None))
-        completion_tokens = 0
+        # Parser state lives per execution; each chunk is scanned once
+        parser = IncrementalJSONParser()
+        chunks: list[str] = []
         # Stream LLM tokens and build decision snapshots
         async for chunk in self.llm.inference_stream(
             prompt,
@@ -68,7 +69,7 @@ class PlannerV2:
             if not chunk:
                 continue
 
-            state.buffer += chunk
+            chunks.append(chunk)
             
             # Emit typed token event
             yield PlannerTokenEvent(type="planner.tokens", delta=chunk)
@@ -76,14 +77,13 @@ class PlannerV2:
             # Track first token timing
             if state.first_token_time is None:
                 state.first_token_time = time.monotonic()
-            completion_tokens += count_tokens(chunk, getattr(self.llm, "model_name", None))
 
-            # Try parsing partial decision (be resilient to JSON decode errors)
-            try:
-                raw_decision = self.parser.parse(state.buffer)
-            except Exception:
-                raw_decision = None
-            if raw_decision:
+            deltas = parser.feed(chunk)
+            # Only rebuild the decision when a field it streams changed
+            if not any(self._is_decision_delta(d) for d in deltas):
+                continue
+            raw_decision = parser.value
+            if isinstance(raw_decision, dict) and raw_decision:
                 # Track reasoning/assistant field timing transitions
                 current_reasoning = raw_decision.get("reasoning_message") or raw_decision.get("reasoning") or raw_decision.get("thought") or ""
                 current_assistant = raw_decision.get("assistant_message") or raw_decision.get("message") or ""
@@ -106,11 +106,13 @@ class PlannerV2:
                     data=decision
                 )
 
+        state.buffer = "".join(chunks)
+        # Count once over the whole output rather than per chunk
+        completion_tokens = count_tokens(state.buffer, getattr(self.llm, "model_name", None)) if state.buffer else 0
+
         # Finalize decision with complete metrics
-        try:
-            final_raw = self.parser.parse(state.buffer) or {}
-        except Exception:
-            final_raw = {}
+        parser.finish()
+        final_raw = parser.value if isinstance(parser.value, dict) and not parser.error else {}
         final_decision = self._create_decision(
             final_raw, 
             state, 
@@ -123,6 +125,19 @@ class PlannerV2:
             data=final_decision
         )
 
+    @staticmethod
+    def _is_decision_delta(delta: JSONDelta) -> bool:
+        """True for deltas that change a partial decision's visible fields.
+
+        Message fields stream as text; inside ``action`` only completed
+        top-level fields count, so large tool arguments (e.g. artifact code)
+        do not trigger a decision rebuild per chunk.
+        """
+        path = delta.path
+        if not path or path[0] != "action":
+            return True
+        return delta.kind == "value" and len(path) <= 2
+
     def _create_decision(
         self, 
         raw: dict, 
@@ -7,13 +7,16 @@ import numpy as np
 import datetime
 import json
 import uuid
-from contextlib import redirect_stdout
+import threading
+from contextlib import contextmanager
 from typing import Dict, Any, Tuple, List, Optional, Callable, Coroutine
 from app.schemas.organization_settings_schema import OrganizationSettingsConfig, FeatureState
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from app.ai.context.builders.code_context_builder import CodeContextBuilder
 from app.ai.schemas.codegen import CodeGenContext, CodeGenRequest
+from app.ai.code_execution.execution_pool import code_execution_pool, CodeExecutionCancelled
+from app.data_sources.clients.fetch_guard import fetch_guard, FETCH_TRUNCATED_ATTR
 
 
 # =============================================================================
@@ -214,34 +217,84 @@ class QueryCapturingClientWrapper:
     """Wrapper around a database client that captures all queries passed to execute_query.
 
     Works with any client that has an execute_query method (SQL, MongoDB, etc.).
+    Queries run under the fetch guard's row/byte budget; truncated results are
+    reported in ``fetch_notices``.
     """
 
-    def __init__(self, original_client, captured_queries: List[str]):
+    def __init__(self, original_client, captured_queries: List[str], fetch_notices: Optional[List[Dict]] = None):
         self._original = original_client
         self._captured_queries = captured_queries
+        self._fetch_notices = fetch_notices
 
     def execute_query(self, query: str, *args, **kwargs):
         """Intercept execute_query calls to capture the query string."""
         if isinstance(query, str):
             self._captured_queries.append(query)
-        return self._original.execute_query(query, *args, **kwargs)
+        return fetch_guard.execute(self._original, query, *args, notices=self._fetch_notices, **kwargs)
 
     def __getattr__(self, name):
         """Delegate all other attributes to the original client."""
         return getattr(self._original, name)
 
 
-def wrap_clients_for_capture(ds_clients: Dict, captured_queries: List[str]) -> Dict:
+def wrap_clients_for_capture(ds_clients: Dict, captured_queries: List[str], fetch_notices: Optional[List[Dict]] = None) -> Dict:
     """Wrap all database clients to capture queries from execute_query calls."""
     wrapped = {}
     for key, client in (ds_clients or {}).items():
         if client is not None and hasattr(client, 'execute_query'):
-            wrapped[key] = QueryCapturingClientWrapper(client, captured_queries)
+            wrapped[key] = QueryCapturingClientWrapper(client, captured_queries, fetch_notices)
         else:
             wrapped[key] = client
     return wrapped
 
 
+# =============================================================================
+# Per-thread stdout capture
+# =============================================================================
+
+class _ThreadLocalStdout(io.TextIOBase):
+    """sys.stdout proxy that routes writes to a per-thread capture buffer.
+
+    contextlib.redirect_stdout swaps the process-wide sys.stdout, which breaks
+    as soon as two executions run concurrently on worker threads.
+    """
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def _target(self):
+        return getattr(self._local, "buffer", None) or self._fallback
+
+    def write(self, s):
+        return self._target().write(s)
+
+    def flush(self):
+        return self._target().flush()
+
+    def isatty(self):
+        return False
+
+
+_stdout_install_lock = threading.Lock()
+
+
+@contextmanager
+def _capture_thread_stdout():
+    with _stdout_install_lock:
+        proxy = sys.stdout
+        if not isinstance(proxy, _ThreadLocalStdout):
+            proxy = _ThreadLocalStdout(sys.stdout)
+            sys.stdout = proxy
+    buffer = io.StringIO()
+    previous = getattr(proxy._local, "buffer", None)
+    proxy._local.buffer = buffer
+    try:
+        yield buffer
+    finally:
+        proxy._local.buffer = previous
+
+
 class CodeExecutionManager:
     """
     Deprecated shim. Use StreamingCodeExecutor instead.
@@ -259,6 +312,10 @@ class CodeExecutionManager:
         executor = StreamingCodeExecutor(organization_settings=self.organization_settings, logger=self.logger)
         return executor.execute_code(code=code, ds_clients=db_clients, excel_files=excel_files)
 
+    async def execute_code_async(self, code: str, db_clients: Dict, excel_files: List, organization_id: Optional[str] = None):
+        executor = StreamingCodeExecutor(organization_settings=self.organization_settings, logger=self.logger, organization_id=organization_id)
+        return await executor.execute_code_async(code=code, ds_clients=db_clients, excel_files=excel_files)
+
     def format_df_for_widget(self, df: pd.DataFrame, max_rows: Optional[int] = None) -> Dict:
         executor = StreamingCodeExecutor(organization_settings=self.organization_settings, logger=self.logger)
         return executor.format_df_for_widget(df=df, max_rows=max_rows)
@@ -268,10 +325,12 @@ class StreamingCodeExecutor:
     """
     Pure, tool-first streaming executor with retries. No project_manager/DB side-effects.
     """
-    def __init__(self, organization_settings: OrganizationSettingsConfig = None, logger=None, context_hub=None):
+    def __init__(self, organization_settings: OrganizationSettingsConfig = None, logger=None, context_hub=None, organization_id: Optional[str] = None):
         self.organization_settings = organization_settings
         self.logger = logger
         self.context_hub = context_hub
+        # Used to apply the per-organization concurrency limit of the execution pool
+        self.organization_id = str(organization_id) if organization_id else None
 
     def execute_code(self, *, code: str, ds_clients: Dict, excel_files: List) -> Tuple[pd.DataFrame, str, List[str]]:
         """Execute Python code and return the resulting DataFrame, captured stdout log, and executed queries.
@@ -293,9 +352,10 @@ class StreamingCodeExecutor:
 
         output_log = ""
         executed_queries: List[str] = []
+        fetch_notices: List[Dict] = []
 
         # Wrap clients to capture all queries passed to execute_query
-        wrapped_clients = wrap_clients_for_capture(ds_clients, executed_queries)
+        wrapped_clients = wrap_clients_for_capture(ds_clients, executed_queries, fetch_notices)
 
         local_namespace = {
             'pd': pd,
@@ -305,16 +365,37 @@ class StreamingCodeExecutor:
         }
         if self.logger:
             self.logger.debug(f"Executing code:\n{code}")
-        with io.StringIO() as stdout_capture:
-            with redirect_stdout(stdout_capture):
-                exec(code, local_namespace)
-                generate_df = local_namespace.get('generate_df')
-                if not generate_df:
-                    raise Exception("No generate_df function found in code")
-                df = generate_df(wrapped_clients, excel_files)
+        with _capture_thread_stdout() as stdout_capture:
+            exec(code, local_namespace)
+            generate_df = local_namespace.get('generate_df')
+            if not generate_df:
+                raise Exception("No generate_df function found in code")
+            df = generate_df(wrapped_clients, excel_files)
+            for notice in fetch_notices:
+                print(
+                    f"Warning: query result truncated to {notice['rows']} rows "
+                    f"(fetch {notice['reason']} budget reached); results computed from it may be incomplete."
+                )
+            if fetch_notices and isinstance(df, pd.DataFrame):
+                df.attrs[FETCH_TRUNCATED_ATTR] = fetch_notices
             output_log = stdout_capture.getvalue()
         return df, output_log, executed_queries
 
+    async def execute_code_async(self, *, code: str, ds_clients: Dict, excel_files: List, sigkill_event=None) -> Tuple[pd.DataFrame, str, List[str]]:
+        """Run execute_code on the shared execution pool so the event loop stays responsive.
+
+        Raises:
+            CodeExecutionCancelled: If sigkill_event is set before execution finishes.
+        """
+        return await code_execution_pool.run(
+            self.execute_code,
+            code=code,
+            ds_clients=ds_clients,
+            excel_files=excel_files,
+            organization_id=self.organization_id,
+            sigkill_event=sigkill_event,
+        )
+
     def get_df_info(self, df: pd.DataFrame) -> Dict:
         """Extract comprehensive information from a DataFrame."""
         def convert_to_native(obj):
@@ -473,6 +554,9 @@ class StreamingCodeExecutor:
                 df_to_serialize.to_json(orient='records', date_format='iso', default_handler=str)
             )
             df_info = self.get_df_info(df)
+        truncation = df.attrs.get(FETCH_TRUNCATED_ATTR)
+        if truncation:
+            df_info["fetch_truncated"] = truncation if isinstance(truncation, list) else [truncation]
         return {
             "rows": rows,
             "columns": columns,
@@ -544,9 +628,13 @@ class StreamingCodeExecutor:
                 # Cancellation before executing user code
                 if sigkill_event and hasattr(sigkill_event, 'is_set') and sigkill_event.is_set():
                     break
-                exec_df, execution_log, executed_queries = self.execute_code(code=final_code, ds_clients=ds_clients, excel_files=excel_files)
+                exec_df, execution_log, executed_queries = await self.execute_code_async(
+                    code=final_code, ds_clients=ds_clients, excel_files=excel_files, sigkill_event=sigkill_event
+                )
                 executed_successfully = True
                 break
+            except CodeExecutionCancelled:
+                break
             except Exception as e:
                 import traceback
                 trace = traceback.format_exc()
@@ -662,9 +750,13 @@ class StreamingCodeExecutor:
             try:
                 if sigkill_event and hasattr(sigkill_event, 'is_set') and sigkill_event.is_set():
                     break
-                exec_df, execution_log, executed_queries = self.execute_code(code=final_code, ds_clients=ds_clients, excel_files=excel_files)
+                exec_df, execution_log, executed_queries = await self.execute_code_async(
+                    code=final_code, ds_clients=ds_clients, excel_files=excel_files, sigkill_event=sigkill_event
+                )
                 executed_successfully = True
                 break
+            except CodeExecutionCancelled:
+                break
             except Exception as e:
                 import traceback
                 trace = traceback.format_exc()
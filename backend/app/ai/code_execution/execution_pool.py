@@ -0,0 +1,258 @@
+"""Bounded worker pool for running generated code off the event loop.
+
+``StreamingCodeExecutor.execute_code`` runs ``exec()`` on LLM-generated code
+which in turn issues blocking warehouse queries. Calling it directly from an
+async generator freezes every SSE stream, WebSocket and API request served by
+the worker for the duration of the query. This module moves that work onto a
+thread pool with a global worker bound, a per-organization concurrency limit,
+queueing metrics and cooperative cancellation via the agent's sigkill event.
+
+A process pool is intentionally not offered: data source clients hold live
+engines/sessions and uploaded file handles that cannot be pickled across
+process boundaries.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_ORGANIZATION_LIMIT = 4
+
+
+class CodeExecutionCancelled(Exception):
+    """Raised when an execution is abandoned because the sigkill event fired."""
+    pass
+
+
+class CodeExecutionPool:
+    """Runs blocking callables on a shared thread pool.
+
+    Modes:
+        - ``thread``: run on the bounded pool (default).
+        - ``inline``: run directly on the calling thread (legacy behaviour,
+          useful for debugging).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        per_organization_limit: int = DEFAULT_PER_ORGANIZATION_LIMIT,
+        mode: str = "thread",
+    ):
+        self.max_workers = max_workers
+        self.per_organization_limit = per_organization_limit
+        self.mode = mode
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # asyncio primitives are bound to a loop, so semaphores are kept per loop
+        self._org_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "queued": 0,
+            "running": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "total_queue_wait_ms": 0.0,
+            "max_queue_wait_ms": 0.0,
+            "total_run_ms": 0.0,
+        }
+
+    def configure(self, max_workers: Optional[int] = None, per_organization_limit: Optional[int] = None, mode: Optional[str] = None) -> None:
+        """Apply settings. Resizing recreates the executor; running jobs finish on the old one."""
+        if mode is not None:
+            if mode not in ("thread", "inline"):
+                raise ValueError(f"Unknown code execution mode: {mode}")
+            self.mode = mode
+        if per_organization_limit is not None:
+            self.per_organization_limit = per_organization_limit
+        if max_workers is not None and max_workers != self.max_workers:
+            self.max_workers = max_workers
+            with self._executor_lock:
+                old, self._executor = self._executor, None
+            if old is not None:
+                old.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queueing metrics (counters are process-lifetime)."""
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        finished = snapshot["completed"] + snapshot["failed"]
+        snapshot["avg_queue_wait_ms"] = (snapshot["total_queue_wait_ms"] / finished) if finished else 0.0
+        snapshot["max_workers"] = self.max_workers
+        snapshot["per_organization_limit"] = self.per_organization_limit
+        snapshot["mode"] = self.mode
+        return snapshot
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        organization_id: Optional[str] = None,
+        sigkill_event: Optional[asyncio.Event] = None,
+        **kwargs,
+    ):
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result.
+
+        Raises:
+            CodeExecutionCancelled: if ``sigkill_event`` is set before the job
+                finishes. A job that already started keeps running to
+                completion in its worker thread (holding its organization's
+                slot), but its result is discarded. The same applies when the
+                awaiting task itself is cancelled.
+        """
+        if self.mode == "inline":
+            return fn(*args, **kwargs)
+
+        if sigkill_event is not None and sigkill_event.is_set():
+            raise CodeExecutionCancelled("Execution cancelled")
+
+        self._bump(submitted=1, queued=1)
+        submitted_at = time.monotonic()
+        semaphore = self._org_semaphore(organization_id)
+        if semaphore is not None:
+            try:
+                await self._acquire(semaphore, sigkill_event)
+            except CodeExecutionCancelled:
+                self._bump(queued=-1, cancelled=1)
+                raise
+
+        call = functools.partial(self._timed_call, fn, args, kwargs, submitted_at)
+        ctx = contextvars.copy_context()
+        try:
+            job = self._get_executor().submit(ctx.run, call)
+        except BaseException:
+            self._bump(queued=-1, failed=1)
+            if semaphore is not None:
+                semaphore.release()
+            raise
+        if semaphore is not None:
+            # The org slot is held until the worker thread is done with the job,
+            # even if the awaiting task is cancelled or abandons it
+            loop = asyncio.get_running_loop()
+            job.add_done_callback(lambda _job: self._release_threadsafe(loop, semaphore))
+        try:
+            return await self._await_result(job, sigkill_event)
+        except (CodeExecutionCancelled, asyncio.CancelledError):
+            if job.cancel():
+                # Never reached a worker; undo the queued count here
+                self._bump(queued=-1)
+            self._bump(cancelled=1)
+            raise
+
+    def _timed_call(self, fn: Callable, args, kwargs, submitted_at: float):
+        started_at = time.monotonic()
+        wait_ms = (started_at - submitted_at) * 1000.0
+        with self._stats_lock:
+            self._stats["queued"] -= 1
+            self._stats["running"] += 1
+            self._stats["total_queue_wait_ms"] += wait_ms
+            self._stats["max_queue_wait_ms"] = max(self._stats["max_queue_wait_ms"], wait_ms)
+        outcome = "failed"
+        try:
+            result = fn(*args, **kwargs)
+            outcome = "completed"
+            return result
+        finally:
+            run_ms = (time.monotonic() - started_at) * 1000.0
+            with self._stats_lock:
+                self._stats["running"] -= 1
+                self._stats[outcome] += 1
+                self._stats["total_run_ms"] += run_ms
+
+    @staticmethod
+    async def _acquire(semaphore: asyncio.Semaphore, sigkill_event: Optional[asyncio.Event]) -> None:
+        if sigkill_event is None:
+            await semaphore.acquire()
+            return
+        acquire = asyncio.ensure_future(semaphore.acquire())
+        killer = asyncio.ensure_future(sigkill_event.wait())
+        try:
+            await asyncio.wait({acquire, killer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            killer.cancel()
+        if acquire.done() and not acquire.cancelled():
+            if not sigkill_event.is_set():
+                return
+            semaphore.release()
+            raise CodeExecutionCancelled("Execution cancelled")
+        acquire.cancel()
+        try:
+            await acquire
+        except asyncio.CancelledError:
+            pass
+        else:
+            # Permit was granted while we were cancelling; hand it back
+            semaphore.release()
+        raise CodeExecutionCancelled("Execution cancelled")
+
+    @staticmethod
+    def _release_threadsafe(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore) -> None:
+        # Job callbacks run on the worker thread; asyncio semaphores are not thread-safe
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:
+            # Loop already closed, and its semaphores with it
+            pass
+
+    @staticmethod
+    async def _await_result(job: Future, sigkill_event: Optional[asyncio.Event]):
+        future = asyncio.wrap_future(job)
+        # Consume the outcome of abandoned jobs so it is not logged as unretrieved
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        if sigkill_event is None:
+            # Shielded: cancelling the caller must not cancel the job behind run()'s back
+            return await asyncio.shield(future)
+        killer = asyncio.ensure_future(sigkill_event.wait())
+        try:
+            await asyncio.wait({future, killer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            killer.cancel()
+        if future.done():
+            return future.result()
+        raise CodeExecutionCancelled("Execution cancelled")
+
+    def _org_semaphore(self, organization_id: Optional[str]) -> Optional[asyncio.Semaphore]:
+        if not organization_id or not self.per_organization_limit:
+            return None
+        loop = asyncio.get_running_loop()
+        per_loop = self._org_semaphores.setdefault(loop, {})
+        sem = per_loop.get(str(organization_id))
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_organization_limit)
+            per_loop[str(organization_id)] = sem
+        return sem
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="code-exec",
+                )
+            return self._executor
+
+    def _bump(self, **deltas) -> None:
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                self._stats[key] += delta
+
+
+code_execution_pool = CodeExecutionPool()
@@ -6,9 +6,10 @@ with security validation reused from code_execution.py.
 """
 
 import io
+import os
 import ast
+import hashlib
 import tempfile
-import subprocess
 from pathlib import Path
 from contextlib import redirect_stdout
 from typing import Dict, Any, List, Tuple, Optional
@@ -21,6 +22,7 @@ from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
 from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
 from pptx.chart.data import CategoryChartData, ChartData
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
 
 from app.ai.code_execution.code_execution import (
     CodeSecurityError,
@@ -29,6 +31,7 @@ from app.ai.code_execution.code_execution import (
     FORBIDDEN_BUILTINS,
     FORBIDDEN_ATTRIBUTES,
 )
+from app.ai.code_execution.slide_previews import link_or_copy, office_converter, slide_preview_store
 
 
 # =============================================================================
@@ -252,12 +255,72 @@ class PptxCodeExecutor:
 # PPTX to Image Preview Conversion
 # =============================================================================
 
+def slide_fingerprints(pptx_path: Path) -> List[str]:
+    """Content hash of each slide that appears in the exported PDF, in page order.
+
+    A slide's hash covers its XML and, recursively, every part it references
+    (images, charts, layout, master, theme) plus the deck's slide size, so two
+    slides render identically whenever their hashes match. Slides that draw a
+    text field (``a:fld``, e.g. a slide number) also hash their position, since
+    the same XML renders differently elsewhere in the deck. Hidden slides are
+    skipped because LibreOffice leaves them out of the PDF.
+    """
+    prs = Presentation(str(pptx_path))
+    digests: Dict[str, bytes] = {}
+    in_progress: set = set()
+
+    def part_digest(part) -> bytes:
+        name = str(part.partname)
+        if name in digests:
+            return digests[name]
+        in_progress.add(name)
+        digest = hashlib.sha256(part.blob)
+        for r_id, rel in sorted(part.rels.items()):
+            if rel.is_external or rel.reltype == RT.NOTES_SLIDE:
+                continue
+            digest.update(r_id.encode())
+            target = rel.target_part
+            # Layouts and masters reference each other; a back-edge only contributes its rId
+            if str(target.partname) not in in_progress:
+                digest.update(part_digest(target))
+        in_progress.discard(name)
+        digests[name] = digest.digest()
+        return digests[name]
+
+    size = f"{prs.slide_width}x{prs.slide_height}".encode()
+    first_number = int(prs.part._element.get('firstSlideNum', '1'))
+    fingerprints = []
+    for index, slide in enumerate(prs.slides):
+        if slide._element.get('show') in ('0', 'false'):
+            continue
+        digest = part_digest(slide.part)
+        if _draws_fields(slide):
+            # Hidden slides still count towards the slide number
+            digest += f"#{first_number + index}".encode()
+        fingerprints.append(hashlib.sha256(size + digest).hexdigest())
+    return fingerprints
+
+
+def _draws_fields(slide) -> bool:
+    """Whether ``slide`` renders a text field such as the slide number."""
+    if slide._element.xpath('.//a:fld'):
+        return True
+    # Layout/master placeholders only show their fields through the slide's own placeholders
+    layout = slide.slide_layout
+    return any(
+        part._element.xpath('.//p:sp[not(.//p:ph)]//a:fld')
+        for part in (layout, layout.slide_master)
+    )
+
+
 class PptxPreviewService:
     """
     Service for generating preview images from PPTX files.
 
-    Uses LibreOffice (headless) to convert PPTX to PDF,
-    then pdf2image to convert PDF pages to PNG images.
+    Converts the deck to PDF on a warm LibreOffice process (``office_converter``)
+    and rasterizes pages with pdf2image. Slide images are cached by content
+    hash (``slide_preview_store``), so regenerating a deck only converts and
+    renders the slides that changed.
     """
 
     def __init__(self, preview_dir: Optional[Path] = None, logger=None):
@@ -281,6 +344,8 @@ class PptxPreviewService:
         """
         Convert PPTX to PNG preview images.
 
+        Blocking; call it from a worker thread.
+
         Args:
             pptx_path: Path to the PPTX file
             artifact_id: Artifact ID for organizing previews
@@ -289,58 +354,42 @@ class PptxPreviewService:
         Returns:
             List of relative paths to preview images (e.g., ["pptx_previews/{id}/slide-1.png", ...])
         """
-        from pdf2image import convert_from_path
-        from pdf2image.exceptions import PDFInfoNotInstalledError, PDFPageCountError
-
         # Create artifact-specific preview directory
         artifact_preview_dir = self.preview_dir / artifact_id
         artifact_preview_dir.mkdir(parents=True, exist_ok=True)
 
-        # Step 1: Convert PPTX to PDF using LibreOffice
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            tmp_path = Path(tmp_dir)
-
-            # LibreOffice convert to PDF
-            try:
-                result = subprocess.run(
-                    [
-                        'soffice',
-                        '--headless',
-                        '--convert-to', 'pdf',
-                        '--outdir', str(tmp_path),
-                        str(pptx_path),
-                    ],
-                    capture_output=True,
-                    text=True,
-                    timeout=60,
-                )
-                if result.returncode != 0:
-                    raise RuntimeError(f"LibreOffice conversion failed: {result.stderr}")
-            except FileNotFoundError:
-                raise RuntimeError(
-                    "LibreOffice not found. Install with: apt-get install libreoffice-impress"
-                )
-
-            # Find the generated PDF
-            pdf_files = list(tmp_path.glob("*.pdf"))
-            if not pdf_files:
-                raise RuntimeError("LibreOffice did not produce a PDF file")
-            pdf_path = pdf_files[0]
-
-            # Step 2: Convert PDF pages to PNG using pdf2image
-            try:
-                images = convert_from_path(pdf_path, dpi=dpi)
-            except PDFInfoNotInstalledError:
-                raise RuntimeError(
-                    "poppler not found. Install with: apt-get install poppler-utils"
-                )
-            except PDFPageCountError as e:
-                raise RuntimeError(f"Failed to read PDF: {e}")
-
-            # Save images
-            for i, image in enumerate(images):
-                image_path = artifact_preview_dir / f"slide-{i + 1:02d}.png"
-                image.save(str(image_path), "PNG")
+        fingerprints = slide_fingerprints(pptx_path)
+        images: Dict[int, Path] = {}
+        missing: List[int] = []
+        for index, fingerprint in enumerate(fingerprints):
+            cached = slide_preview_store.get(fingerprint, dpi)
+            if cached is not None:
+                images[index] = cached
+            else:
+                missing.append(index)
+
+        if missing:
+            # Step 1: Convert PPTX to PDF on a warm LibreOffice process
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                tmp_path = Path(tmp_dir)
+                pdf_path = office_converter.convert_to_pdf(Path(pptx_path), tmp_path)
+
+                # Step 2: Rasterize only the pages whose slides are not cached
+                pages = {index + 1: tmp_path / f"page-{index + 1}.png" for index in missing}
+                slide_preview_store.rasterize(pdf_path, pages, dpi)
+                for index in missing:
+                    images[index] = slide_preview_store.put_file(fingerprints[index], dpi, pages[index + 1])
+
+        # Publish into the artifact directory, leaving unchanged slides untouched
+        for index in range(len(fingerprints)):
+            target = artifact_preview_dir / f"slide-{index + 1:02d}.png"
+            if target.exists() and os.path.samefile(target, images[index]):
+                continue
+            link_or_copy(images[index], target)
+        for stale in artifact_preview_dir.glob("slide-*.png"):
+            number = stale.stem.split("-", 1)[1]
+            if not number.isdigit() or int(number) > len(fingerprints):
+                stale.unlink()
 
         # Collect generated image paths
         preview_images = sorted(artifact_preview_dir.glob("slide-*.png"))
@@ -351,7 +400,10 @@ class PptxPreviewService:
         ]
 
         if self.logger:
-            self.logger.info(f"Generated {len(relative_paths)} preview images for artifact {artifact_id}")
+            self.logger.info(
+                f"Generated {len(relative_paths)} preview images for artifact {artifact_id} "
+                f"({len(missing)} rendered, {len(fingerprints) - len(missing)} cached)"
+            )
 
         return relative_paths
 
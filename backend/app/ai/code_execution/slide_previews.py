@@ -0,0 +1,495 @@
+"""Warm LibreOffice conversion and cached rasterization for slide previews.
+
+Converting a generated deck used to start a cold ``soffice --headless
+--convert-to pdf`` per artifact and then rasterize every PDF page serially.
+This module provides the pieces ``PptxPreviewService`` builds on:
+
+  - ``OfficeConverter``: a small pool of long-lived LibreOffice processes
+    driven over UNO (``soffice --accept=socket...``). Conversions check a
+    process out of the pool, so the pool doubles as the job queue; a process
+    that hangs past ``timeout`` is killed and restarted, and each one is
+    recycled after ``max_jobs_per_instance`` conversions. When the ``uno``
+    bindings are not importable (they ship with the system LibreOffice
+    Python, not with pip) the pool falls back to one-shot ``soffice``
+    invocations, each slot keeping its own warm user profile.
+  - ``SlidePreviewStore``: PNGs stored by slide content hash and DPI, so an
+    unchanged slide is never rasterized twice (and a deck whose slides are all
+    cached is never converted at all). Only the missing PDF pages are
+    rendered, in parallel, each in its own ``pdftoppm`` process.
+"""
+
+import logging
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+BACKEND_ROOT = Path(__file__).parent.parent.parent.parent
+
+DEFAULT_MODE = "auto"  # auto | uno | subprocess
+DEFAULT_INSTANCES = 1
+DEFAULT_TIMEOUT = 60  # seconds per conversion
+DEFAULT_STARTUP_TIMEOUT = 30  # seconds for a daemon to accept connections
+DEFAULT_MAX_JOBS_PER_INSTANCE = 200
+DEFAULT_QUEUE_TIMEOUT = 120  # seconds to wait for a free converter
+DEFAULT_RASTER_WORKERS = 4
+DEFAULT_CACHE_DIR = BACKEND_ROOT / "uploads" / "pptx_previews" / "_cache"
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+PDF_EXPORT_FILTER = "impress_pdf_Export"
+
+
+class OfficeConversionError(RuntimeError):
+    """Raised when a document cannot be converted to PDF."""
+    pass
+
+
+def _uno_available() -> bool:
+    try:
+        import uno  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _profile_arg(profile_dir: Path) -> str:
+    return f"-env:UserInstallation={profile_dir.resolve().as_uri()}"
+
+
+class _SubprocessSlot:
+    """One-shot ``soffice`` per conversion, reusing a per-slot user profile."""
+
+    def __init__(self, soffice_binary: str, profile_dir: Path, timeout: float):
+        self.soffice_binary = soffice_binary
+        self.profile_dir = profile_dir
+        self.timeout = timeout
+        self.jobs = 0
+
+    def convert(self, source: Path, out_dir: Path) -> Path:
+        try:
+            result = subprocess.run(
+                [
+                    self.soffice_binary,
+                    _profile_arg(self.profile_dir),
+                    '--headless',
+                    '--convert-to', 'pdf',
+                    '--outdir', str(out_dir),
+                    str(source),
+                ],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+            )
+        except FileNotFoundError:
+            raise OfficeConversionError(
+                "LibreOffice not found. Install with: apt-get install libreoffice-impress"
+            )
+        except subprocess.TimeoutExpired:
+            raise OfficeConversionError(f"LibreOffice conversion timed out after {self.timeout}s")
+        if result.returncode != 0:
+            raise OfficeConversionError(f"LibreOffice conversion failed: {result.stderr}")
+        pdf_path = out_dir / f"{source.stem}.pdf"
+        if not pdf_path.exists():
+            raise OfficeConversionError("LibreOffice did not produce a PDF file")
+        self.jobs += 1
+        return pdf_path
+
+    def alive(self) -> bool:
+        return True
+
+    def stop(self) -> None:
+        pass
+
+
+class _UnoSlot:
+    """A headless ``soffice`` kept running and driven over a UNO socket."""
+
+    def __init__(self, soffice_binary: str, profile_dir: Path, timeout: float, startup_timeout: float):
+        self.soffice_binary = soffice_binary
+        self.profile_dir = profile_dir
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.jobs = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._desktop: Any = None
+
+    def start(self) -> None:
+        import uno
+
+        port = _free_port()
+        try:
+            self._process = subprocess.Popen(
+                [
+                    self.soffice_binary,
+                    _profile_arg(self.profile_dir),
+                    '--headless', '--invisible', '--nologo', '--norestore', '--nodefault', '--nolockcheck',
+                    f'--accept=socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext',
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            raise OfficeConversionError(
+                "LibreOffice not found. Install with: apt-get install libreoffice-impress"
+            )
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self._process.poll() is not None:
+                raise OfficeConversionError(f"LibreOffice exited during startup (code {self._process.returncode})")
+            try:
+                context = resolver.resolve(
+                    f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"
+                )
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise OfficeConversionError("LibreOffice did not accept connections in time")
+                time.sleep(0.25)
+        self._desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def convert(self, source: Path, out_dir: Path) -> Path:
+        import uno
+
+        def prop(name, value):
+            struct = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+            struct.Name = name
+            struct.Value = value
+            return struct
+
+        pdf_path = out_dir / f"{source.stem}.pdf"
+        # UNO calls cannot be cancelled; a hung conversion is ended by killing the process
+        watchdog = threading.Timer(self.timeout, self.stop)
+        watchdog.daemon = True
+        watchdog.start()
+        document = None
+        try:
+            document = self._desktop.loadComponentFromURL(
+                source.resolve().as_uri(), "_blank", 0,
+                (prop("Hidden", True), prop("ReadOnly", True)),
+            )
+            if document is None:
+                raise OfficeConversionError(f"LibreOffice could not open {source.name}")
+            document.storeToURL(pdf_path.resolve().as_uri(), (prop("FilterName", PDF_EXPORT_FILTER),))
+        except OfficeConversionError:
+            raise
+        except Exception as e:
+            if not self.alive():
+                raise OfficeConversionError(f"LibreOffice conversion timed out or crashed: {e}")
+            raise OfficeConversionError(f"LibreOffice conversion failed: {e}")
+        finally:
+            watchdog.cancel()
+            if document is not None:
+                try:
+                    document.close(True)
+                except Exception:
+                    pass
+        if not pdf_path.exists():
+            raise OfficeConversionError("LibreOffice did not produce a PDF file")
+        self.jobs += 1
+        return pdf_path
+
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def stop(self) -> None:
+        process, self._process = self._process, None
+        self._desktop = None
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class OfficeConverter:
+    """Pool of warm LibreOffice converters; thread-safe, call from worker threads."""
+
+    def __init__(
+        self,
+        mode: str = DEFAULT_MODE,
+        instances: int = DEFAULT_INSTANCES,
+        timeout: float = DEFAULT_TIMEOUT,
+        startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+        max_jobs_per_instance: int = DEFAULT_MAX_JOBS_PER_INSTANCE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+        soffice_binary: str = "soffice",
+        profile_dir: Optional[str] = None,
+    ):
+        self.mode = mode
+        self.instances = instances
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.max_jobs_per_instance = max_jobs_per_instance
+        self.queue_timeout = queue_timeout
+        self.soffice_binary = soffice_binary
+        self.profile_dir = profile_dir
+        self._slots: Optional["queue.Queue"] = None
+        self._all_slots: List[Any] = []
+        self._lock = threading.Lock()
+        self._stats = {"conversions": 0, "failed": 0, "restarts": 0, "total_ms": 0.0}
+
+    def configure(self, **options) -> None:
+        """Apply settings; running converters are replaced on their next checkout."""
+        with self._lock:
+            for key, value in options.items():
+                if value is None:
+                    continue
+                if not hasattr(self, key) or key.startswith("_"):
+                    raise ValueError(f"Unknown office converter option: {key}")
+                if key == "mode" and value not in ("auto", "uno", "subprocess"):
+                    raise ValueError(f"Unknown office converter mode: {value}")
+                setattr(self, key, value)
+        self.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["mode"] = self.effective_mode()
+        snapshot["instances"] = self.instances
+        snapshot["idle"] = self._slots.qsize() if self._slots is not None else self.instances
+        return snapshot
+
+    def effective_mode(self) -> str:
+        if self.mode == "auto":
+            return "uno" if _uno_available() else "subprocess"
+        return self.mode
+
+    def convert_to_pdf(self, source: Path, out_dir: Path) -> Path:
+        """Convert ``source`` to ``out_dir/<stem>.pdf`` on the next free converter.
+
+        Raises:
+            OfficeConversionError: on failure, or if no converter frees up within ``queue_timeout``.
+        """
+        slots = self._get_slots()
+        try:
+            index = slots.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            raise OfficeConversionError("All LibreOffice converters are busy")
+        started_at = time.monotonic()
+        try:
+            slot = self._ready_slot(index)
+            pdf_path = slot.convert(Path(source), Path(out_dir))
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            self._retire(index)
+            raise
+        finally:
+            slots.put(index)
+        with self._lock:
+            self._stats["conversions"] += 1
+            self._stats["total_ms"] += (time.monotonic() - started_at) * 1000.0
+        return pdf_path
+
+    def warm(self) -> None:
+        """Start every converter now instead of on first use."""
+        slots = self._get_slots()
+        for _ in range(self.instances):
+            index = slots.get(timeout=self.queue_timeout)
+            try:
+                self._ready_slot(index)
+            except Exception as e:
+                logger.warning(f"Failed to start LibreOffice converter: {e}")
+            finally:
+                slots.put(index)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            all_slots, self._all_slots = self._all_slots, []
+            self._slots = None
+        for slot in all_slots:
+            if slot is not None:
+                slot.stop()
+
+    def _get_slots(self) -> "queue.Queue":
+        with self._lock:
+            if self._slots is None:
+                self._slots = queue.Queue()
+                self._all_slots = [None] * self.instances
+                for index in range(self.instances):
+                    self._slots.put(index)
+            return self._slots
+
+    def _profile_root(self) -> Path:
+        if self.profile_dir:
+            return Path(self.profile_dir)
+        return Path(tempfile.gettempdir()) / f"metricchat-soffice-{os.getpid()}"
+
+    def _ready_slot(self, index: int):
+        """The slot's converter, (re)started if it is missing, dead or worn out."""
+        slot = self._all_slots[index] if index < len(self._all_slots) else None
+        if slot is not None and slot.alive() and slot.jobs < self.max_jobs_per_instance:
+            return slot
+        if slot is not None:
+            slot.stop()
+            with self._lock:
+                self._stats["restarts"] += 1
+        profile_dir = self._profile_root() / f"slot-{index}"
+        if self.effective_mode() == "uno":
+            slot = _UnoSlot(self.soffice_binary, profile_dir, self.timeout, self.startup_timeout)
+            try:
+                slot.start()
+            except Exception:
+                if self.mode == "uno":
+                    raise
+                logger.warning("Could not start a LibreOffice daemon; falling back to one-shot conversion", exc_info=True)
+                slot = _SubprocessSlot(self.soffice_binary, profile_dir, self.timeout)
+        else:
+            slot = _SubprocessSlot(self.soffice_binary, profile_dir, self.timeout)
+        if index < len(self._all_slots):
+            self._all_slots[index] = slot
+        return slot
+
+    def _retire(self, index: int) -> None:
+        slot = self._all_slots[index] if index < len(self._all_slots) else None
+        if slot is not None and not slot.alive():
+            slot.stop()
+            self._all_slots[index] = None
+
+
+class SlidePreviewStore:
+    """Content-addressed slide PNGs (``<cache_dir>/<hash[:2]>/<hash>-<dpi>.png``) and their rasterization."""
+
+    def __init__(
+        self,
+        cache_dir: str = str(DEFAULT_CACHE_DIR),
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        raster_workers: int = DEFAULT_RASTER_WORKERS,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.raster_workers = raster_workers
+
+    def configure(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        raster_workers: Optional[int] = None,
+    ) -> None:
+        if cache_dir is not None:
+            self.cache_dir = cache_dir
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if raster_workers is not None:
+            self.raster_workers = raster_workers
+
+    def path_for(self, slide_hash: str, dpi: int) -> Path:
+        return Path(self.cache_dir) / slide_hash[:2] / f"{slide_hash}-{dpi}.png"
+
+    def get(self, slide_hash: str, dpi: int) -> Optional[Path]:
+        path = self.path_for(slide_hash, dpi)
+        if not path.exists():
+            return None
+        try:
+            os.utime(path)  # recency for pruning
+        except OSError:
+            pass
+        return path
+
+    def put_file(self, slide_hash: str, dpi: int, source: Path) -> Path:
+        """Move a freshly rendered PNG into the cache (atomically)."""
+        path = self.path_for(slide_hash, dpi)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, path)
+        return path
+
+    def rasterize(self, pdf_path: Path, pages: Dict[int, Path], dpi: int) -> None:
+        """Render the given 1-based PDF ``pages`` to PNG files at their target paths, in parallel."""
+        from pdf2image import convert_from_path
+        from pdf2image.exceptions import PDFInfoNotInstalledError, PDFPageCountError
+
+        def render(page_number: int, target: Path) -> None:
+            try:
+                images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+            except PDFInfoNotInstalledError:
+                raise RuntimeError("poppler not found. Install with: apt-get install poppler-utils")
+            except PDFPageCountError as e:
+                raise RuntimeError(f"Failed to read PDF: {e}")
+            if not images:
+                raise RuntimeError(f"PDF has no page {page_number}")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            images[0].save(str(target), "PNG")
+
+        if not pages:
+            return
+        workers = self.raster_workers
+        if workers <= 1 or len(pages) == 1:
+            for page_number, target in pages.items():
+                render(page_number, target)
+            return
+        with ThreadPoolExecutor(max_workers=min(workers, len(pages)), thread_name_prefix="slide-raster") as pool:
+            futures = [pool.submit(render, page_number, target) for page_number, target in pages.items()]
+            for future in futures:
+                future.result()
+
+    def prune(self) -> int:
+        """Drop least recently used entries until the cache fits ``max_bytes``; returns entries removed."""
+        root = Path(self.cache_dir)
+        if not root.exists():
+            return 0
+        entries = []
+        total = 0
+        for path in root.glob("*/*.png"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def link_or_copy(source: Path, target: Path) -> None:
+    """Place ``source`` at ``target`` via a hard link when possible."""
+    tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copyfile(source, tmp)
+    os.replace(tmp, target)
+
+
+office_converter = OfficeConverter()
+slide_preview_store = SlidePreviewStore()
+
+
+def prune_slide_preview_store() -> None:
+    """Scheduler job: keep the slide preview cache within its byte budget."""
+    removed = slide_preview_store.prune()
+    if removed:
+        logger.info(f"Pruned {removed} cached slide previews")
@@ -0,0 +1,254 @@
+"""
+Conversation digests - the rendered history line for one completion.
+
+``MessageContextBuilder`` shows the last N completions of a report as one
+line each: the user's prompt, or the assistant's reasoning, responses and a
+short digest of every tool call. Rendering a system completion needs its
+blocks and tool executions, so rebuilding the whole window on every planner
+loop made long threads slower per turn.
+
+Digests are rendered once and persisted in ``completion_digests``; later
+builds reuse them while the completion's fingerprint (status, ``updated_at``
+and a ``count``/``max(updated_at)`` aggregate over its blocks and tool
+executions) is unchanged. Only completions in a final status are stored, so
+the in-progress answer is always rendered fresh.
+
+This module only holds the rendering and fingerprint helpers (no DB access).
+"""
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+
+# Bump when the rendered format changes; stored digests of older versions are re-rendered
+DIGEST_VERSION = 1
+
+FINAL_STATUSES = frozenset({"success", "error", "stopped", "sigkill", "completed"})
+
+_TABLE_NAME_RE = re.compile(r'<table\s+[^>]*name="([^"]+)"')
+
+
+@dataclass
+class CompletionDigestEntry:
+    """Rendered digest of one completion, in both data-visibility variants."""
+    completion_id: str
+    role: str
+    fingerprint: str
+    text: Optional[str]
+    text_without_data: Optional[str] = None  # None when identical to ``text``
+    mentions: Optional[str] = None
+    final: bool = False
+
+    def text_for(self, allow_llm_see_data: bool) -> Optional[str]:
+        if not allow_llm_see_data and self.text_without_data is not None:
+            return self.text_without_data
+        return self.text
+
+
+def is_final(completion) -> bool:
+    """User prompts are final once written; system completions once they leave ``in_progress``."""
+    if completion.role == "user":
+        return True
+    return (completion.status or "") in FINAL_STATUSES
+
+
+def user_fingerprint(completion, mention_count: int) -> str:
+    return f"u|{completion.updated_at}|{mention_count}"
+
+
+def system_fingerprint(completion, block_count: int, blocks_updated_at=None, tools_updated_at=None) -> str:
+    return f"s|{completion.status}|{completion.updated_at}|{block_count}|{blocks_updated_at}|{tools_updated_at}"
+
+
+def user_text(completion) -> Optional[str]:
+    content = completion.prompt.get("content", "") if completion.prompt else ""
+    content = (content or "").strip()
+    return content or None
+
+
+def _sample_row(result_json: Dict[str, Any], rows: list) -> Any:
+    preview = result_json.get("data_preview", {}) or {}
+    preview_rows = preview.get("rows") or []
+    return preview_rows[0] if preview_rows else (rows[0] if rows else None)
+
+
+def _table_digest(col_names: list, row_count: int) -> list:
+    digest_parts = [f"{row_count} rows × {len(col_names)} cols"]
+    if col_names:
+        head_cols = ", ".join(col_names[:3])
+        digest_parts.append(f"cols: {head_cols}{'…' if len(col_names) > 3 else ''}")
+    return digest_parts
+
+
+def tool_digest(
+    tool_execution,
+    allow_llm_see_data: bool,
+    widget_titles: Optional[Dict[str, Optional[str]]] = None,
+    step_titles: Optional[Dict[str, Optional[str]]] = None,
+) -> str:
+    """One-line summary of a tool execution.
+
+    ``widget_titles``/``step_titles`` enable the fallback digests for other
+    tools that created a widget or step (and the ``result_summary`` fallback);
+    the planner's messages section leaves them out.
+    """
+    tool_info = f"Tool: {tool_execution.tool_name}"
+    if tool_execution.tool_action:
+        tool_info += f" → {tool_execution.tool_action}"
+    tool_info += f" ({tool_execution.status})"
+
+    name = tool_execution.tool_name
+    rj = tool_execution.result_json or {}
+
+    if tool_execution.status == "success":
+        if name == "create_widget" and rj:
+            widget_data = rj.get("widget_data", {}) or {}
+            columns = widget_data.get("columns", []) or []
+            rows = widget_data.get("rows", []) or []
+            col_names = [c.get("field") or c.get("headerName") for c in columns if (c.get("field") or c.get("headerName"))]
+            digest_parts = _table_digest(col_names, len(rows))
+            if allow_llm_see_data:
+                sample_row = _sample_row(rj, rows)
+                if sample_row:
+                    try:
+                        digest_parts.append(f"top row: {json.dumps(sample_row)}")
+                    except Exception:
+                        pass
+            tool_info += " - " + "; ".join(digest_parts)
+        elif name == "create_data" and rj:
+            data_obj = rj.get("data") or {}
+            columns = data_obj.get("columns", []) or []
+            rows = data_obj.get("rows", []) or []
+            col_names = [
+                (c.get("field") or c.get("headerName"))
+                for c in columns
+                if isinstance(c, dict) and (c.get("field") or c.get("headerName"))
+            ]
+            digest_parts = _table_digest(col_names, len(rows))
+            if allow_llm_see_data:
+                sample_row = _sample_row(rj, rows)
+                if sample_row:
+                    try:
+                        digest_parts.append(f"top row: {json.dumps(sample_row)}")
+                    except Exception:
+                        pass
+            # If a non-table viz was inferred, surface it concisely
+            try:
+                dm = rj.get("data_model") or {}
+                dm_type = str(dm.get("type") or "").strip()
+                if dm_type and dm_type != "table":
+                    digest_parts.append(f"chart: {dm_type}")
+            except Exception:
+                pass
+            # Surface visualization_id if available (added by orchestrator)
+            try:
+                viz_ids = rj.get("created_visualization_ids") or []
+                if viz_ids:
+                    digest_parts.append(f"viz_id: {viz_ids[0]}")
+            except Exception:
+                pass
+            tool_info += " - " + "; ".join(digest_parts)
+        elif name == "describe_entity" and rj:
+            digest_parts = []
+            entity_title = rj.get("title")
+            if entity_title:
+                digest_parts.append(f"entity: {entity_title}")
+            try:
+                viz_ids = rj.get("created_visualization_ids") or []
+                if viz_ids:
+                    digest_parts.append(f"viz_id: {viz_ids[0]}")
+            except Exception:
+                pass
+            if digest_parts:
+                tool_info += " - " + "; ".join(digest_parts)
+        elif name == "describe_tables" and rj:
+            # Show table names extracted from schemas excerpt; fallback to query/arguments
+            try:
+                names = _TABLE_NAME_RE.findall(rj.get("schemas_excerpt") or "")[:5]
+            except Exception:
+                names = []
+            if not names:
+                try:
+                    args = getattr(tool_execution, "arguments_json", None) or {}
+                    q = args.get("query")
+                    if isinstance(q, list):
+                        names = [str(x) for x in q][:5]
+                    elif isinstance(q, str) and q.strip():
+                        names = [q.strip()]
+                except Exception:
+                    pass
+            if names:
+                tool_info += f" - tables: {', '.join(names)}"
+        elif name == "answer_question" and rj:
+            answer_text = rj.get("answer") or ((rj.get("output") or {}).get("answer") if isinstance(rj.get("output"), dict) else None)
+            if answer_text:
+                tool_info += f" - AI answer: {answer_text}"
+        elif name in ("create_artifact", "read_artifact") and rj:
+            digest_parts = []
+            if rj.get("title"):
+                digest_parts.append(f"artifact: {rj.get('title')}")
+            if rj.get("mode"):
+                digest_parts.append(f"mode: {rj.get('mode')}")
+            if rj.get("artifact_id"):
+                digest_parts.append(f"artifact_id: {rj.get('artifact_id')}")
+            if name == "create_artifact":
+                # Surface visualization_ids used to build the artifact
+                viz_ids = rj.get("visualization_ids") or []
+                if viz_ids:
+                    digest_parts.append(f"viz_ids: {', '.join(viz_ids)}")
+            elif rj.get("version"):
+                digest_parts.append(f"v{rj.get('version')}")
+            if digest_parts:
+                tool_info += " - " + "; ".join(digest_parts)
+        elif widget_titles is not None and tool_execution.created_widget_id:
+            title = widget_titles.get(str(tool_execution.created_widget_id))
+            tool_info += f" - Widget: '{title}'" if title is not None else f" - Widget #{tool_execution.created_widget_id}"
+        elif step_titles is not None and tool_execution.created_step_id:
+            title = step_titles.get(str(tool_execution.created_step_id))
+            tool_info += f" - Step: '{title}'" if title is not None else f" - Step #{tool_execution.created_step_id}"
+        elif widget_titles is not None and tool_execution.result_summary:
+            summary = tool_execution.result_summary
+            if len(summary) > 60:
+                summary = summary[:60] + "..."
+            tool_info += f" - {summary}"
+    elif tool_execution.status == "error" and tool_execution.error_message:
+        error = tool_execution.error_message
+        if len(error) > 50:
+            error = error[:50] + "..."
+        tool_info += f" - Error: {error}"
+
+    return tool_info
+
+
+def system_text(
+    completion,
+    blocks: Iterable,
+    tools_by_id: Dict[str, Any],
+    allow_llm_see_data: bool,
+    widget_titles: Optional[Dict[str, Optional[str]]] = None,
+    step_titles: Optional[Dict[str, Optional[str]]] = None,
+) -> Optional[str]:
+    """Reasoning, responses and tool digests of a system completion, joined with `` | ``."""
+    system_parts = []
+    for block in blocks:
+        # Don't truncate reasoning and content - show full text
+        if block.reasoning and block.reasoning.strip():
+            system_parts.append(f"Thinking: {block.reasoning.strip()}")
+        if block.content and block.content.strip():
+            system_parts.append(f"Response: {block.content.strip()}")
+        if block.tool_execution_id:
+            tool_execution = tools_by_id.get(str(block.tool_execution_id))
+            if tool_execution is not None:
+                system_parts.append(tool_digest(tool_execution, allow_llm_see_data, widget_titles, step_titles))
+
+    # If no blocks or content, fall back to completion.completion
+    if not system_parts and completion.completion:
+        if isinstance(completion.completion, dict):
+            content = completion.completion.get("content", "") or completion.completion.get("message", "")
+        else:
+            content = str(completion.completion)
+        if content and content.strip():
+            system_parts.append(f"Response: {content.strip()}")
+
+    return " | ".join(system_parts) if system_parts else None
@@ -0,0 +1,196 @@
+"""
+Instruction Build Index - compiled retrieval index per approved instruction build.
+
+``InstructionContextBuilder._load_from_build`` used to load every
+``BuildContent`` row with its ``Instruction`` and ``InstructionVersion`` on each
+agent run and re-tokenize the text of every intelligent instruction to score
+it. Approved builds never change (contents are only edited while a build is a
+draft or pending approval) and neither do instruction versions, so everything
+derived from the versions is compiled once per build:
+
+  - the always-loaded entries, in build order,
+  - the intelligent entries with their precomputed keyword sets, and
+  - postings from each distinct word to the intelligent entries containing it,
+    so a query only scores entries sharing a word (or substring of a word)
+    with it instead of scanning them all.
+
+Scores are identical to ``InstructionContextBuilder._score_text`` (Jaccard over
+keywords, or 0.8 x the share of 3+ character query keywords found as
+substrings). Fields that can change on an approved build's instructions
+(status, category, labels) are not cached; the builder loads them for the
+selected instructions only.
+
+Indexes are kept in a per-process LRU keyed by build id and warmed when a
+build is promoted to main.
+"""
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+DEFAULT_MAX_BUILDS = 32
+SUBSTRING_MEMO_SIZE = 4096  # query keywords whose substring matches are remembered per index
+
+_SPLIT_RE = re.compile(r'[^a-z0-9]+')
+
+
+@dataclass(frozen=True)
+class CompiledInstruction:
+    """Version-derived fields of one build entry (never mutated once compiled)."""
+    instruction_id: str
+    version_id: str
+    version_number: Optional[int]
+    content_hash: Optional[str]
+    text: str
+    title: Optional[str]
+    load_mode: Optional[str]
+    keywords: FrozenSet[str] = frozenset()
+
+
+def searchable_text(text: Optional[str], title: Optional[str], structured_data: Any) -> str:
+    """Text an intelligent instruction version is matched against (text, title, name, description)."""
+    parts = [text or ""]
+    if title:
+        parts.append(title)
+    if isinstance(structured_data, dict):
+        if structured_data.get('name'):
+            parts.append(structured_data['name'])
+        if structured_data.get('description'):
+            parts.append(structured_data['description'])
+    return " ".join(parts)
+
+
+def extract_keywords(text: str, stopwords: Set[str]) -> Set[str]:
+    """Lowercase alphanumeric words of ``text`` (2+ chars, stopwords removed)."""
+    return {w for w in _SPLIT_RE.split(text.lower()) if w and len(w) >= 2 and w not in stopwords}
+
+
+class BuildIndex:
+    """Compiled entries of one build; shared between requests and read-only."""
+
+    def __init__(self, build_id: str, always: List[CompiledInstruction], intelligent: List[CompiledInstruction], words: Dict[str, List[int]]):
+        self.build_id = build_id
+        self.always = always
+        self.intelligent = intelligent
+        # Distinct words of the intelligent entries' text -> entry positions
+        self._words = words
+        self._substring_memo: Dict[str, FrozenSet[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.always) + len(self.intelligent)
+
+    def rank(self, keywords: Set[str]) -> List[Tuple[CompiledInstruction, float]]:
+        """Intelligent entries with a positive score, best first (build order on ties)."""
+        if not keywords or not self.intelligent:
+            return []
+        exact: Dict[int, int] = {}
+        substring: Dict[int, int] = {}
+        for kw in keywords:
+            for i in self._words.get(kw, ()):
+                exact[i] = exact.get(i, 0) + 1
+            if len(kw) >= 3:
+                for i in self._substring_matches(kw):
+                    substring[i] = substring.get(i, 0) + 1
+
+        scored: List[Tuple[int, float]] = []
+        for i in set(exact) | set(substring):
+            entry = self.intelligent[i]
+            intersection = len(keywords & entry.keywords)
+            union = len(keywords | entry.keywords) if entry.keywords else 1
+            jaccard = intersection / union if union > 0 else 0.0
+            score = max(jaccard, substring.get(i, 0) / len(keywords) * 0.8)
+            if score > 0:
+                scored.append((i, score))
+        scored.sort(key=lambda x: (-x[1], x[0]))
+        return [(self.intelligent[i], score) for i, score in scored]
+
+    def _substring_matches(self, kw: str) -> FrozenSet[int]:
+        """Positions of entries with ``kw`` inside one of their words (keywords have no separators)."""
+        matched = self._substring_memo.get(kw)
+        if matched is None:
+            matched = frozenset(i for word, positions in self._words.items() if kw in word for i in positions)
+            if len(self._substring_memo) >= SUBSTRING_MEMO_SIZE:
+                self._substring_memo.clear()
+            self._substring_memo[kw] = matched
+        return matched
+
+
+def compile_build_index(build_id: str, rows: Iterable[Any], stopwords: Set[str]) -> BuildIndex:
+    """Compile a build from rows with ``instruction_id``, ``version_id``, ``version_number``,
+    ``content_hash``, ``text``, ``title``, ``load_mode`` and ``structured_data``.
+
+    Disabled versions are left out; a NULL load mode counts as always.
+    """
+    always: List[CompiledInstruction] = []
+    intelligent: List[CompiledInstruction] = []
+    words: Dict[str, List[int]] = {}
+    for row in rows:
+        if row.load_mode == "disabled":
+            continue
+        if row.load_mode != "intelligent":
+            always.append(CompiledInstruction(
+                instruction_id=str(row.instruction_id),
+                version_id=str(row.version_id),
+                version_number=row.version_number,
+                content_hash=row.content_hash,
+                text=row.text or "",
+                title=row.title,
+                load_mode=row.load_mode,
+            ))
+            continue
+        searchable = searchable_text(row.text, row.title, row.structured_data)
+        position = len(intelligent)
+        intelligent.append(CompiledInstruction(
+            instruction_id=str(row.instruction_id),
+            version_id=str(row.version_id),
+            version_number=row.version_number,
+            content_hash=row.content_hash,
+            text=row.text or "",
+            title=row.title,
+            load_mode=row.load_mode,
+            keywords=frozenset(extract_keywords(searchable, stopwords)),
+        ))
+        for word in set(_SPLIT_RE.split(searchable.lower())):
+            if word:
+                words.setdefault(word, []).append(position)
+    return BuildIndex(str(build_id), always, intelligent, words)
+
+
+class BuildIndexCache:
+    """Thread-safe LRU of compiled build indexes by build id."""
+
+    def __init__(self, max_builds: int = DEFAULT_MAX_BUILDS):
+        self.max_builds = max_builds
+        self._entries: "OrderedDict[str, BuildIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, build_id: str) -> Optional[BuildIndex]:
+        key = str(build_id)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+            return index
+
+    def put(self, index: BuildIndex) -> None:
+        with self._lock:
+            self._entries[index.build_id] = index
+            self._entries.move_to_end(index.build_id)
+            while len(self._entries) > self.max_builds:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, build_id: str) -> None:
+        with self._lock:
+            self._entries.pop(str(build_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+build_index_cache = BuildIndexCache()
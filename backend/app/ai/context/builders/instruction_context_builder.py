@@ -1,5 +1,4 @@
 from typing import List, Optional, Set, Tuple, Dict
-import re
 import logging
 
 from sqlalchemy import select, and_, or_, func
@@ -16,6 +15,13 @@ from app.models.organization import Organization
 from app.models.user import User
 
 from app.ai.context.sections.instructions_section import InstructionsSection, InstructionItem, InstructionLabelItem
+from app.ai.context.builders.instruction_build_index import (
+    BuildIndex,
+    CompiledInstruction,
+    build_index_cache,
+    compile_build_index,
+    extract_keywords,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -405,106 +411,75 @@ class InstructionContextBuilder:
         if not build:
             return None  # No build available, fallback to legacy
         
-        # Load build contents with versions
-        contents_result = await self.db.execute(
-            select(BuildContent)
-            .options(
-                selectinload(BuildContent.instruction),
-                selectinload(BuildContent.instruction_version),
+        index = await self.load_build_index(self.db, build)
+        if not len(index):
+            return []  # Build exists but is empty
+
+        # Instruction status can change after a build is approved, so it is not part of the index
+        published_result = await self.db.execute(
+            select(BuildContent.instruction_id)
+            .join(Instruction, Instruction.id == BuildContent.instruction_id)
+            .where(
+                and_(
+                    BuildContent.build_id == build.id,
+                    Instruction.status == "published",
+                )
             )
-            .where(BuildContent.build_id == build.id)
         )
-        contents = contents_result.scalars().all()
-        
-        if not contents:
-            return []  # Build exists but is empty
-        
-        # Separate by load_mode
-        always_contents: List[Tuple[BuildContent, Instruction, InstructionVersion]] = []
-        intelligent_contents: List[Tuple[BuildContent, Instruction, InstructionVersion]] = []
-        
-        for content in contents:
-            instruction = content.instruction
-            version = content.instruction_version
-            
-            if not instruction or not version:
-                continue
-            
-            # Skip unpublished and disabled
-            if instruction.status != "published":
-                continue
-            if version.load_mode == "disabled":
-                continue
-            
-            # Categorize by load_mode
-            if version.load_mode == "intelligent":
-                intelligent_contents.append((content, instruction, version))
+        published_ids = {str(instruction_id) for instruction_id in published_result.scalars().all()}
+
+        # 'Always' instructions all get loaded
+        always_entries = [entry for entry in index.always if entry.instruction_id in published_ids]
+
+        # Fill the remaining slots with the best intelligent matches (all of them, in build order, without a query)
+        remaining_slots = max_instructions - len(always_entries)
+        intelligent_entries: List[Tuple[CompiledInstruction, float]] = []
+        if remaining_slots > 0 and index.intelligent:
+            if query:
+                candidates = index.rank(self._extract_keywords(query))
             else:
-                # 'always' or None (treat NULL as always for backwards compat)
-                always_contents.append((content, instruction, version))
-        
-        # Batch load usage counts for all candidates
-        all_instruction_ids = [str(c.instruction_id) for c in contents]
-        usage_counts = await self._batch_load_usage_counts(all_instruction_ids)
-        
-        # Build items for 'always' instructions (they all get loaded)
+                candidates = [(entry, 0.0) for entry in index.intelligent]
+            for entry, score in candidates:
+                if entry.instruction_id not in published_ids:
+                    continue
+                intelligent_entries.append((entry, score))
+                if len(intelligent_entries) >= remaining_slots:
+                    break
+
+        # Only the selected instructions are loaded (for category, source type and labels)
+        selected_ids = [entry.instruction_id for entry in always_entries] + [entry.instruction_id for entry, _ in intelligent_entries]
+        instructions: Dict[str, Instruction] = {}
+        if selected_ids:
+            instructions_result = await self.db.execute(
+                select(Instruction).where(Instruction.id.in_(selected_ids))
+            )
+            instructions = {str(instruction.id): instruction for instruction in instructions_result.scalars().all()}
+        usage_counts = await self._batch_load_usage_counts(selected_ids)
+
         always_items: List[InstructionItem] = []
-        for content, instruction, version in always_contents:
-            inst_id = str(instruction.id)
-            always_items.append(InstructionItem(
-                id=inst_id,
-                category=instruction.category,
-                text=version.text or "",
-                load_mode=version.load_mode or "always",
+        for entry in always_entries:
+            instruction = instructions.get(entry.instruction_id)
+            if instruction is None:
+                continue
+            always_items.append(self._build_item(
+                entry, instruction, build,
+                load_mode=entry.load_mode or "always",
                 load_reason="always",
-                source_type=instruction.source_type,
-                title=version.title,
-                labels=self._extract_labels(instruction),
-                usage_count=usage_counts.get(inst_id),
-                # Version/Build lineage tracking
-                version_id=str(version.id),
-                version_number=version.version_number,
-                content_hash=version.content_hash,
-                build_number=build.build_number,
+                usage_count=usage_counts.get(entry.instruction_id),
             ))
-        
-        # Calculate remaining slots for intelligent instructions
-        remaining_slots = max_instructions - len(always_items)
+
         intelligent_items: List[InstructionItem] = []
-        
-        if remaining_slots > 0 and intelligent_contents:
-            # Extract keywords from query for scoring
-            keywords = self._extract_keywords(query) if query else set()
-            
-            # Score and rank intelligent instructions
-            scored: List[Tuple[InstructionItem, float]] = []
-            for content, instruction, version in intelligent_contents:
-                score = self._score_instruction_version(version, keywords)
-                # Include if score > 0 OR if we have no query (load all intelligent)
-                if score > 0 or not query:
-                    inst_id = str(instruction.id)
-                    item = InstructionItem(
-                        id=inst_id,
-                        category=instruction.category,
-                        text=version.text or "",
-                        load_mode="intelligent",
-                        load_reason=f"search_match:{score:.2f}" if score > 0 else "fill",
-                        source_type=instruction.source_type,
-                        title=version.title,
-                        labels=self._extract_labels(instruction),
-                        usage_count=usage_counts.get(inst_id),
-                        # Version/Build lineage tracking
-                        version_id=str(version.id),
-                        version_number=version.version_number,
-                        content_hash=version.content_hash,
-                        build_number=build.build_number,
-                    )
-                    scored.append((item, score))
-            
-            # Sort by score descending and take top N
-            scored.sort(key=lambda x: x[1], reverse=True)
-            intelligent_items = [item for item, _ in scored[:remaining_slots]]
-        
+        for entry, score in intelligent_entries:
+            instruction = instructions.get(entry.instruction_id)
+            if instruction is None:
+                continue
+            intelligent_items.append(self._build_item(
+                entry, instruction, build,
+                load_mode="intelligent",
+                load_reason=f"search_match:{score:.2f}" if score > 0 else "fill",
+                usage_count=usage_counts.get(entry.instruction_id),
+            ))
+
         items = always_items + intelligent_items
 
         # Load referenced instructions (dependencies)
@@ -522,6 +497,66 @@ class InstructionContextBuilder:
 
         return items
     
+    @classmethod
+    async def load_build_index(cls, db: AsyncSession, build: InstructionBuild) -> BuildIndex:
+        """
+        Compiled retrieval index of a build's contents.
+
+        Approved builds are immutable, so their index is cached by build id;
+        drafts and pending builds are compiled on every call.
+        """
+        cacheable = build.status == "approved"
+        if cacheable:
+            index = build_index_cache.get(str(build.id))
+            if index is not None:
+                return index
+
+        rows = await db.execute(
+            select(
+                BuildContent.instruction_id,
+                InstructionVersion.id.label("version_id"),
+                InstructionVersion.version_number,
+                InstructionVersion.content_hash,
+                InstructionVersion.text,
+                InstructionVersion.title,
+                InstructionVersion.load_mode,
+                InstructionVersion.structured_data,
+            )
+            .join(InstructionVersion, InstructionVersion.id == BuildContent.instruction_version_id)
+            .where(BuildContent.build_id == build.id)
+        )
+        index = compile_build_index(str(build.id), rows.all(), cls.STOPWORDS)
+        if cacheable:
+            build_index_cache.put(index)
+        return index
+
+    def _build_item(
+        self,
+        entry: CompiledInstruction,
+        instruction: Instruction,
+        build: InstructionBuild,
+        *,
+        load_mode: str,
+        load_reason: str,
+        usage_count: Optional[int],
+    ) -> InstructionItem:
+        return InstructionItem(
+            id=entry.instruction_id,
+            category=instruction.category,
+            text=entry.text,
+            load_mode=load_mode,
+            load_reason=load_reason,
+            source_type=instruction.source_type,
+            title=entry.title,
+            labels=self._extract_labels(instruction),
+            usage_count=usage_count,
+            # Version/Build lineage tracking
+            version_id=entry.version_id,
+            version_number=entry.version_number,
+            content_hash=entry.content_hash,
+            build_number=build.build_number,
+        )
+
     async def _build_legacy(
         self,
         query: Optional[str] = None,
@@ -810,13 +845,7 @@ class InstructionContextBuilder:
     def _extract_keywords(self, text: str) -> Set[str]:
         """Extract meaningful keywords from text."""
         # Lowercase and split on non-alphanumeric (including underscores for better matching)
-        words = re.split(r'[^a-z0-9]+', text.lower())
-        # Filter out stopwords and short words
-        keywords = {
-            w for w in words 
-            if w and len(w) >= 2 and w not in self.STOPWORDS
-        }
-        return keywords
+        return extract_keywords(text, self.STOPWORDS)
     
     def _score_instruction(self, instruction: Instruction, keywords: Set[str]) -> float:
         """
@@ -829,26 +858,6 @@ class InstructionContextBuilder:
         searchable = self._build_searchable_text(instruction)
         return self._score_text(searchable, keywords)
     
-    def _score_instruction_version(self, version: InstructionVersion, keywords: Set[str]) -> float:
-        """
-        Score an instruction version based on keyword matching.
-        
-        Used for build-based loading to match against version.text/title.
-        Returns a score between 0 and 1.
-        """
-        # Build searchable text from version fields
-        parts = [version.text or ""]
-        if version.title:
-            parts.append(version.title)
-        if version.structured_data:
-            if isinstance(version.structured_data, dict):
-                if version.structured_data.get('name'):
-                    parts.append(version.structured_data['name'])
-                if version.structured_data.get('description'):
-                    parts.append(version.structured_data['description'])
-        searchable = " ".join(parts)
-        return self._score_text(searchable, keywords)
-    
     def _score_text(self, searchable: str, keywords: Set[str]) -> float:
         """
         Score text based on keyword matching.
@@ -1,22 +1,39 @@
 """
 Message Context Builder - Ports proven logic from agent._build_messages_context()
+
+Only the tail window of the conversation is read (newest first, bounded by
+``max_messages``), blocks and tool executions are loaded in batches, and the
+planner's messages section reuses persisted per-completion digests (see
+``conversation_digests``).
 """
-import json
 from typing import Optional, List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy import and_
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
 
 from app.models.completion import Completion
+from app.models.completion_digest import CompletionDigest
 from app.models.widget import Widget
 from app.models.step import Step
 from app.models.organization import Organization
 from app.ai.context.sections.messages_section import MessagesSection, MessageItem
+from app.ai.context.builders.conversation_digests import (
+    DIGEST_VERSION,
+    CompletionDigestEntry,
+    is_final,
+    system_fingerprint,
+    system_text,
+    user_fingerprint,
+    user_text,
+)
 from app.models.entity import Entity
 from app.models.mention import Mention, MentionType
 from app.models.file import File
 from app.models.data_source import DataSource
 from app.models.datasource_table import DataSourceTable
+from app.settings.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 
 class MessageContextBuilder:
@@ -32,6 +49,18 @@ class MessageContextBuilder:
         self.report = report
         self.organization = organization
         self.organization_settings = organization.settings if organization else None
+        # Digests already resolved by this builder, by completion id (checked against fingerprints)
+        self._digests: Dict[str, CompletionDigestEntry] = {}
+
+    def _allow_llm_see_data(self) -> bool:
+        # Check organization settings for data visibility
+        if not self.organization_settings:
+            return True
+        try:
+            settings_dict = self.organization_settings.config
+            return settings_dict.get("allow_llm_see_data", {}).get("value", True)
+        except Exception:
+            return False
     
     async def build_context(
         self,
@@ -52,283 +81,46 @@ class MessageContextBuilder:
         Returns:
             Formatted conversation context string
         """
-        from app.models.completion_block import CompletionBlock
-        
+        allow_llm_see_data = self._allow_llm_see_data()
+        completions_to_process = await self._tail_completions(max_messages, role_filter)
+
+        system_completions = [c for c in completions_to_process if c.role == 'system']
+        blocks_by_completion, tools_by_id = await self._load_blocks(system_completions)
+
+        # Titles for tools that created a widget/step (other than the digested tools)
+        widget_ids = {str(t.created_widget_id) for t in tools_by_id.values() if t.created_widget_id}
+        step_ids = {str(t.created_step_id) for t in tools_by_id.values() if t.created_step_id}
+        widget_titles: Dict[str, Optional[str]] = {}
+        step_titles: Dict[str, Optional[str]] = {}
+        if widget_ids:
+            rows = await self.db.execute(select(Widget.id, Widget.title).where(Widget.id.in_(list(widget_ids))))
+            widget_titles = {str(wid): title for wid, title in rows.all()}
+        if step_ids:
+            rows = await self.db.execute(select(Step.id, Step.title).where(Step.id.in_(list(step_ids))))
+            step_titles = {str(sid): title for sid, title in rows.all()}
+
         conversation = []
-                   # Check organization settings for data visibility
-        allow_llm_see_data = True
-        if self.organization_settings:
-            try:
-                # Get the config dictionary from the organization settings
-                settings_dict = self.organization_settings.config
-                allow_llm_see_data = settings_dict.get("allow_llm_see_data", {}).get("value", True)
-            except:
-                allow_llm_see_data = False  # Default to True if settings unavailable
-                    
-        # Get all completions for this report ordered by creation time
-        report_completions = await self.db.execute(
-            select(Completion)
-            .filter(Completion.report_id == self.report.id)
-            .order_by(Completion.created_at.asc())
-        )
-        report_completions = report_completions.scalars().all()
-        
-        # Skip the last completion if it's from a user (current incomplete conversation)
-        completions_to_process = (
-            report_completions[:-1] 
-            if report_completions and report_completions[-1].role == 'user' 
-            else report_completions
-        )
-        
-        # Apply role filter if provided
-        if role_filter:
-            completions_to_process = [
-                c for c in completions_to_process 
-                if c.role in role_filter
-            ]
-        
-        # Limit to max_messages (considering pairs)
-        completions_to_process = completions_to_process[-max_messages:]
-        
         for completion in completions_to_process:
             timestamp = completion.created_at.strftime("%H:%M")
             
             if completion.role == 'user':
                 # User message: show prompt content
-                content = completion.prompt.get('content', '') if completion.prompt else ''
-                if content.strip():
-                    conversation.append(f"User ({timestamp}): {content.strip()}")
+                content = user_text(completion)
+                if content:
+                    conversation.append(f"User ({timestamp}): {content}")
                     
             elif completion.role == 'system':
-                # System message: get reasoning + assistant from completion blocks + tool executions
-                blocks_result = await self.db.execute(
-                    select(CompletionBlock)
-                    .filter(CompletionBlock.completion_id == completion.id)
-                    .order_by(CompletionBlock.block_index.asc())
+                # System message: reasoning + assistant from completion blocks + tool executions
+                text = system_text(
+                    completion,
+                    blocks_by_completion.get(str(completion.id), []),
+                    tools_by_id,
+                    allow_llm_see_data,
+                    widget_titles=widget_titles,
+                    step_titles=step_titles,
                 )
-                blocks = blocks_result.scalars().all()
-                
-                system_parts = []
-                
-                # Collect reasoning, assistant messages, and tool executions from blocks
-                for block in blocks:
-                    # Don't truncate reasoning and content - show full text
-                    if block.reasoning and block.reasoning.strip():
-                        system_parts.append(f"Thinking: {block.reasoning.strip()}")
-                    
-                    if block.content and block.content.strip():
-                        system_parts.append(f"Response: {block.content.strip()}")
-                    
-                    # Add tool execution details if available
-                    if block.tool_execution_id:
-                        from app.models.tool_execution import ToolExecution
-                        tool_result = await self.db.execute(
-                            select(ToolExecution).filter(ToolExecution.id == block.tool_execution_id)
-                        )
-                        tool_execution = tool_result.scalars().first()
-                        
-                        if tool_execution:
-                            tool_info = f"Tool: {tool_execution.tool_name}"
-                            if tool_execution.tool_action:
-                                tool_info += f" → {tool_execution.tool_action}"
-                            tool_info += f" ({tool_execution.status})"
-                            
-                
-                            # Add widget/step information and data based on tool execution result
-                            if tool_execution.status == 'success':
-                                # Digest for create_widget results
-                                if tool_execution.tool_name == 'create_widget' and tool_execution.result_json:
-                                    result_json = tool_execution.result_json or {}
-                                    widget_data = result_json.get('widget_data', {}) or {}
-                                    columns = widget_data.get('columns', []) or []
-                                    rows = widget_data.get('rows', []) or []
-                                    col_names = [c.get('field') or c.get('headerName') for c in columns if (c.get('field') or c.get('headerName'))]
-                                    row_count = len(rows)
-                                    sample_row = None
-                                    if allow_llm_see_data:
-                                        preview = result_json.get('data_preview', {}) or {}
-                                        preview_rows = preview.get('rows') or []
-                                        if preview_rows:
-                                            sample_row = preview_rows[0]
-                                        elif rows:
-                                            sample_row = rows[0]
-                                    digest_parts = [f"{row_count} rows × {len(col_names)} cols"]
-                                    if col_names:
-                                        head_cols = ", ".join(col_names[:3])
-                                        digest_parts.append(f"cols: {head_cols}{'…' if len(col_names) > 3 else ''}")
-                                    if sample_row:
-                                        try:
-                                            digest_parts.append(f"top row: {json.dumps(sample_row)}")
-                                        except Exception:
-                                            pass
-                                    tool_info += " - " + "; ".join(digest_parts)
-                                # Digest for create_data results (same style as create_widget)
-                                elif tool_execution.tool_name == 'create_data' and tool_execution.result_json:
-                                    rj = tool_execution.result_json or {}
-                                    data_obj = rj.get('data') or {}
-                                    columns = data_obj.get('columns', []) or []
-                                    rows = data_obj.get('rows', []) or []
-                                    col_names = [
-                                        (c.get('field') or c.get('headerName'))
-                                        for c in columns
-                                        if isinstance(c, dict) and (c.get('field') or c.get('headerName'))
-                                    ]
-                                    row_count = len(rows)
-                                    sample_row = None
-                                    if allow_llm_see_data:
-                                        preview = rj.get('data_preview', {}) or {}
-                                        preview_rows = preview.get('rows') or []
-                                        if preview_rows:
-                                            sample_row = preview_rows[0]
-                                        elif rows:
-                                            sample_row = rows[0]
-                                    digest_parts = [f"{row_count} rows × {len(col_names)} cols"]
-                                    if col_names:
-                                        head_cols = ", ".join(col_names[:3])
-                                        digest_parts.append(f"cols: {head_cols}{'…' if len(col_names) > 3 else ''}")
-                                    # If a non-table viz was inferred, surface it concisely
-                                    try:
-                                        dm = rj.get('data_model') or {}
-                                        dm_type = str(dm.get('type') or '').strip()
-                                        if dm_type and dm_type != 'table':
-                                            digest_parts.append(f"chart: {dm_type}")
-                                    except Exception:
-                                        pass
-                                    # Surface visualization_id if available (added by orchestrator)
-                                    try:
-                                        viz_ids = rj.get('created_visualization_ids') or []
-                                        if viz_ids:
-                                            digest_parts.append(f"viz_id: {viz_ids[0]}")
-                                    except Exception:
-                                        pass
-                                    if sample_row:
-                                        try:
-                                            digest_parts.append(f"top row: {json.dumps(sample_row)}")
-                                        except Exception:
-                                            pass
-                                    tool_info += " - " + "; ".join(digest_parts)
-                                # Digest for describe_entity results
-                                elif tool_execution.tool_name == 'describe_entity' and tool_execution.result_json:
-                                    rj = tool_execution.result_json or {}
-                                    digest_parts = []
-                                    entity_title = rj.get('title')
-                                    if entity_title:
-                                        digest_parts.append(f"entity: {entity_title}")
-                                    # Surface visualization_id if created
-                                    try:
-                                        viz_ids = rj.get('created_visualization_ids') or []
-                                        if viz_ids:
-                                            digest_parts.append(f"viz_id: {viz_ids[0]}")
-                                    except Exception:
-                                        pass
-                                    if digest_parts:
-                                        tool_info += " - " + "; ".join(digest_parts)
-                                elif tool_execution.tool_name == 'describe_tables' and tool_execution.result_json:
-                                    # Show table names extracted from schemas excerpt; fallback to query/arguments
-                                    rj = tool_execution.result_json or {}
-                                    names: list[str] = []
-                                    try:
-                                        import re
-                                        excerpt = rj.get('schemas_excerpt') or ''
-                                        names = re.findall(r'<table\s+[^>]*name="([^\"]+)"', excerpt)[:5]
-                                    except Exception:
-                                        names = []
-                                    if not names:
-                                        try:
-                                            args = getattr(tool_execution, 'arguments_json', None) or {}
-                                            q = args.get('query')
-                                            if isinstance(q, list):
-                                                names = [str(x) for x in q][:5]
-                                            elif isinstance(q, str) and q.strip():
-                                                names = [q.strip()]
-                                        except Exception:
-                                            pass
-                                    if names:
-                                        tool_info += f" - tables: {', '.join(names)}"
-                                elif tool_execution.tool_name == 'answer_question' and tool_execution.result_json:
-                                    rj = tool_execution.result_json or {}
-                                    answer_text = rj.get('answer') or ((rj.get('output') or {}).get('answer') if isinstance(rj.get('output'), dict) else None)
-                                    if answer_text:
-                                        tool_info += f" - AI answer: {answer_text}"
-                                elif tool_execution.tool_name == 'create_artifact' and tool_execution.result_json:
-                                    rj = tool_execution.result_json or {}
-                                    digest_parts = []
-                                    if rj.get('title'):
-                                        digest_parts.append(f"artifact: {rj.get('title')}")
-                                    if rj.get('mode'):
-                                        digest_parts.append(f"mode: {rj.get('mode')}")
-                                    if rj.get('artifact_id'):
-                                        digest_parts.append(f"artifact_id: {rj.get('artifact_id')}")
-                                    # Surface visualization_ids used to build the artifact
-                                    viz_ids = rj.get('visualization_ids') or []
-                                    if viz_ids:
-                                        digest_parts.append(f"viz_ids: {', '.join(viz_ids)}")
-                                    if digest_parts:
-                                        tool_info += " - " + "; ".join(digest_parts)
-                                elif tool_execution.tool_name == 'read_artifact' and tool_execution.result_json:
-                                    rj = tool_execution.result_json or {}
-                                    digest_parts = []
-                                    if rj.get('title'):
-                                        digest_parts.append(f"artifact: {rj.get('title')}")
-                                    if rj.get('mode'):
-                                        digest_parts.append(f"mode: {rj.get('mode')}")
-                                    if rj.get('artifact_id'):
-                                        digest_parts.append(f"artifact_id: {rj.get('artifact_id')}")
-                                    if rj.get('version'):
-                                        digest_parts.append(f"v{rj.get('version')}")
-                                    if digest_parts:
-                                        tool_info += " - " + "; ".join(digest_parts)
-                                elif tool_execution.created_widget_id:
-                                    # Get widget details for other tools
-                                    widget_result = await self.db.execute(
-                                        select(Widget).filter(Widget.id == tool_execution.created_widget_id)
-                                    )
-                                    widget = widget_result.scalars().first()
-                                    if widget:
-                                        tool_info += f" - Widget: '{widget.title}'"
-                                    else:
-                                        tool_info += f" - Widget #{tool_execution.created_widget_id}"
-                                
-                                elif tool_execution.created_step_id:
-                                    # Get step details for other tools
-                                    step_result = await self.db.execute(
-                                        select(Step).filter(Step.id == tool_execution.created_step_id)
-                                    )
-                                    step = step_result.scalars().first()
-                                    if step:
-                                        tool_info += f" - Step: '{step.title}'"
-                                    else:
-                                        tool_info += f" - Step #{tool_execution.created_step_id}"
-                                
-                                elif tool_execution.result_summary:
-                                    # Condense result summary
-                                    summary = tool_execution.result_summary
-                                    if len(summary) > 60:
-                                        summary = summary[:60] + "..."
-                                    tool_info += f" - {summary}"
-                            
-                            elif tool_execution.status == 'error' and tool_execution.error_message:
-                                # Show condensed error
-                                error = tool_execution.error_message
-                                if len(error) > 50:
-                                    error = error[:50] + "..."
-                                tool_info += f" - Error: {error}"
-                            
-                            system_parts.append(tool_info)
-                
-                # If no blocks or content, fall back to completion.completion
-                if not system_parts and completion.completion:
-                    if isinstance(completion.completion, dict):
-                        # Handle JSON completion format
-                        content = completion.completion.get('content', '') or completion.completion.get('message', '')
-                    else:
-                        content = str(completion.completion)
-                    
-                    if content.strip():
-                        system_parts.append(f"Response: {content.strip()}")
-                
-                if system_parts:
-                    conversation.append(f"Assistant ({timestamp}): {' | '.join(system_parts)}")
+                if text:
+                    conversation.append(f"Assistant ({timestamp}): {text}")
         
         # Join all conversation parts
         conversation_text = "\n".join(conversation) if conversation else "No conversation history available"
@@ -345,41 +137,227 @@ class MessageContextBuilder:
         max_messages: int = 20,
         role_filter: Optional[List[str]] = None
     ) -> MessagesSection:
-        """Build object-based messages section using the same data path as build_context."""
-        from app.models.completion_block import CompletionBlock
+        """Build object-based messages section from the tail window, reusing stored digests."""
+        allow_llm_see_data = self._allow_llm_see_data()
+        completions_to_process = await self._tail_completions(max_messages, role_filter)
+        digests = await self._digests_for(completions_to_process)
 
         items: List[MessageItem] = []
+        for completion in completions_to_process:
+            entry = digests.get(str(completion.id))
+            text = entry.text_for(allow_llm_see_data) if entry else None
+            if not text:
+                continue
+            ts = completion.created_at.strftime("%H:%M") if getattr(completion, 'created_at', None) else None
+            if completion.role == 'user':
+                items.append(MessageItem(role="user", timestamp=ts, text=text, mentions=entry.mentions))
+            elif completion.role == 'system':
+                items.append(MessageItem(role="system", timestamp=ts, text=text))
 
-        allow_llm_see_data = True
-        if self.organization_settings:
-            try:
-                settings_dict = self.organization_settings.config
-                allow_llm_see_data = settings_dict.get("allow_llm_see_data", {}).get("value", True)
-            except Exception:
-                allow_llm_see_data = False
+        return MessagesSection(items=items)
 
-        report_completions = await self.db.execute(
+    async def _tail_completions(self, max_messages: int, role_filter: Optional[List[str]] = None) -> List[Completion]:
+        """Last ``max_messages`` completions (oldest first), without the trailing in-flight user prompt.
+
+        Reads newest-first with a limit (ix_completions_report_created) instead of
+        loading the whole conversation.
+        """
+        newest_first = (Completion.created_at.desc(), Completion.id.desc())
+        stmt = (
             select(Completion)
             .filter(Completion.report_id == self.report.id)
-            .order_by(Completion.created_at.asc())
+            .order_by(*newest_first)
+            .limit(max_messages + 1)
         )
-        report_completions = report_completions.scalars().all()
+        if role_filter:
+            stmt = stmt.filter(Completion.role.in_(role_filter))
+        completions = list((await self.db.execute(stmt)).scalars().all())
+
+        # Skip the last completion if it's from a user (current incomplete conversation)
+        if role_filter:
+            latest = (await self.db.execute(
+                select(Completion.id, Completion.role)
+                .filter(Completion.report_id == self.report.id)
+                .order_by(*newest_first)
+                .limit(1)
+            )).first()
+        else:
+            latest = completions[0] if completions else None
+        if latest is not None and latest.role == 'user':
+            completions = [c for c in completions if c.id != latest.id]
+
+        completions = completions[:max_messages]
+        completions.reverse()
+        return completions
 
-        completions_to_process = (
-            report_completions[:-1]
-            if report_completions and report_completions[-1].role == 'user'
-            else report_completions
+    async def _load_blocks(self, system_completions: List[Completion]):
+        """Blocks per completion id (in block order) and their tool executions by id, in two queries."""
+        from app.models.completion_block import CompletionBlock
+        from app.models.tool_execution import ToolExecution
+
+        blocks_by_completion: Dict[str, List[Any]] = {}
+        tools_by_id: Dict[str, Any] = {}
+        if not system_completions:
+            return blocks_by_completion, tools_by_id
+
+        blocks_result = await self.db.execute(
+            select(CompletionBlock)
+            .filter(CompletionBlock.completion_id.in_([str(c.id) for c in system_completions]))
+            .order_by(CompletionBlock.completion_id, CompletionBlock.block_index.asc())
         )
+        tool_ids = set()
+        for block in blocks_result.scalars().all():
+            blocks_by_completion.setdefault(str(block.completion_id), []).append(block)
+            if block.tool_execution_id:
+                tool_ids.add(str(block.tool_execution_id))
 
-        if role_filter:
-            completions_to_process = [c for c in completions_to_process if c.role in role_filter]
+        if tool_ids:
+            tools_result = await self.db.execute(select(ToolExecution).filter(ToolExecution.id.in_(list(tool_ids))))
+            tools_by_id = {str(t.id): t for t in tools_result.scalars().all()}
+        return blocks_by_completion, tools_by_id
 
-        completions_to_process = completions_to_process[-max_messages:]
+    async def _fingerprints(self, completions: List[Completion]) -> Dict[str, str]:
+        """Cheap change fingerprint per completion (one grouped query over blocks/tool executions)."""
+        from app.models.completion_block import CompletionBlock
+        from app.models.tool_execution import ToolExecution
+
+        fingerprints: Dict[str, str] = {}
+        system_ids = [str(c.id) for c in completions if c.role == 'system']
+        aggregates: Dict[str, Any] = {}
+        if system_ids:
+            rows = await self.db.execute(
+                select(
+                    CompletionBlock.completion_id,
+                    func.count(CompletionBlock.id),
+                    func.max(CompletionBlock.updated_at),
+                    func.max(ToolExecution.updated_at),
+                )
+                .outerjoin(ToolExecution, ToolExecution.id == CompletionBlock.tool_execution_id)
+                .filter(CompletionBlock.completion_id.in_(system_ids))
+                .group_by(CompletionBlock.completion_id)
+            )
+            aggregates = {str(row[0]): row[1:] for row in rows.all()}
+
+        for completion in completions:
+            cid = str(completion.id)
+            if completion.role == 'system':
+                fingerprints[cid] = system_fingerprint(completion, *aggregates.get(cid, (0, None, None)))
+            else:
+                fingerprints[cid] = user_fingerprint(completion, len(completion.mentions or []))
+        return fingerprints
+
+    async def _digests_for(self, completions: List[Completion]) -> Dict[str, CompletionDigestEntry]:
+        """Digest per completion: from this builder, then ``completion_digests``, else rendered now.
+
+        Newly rendered digests of finished completions are stored for later builds.
+        """
+        fingerprints = await self._fingerprints(completions)
+        digests: Dict[str, CompletionDigestEntry] = {}
+        missing: List[Completion] = []
+        for completion in completions:
+            cid = str(completion.id)
+            entry = self._digests.get(cid)
+            if entry is not None and entry.fingerprint == fingerprints[cid]:
+                digests[cid] = entry
+            else:
+                missing.append(completion)
+
+        if missing:
+            stored = await self.db.execute(
+                select(CompletionDigest).filter(CompletionDigest.completion_id.in_([str(c.id) for c in missing]))
+            )
+            for row in stored.scalars().all():
+                cid = str(row.completion_id)
+                if row.version == DIGEST_VERSION and row.fingerprint == fingerprints.get(cid):
+                    digests[cid] = CompletionDigestEntry(
+                        completion_id=cid,
+                        role=row.role,
+                        fingerprint=row.fingerprint,
+                        text=row.text,
+                        text_without_data=row.text_without_data,
+                        mentions=row.mentions,
+                        final=True,
+                    )
 
+            stale = [c for c in missing if str(c.id) not in digests]
+            if stale:
+                rendered = await self._render_digests(stale, fingerprints)
+                digests.update(rendered)
+                await self._store_digests([e for e in rendered.values() if e.final])
+
+        self._digests.update(digests)
+        return digests
+
+    async def _render_digests(
+        self,
+        completions: List[Completion],
+        fingerprints: Dict[str, str],
+    ) -> Dict[str, CompletionDigestEntry]:
+        user_completions = [c for c in completions if c.role == 'user']
+        system_completions = [c for c in completions if c.role == 'system']
+        mentions = await self._mention_summaries(user_completions) if user_completions else {}
+        blocks_by_completion, tools_by_id = await self._load_blocks(system_completions)
+
+        rendered: Dict[str, CompletionDigestEntry] = {}
+        for completion in completions:
+            cid = str(completion.id)
+            if completion.role == 'user':
+                text, text_without_data = user_text(completion), None
+            elif completion.role == 'system':
+                blocks = blocks_by_completion.get(cid, [])
+                text = system_text(completion, blocks, tools_by_id, True)
+                text_without_data = system_text(completion, blocks, tools_by_id, False)
+                if text_without_data == text:
+                    text_without_data = None
+            else:
+                continue
+            rendered[cid] = CompletionDigestEntry(
+                completion_id=cid,
+                role=completion.role,
+                fingerprint=fingerprints[cid],
+                text=text,
+                text_without_data=text_without_data,
+                mentions=mentions.get(cid),
+                final=is_final(completion),
+            )
+        return rendered
+
+    async def _store_digests(self, entries: List[CompletionDigestEntry]) -> None:
+        """Upsert digests in a separate session so the agent's transaction is left alone (best-effort)."""
+        if not entries:
+            return
+        from app.dependencies import async_session_maker
+
+        try:
+            async with async_session_maker() as session:
+                existing = await session.execute(
+                    select(CompletionDigest).filter(CompletionDigest.completion_id.in_([e.completion_id for e in entries]))
+                )
+                rows = {str(row.completion_id): row for row in existing.scalars().all()}
+                for entry in entries:
+                    row = rows.get(entry.completion_id)
+                    if row is None:
+                        row = CompletionDigest(completion_id=entry.completion_id, report_id=str(self.report.id))
+                        session.add(row)
+                    row.role = entry.role
+                    row.text = entry.text
+                    row.text_without_data = entry.text_without_data
+                    row.mentions = entry.mentions
+                    row.fingerprint = entry.fingerprint
+                    row.version = DIGEST_VERSION
+                await session.commit()
+        except IntegrityError:
+            # Another worker stored the same completion first
+            pass
+        except Exception as e:
+            logger.debug(f"Failed to store completion digests: {e}")
+
+    async def _mention_summaries(self, user_completions: List[Completion]) -> Dict[str, Optional[str]]:
+        """Display string of persisted mentions per user completion (batched lookups)."""
         # =========================
         # Batch-load mentions for all user messages to avoid N+1 queries
         # =========================
-        user_completion_ids: List[str] = [str(c.id) for c in completions_to_process if c.role == 'user']
+        user_completion_ids: List[str] = [str(c.id) for c in user_completions]
         mentions_by_completion: Dict[str, List[Mention]] = {}
         file_ids: set[str] = set()
         ds_ids: set[str] = set()
@@ -454,265 +432,89 @@ class MessageContextBuilder:
             except Exception:
                 pass
 
-        for completion in completions_to_process:
-            ts = completion.created_at.strftime("%H:%M") if getattr(completion, 'created_at', None) else None
-            if completion.role == 'user':
-                content = completion.prompt.get('content', '') if completion.prompt else ''
-                if content and content.strip():
-                    # Prefer persisted mentions over prompt payload for display
-                    mentions_str = None
-                    try:
-                        cid = str(getattr(completion, 'id', ''))
-                        mlist = mentions_by_completion.get(cid, [])
-                        if mlist:
-                            parts: List[str] = []
-                            for m in mlist:
-                                try:
-                                    if m.type == MentionType.DATA_SOURCE:
-                                        ds = ds_map.get(str(m.object_id))
-                                        name = getattr(ds, 'name', None) or m.mention_content
-                                        parts.append(str(name))
-                                    elif m.type == MentionType.TABLE:
-                                        t = tbl_map.get(str(m.object_id))
-                                        if t:
-                                            ds_name = None
-                                            try:
-                                                ds_name = getattr(ds_map.get(str(getattr(t, 'data_source_id', ''))), 'name', None)
-                                            except Exception:
-                                                ds_name = None
-                                            tname = getattr(t, 'name', None) or m.mention_content
-                                            if ds_name:
-                                                parts.append(f"{tname} (Table in Data Source: {ds_name})")
-                                            else:
-                                                parts.append(f"{tname} (Table)")
-                                        else:
-                                            parts.append(m.mention_content)
-                                    elif m.type == MentionType.ENTITY:
-                                        e = ent_map.get(str(m.object_id))
-                                        title = getattr(e, 'title', None) or m.mention_content
-                                        cols_preview: List[str] = []
-                                        rows_count: Optional[int] = None
-                                        try:
-                                            data_json = getattr(e, 'data', None) or {}
-                                            if isinstance(data_json, dict):
-                                                cols = data_json.get('columns')
-                                                if isinstance(cols, list):
-                                                    for c in cols:
-                                                        if isinstance(c, dict):
-                                                            n = c.get('field') or c.get('headerName') or c.get('name')
-                                                            if n:
-                                                                cols_preview.append(str(n))
-                                                        else:
-                                                            cols_preview.append(str(c))
-                                                info = data_json.get('info')
-                                                rows = data_json.get('rows')
-                                                if isinstance(info, dict) and isinstance(info.get('total_rows'), int):
-                                                    rows_count = info.get('total_rows')
-                                                elif isinstance(rows, list):
-                                                    rows_count = len(rows)
-                                        except Exception:
-                                            pass
-                                        extras: List[str] = ["Entity from Catalog"]
-                                        if cols_preview:
-                                            extras.append(f"cols: {','.join(cols_preview[:3])}")
-                                        if rows_count is not None:
-                                            extras.append(f"rows: {rows_count}")
-                                        parts.append(f"{title} (" + ", ".join(extras) + ")")
-                                    elif m.type == MentionType.FILE:
-                                        fobj = file_map.get(str(m.object_id))
-                                        fname = getattr(fobj, 'filename', None) or m.mention_content
-                                        parts.append(str(fname))
-                                except Exception:
-                                    continue
-                            if parts:
-                                mentions_str = ", ".join(parts[:8]) + ("…" if len(parts) > 8 else "")
-                    except Exception:
-                        mentions_str = None
-                    items.append(MessageItem(role="user", timestamp=ts, text=content.strip(), mentions=mentions_str))
-            elif completion.role == 'system':
-                # Aggregate blocks like build_context
-                blocks_result = await self.db.execute(
-                    select(CompletionBlock)
-                    .filter(CompletionBlock.completion_id == completion.id)
-                    .order_by(CompletionBlock.block_index.asc())
-                )
-                blocks = blocks_result.scalars().all()
-                system_parts: List[str] = []
-                for block in blocks:
-                    if block.reasoning and block.reasoning.strip():
-                        system_parts.append(f"Thinking: {block.reasoning.strip()}")
-                    if block.content and block.content.strip():
-                        system_parts.append(f"Response: {block.content.strip()}")
-                    if block.tool_execution_id:
-                        from app.models.tool_execution import ToolExecution
-                        tool_result = await self.db.execute(
-                            select(ToolExecution).filter(ToolExecution.id == block.tool_execution_id)
-                        )
-                        tool_execution = tool_result.scalars().first()
-                        if tool_execution:
-                            tool_info = f"Tool: {tool_execution.tool_name}"
-                            if tool_execution.tool_action:
-                                tool_info += f" → {tool_execution.tool_action}"
-                            tool_info += f" ({tool_execution.status})"
-                            if tool_execution.status == 'success' and tool_execution.tool_name == 'create_widget' and tool_execution.result_json:
-                                result_json = tool_execution.result_json or {}
-                                widget_data = result_json.get('widget_data', {}) or {}
-                                columns = widget_data.get('columns', []) or []
-                                rows = widget_data.get('rows', []) or []
-                                col_names = [c.get('field') or c.get('headerName') for c in columns if (c.get('field') or c.get('headerName'))]
-                                row_count = len(rows)
-                                digest_parts = [f"{row_count} rows × {len(col_names)} cols"]
-                                if col_names:
-                                    head_cols = ", ".join(col_names[:3])
-                                    digest_parts.append(f"cols: {head_cols}{'…' if len(col_names) > 3 else ''}")
-                                if allow_llm_see_data:
-                                    preview = result_json.get('data_preview', {}) or {}
-                                    preview_rows = preview.get('rows') or []
-                                    sample_row = preview_rows[0] if preview_rows else (rows[0] if rows else None)
-                                    if sample_row:
-                                        try:
-                                            digest_parts.append(f"top row: {json.dumps(sample_row)}")
-                                        except Exception:
-                                            pass
-                                tool_info += " - " + "; ".join(digest_parts)
-                            elif tool_execution.status == 'success' and tool_execution.tool_name == 'create_data' and tool_execution.result_json:
-                                rj = tool_execution.result_json or {}
-                                data_obj = rj.get('data') or {}
-                                columns = data_obj.get('columns', []) or []
-                                rows = data_obj.get('rows', []) or []
-                                col_names = [
-                                    (c.get('field') or c.get('headerName'))
-                                    for c in columns
-                                    if isinstance(c, dict) and (c.get('field') or c.get('headerName'))
-                                ]
-                                row_count = len(rows)
-                                digest_parts = [f"{row_count} rows × {len(col_names)} cols"]
-                                if col_names:
-                                    head_cols = ", ".join(col_names[:3])
-                                    digest_parts.append(f"cols: {head_cols}{'…' if len(col_names) > 3 else ''}")
-                                if allow_llm_see_data:
-                                    preview = rj.get('data_preview', {}) or {}
-                                    preview_rows = preview.get('rows') or []
-                                    sample_row = preview_rows[0] if preview_rows else (rows[0] if rows else None)
-                                    if sample_row:
-                                        try:
-                                            digest_parts.append(f"top row: {json.dumps(sample_row)}")
-                                        except Exception:
-                                            pass
-                                # If a non-table viz was inferred, surface it concisely
-                                try:
-                                    dm = rj.get('data_model') or {}
-                                    dm_type = str(dm.get('type') or '').strip()
-                                    if dm_type and dm_type != 'table':
-                                        digest_parts.append(f"chart: {dm_type}")
-                                except Exception:
-                                    pass
-                                # Surface visualization_id if available (added by orchestrator)
-                                try:
-                                    viz_ids = rj.get('created_visualization_ids') or []
-                                    if viz_ids:
-                                        digest_parts.append(f"viz_id: {viz_ids[0]}")
-                                except Exception:
-                                    pass
-                                tool_info += " - " + "; ".join(digest_parts)
-                            elif tool_execution.status == 'success' and tool_execution.tool_name == 'describe_entity' and tool_execution.result_json:
-                                # Digest for describe_entity results
-                                rj = tool_execution.result_json or {}
-                                digest_parts = []
-                                entity_title = rj.get('title')
-                                if entity_title:
-                                    digest_parts.append(f"entity: {entity_title}")
-                                # Surface visualization_id if created
+        summaries: Dict[str, Optional[str]] = {}
+        for completion in user_completions:
+            # Prefer persisted mentions over prompt payload for display
+            mentions_str = None
+            try:
+                cid = str(getattr(completion, 'id', ''))
+                mlist = mentions_by_completion.get(cid, [])
+                if mlist:
+                    parts: List[str] = []
+                    for m in mlist:
+                        try:
+                            if m.type == MentionType.DATA_SOURCE:
+                                ds = ds_map.get(str(m.object_id))
+                                name = getattr(ds, 'name', None) or m.mention_content
+                                parts.append(str(name))
+                            elif m.type == MentionType.TABLE:
+                                t = tbl_map.get(str(m.object_id))
+                                if t:
+                                    ds_name = None
+                                    try:
+                                        ds_name = getattr(ds_map.get(str(getattr(t, 'data_source_id', ''))), 'name', None)
+                                    except Exception:
+                                        ds_name = None
+                                    tname = getattr(t, 'name', None) or m.mention_content
+                                    if ds_name:
+                                        parts.append(f"{tname} (Table in Data Source: {ds_name})")
+                                    else:
+                                        parts.append(f"{tname} (Table)")
+                                else:
+                                    parts.append(m.mention_content)
+                            elif m.type == MentionType.ENTITY:
+                                e = ent_map.get(str(m.object_id))
+                                title = getattr(e, 'title', None) or m.mention_content
+                                cols_preview: List[str] = []
+                                rows_count: Optional[int] = None
                                 try:
-                                    viz_ids = rj.get('created_visualization_ids') or []
-                                    if viz_ids:
-                                        digest_parts.append(f"viz_id: {viz_ids[0]}")
+                                    data_json = getattr(e, 'data', None) or {}
+                                    if isinstance(data_json, dict):
+                                        cols = data_json.get('columns')
+                                        if isinstance(cols, list):
+                                            for c in cols:
+                                                if isinstance(c, dict):
+                                                    n = c.get('field') or c.get('headerName') or c.get('name')
+                                                    if n:
+                                                        cols_preview.append(str(n))
+                                                else:
+                                                    cols_preview.append(str(c))
+                                        info = data_json.get('info')
+                                        rows = data_json.get('rows')
+                                        if isinstance(info, dict) and isinstance(info.get('total_rows'), int):
+                                            rows_count = info.get('total_rows')
+                                        elif isinstance(rows, list):
+                                            rows_count = len(rows)
                                 except Exception:
                                     pass
-                                if digest_parts:
-                                    tool_info += " - " + "; ".join(digest_parts)
-                            elif tool_execution.status == 'success' and tool_execution.tool_name == 'describe_tables' and tool_execution.result_json:
-                                # Show table names extracted from schemas excerpt; fallback to query/arguments
-                                rj = tool_execution.result_json or {}
-                                names: list[str] = []
-                                try:
-                                    import re
-                                    excerpt = rj.get('schemas_excerpt') or ''
-                                    names = re.findall(r'<table\s+[^>]*name=\"([^\\\"]+)\"', excerpt)[:5]
-                                except Exception:
-                                    names = []
-                                if not names:
-                                    try:
-                                        args = getattr(tool_execution, 'arguments_json', None) or {}
-                                        q = args.get('query')
-                                        if isinstance(q, list):
-                                            names = [str(x) for x in q][:5]
-                                        elif isinstance(q, str) and q.strip():
-                                            names = [q.strip()]
-                                    except Exception:
-                                        pass
-                                if names:
-                                    tool_info += f" - tables: {', '.join(names)}"
-                            elif tool_execution.status == 'success' and tool_execution.tool_name == 'answer_question' and tool_execution.result_json:
-                                rj = tool_execution.result_json or {}
-                                answer_text = rj.get('answer') or ((rj.get('output') or {}).get('answer') if isinstance(rj.get('output'), dict) else None)
-                                if answer_text:
-                                    tool_info += f" - AI answer: {answer_text}"
-                            elif tool_execution.status == 'success' and tool_execution.tool_name == 'create_artifact' and tool_execution.result_json:
-                                rj = tool_execution.result_json or {}
-                                digest_parts = []
-                                if rj.get('title'):
-                                    digest_parts.append(f"artifact: {rj.get('title')}")
-                                if rj.get('mode'):
-                                    digest_parts.append(f"mode: {rj.get('mode')}")
-                                if rj.get('artifact_id'):
-                                    digest_parts.append(f"artifact_id: {rj.get('artifact_id')}")
-                                # Surface visualization_ids used to build the artifact
-                                viz_ids = rj.get('visualization_ids') or []
-                                if viz_ids:
-                                    digest_parts.append(f"viz_ids: {', '.join(viz_ids)}")
-                                if digest_parts:
-                                    tool_info += " - " + "; ".join(digest_parts)
-                            elif tool_execution.status == 'success' and tool_execution.tool_name == 'read_artifact' and tool_execution.result_json:
-                                rj = tool_execution.result_json or {}
-                                digest_parts = []
-                                if rj.get('title'):
-                                    digest_parts.append(f"artifact: {rj.get('title')}")
-                                if rj.get('mode'):
-                                    digest_parts.append(f"mode: {rj.get('mode')}")
-                                if rj.get('artifact_id'):
-                                    digest_parts.append(f"artifact_id: {rj.get('artifact_id')}")
-                                if rj.get('version'):
-                                    digest_parts.append(f"v{rj.get('version')}")
-                                if digest_parts:
-                                    tool_info += " - " + "; ".join(digest_parts)
-                            elif tool_execution.status == 'error' and tool_execution.error_message:
-                                error = tool_execution.error_message
-                                if len(error) > 50:
-                                    error = error[:50] + "..."
-                                tool_info += f" - Error: {error}"
-                            system_parts.append(tool_info)
-                if not system_parts and completion.completion:
-                    if isinstance(completion.completion, dict):
-                        content = completion.completion.get('content', '') or completion.completion.get('message', '')
-                    else:
-                        content = str(completion.completion)
-                    if content.strip():
-                        system_parts.append(f"Response: {content.strip()}")
-                if system_parts:
-                    items.append(MessageItem(role="system", timestamp=ts, text=" | ".join(system_parts)))
+                                extras: List[str] = ["Entity from Catalog"]
+                                if cols_preview:
+                                    extras.append(f"cols: {','.join(cols_preview[:3])}")
+                                if rows_count is not None:
+                                    extras.append(f"rows: {rows_count}")
+                                parts.append(f"{title} (" + ", ".join(extras) + ")")
+                            elif m.type == MentionType.FILE:
+                                fobj = file_map.get(str(m.object_id))
+                                fname = getattr(fobj, 'filename', None) or m.mention_content
+                                parts.append(str(fname))
+                        except Exception:
+                            continue
+                    if parts:
+                        mentions_str = ", ".join(parts[:8]) + ("…" if len(parts) > 8 else "")
+            except Exception:
+                mentions_str = None
+            summaries[str(completion.id)] = mentions_str
+        return summaries
 
-        return MessagesSection(items=items)
-    
     async def get_message_count(self, role_filter: Optional[List[str]] = None) -> int:
         """Get total number of messages for this report."""
-        query = select(Completion).filter(Completion.report_id == self.report.id)
+        query = select(func.count(Completion.id)).filter(Completion.report_id == self.report.id)
         
         if role_filter:
             query = query.filter(Completion.role.in_(role_filter))
             
         result = await self.db.execute(query)
-        return len(result.scalars().all())
+        return result.scalar() or 0
     
     async def render(self, max_messages: int = 10) -> str:
         """Render a human-readable view of message context."""
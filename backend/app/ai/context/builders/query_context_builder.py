@@ -8,6 +8,7 @@ from sqlalchemy import select
 
 from app.models.query import Query
 from app.models.step import Step
+from app.services.step_data_store import step_data_store
 from app.models.visualization import Visualization
 from app.ai.context.sections.queries_section import QueriesSection, QueryObservation, QueryVisualizationSummary
 
@@ -111,7 +112,7 @@ class QueryContextBuilder:
                         obs.column_names = [c.get('field', '?') for c in default_step.data['columns']]
                     if 'rows' in default_step.data and isinstance(default_step.data['rows'], list):
                         rows = default_step.data['rows']
-                        obs.row_count = len(rows)
+                        obs.row_count = step_data_store.row_count(default_step.data)
                         if include_data_preview and rows and obs.column_names:
                             try:
                                 cols = obs.column_names
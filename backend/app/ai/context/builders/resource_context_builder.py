@@ -14,10 +14,9 @@ Example migration:
     context = await builder.build(query, data_source_ids=ds_ids)
 """
 
-import re
 import json
 import warnings
-from sqlalchemy import select
+from sqlalchemy import select, func
 
 # Import the unified MetadataResource model
 from app.models.metadata_resource import MetadataResource
@@ -25,6 +24,28 @@ from app.models.git_repository import GitRepository
 from app.models.metadata_indexing_job import MetadataIndexingJob
 from app.models.organization import Organization
 from app.ai.context.sections.resources_section import ResourcesSection
+from app.services.metadata_search_index import ensure_job_index, search_resources
+
+
+SAMPLE_SIZE = 10  # resources rendered in full per repository (matches render_combined's top_k_per_repo)
+INDEX_LIMIT = 200  # resources listed by name per repository
+LEGACY_TOP_K = 5  # resources in the pre-rendered <relevant_metadata_resources> block
+
+# Columns needed to render a resource; avoids loading the ORM entity and its instruction relationship
+RESOURCE_PAYLOAD_COLUMNS = (
+    MetadataResource.id,
+    MetadataResource.name,
+    MetadataResource.resource_type,
+    MetadataResource.path,
+    MetadataResource.description,
+    MetadataResource.sql_content,
+    MetadataResource.source_name,
+    MetadataResource.database,
+    MetadataResource.schema,
+    MetadataResource.columns,
+    MetadataResource.depends_on,
+    MetadataResource.raw_data,
+)
 
 
 class ResourceContextBuilder:
@@ -47,12 +68,17 @@ class ResourceContextBuilder:
         self.prompt_content = prompt_content
         self.data_sources = data_sources
 
-    async def build_context(self):
-        """Build context from resources based on the prompt content (string)."""
+    async def build_context(self, top_k: int = SAMPLE_SIZE, index_limit: int = INDEX_LIMIT):
+        """Build context from resources based on the prompt content (string).
+
+        Resources are ranked with the job's search index; only the ``top_k``
+        best matches (padded with the first resources by name when there are
+        fewer hits) are loaded with their full payload. The rest of the
+        repository is listed by name/type/path, up to ``index_limit`` entries.
+        """
         context = []
         repositories: list[ResourcesSection.Repository] = []
-        # Extract keywords from the prompt
-        keywords = self._extract_keywords_from_prompt(self.prompt_content)
+        prompt_text = self.prompt_content.get('content', '') if isinstance(self.prompt_content, dict) else ''
         # For each data source, check if there's a git repository
         for data_source in self.data_sources:
             # Find the most recently created git repository connected to this data source
@@ -82,18 +108,46 @@ class ResourceContextBuilder:
 
             if not latest_index_job:
                 continue
-                
-            # Find all active MetadataResources associated with this index job
-            metadata_resources_result = await self.db.execute(
-                select(MetadataResource)
-                .where(MetadataResource.metadata_indexing_job_id == latest_index_job.id)
-                .where(MetadataResource.is_active == True)
+
+            job_id = str(latest_index_job.id)
+            active_resources = (
+                MetadataResource.metadata_indexing_job_id == job_id,
+                MetadataResource.is_active == True,
             )
-            all_resources = metadata_resources_result.scalars().all()
-            
-            # Filter resources based on keywords
-            relevant_resources = self._filter_resources_by_keywords(all_resources, keywords)
-            # Add relevant resources to context
+
+            # Rank active resources of this job against the prompt
+            await ensure_job_index(latest_index_job)
+            ranked_ids = [resource_id for resource_id, _ in await search_resources(self.db, job_id, prompt_text, limit=top_k)]
+
+            # Lightweight listing for the names index (and padding of the sample)
+            total = (await self.db.execute(
+                select(func.count(MetadataResource.id)).where(*active_resources)
+            )).scalar() or 0
+            listing = (await self.db.execute(
+                select(MetadataResource.id, MetadataResource.name, MetadataResource.resource_type, MetadataResource.path)
+                .where(*active_resources)
+                .order_by(MetadataResource.name, MetadataResource.id)
+                .limit(index_limit + top_k)
+            )).all()
+
+            sample_ids = list(ranked_ids)
+            for row in listing:
+                if len(sample_ids) >= top_k:
+                    break
+                if str(row.id) not in sample_ids:
+                    sample_ids.append(str(row.id))
+
+            # Full payloads only for the sample
+            payload_rows = {}
+            if sample_ids:
+                rows = await self.db.execute(
+                    select(*RESOURCE_PAYLOAD_COLUMNS).where(MetadataResource.id.in_(sample_ids))
+                )
+                payload_rows = {str(row.id): row for row in rows.all()}
+            sample = [payload_rows[rid] for rid in sample_ids if rid in payload_rows]
+
+            # Legacy pre-rendered content: the best matches only
+            relevant_resources = [payload_rows[rid] for rid in ranked_ids[:LEGACY_TOP_K] if rid in payload_rows]
             if relevant_resources:
                 context.append("<relevant_metadata_resources>")
                 
@@ -112,29 +166,40 @@ class ResourceContextBuilder:
                 ds_id = str(getattr(data_source, 'id', None)) if getattr(data_source, 'id', None) else None
 
                 resources_payload: list[dict] = []
-                for res in all_resources:
+                for res in sample:
                     try:
                         resources_payload.append({
-                            "name": getattr(res, 'name', None),
-                            "resource_type": (getattr(res, 'resource_type', None) or ""),
-                            "path": getattr(res, 'path', None),
-                            "description": getattr(res, 'description', None),
-                            "sql_content": getattr(res, 'sql_content', None),
-                            "source_name": getattr(res, 'source_name', None),
-                            "database": getattr(res, 'database', None),
-                            "schema": getattr(res, 'schema', None),
-                            "columns": getattr(res, 'columns', None),
-                            "depends_on": getattr(res, 'depends_on', None),
-                            "raw_data": getattr(res, 'raw_data', None),
+                            "name": res.name,
+                            "resource_type": res.resource_type or "",
+                            "path": res.path,
+                            "description": res.description,
+                            "sql_content": res.sql_content,
+                            "source_name": res.source_name,
+                            "database": res.database,
+                            "schema": res.schema,
+                            "columns": res.columns,
+                            "depends_on": res.depends_on,
+                            "raw_data": res.raw_data,
                         })
                     except Exception:
                         continue
+                for row in listing:
+                    if len(resources_payload) >= max(index_limit, len(sample)):
+                        break
+                    if str(row.id) in payload_rows:
+                        continue
+                    resources_payload.append({
+                        "name": row.name,
+                        "resource_type": row.resource_type or "",
+                        "path": row.path,
+                    })
 
                 repositories.append(ResourcesSection.Repository(
                     name=repo_name,
                     id=repo_id,
                     data_source_id=ds_id,
                     resources=resources_payload,
+                    total=total,
                 ))
             except Exception:
                 # Structured section is best-effort; keep legacy content regardless
@@ -155,35 +220,6 @@ class ResourceContextBuilder:
         content = result
         return ResourcesSection(content=content)
 
-    def _extract_keywords_from_prompt(self, prompt_data):
-        """Extract important keywords from the prompt."""
-        # Simple implementation - split by spaces and remove common words
-        common_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'like', 'through', 'over', 'before', 'between', 'after', 'since', 'without', 'under', 'within', 'along', 'following', 'across', 'behind', 'beyond', 'plus', 'except', 'but', 'up', 'out', 'around', 'down', 'off', 'above', 'near', 'show', 'me', 'get', 'find', 'what', 'where', 'when', 'who', 'how', 'why', 'which', 'create', 'make', 'list', 'all', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'can', 'could', 'will', 'would', 'shall', 'should', 'may', 'might', 'must'}
-        # Ensure prompt_data is a dictionary and has 'content'
-        prompt_content = prompt_data.get('content', '') if isinstance(prompt_data, dict) else ''
-        prompt = prompt_content.lower()
-
-        words = re.findall(r'\b\w+\b', prompt)
-        keywords = [word for word in words if word not in common_words and len(word) > 2]
-        
-        return keywords
-
-    def _filter_resources_by_keywords(self, resources, keywords):
-        """Filter resources based on keywords."""
-        relevant_resources = []
-        
-        for resource in resources:
-            # Create a searchable text from the resource
-            # Include resource_type in searchable text
-            searchable_text = f"{resource.name} {resource.resource_type} {resource.description or ''} {resource.sql_content or ''} {resource.path or ''}"
-            
-            # Check if any keyword is in the searchable text
-            if any(keyword.lower() in searchable_text.lower() for keyword in keywords):
-                relevant_resources.append(resource)
-        
-        # Limit to top 5 most relevant resources to avoid context overload
-        return relevant_resources[:5]
-
     def _format_resource_by_type(self, resource):
         """Format a resource based on its type according to the schema."""
         # Normalize resource_type (e.g., 'dbt model', 'lookml view')
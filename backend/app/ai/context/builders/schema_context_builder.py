@@ -2,13 +2,13 @@
 Schema Context Builder - builds TablesSchemaContext object for schemas
 """
 from typing import List, Optional, Dict, Any
-import re
+from types import SimpleNamespace
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select, func, and_
 from app.ai.context.sections.tables_schema_section import TablesSchemaContext
 from app.schemas.data_source_schema import DataSourceSummarySchema
-from app.ai.prompt_formatters import Table as PromptTable, TableColumn as PromptTableColumn, ForeignKey as PromptForeignKey
+from app.ai.prompt_formatters import Table as PromptTable
 from app.models.table_stats import TableStats
 from app.models.organization import Organization
 from app.models.report import Report
@@ -17,6 +17,20 @@ from app.models.datasource_table import DataSourceTable
 from app.models.connection_table import ConnectionTable
 from app.models.instruction_reference import InstructionReference
 from app.models.user_data_source_overlay import UserDataSourceTable, UserDataSourceColumn
+from app.ai.context.builders.schema_snapshot_cache import (
+    SchemaSnapshot,
+    SignalsSnapshot,
+    name_matcher,
+    schema_snapshot_cache,
+)
+
+
+# TableStats attributes used for scoring; copied off the ORM rows so snapshots outlive the session
+_STATS_FIELDS = (
+    "usage_count", "success_count", "failure_count", "weighted_usage_count",
+    "pos_feedback_count", "neg_feedback_count", "weighted_pos_feedback", "weighted_neg_feedback",
+    "last_used_at", "last_feedback_at",
+)
 
 
 class SchemaContextBuilder:
@@ -59,29 +73,10 @@ class SchemaContextBuilder:
         for ds in self.data_sources:
             if ds_filter and str(ds.id) not in ds_filter:
                 continue
-            # Build stats map (table name lowercase -> TableStats)
-            stats_map: Dict[str, TableStats] = {}
-            if with_stats:
-                res = await self.db.execute(
-                    select(TableStats).where(
-                        TableStats.report_id == None,
-                        TableStats.data_source_id == str(ds.id),
-                    )
-                )
-                for s in res.scalars().all():
-                    stats_map[(s.table_fqn or '').lower()] = s
-
-            # Canonical (org-level) source - load with connection relationships
-            ds_tables_result = await self.db.execute(
-                select(DataSourceTable)
-                .options(
-                    selectinload(DataSourceTable.connection_table)
-                    .selectinload(ConnectionTable.connection)
-                )
-                .where(DataSourceTable.datasource_id == str(ds.id))
-            )
-            ds_tables = ds_tables_result.scalars().all()
-            canonical_by_name: Dict[str, DataSourceTable] = {getattr(t, 'name', ''): t for t in ds_tables}
+            schema_snapshot, signals = await self._get_snapshots(ds)
+            # Stats map (table name lowercase -> stats)
+            stats_map = signals.stats if with_stats else {}
+            canonical_by_name = schema_snapshot.by_name
 
             # Choose source: overlay for user_required with user, else canonical
             use_overlay = (getattr(ds, 'auth_policy', 'system_only') == 'user_required') and (self.user is not None)
@@ -99,6 +94,10 @@ class SchemaContextBuilder:
                     )
                 )
                 overlay_tables = overlays_q.scalars().all()
+                # Apply name filters before loading columns
+                if table_names or name_patterns:
+                    name_matches = name_matcher(table_names, name_patterns)
+                    overlay_tables = [ot for ot in overlay_tables if name_matches(getattr(ot, 'table_name', '') or '')]
                 overlay_ids = [str(ot.id) for ot in overlay_tables]
                 cols_q = await self.db.execute(
                     select(UserDataSourceColumn).where(
@@ -116,120 +115,43 @@ class SchemaContextBuilder:
                     columns = [{"name": getattr(c, 'column_name', ''), "dtype": getattr(c, 'data_type', None), "description": getattr(c, 'description', None), "metadata": getattr(c, 'metadata', None)} for c in overlay_cols]
                     base = canonical_by_name.get(name)
                     # Respect canonical table's is_active status (default False if not found)
-                    canonical_is_active = bool(getattr(base, 'is_active', False)) if base is not None else False
+                    canonical_is_active = bool(base.get("is_active", False)) if base is not None else False
                     # Skip inactive tables when active_only is True
                     if active_only and not canonical_is_active:
                         continue
-                    pks = getattr(base, 'pks', []) if base is not None else []
-                    fks = getattr(base, 'fks', []) if base is not None else []
-                    metadata_json = getattr(base, 'metadata_json', None) if base is not None else None
-                    # Extract connection info from the base table
-                    conn_id = None
-                    conn_name = None
-                    conn_type = None
-                    if base is not None and getattr(base, 'connection_table', None):
-                        ct = base.connection_table
-                        if getattr(ct, 'connection', None):
-                            conn_id = str(ct.connection.id)
-                            conn_name = ct.connection.name
-                            conn_type = ct.connection.type
-
+                    base = base or {}
                     normalized.append({
                         "name": name,
-                        "table_id": str(base.id) if base is not None else None,
+                        "table_id": base.get("table_id"),
                         "columns": columns,
-                        "pks": pks,
-                        "fks": fks,
-                        "metadata_json": metadata_json,
-                        "centrality_score": getattr(base, 'centrality_score', None) if base is not None else None,
-                        "richness": getattr(base, 'richness', None) if base is not None else None,
-                        "degree_in": getattr(base, 'degree_in', None) if base is not None else None,
-                        "degree_out": getattr(base, 'degree_out', None) if base is not None else None,
-                        "entity_like": getattr(base, 'entity_like', None) if base is not None else None,
+                        "pks": base.get("pks") or [],
+                        "fks": base.get("fks") or [],
+                        "metadata_json": base.get("metadata_json"),
+                        "centrality_score": base.get("centrality_score"),
+                        "richness": base.get("richness"),
+                        "degree_in": base.get("degree_in"),
+                        "degree_out": base.get("degree_out"),
+                        "entity_like": base.get("entity_like"),
                         "is_active": canonical_is_active,
-                        "connection_id": conn_id,
-                        "connection_name": conn_name,
-                        "connection_type": conn_type,
+                        "connection_id": base.get("connection_id"),
+                        "connection_name": base.get("connection_name"),
+                        "connection_type": base.get("connection_type"),
                     })
             else:
-                for t in ds_tables:
-                    table_is_active = bool(getattr(t, 'is_active', False))
+                # Name filters resolve through the snapshot's name index
+                for t in schema_snapshot.select(table_names, name_patterns):
                     # Skip inactive tables when active_only is True
-                    if active_only and not table_is_active:
+                    if active_only and not t["is_active"]:
                         continue
-                    columns = [{"name": col.get("name"), "dtype": col.get("dtype", "unknown"), "description": col.get("description"), "metadata": col.get("metadata")} for col in (getattr(t, 'columns', []) or [])]
-
-                    # Extract connection info
-                    conn_id = None
-                    conn_name = None
-                    conn_type = None
-                    if getattr(t, 'connection_table', None):
-                        ct = t.connection_table
-                        if getattr(ct, 'connection', None):
-                            conn_id = str(ct.connection.id)
-                            conn_name = ct.connection.name
-                            conn_type = ct.connection.type
+                    normalized.append(t)
 
-                    normalized.append({
-                        "name": getattr(t, 'name', ''),
-                        "table_id": str(t.id) if getattr(t, 'id', None) else None,
-                        "columns": columns,
-                        "pks": getattr(t, 'pks', []) or [],
-                        "fks": getattr(t, 'fks', []) or [],
-                        "metadata_json": getattr(t, 'metadata_json', None),
-                        "centrality_score": getattr(t, 'centrality_score', None),
-                        "richness": getattr(t, 'richness', None),
-                        "degree_in": getattr(t, 'degree_in', None),
-                        "degree_out": getattr(t, 'degree_out', None),
-                        "entity_like": getattr(t, 'entity_like', None),
-                        "is_active": table_is_active,
-                        "connection_id": conn_id,
-                        "connection_name": conn_name,
-                        "connection_type": conn_type,
-                    })
-
-            # Batch-query instruction reference counts for all tables in this data source
-            instruction_ref_counts: Dict[str, int] = {}
-            table_ids_for_ref = [item["table_id"] for item in normalized if item.get("table_id")]
-            if table_ids_for_ref:
-                try:
-                    ref_count_result = await self.db.execute(
-                        select(
-                            InstructionReference.object_id,
-                            func.count(InstructionReference.id)
-                        ).where(
-                            and_(
-                                InstructionReference.object_type == 'datasource_table',
-                                InstructionReference.object_id.in_(table_ids_for_ref),
-                                InstructionReference.deleted_at.is_(None),
-                            )
-                        ).group_by(InstructionReference.object_id)
-                    )
-                    for object_id, count in ref_count_result.all():
-                        instruction_ref_counts[str(object_id)] = count
-                except Exception:
-                    pass  # Non-critical - continue without counts
+            instruction_ref_counts = signals.instruction_ref_counts
 
             # Common rendering and scoring
             scored: List[tuple[float, PromptTable]] = []
             tables: List[PromptTable] = []
             for item in normalized:
-                columns = [
-                    PromptTableColumn(name=c.get("name"), dtype=c.get("dtype"), description=c.get("description"), metadata=c.get("metadata"))
-                    for c in (item.get("columns") or [])
-                ]
-                pks = [
-                    PromptTableColumn(name=pk.get("name"), dtype=pk.get("dtype"))
-                    for pk in (item.get("pks") or [])
-                ]
-                fks = [
-                    PromptForeignKey(
-                        column=PromptTableColumn(name=fk.get('column', {}).get('name'), dtype=fk.get('column', {}).get('dtype')),
-                        references_name=fk.get('references_name'),
-                        references_column=PromptTableColumn(name=fk.get('references_column', {}).get('name'), dtype=fk.get('references_column', {}).get('dtype')),
-                    )
-                    for fk in (item.get("fks") or [])
-                ]
+                columns, pks, fks = schema_snapshot.prompt_parts_for(item)
 
                 tbl = PromptTable(
                     name=item.get("name", ""),
@@ -313,32 +235,6 @@ class SchemaContextBuilder:
             except Exception:
                 pass
 
-            # Apply table-level filters (name matching only - active filtering already done above)
-            if table_names or name_patterns:
-                name_set = set((table_names or []))
-                patterns = []
-                for p in (name_patterns or []):
-                    try:
-                        patterns.append(re.compile(p))
-                    except Exception:
-                        continue
-                def _match(n: str) -> bool:
-                    if name_set and n in name_set:
-                        return True
-                    for rp in patterns:
-                        try:
-                            if rp.search(n or ''):
-                                return True
-                        except Exception:
-                            continue
-                    return (not name_set) and (not patterns)
-                filtered = []
-                for t in tables:
-                    if not _match(getattr(t, 'name', '')):
-                        continue
-                    filtered.append(t)
-                tables = filtered
-
             # Apply top_k cap last
             if top_k is not None and top_k > 0:
                 tables = tables[:top_k]
@@ -359,6 +255,122 @@ class SchemaContextBuilder:
 
         return TablesSchemaContext(data_sources=ds_sections)
 
+    async def _get_snapshots(self, ds: DataSource) -> tuple[SchemaSnapshot, SignalsSnapshot]:
+        """Return cached schema/signals snapshots for ``ds``, reloading stale ones.
+
+        One round trip fetches the database fingerprints; tables, stats and
+        instruction reference counts are only re-read when theirs changed.
+        """
+        ds_id = str(ds.id)
+        ds_table_ids = select(DataSourceTable.id).where(DataSourceTable.datasource_id == ds_id)
+        ref_filter = and_(
+            InstructionReference.object_type == 'datasource_table',
+            InstructionReference.object_id.in_(ds_table_ids),
+        )
+        stats_filter = and_(TableStats.report_id == None, TableStats.data_source_id == ds_id)
+        fingerprint = (await self.db.execute(
+            select(
+                select(func.count(DataSourceTable.id)).where(DataSourceTable.datasource_id == ds_id).scalar_subquery(),
+                select(func.max(DataSourceTable.updated_at)).where(DataSourceTable.datasource_id == ds_id).scalar_subquery(),
+                select(func.count(TableStats.id)).where(stats_filter).scalar_subquery(),
+                select(func.max(TableStats.updated_at)).where(stats_filter).scalar_subquery(),
+                select(func.count(InstructionReference.id)).where(ref_filter).scalar_subquery(),
+                select(func.max(InstructionReference.updated_at)).where(ref_filter).scalar_subquery(),
+            )
+        )).one()
+
+        schema_revision = (schema_snapshot_cache.local_revision("schema", ds_id), *fingerprint[:2])
+        schema_snapshot = schema_snapshot_cache.get("schema", ds_id, schema_revision)
+        if schema_snapshot is None:
+            schema_snapshot = await self._load_schema_snapshot(ds_id)
+            schema_snapshot_cache.put("schema", ds_id, schema_revision, schema_snapshot)
+
+        signals_revision = (schema_snapshot_cache.local_revision("signals", ds_id), *fingerprint[2:])
+        signals = schema_snapshot_cache.get("signals", ds_id, signals_revision)
+        if signals is None:
+            signals = await self._load_signals_snapshot(ds_id)
+            schema_snapshot_cache.put("signals", ds_id, signals_revision, signals)
+
+        return schema_snapshot, signals
+
+    async def _load_schema_snapshot(self, ds_id: str) -> SchemaSnapshot:
+        # Canonical (org-level) source - load with connection relationships
+        ds_tables_result = await self.db.execute(
+            select(DataSourceTable)
+            .options(
+                selectinload(DataSourceTable.connection_table)
+                .selectinload(ConnectionTable.connection)
+            )
+            .where(DataSourceTable.datasource_id == ds_id)
+        )
+        items: List[Dict[str, Any]] = []
+        for t in ds_tables_result.scalars().all():
+            columns = [{"name": col.get("name"), "dtype": col.get("dtype", "unknown"), "description": col.get("description"), "metadata": col.get("metadata")} for col in (getattr(t, 'columns', []) or [])]
+
+            # Extract connection info
+            conn_id = None
+            conn_name = None
+            conn_type = None
+            if getattr(t, 'connection_table', None):
+                ct = t.connection_table
+                if getattr(ct, 'connection', None):
+                    conn_id = str(ct.connection.id)
+                    conn_name = ct.connection.name
+                    conn_type = ct.connection.type
+
+            items.append({
+                "name": getattr(t, 'name', ''),
+                "table_id": str(t.id) if getattr(t, 'id', None) else None,
+                "columns": columns,
+                "pks": getattr(t, 'pks', []) or [],
+                "fks": getattr(t, 'fks', []) or [],
+                "metadata_json": getattr(t, 'metadata_json', None),
+                "centrality_score": getattr(t, 'centrality_score', None),
+                "richness": getattr(t, 'richness', None),
+                "degree_in": getattr(t, 'degree_in', None),
+                "degree_out": getattr(t, 'degree_out', None),
+                "entity_like": getattr(t, 'entity_like', None),
+                "is_active": bool(getattr(t, 'is_active', False)),
+                "connection_id": conn_id,
+                "connection_name": conn_name,
+                "connection_type": conn_type,
+            })
+        return SchemaSnapshot(items)
+
+    async def _load_signals_snapshot(self, ds_id: str) -> SignalsSnapshot:
+        stats: Dict[str, SimpleNamespace] = {}
+        res = await self.db.execute(
+            select(TableStats).where(
+                TableStats.report_id == None,
+                TableStats.data_source_id == ds_id,
+            )
+        )
+        for s in res.scalars().all():
+            stats[(s.table_fqn or '').lower()] = SimpleNamespace(**{f: getattr(s, f) for f in _STATS_FIELDS})
+
+        # Batch-query instruction reference counts for all tables in this data source
+        instruction_ref_counts: Dict[str, int] = {}
+        try:
+            ref_count_result = await self.db.execute(
+                select(
+                    InstructionReference.object_id,
+                    func.count(InstructionReference.id)
+                ).where(
+                    and_(
+                        InstructionReference.object_type == 'datasource_table',
+                        InstructionReference.object_id.in_(
+                            select(DataSourceTable.id).where(DataSourceTable.datasource_id == ds_id)
+                        ),
+                        InstructionReference.deleted_at.is_(None),
+                    )
+                ).group_by(InstructionReference.object_id)
+            )
+            for object_id, count in ref_count_result.all():
+                instruction_ref_counts[str(object_id)] = count
+        except Exception:
+            pass  # Non-critical - continue without counts
+        return SignalsSnapshot(stats, instruction_ref_counts)
+
     # Backward-compatibility helpers (temporary; will be removed after full migration)
     async def get_data_source_count(self) -> int:
         data_sources = getattr(self.report, 'data_sources', []) or []
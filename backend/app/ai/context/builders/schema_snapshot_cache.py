@@ -0,0 +1,205 @@
+"""
+Schema Snapshot Cache - per data source snapshots used by SchemaContextBuilder.
+
+Hydrating every ``DataSourceTable`` (plus connection relationships), all
+``TableStats`` rows and instruction reference counts is the expensive part of
+building schema context, and it is repeated several times within a single
+agent turn. Snapshots hold plain, ORM-free copies of that data keyed by data
+source and are reused while their revision still matches.
+
+A revision is ``(local counter, database fingerprint)``:
+  - the local counter is bumped by ``invalidate()`` from the write paths in this
+    process (``save_or_update_tables``, stats upserts), and
+  - the fingerprint is a cheap ``count``/``max(updated_at)`` aggregate, so
+    writes made by other workers (or paths that do not call ``invalidate``)
+    are still picked up on the next build.
+"""
+import bisect
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+from app.ai.prompt_formatters import TableColumn as PromptTableColumn, ForeignKey as PromptForeignKey
+
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 300  # seconds; upper bound for changes the fingerprint cannot see (e.g. connection renames)
+
+# Characters that make a pattern more than a literal prefix
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+
+class SchemaSnapshot:
+    """Canonical (org-level) tables of one data source with a name index.
+
+    ``items`` are normalized dicts in the shape SchemaContextBuilder renders.
+    They are shared between builds and must be treated as read-only.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        self.items = items
+        self.by_name: Dict[str, Dict[str, Any]] = {item["name"]: item for item in items}
+        self._positions: Dict[str, List[int]] = {}
+        for i, item in enumerate(items):
+            self._positions.setdefault(item["name"], []).append(i)
+        self.sorted_names: List[str] = sorted(self._positions)
+        self._item_index: Dict[int, int] = {id(item): i for i, item in enumerate(items)}
+        self._prompt_parts: Dict[int, tuple] = {}
+
+    def select(self, table_names: Optional[Iterable[str]], name_patterns: Optional[Iterable[str]]) -> List[Dict[str, Any]]:
+        """Items matching the name filters, in their original order."""
+        names = self.match_names(table_names, name_patterns)
+        if names is None:
+            return self.items
+        positions = sorted(i for n in names for i in self._positions.get(n, ()))
+        return [self.items[i] for i in positions]
+
+    def match_names(self, table_names: Optional[Iterable[str]], name_patterns: Optional[Iterable[str]]) -> Optional[Set[str]]:
+        """Names matching any exact name or regex pattern; ``None`` means no filter.
+
+        Exact names are dict lookups and ``^literal`` patterns use a bisect over
+        the sorted names; other patterns fall back to a regex scan of the names.
+        """
+        name_set = set(table_names or [])
+        prefixes, patterns = _split_patterns(name_patterns)
+        if not name_set and not prefixes and not patterns:
+            return None
+        matched: Set[str] = {n for n in name_set if n in self._positions}
+        for prefix in prefixes:
+            matched.update(self._names_with_prefix(prefix))
+        for rp in patterns:
+            matched.update(n for n in self.sorted_names if rp.search(n))
+        return matched
+
+    def prompt_parts_for(self, item: Dict[str, Any]) -> tuple:
+        """``(columns, pks, fks)`` prompt models for ``item``, memoized for snapshot items."""
+        i = self._item_index.get(id(item))
+        if i is None or self.items[i] is not item:
+            return _prompt_parts(item)
+        parts = self._prompt_parts.get(i)
+        if parts is None:
+            parts = _prompt_parts(item)
+            self._prompt_parts[i] = parts
+        return parts
+
+    def _names_with_prefix(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.sorted_names, prefix)
+        names = []
+        for name in self.sorted_names[start:]:
+            if not name.startswith(prefix):
+                break
+            names.append(name)
+        return names
+
+
+class SignalsSnapshot:
+    """Usage stats (keyed by lowercase table name) and instruction reference counts."""
+
+    def __init__(self, stats: Dict[str, Any], instruction_ref_counts: Dict[str, int]):
+        self.stats = stats
+        self.instruction_ref_counts = instruction_ref_counts
+
+
+def _split_patterns(name_patterns: Optional[Iterable[str]]) -> tuple:
+    """Split patterns into literal ``^prefix`` strings and compiled regexes (invalid ones are dropped)."""
+    prefixes: List[str] = []
+    patterns = []
+    for p in (name_patterns or []):
+        if p and p.startswith("^") and not any(ch in _REGEX_META for ch in p[1:]):
+            prefixes.append(p[1:])
+            continue
+        try:
+            patterns.append(re.compile(p))
+        except Exception:
+            continue
+    return prefixes, patterns
+
+
+def name_matcher(table_names: Optional[Iterable[str]], name_patterns: Optional[Iterable[str]]) -> Callable[[str], bool]:
+    """Predicate for exact-name/regex filters; matches everything when no usable filter is given."""
+    name_set = set(table_names or [])
+    prefixes, patterns = _split_patterns(name_patterns)
+    if not name_set and not prefixes and not patterns:
+        return lambda n: True
+
+    def _match(n: str) -> bool:
+        n = n or ''
+        return n in name_set or any(n.startswith(p) for p in prefixes) or any(rp.search(n) for rp in patterns)
+    return _match
+
+
+def _prompt_parts(item: Dict[str, Any]) -> tuple:
+    columns = [
+        PromptTableColumn(name=c.get("name"), dtype=c.get("dtype"), description=c.get("description"), metadata=c.get("metadata"))
+        for c in (item.get("columns") or [])
+    ]
+    pks = [
+        PromptTableColumn(name=pk.get("name"), dtype=pk.get("dtype"))
+        for pk in (item.get("pks") or [])
+    ]
+    fks = [
+        PromptForeignKey(
+            column=PromptTableColumn(name=fk.get('column', {}).get('name'), dtype=fk.get('column', {}).get('dtype')),
+            references_name=fk.get('references_name'),
+            references_column=PromptTableColumn(name=fk.get('references_column', {}).get('name'), dtype=fk.get('references_column', {}).get('dtype')),
+        )
+        for fk in (item.get("fks") or [])
+    ]
+    return columns, pks, fks
+
+
+class SchemaSnapshotCache:
+    """Thread-safe LRU of schema and signals snapshots per data source."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._counters: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def local_revision(self, kind: str, data_source_id: str) -> int:
+        with self._lock:
+            return self._counters.get((kind, str(data_source_id)), 0)
+
+    def get(self, kind: str, data_source_id: str, revision: Hashable):
+        key = (kind, str(data_source_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cached_revision, created_at, snapshot = entry
+            if cached_revision != revision or (self.ttl and time.monotonic() - created_at > self.ttl):
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return snapshot
+
+    def put(self, kind: str, data_source_id: str, revision: Hashable, snapshot) -> None:
+        key = (kind, str(data_source_id))
+        with self._lock:
+            self._entries[key] = (revision, time.monotonic(), snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, data_source_id: str, *, schema: bool = True, signals: bool = True) -> None:
+        """Bump local revisions so the next build reloads from the database."""
+        kinds = [k for k, enabled in (("schema", schema), ("signals", signals)) if enabled]
+        with self._lock:
+            for kind in kinds:
+                key = (kind, str(data_source_id))
+                self._counters[key] = self._counters.get(key, 0) + 1
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+schema_snapshot_cache = SchemaSnapshotCache()
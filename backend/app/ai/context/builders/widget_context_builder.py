@@ -8,6 +8,7 @@ from sqlalchemy import select
 
 from app.models.widget import Widget
 from app.models.step import Step
+from app.services.step_data_store import step_data_store
 from app.ai.context.sections.widgets_section import WidgetsSection, WidgetObservation
 
 from app.settings.logging_config import get_logger
@@ -190,7 +191,7 @@ class WidgetContextBuilder:
                 
                 if "rows" in step.data and isinstance(step.data["rows"], list):
                     rows = step.data["rows"]
-                    observation_data["row_count"] = len(rows)
+                    observation_data["row_count"] = step_data_store.row_count(step.data)
                     observation_data["data"] = rows
                     
                     # Only include formatted preview if allowed and requested
@@ -288,7 +289,7 @@ class WidgetContextBuilder:
             
             # Get row count if available
             if step and step.data and isinstance(step.data, dict) and 'rows' in step.data:
-                row_count = len(step.data['rows'])
+                row_count = step_data_store.row_count(step.data)
             
             parts.append(f"  {i+1}. {widget.title} ({widget_type}) - {row_count} rows")
             parts.append(f"     Step: {step_title}")
@@ -17,6 +17,8 @@ class ResourcesSection(ContextSection):
         data_source_id: Optional[str] = None
         # Resources held as simple dicts with keys: name, type, path?, desc?
         resources: List[dict] = []
+        # Active resources in the repository when ``resources`` holds only a ranked sample + index
+        total: Optional[int] = None
 
         def _render_topk_resources_full(self, top_k: int) -> str:
             items: List[str] = []
@@ -49,8 +51,9 @@ class ResourcesSection(ContextSection):
                 # emit self-closing <item .../>
                 attrs_str = "".join(f' {k}="{xml_escape(str(v))}"' for k, v in attrs.items())
                 lines.append(f"<item{attrs_str}/>")
-            idx_attrs = {"count": str(len(all_items))}
-            if cap > 0 and len(all_items) > cap:
+            count = max(self.total or 0, len(all_items))
+            idx_attrs = {"count": str(count)}
+            if cap > 0 and count > min(cap, len(all_items)):
                 idx_attrs["truncated"] = "true"
             return xml_tag("index", "\n".join(lines), idx_attrs)
 
@@ -68,7 +71,7 @@ class ResourcesSection(ContextSection):
                 attrs["id"] = self.id
             if self.data_source_id:
                 attrs["data_source_id"] = self.data_source_id
-            attrs["total_resources"] = str(len(self.resources or []))
+            attrs["total_resources"] = str(self.total if self.total is not None else len(self.resources or []))
             return xml_tag(self.tag_name, "\n".join(parts), attrs)
 
     repositories: List[Repository] = []
@@ -0,0 +1,292 @@
+"""Record and replay of LLM client calls ("cassettes").
+
+While ``use_cassette(cassette)`` is active, every ``LLM`` created wraps its
+provider client in a ``CassetteClient``, so OpenAI, Anthropic, Google, Azure,
+Bedrock and custom providers are covered the same way:
+
+  - in ``record`` mode calls go to the real client, and the response text,
+    the stream chunks (with their arrival offsets) and the token usage are
+    appended to the cassette, which is written when the block exits;
+  - in ``replay`` mode no request is made. Responses are served from the
+    cassette with either the recorded chunk timing (scaled by ``time_scale``)
+    or a fixed one (``first_token_ms``, then ``token_ms`` per chunk or token).
+
+Interactions are matched on a fingerprint of provider, model id, prompt and
+images, with UUIDs and timestamps masked since they differ between runs. A
+call with no matching fingerprint takes the next unused interaction of the
+same kind, unless the cassette is ``strict``.
+
+``LLM`` instances created before the block started keep their real client.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional
+
+from app.ai.llm.clients.base import LLMClient
+from app.ai.llm.types import ImageInput, LLMResponse, LLMUsage
+
+
+CASSETTE_VERSION = 1
+MODES = ("record", "replay")
+TIMINGS = ("recorded", "fixed")
+PROMPT_PREVIEW_CHARS = 200
+
+_VOLATILE_PATTERNS = [
+    re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"),
+    re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"),
+    re.compile(r"\d{4}-\d{2}-\d{2}"),
+]
+
+
+class CassetteMiss(Exception):
+    """Raised in replay when no recorded interaction is left for a call."""
+    pass
+
+
+def prompt_fingerprint(provider: str, model_id: str, prompt: str, images: Optional[List[ImageInput]] = None) -> str:
+    """Stable key of a call; run-specific ids and timestamps in the prompt are masked."""
+    masked = prompt or ""
+    for pattern in _VOLATILE_PATTERNS:
+        masked = pattern.sub("<volatile>", masked)
+    digest = hashlib.sha256()
+    for part in (provider or "", model_id or "", masked):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    for image in images or []:
+        digest.update(hashlib.sha256((image.data or "").encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+class Cassette:
+    """Interactions of one recording, stored as JSON at ``path``."""
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        *,
+        timing: str = "recorded",
+        time_scale: float = 1.0,
+        first_token_ms: float = 0.0,
+        token_ms: float = 0.0,
+        strict: bool = False,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if timing not in TIMINGS:
+            raise ValueError(f"Unknown cassette timing: {timing}")
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self.time_scale = time_scale
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.strict = strict
+        self.interactions: List[Dict[str, Any]] = []
+        self._by_key: Dict[tuple, List[int]] = {}
+        self._used: set = set()
+        self._lock = threading.Lock()
+        self._stats = {"recorded": 0, "replayed": 0, "unmatched": 0}
+
+    def load(self) -> "Cassette":
+        """Read the recording from ``path`` (replay mode); a missing file raises FileNotFoundError."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            self.interactions = list(data.get("interactions") or [])
+            self._by_key = {}
+            self._used = set()
+            for position, interaction in enumerate(self.interactions):
+                key = (interaction.get("kind"), interaction.get("fingerprint"))
+                self._by_key.setdefault(key, []).append(position)
+        return self
+
+    def rewind(self) -> None:
+        """Make every interaction available again, e.g. to replay the recording for another round."""
+        with self._lock:
+            self._used = set()
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "interactions": list(self.interactions)}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+
+    def record(self, interaction: Dict[str, Any]) -> None:
+        with self._lock:
+            self.interactions.append(interaction)
+            self._stats["recorded"] += 1
+
+    def next_interaction(self, kind: str, fingerprint: str) -> Dict[str, Any]:
+        """Oldest unused interaction with this fingerprint, else (unless strict) of this kind."""
+        with self._lock:
+            for position in self._by_key.get((kind, fingerprint), ()):
+                if position not in self._used:
+                    return self._take(position)
+            if not self.strict:
+                for position, interaction in enumerate(self.interactions):
+                    if position not in self._used and interaction.get("kind") == kind:
+                        self._stats["unmatched"] += 1
+                        return self._take(position)
+        raise CassetteMiss(f"No recorded {kind} interaction left in {self.path} for fingerprint {fingerprint[:12]}")
+
+    def response_delay(self, interaction: Dict[str, Any]) -> float:
+        """Seconds to wait before returning a non-streamed response."""
+        if self.timing == "fixed":
+            tokens = (interaction.get("usage") or {}).get("completion_tokens") or 0
+            return (self.first_token_ms + self.token_ms * tokens) / 1000.0
+        return max(0.0, float(interaction.get("latency_ms") or 0.0)) * self.time_scale / 1000.0
+
+    def chunk_delays(self, interaction: Dict[str, Any]) -> List[float]:
+        """Seconds to wait before each streamed chunk."""
+        chunks = interaction.get("chunks") or []
+        if self.timing == "fixed":
+            return [(self.first_token_ms if i == 0 else self.token_ms) / 1000.0 for i in range(len(chunks))]
+        delays = []
+        previous = 0.0
+        for offset_ms, _ in chunks:
+            delays.append(max(0.0, offset_ms - previous) * self.time_scale / 1000.0)
+            previous = max(previous, offset_ms)
+        return delays
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, interactions=len(self.interactions), unused=len(self.interactions) - len(self._used))
+
+    def _take(self, position: int) -> Dict[str, Any]:
+        self._used.add(position)
+        self._stats["replayed"] += 1
+        return self.interactions[position]
+
+
+def _usage_dict(usage: Optional[LLMUsage]) -> Dict[str, int]:
+    usage = usage or LLMUsage()
+    return {"prompt_tokens": usage.prompt_tokens or 0, "completion_tokens": usage.completion_tokens or 0}
+
+
+class CassetteClient(LLMClient):
+    """Provider client wrapper that records to, or replays from, a cassette."""
+
+    def __init__(self, client: LLMClient, provider: str, cassette: Cassette):
+        super().__init__()
+        self.client = client
+        self.provider = provider
+        self.cassette = cassette
+
+    def __getattr__(self, name: str) -> Any:
+        # Anything besides inference (e.g. provider-specific helpers) goes to the real client
+        client = self.__dict__.get("client")
+        if client is None:
+            raise AttributeError(name)
+        return getattr(client, name)
+
+    def inference(self, model_id: str, prompt: str, images: Optional[list[ImageInput]] = None) -> LLMResponse:
+        fingerprint = prompt_fingerprint(self.provider, model_id, prompt, images)
+        if self.cassette.mode == "replay":
+            interaction = self.cassette.next_interaction("inference", fingerprint)
+            delay = self.cassette.response_delay(interaction)
+            if delay > 0:
+                time.sleep(delay)
+            usage = LLMUsage(**(interaction.get("usage") or {}))
+            self._set_last_usage(usage)
+            return LLMResponse(text=interaction.get("text") or "", usage=usage)
+
+        started = time.monotonic()
+        response = self.client.inference(model_id=model_id, prompt=prompt, images=images)
+        latency_ms = (time.monotonic() - started) * 1000.0
+        if isinstance(response, LLMResponse):
+            text, usage = response.text, response.usage
+        else:
+            text, usage = str(response or ""), None
+        if not usage or not (usage.prompt_tokens or usage.completion_tokens):
+            usage = self.client.pop_last_usage()
+        self.cassette.record(self._interaction("inference", fingerprint, model_id, prompt, usage, text=text, latency_ms=round(latency_ms, 2)))
+        self._set_last_usage(usage)
+        return LLMResponse(text=text, usage=usage)
+
+    async def inference_stream(
+        self, model_id: str, prompt: str, images: Optional[list[ImageInput]] = None
+    ) -> AsyncGenerator[str, None]:
+        fingerprint = prompt_fingerprint(self.provider, model_id, prompt, images)
+        if self.cassette.mode == "replay":
+            interaction = self.cassette.next_interaction("stream", fingerprint)
+            for delay, (_, chunk) in zip(self.cassette.chunk_delays(interaction), interaction.get("chunks") or []):
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield chunk
+            self._set_last_usage(LLMUsage(**(interaction.get("usage") or {})))
+            return
+
+        started = time.monotonic()
+        chunks: List[list] = []
+        failed = False
+        try:
+            async for chunk in self.client.inference_stream(model_id=model_id, prompt=prompt, images=images):
+                if chunk is not None:
+                    chunks.append([round((time.monotonic() - started) * 1000.0, 2), str(chunk)])
+                yield chunk
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # Streams the consumer stopped early are kept as they were observed
+            if not failed:
+                usage = self.client.pop_last_usage()
+                self._set_last_usage(usage)
+                latency_ms = round((time.monotonic() - started) * 1000.0, 2)
+                self.cassette.record(self._interaction("stream", fingerprint, model_id, prompt, usage, chunks=chunks, latency_ms=latency_ms))
+
+    def _interaction(self, kind: str, fingerprint: str, model_id: str, prompt: str, usage: LLMUsage, **fields: Any) -> Dict[str, Any]:
+        return {
+            "kind": kind,
+            "fingerprint": fingerprint,
+            "provider": self.provider,
+            "model_id": model_id,
+            "prompt_preview": (prompt or "")[:PROMPT_PREVIEW_CHARS],
+            "usage": _usage_dict(usage),
+            **fields,
+        }
+
+
+_active_cassette: Optional[Cassette] = None
+_active_lock = threading.Lock()
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active_cassette
+
+
+@contextmanager
+def use_cassette(cassette: Cassette) -> Iterator[Cassette]:
+    """Route clients of ``LLM`` instances created inside the block through ``cassette``.
+
+    Process-wide rather than per context, since agent runs happen in
+    background tasks and worker threads. A recording is saved on exit.
+    """
+    global _active_cassette
+    with _active_lock:
+        previous, _active_cassette = _active_cassette, cassette
+    try:
+        yield cassette
+    finally:
+        with _active_lock:
+            _active_cassette = previous
+        if cassette.mode == "record":
+            cassette.save()
+
+
+def wrap_client(client: LLMClient, provider: str) -> LLMClient:
+    """``client`` wrapped for the active cassette, or unchanged when none is active."""
+    cassette = _active_cassette
+    if cassette is None:
+        return client
+    return CassetteClient(client, provider, cassette)
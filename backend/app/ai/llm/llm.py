@@ -8,6 +8,7 @@ from .clients.anthropic_client import Anthropic
 from .clients.azure_client import AzureClient
 from .clients.bedrock_client import BedrockClient
 from .types import LLMResponse, LLMUsage, ImageInput
+from .cassette import wrap_client
 from app.ai.utils.token_counter import count_tokens
 from app.models.llm_model import LLMModel
 from app.services.llm_usage_recorder import LLMUsageRecorderService
@@ -84,6 +85,8 @@ class LLM:
             )
         else:
             raise ValueError(f"Provider {self.provider} not supported")
+        # Recorded/replayed when a cassette is active (benchmarks); unchanged otherwise
+        self.client = wrap_client(self.client, self.provider)
 
     def _validate_vision_support(self, images: Optional[list[ImageInput]]) -> None:
         """Validate that the model supports vision if images are provided."""
@@ -38,6 +38,7 @@ from app.models.artifact import Artifact
 from app.models.visualization import Visualization
 from app.dependencies import async_session_maker
 from app.services.thumbnail_service import ThumbnailService
+from app.services.browser_pool import BrowserPoolUnavailable, browser_pool, wait_until_ready
 from app.services.artifact_libs import get_inline_scripts
 from app.ai.code_execution.pptx_executor import PptxCodeExecutor, PptxPreviewService
 from sqlalchemy import desc
@@ -363,15 +364,6 @@ class CreateArtifactTool(Tool):
         Returns:
             ValidationResult with success status, errors, and optional screenshot
         """
-        try:
-            from playwright.async_api import async_playwright
-        except ImportError:
-            logger.warning("Playwright not installed, skipping artifact validation")
-            return ValidationResult(
-                success=True,
-                errors=["Playwright not installed - validation skipped"]
-            )
-
         # Build the artifact data structure
         artifact_data = {
             "report": {
@@ -389,10 +381,7 @@ class CreateArtifactTool(Tool):
         screenshot_base64: Optional[str] = None
 
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page(viewport={"width": 1280, "height": 720})
-
+            async with browser_pool.page({"width": 1280, "height": 720}) as page:
                 # Capture console errors
                 def handle_console(msg):
                     if msg.type == "error":
@@ -409,17 +398,9 @@ class CreateArtifactTool(Tool):
                 # Load the HTML content directly (no network request needed)
                 await page.set_content(html, wait_until="networkidle")
 
-                # Wait for smart render detection to signal completion
-                try:
-                    await page.wait_for_function(
-                        "window.__ARTIFACT_RENDER_COMPLETE__ === true",
-                        timeout=20000
-                    )
-                except Exception as e:
-                    errors.append(f"Render timeout: {str(e)}")
-
-                # Small buffer for any final paint
-                await asyncio.sleep(0.5)
+                # Wait for smart render detection to signal completion, then for the final paint
+                if not await wait_until_ready(page, timeout=20):
+                    errors.append("Render timeout: artifact did not signal render completion within 20s")
 
                 # Collect any errors captured by our error handlers
                 captured_errors = await page.evaluate("window.__ARTIFACT_ERRORS__")
@@ -434,8 +415,12 @@ class CreateArtifactTool(Tool):
                     screenshot_bytes = await page.screenshot(type="png", full_page=False)
                     screenshot_base64 = base64.b64encode(screenshot_bytes).decode("utf-8")
 
-                await browser.close()
-
+        except BrowserPoolUnavailable:
+            logger.warning("Playwright not installed, skipping artifact validation")
+            return ValidationResult(
+                success=True,
+                errors=["Playwright not installed - validation skipped"]
+            )
         except Exception as e:
             logger.exception("Error during artifact validation")
             errors.append(f"Validation error: {str(e)}")
@@ -937,7 +922,8 @@ Fix these errors while keeping the same design and functionality. Output the cor
 
                 # Generate preview images
                 preview_service = PptxPreviewService(logger=logger)
-                preview_images = preview_service.generate_previews(
+                preview_images = await asyncio.to_thread(
+                    preview_service.generate_previews,
                     pptx_path=result_path,
                     artifact_id=str(artifact.id),
                 )
@@ -850,7 +850,13 @@ Do NOT use generic placeholders like "value" unless that's the actual column nam
             context_hub=context_hub,
             usage_session_maker=async_session_maker,
         )
-        streamer = StreamingCodeExecutor(organization_settings=organization_settings, logger=None, context_hub=context_hub)
+        organization = runtime_ctx.get("organization")
+        streamer = StreamingCodeExecutor(
+            organization_settings=organization_settings,
+            logger=None,
+            context_hub=context_hub,
+            organization_id=getattr(organization, "id", None),
+        )
 
         # Build typed context via helper (use resolved active tables, not original patterns)
         codegen_context = await build_codegen_context(
@@ -344,7 +344,13 @@ CRITICAL:
             context_hub=context_hub,
             usage_session_maker=async_session_maker,
         )
-        streamer = StreamingCodeExecutor(organization_settings=organization_settings, logger=None, context_hub=context_hub)
+        organization = runtime_ctx.get("organization")
+        streamer = StreamingCodeExecutor(
+            organization_settings=organization_settings,
+            logger=None,
+            context_hub=context_hub,
+            organization_id=getattr(organization, "id", None),
+        )
 
         context_view = runtime_ctx.get("context_view")
         schemas_section = getattr(context_view.static, "schemas", None) if context_view else None
@@ -308,16 +308,20 @@ class DescribeEntityTool(Tool):
                     except Exception as e:
                         errors.append(f"Failed to connect to {ds.name}: {str(e)}")
 
-                executor = StreamingCodeExecutor(organization_settings=organization_settings)
+                executor = StreamingCodeExecutor(
+                    organization_settings=organization_settings,
+                    organization_id=entity.organization_id,
+                )
                 code_to_run = entity.code or ""
 
                 if not code_to_run.strip():
                     errors.append("Entity has no code to execute")
                 else:
-                    exec_df, execution_log, _ = executor.execute_code(
+                    exec_df, execution_log, _ = await executor.execute_code_async(
                         code=code_to_run,
                         ds_clients=ds_clients,
                         excel_files=[],
+                        sigkill_event=runtime_ctx.get("sigkill_event"),
                     )
                     entity_data = executor.format_df_for_widget(exec_df)
 
@@ -149,7 +149,8 @@ Don't use on images
         streamer = StreamingCodeExecutor(
             organization_settings=organization_settings, 
             logger=None, 
-            context_hub=context_hub
+            context_hub=context_hub,
+            organization_id=getattr(runtime_ctx.get("organization"), "id", None),
         )
 
         # Wrap generate_inspection_code to match the signature expected by streamer
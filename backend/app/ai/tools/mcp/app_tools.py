@@ -11,6 +11,7 @@ from typing import Dict, Any, List, Optional
 from sqlalchemy import select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from app.services.step_data_store import step_data_store
 
 from app.ai.tools.mcp.base import MCPTool
 from app.models.user import User
@@ -85,6 +86,8 @@ class GetVisualizationMCPTool(MCPTool):
             if not step and viz.query.steps:
                 step = viz.query.steps[-1]
 
+        step_data = step_data_store.hydrate(step.data or {}) if step else {}
+
         # Build response matching ToolWidgetPreview data shape
         return {
             "id": str(viz.id),
@@ -92,8 +95,8 @@ class GetVisualizationMCPTool(MCPTool):
             "view": viz.view or {},
             "code": step.code if step else "",
             "data": {
-                "rows": (step.data or {}).get("rows", []) if step else [],
-                "columns": (step.data or {}).get("columns", []) if step else [],
+                "rows": step_data.get("rows", []),
+                "columns": step_data.get("columns", []),
             },
             "data_model": step.data_model if step else {},
             "step_status": step.status if step else None,
@@ -180,12 +183,13 @@ class GetArtifactDataMCPTool(MCPTool):
                 if viz_ids and str(viz.id) not in viz_ids:
                     continue
 
+                step_data = step_data_store.hydrate(step.data or {}) if step else {}
                 visualizations.append({
                     "id": str(viz.id),
                     "title": viz.title or query.title or "Untitled",
                     "view": viz.view or {},
-                    "rows": (step.data or {}).get("rows", []) if step else [],
-                    "columns": (step.data or {}).get("columns", []) if step else [],
+                    "rows": step_data.get("rows", []),
+                    "columns": step_data.get("columns", []),
                     "dataModel": step.data_model or {} if step else {},
                     "stepStatus": step.status if step else None,
                 })
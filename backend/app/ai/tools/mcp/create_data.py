@@ -147,6 +147,7 @@ class CreateDataMCPTool(MCPTool):
             organization_settings=rich_ctx.org_settings,
             logger=None,
             context_hub=rich_ctx.context_hub,
+            organization_id=organization.id,
         )
 
         # Execute code generation
@@ -161,6 +161,7 @@ class InspectDataMCPTool(MCPTool):
             organization_settings=rich_ctx.org_settings,
             logger=None,
             context_hub=rich_ctx.context_hub,
+            organization_id=organization.id,
         )
         
         # Wrap generate_inspection_code
@@ -0,0 +1,232 @@
+"""Short-lived, per-process cache of API key and membership lookups.
+
+Every API-key request used to hash the key, select the key row, write
+``last_used_at`` in its own transaction and select the user; every
+``requires_permission`` check then selected the caller's ``Membership``.
+Integrations calling thousands of times a minute paid for all of that on each
+call. Resolved keys (user + organization) and membership roles are now kept
+for a few seconds, and ``last_used_at`` writes are buffered and flushed in one
+bulk UPDATE by a scheduler job.
+
+Cached ORM objects are loaded in a throwaway session, so they are detached and
+never mutated by a request; callers attach a copy to their own session with
+``merge(load=False)``, which emits no SQL. Entries are dropped explicitly when a
+key is revoked or a membership changes on this worker; other workers see the
+change once the TTL runs out.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TTL = 30  # seconds
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+@dataclass
+class ApiKeyEntry:
+    api_key_id: str
+    user: Any
+    organization: Any
+    expires_at: Optional[datetime]
+    cached_at: float = field(default_factory=time.monotonic)
+
+    def is_expired(self) -> bool:
+        return bool(self.expires_at and self.expires_at < datetime.utcnow())
+
+
+class _TTLCache:
+    """Bounded LRU whose entries go stale ``ttl`` seconds after insertion."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        stored_at, value = item
+        if time.monotonic() - stored_at > self.ttl:
+            self._items.pop(key, None)
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._items[key] = (time.monotonic(), value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Any:
+        item = self._items.pop(key, None)
+        return item[1] if item else None
+
+    def pop_where(self, predicate) -> int:
+        keys = [k for k, (_, v) in self._items.items() if predicate(k, v)]
+        for k in keys:
+            del self._items[k]
+        return len(keys)
+
+    def evict_expired(self) -> int:
+        now = time.monotonic()
+        keys = [k for k, (stored_at, _) in self._items.items() if now - stored_at > self.ttl]
+        for k in keys:
+            del self._items[k]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class AuthCache:
+    """API key → user/organization and (user, organization) → role lookups.
+
+    Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.enabled = enabled
+        self._api_keys = _TTLCache(ttl, max_entries)
+        self._roles = _TTLCache(ttl, max_entries)
+        self._last_used: Dict[str, datetime] = {}
+
+    def configure(self, enabled: Optional[bool] = None, ttl: Optional[float] = None,
+                  max_entries: Optional[int] = None, **_ignored) -> None:
+        if enabled is not None:
+            self.enabled = enabled
+        for cache in (self._api_keys, self._roles):
+            if ttl is not None:
+                cache.ttl = ttl
+            if max_entries is not None:
+                cache.max_entries = max_entries
+        self.clear()
+
+    # API keys
+
+    def get_api_key(self, key_hash: str) -> Optional[ApiKeyEntry]:
+        if not self.enabled:
+            return None
+        return self._api_keys.get(key_hash)
+
+    def put_api_key(self, key_hash: str, entry: ApiKeyEntry) -> None:
+        if self.enabled:
+            self._api_keys.put(key_hash, entry)
+
+    def invalidate_api_key(self, api_key_id: str) -> None:
+        self._api_keys.pop_where(lambda _, entry: entry.api_key_id == api_key_id)
+        self._last_used.pop(str(api_key_id), None)
+
+    # Memberships
+
+    def get_role(self, user_id: str, organization_id: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        return self._roles.get((str(user_id), str(organization_id)))
+
+    def put_role(self, user_id: str, organization_id: str, role: str) -> None:
+        if self.enabled:
+            self._roles.put((str(user_id), str(organization_id)), role)
+
+    def invalidate_membership(self, user_id: Optional[str], organization_id: str) -> None:
+        if user_id is not None:
+            self._roles.pop((str(user_id), str(organization_id)))
+
+    # last_used_at buffering
+
+    def touch(self, api_key_id: str) -> None:
+        self._last_used[str(api_key_id)] = datetime.utcnow()
+
+    def take_last_used(self) -> Dict[str, datetime]:
+        pending, self._last_used = self._last_used, {}
+        return pending
+
+    def restore_last_used(self, pending: Dict[str, datetime]) -> None:
+        """Put back timestamps from a failed flush without clobbering newer ones."""
+        for key_id, used_at in pending.items():
+            current = self._last_used.get(key_id)
+            if current is None or current < used_at:
+                self._last_used[key_id] = used_at
+
+    def evict_expired(self) -> int:
+        return self._api_keys.evict_expired() + self._roles.evict_expired()
+
+    def clear(self) -> None:
+        self._api_keys.clear()
+        self._roles.clear()
+
+
+auth_cache = AuthCache()
+
+
+async def get_membership_role(db: AsyncSession, user_id: str, organization_id: str) -> Optional[str]:
+    """Role of ``user_id`` in ``organization_id``, or None if not a member.
+
+    Only positive lookups are cached, so a freshly accepted invite is visible
+    on the next request.
+    """
+    role = auth_cache.get_role(user_id, organization_id)
+    if role is not None:
+        return role
+
+    from app.models.membership import Membership
+
+    result = await db.execute(
+        select(Membership.role).where(
+            Membership.user_id == user_id,
+            Membership.organization_id == organization_id,
+        )
+    )
+    role = result.scalar_one_or_none()
+    if role is not None:
+        auth_cache.put_role(user_id, organization_id, role)
+    return role
+
+
+async def flush_api_key_last_used(session_maker=None) -> int:
+    """Scheduler entrypoint: write buffered ``last_used_at`` values in one bulk UPDATE."""
+    pending = auth_cache.take_last_used()
+    if not pending:
+        return 0
+
+    from app.models.api_key import ApiKey
+
+    if session_maker is None:
+        from app.dependencies import async_session_maker as session_maker
+
+    try:
+        async with session_maker() as session:
+            await session.execute(
+                update(ApiKey),
+                [{"id": key_id, "last_used_at": used_at} for key_id, used_at in pending.items()],
+            )
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Failed to flush API key last_used_at: {e}")
+        auth_cache.restore_last_used(pending)
+        return 0
+    return len(pending)
+
+
+def evict_expired_auth_cache() -> int:
+    """Scheduler job: drop expired API key and membership role lookups from this worker's cache."""
+    return auth_cache.evict_expired()
@@ -3,7 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from functools import wraps
 from inspect import signature
-from app.models.membership import Membership, ROLES_PERMISSIONS
+from app.models.membership import ROLES_PERMISSIONS
+from app.core.auth_cache import get_membership_role
 from app.models.instruction import Instruction
 from app.settings.config import settings
 
@@ -52,14 +53,9 @@ def requires_permission(permission, model=None, owner_only=False, allow_public=F
                 raise HTTPException(status_code=400, detail="Missing required parameters")
 
             # Check user membership and role in organization
-            stmt = select(Membership).where(
-                Membership.user_id == user.id,
-                Membership.organization_id == organization.id
-            )
-            result = await db.execute(stmt)
-            membership = result.scalar_one_or_none()
-
-            if not membership:
+            role = await get_membership_role(db, user.id, organization.id)
+
+            if role is None:
                 raise HTTPException(status_code=403, detail="User is not a member of this organization")
 
             # If model is provided and object_id exists and is not None and is a valid UUID-like string, verify object belongs to organization
@@ -90,7 +86,7 @@ def requires_permission(permission, model=None, owner_only=False, allow_public=F
                         raise HTTPException(status_code=500, detail="Object does not support ownership checks")
 
             # Check role-based permission, with special-case for Instruction owner updates on unpublished
-            has_role_permission = permission in ROLES_PERMISSIONS.get(membership.role, set())
+            has_role_permission = permission in ROLES_PERMISSIONS.get(role, set())
             if not has_role_permission:
                 # Special owner allowance: Instruction owner may modify/delete when not published
                 if isinstance(obj, Instruction):
@@ -142,18 +138,13 @@ def requires_data_source_access(permission, allow_public=False, membership_requi
                 raise HTTPException(status_code=403, detail="User is not verified")
 
             # Check user membership and role in organization
-            stmt = select(Membership).where(
-                Membership.user_id == user.id,
-                Membership.organization_id == organization.id
-            )
-            result = await db.execute(stmt)
-            membership = result.scalar_one_or_none()
-
-            if not membership:
+            role = await get_membership_role(db, user.id, organization.id)
+
+            if role is None:
                 raise HTTPException(status_code=403, detail="User is not a member of this organization")
 
             # Check role-based permission
-            if permission not in ROLES_PERMISSIONS.get(membership.role, set()):
+            if permission not in ROLES_PERMISSIONS.get(role, set()):
                 raise HTTPException(status_code=403, detail="Permission denied")
 
             # If data_source_id is provided, check data source specific access
@@ -175,7 +166,7 @@ def requires_data_source_access(permission, allow_public=False, membership_requi
                 
                 # Check if user has admin-level permissions (update_data_source or manage_data_source_memberships)
                 # Admins can access all data sources in their org
-                is_admin = "update_data_source" in ROLES_PERMISSIONS.get(membership.role, set())
+                is_admin = "update_data_source" in ROLES_PERMISSIONS.get(role, set())
                 
                 # If data source is public and allow_public flag is set
                 if allow_public and data_source.is_public:
@@ -1,4 +1,5 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from app.settings.database import create_database_engine
 
@@ -8,8 +9,13 @@ jobstore = SQLAlchemyJobStore(
     tablename='apscheduler_jobs'
 )
 
+# Jobs that act on per-worker state (in-process caches, buffers) must run in
+# every worker, so they are kept out of the shared database job store.
+LOCAL_JOBSTORE = 'local'
+
 scheduler = AsyncIOScheduler(
     jobstores={
-        'default': jobstore
+        'default': jobstore,
+        LOCAL_JOBSTORE: MemoryJobStore(),
     }
 )
@@ -78,6 +78,8 @@ def log_before_retry(retry_state) -> None:
     logger.info("Retrying %s (attempt %d)", retry_state.fn.__name__, retry_state.attempt_number)
 
 class AwsRedshiftClient(DataSourceClient):
+    limit_pushdown = True
+
     def __init__(
         self,
         host: str,
@@ -1,14 +1,61 @@
 from abc import ABC, abstractmethod
 
+from app.data_sources.clients.fetch_guard import current_budget, read_sql_bounded
+
+
+def arrow_to_pandas(table, decimals_as_float: bool = False):
+    """Convert an Arrow result table to a DataFrame.
+
+    Numeric and temporal columns become NumPy-backed blocks without creating a
+    Python object per value. Buffers are released as columns are converted, so
+    ``table`` must not be used afterwards. ``decimals_as_float`` casts decimal
+    columns to float64 (what ``read_sql(coerce_float=True)`` produces) instead
+    of ``Decimal`` objects.
+    """
+    if decimals_as_float:
+        import pyarrow as pa
+
+        for i, field in enumerate(table.schema):
+            if pa.types.is_decimal(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
 
 class DataSourceClient(ABC):
 
+    # Identifier of the owning connection, set by the service layer when the
+    # client is constructed. Pooled resources (engines, sessions) are scoped to
+    # it so they can be invalidated when the connection is edited.
+    engine_scope = None
+    # Whose credentials the client runs with ("system" or "user:<id>") and the
+    # connection's ``query_cache`` config; cached query results are keyed by
+    # both so per-user credentials never share results.
+    credential_scope = "system"
+    query_cache_policy = None
+    # Clients whose driver has a columnar fetch (Snowflake, Databricks,
+    # ClickHouse) read results as Arrow instead of Python rows; connections can
+    # set ``"arrow_fetch": false`` in their config to use the row path.
+    arrow_fetch = True
+    # Whether the dialect accepts a trailing ``LIMIT n``, so guarded queries
+    # (see fetch_guard) can have their row budget pushed down to the server.
+    limit_pushdown = False
+
     def __init__(self):
         pass
 
     def connect(self):
         pass
 
+    def read_sql(self, conn, sql: str):
+        """``pd.read_sql`` for SQLAlchemy connections, bounded when a fetch budget is active."""
+        import pandas as pd
+        from sqlalchemy import text
+
+        budget = current_budget()
+        if budget is not None:
+            return read_sql_bounded(conn, sql, budget)
+        return pd.read_sql(text(sql), conn)
+
     @property
     @abstractmethod
     def description(self):
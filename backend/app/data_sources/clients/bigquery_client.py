@@ -12,6 +12,8 @@ from contextlib import contextmanager
 
 
 class BigqueryClient(DataSourceClient):
+    limit_pushdown = True
+
     def __init__(self, project_id, credentials_json, dataset, maximum_bytes_billed: Optional[int] = None, use_query_cache: bool = False):
         self.project_id = project_id
         self.credentials_json = credentials_json
@@ -1,4 +1,5 @@
-from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.clients.base import DataSourceClient, arrow_to_pandas
+from app.data_sources.clients.fetch_guard import current_budget, read_arrow_batches
 
 import pandas as pd
 import clickhouse_connect
@@ -9,6 +10,8 @@ from contextlib import contextmanager
 
 
 class ClickhouseClient(DataSourceClient):
+    limit_pushdown = True
+
     def __init__(self, host, port, user, password, database, secure=True):
         self.host = host
         self.port = port
@@ -54,7 +57,19 @@ class ClickhouseClient(DataSourceClient):
         """Run SQL statement and return the result as a DataFrame."""
         try:
             with self.connect() as conn:
-                result = conn.query(sql)
+                budget = current_budget()
+                if self.arrow_fetch:
+                    # Native Arrow output format; strings decoded server-side rather than as bytes
+                    if budget is not None:
+                        with conn.query_arrow_stream(sql, use_strings=True) as stream:
+                            table = read_arrow_batches(stream, budget)
+                        return arrow_to_pandas(table)
+                    return arrow_to_pandas(conn.query_arrow(sql, use_strings=True))
+                if budget is not None and budget.max_rows:
+                    # Server stops producing blocks once the limit is reached
+                    result = conn.query(sql, settings={"max_result_rows": budget.max_rows + 1, "result_overflow_mode": "break"})
+                else:
+                    result = conn.query(sql)
                 df = pd.DataFrame(result.result_set, columns=result.column_names)
                 return df
         except Exception as e:
@@ -1,4 +1,5 @@
-from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.clients.base import DataSourceClient, arrow_to_pandas
+from app.data_sources.clients.fetch_guard import current_budget, fetchmany_batches, read_arrow_batches, read_rows_bounded
 
 import pandas as pd
 from contextlib import contextmanager
@@ -13,6 +14,8 @@ from databricks import sql as databricks_sql
 class DatabricksSqlClient(DataSourceClient):
     """Client for Databricks SQL Warehouse connections."""
 
+    limit_pushdown = True
+
     def __init__(
         self,
         server_hostname: str,
@@ -72,11 +75,21 @@ class DatabricksSqlClient(DataSourceClient):
             with self.connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute(sql)
+                budget = current_budget()
+                if self.arrow_fetch and cursor.description:
+                    if budget is not None:
+                        table = read_arrow_batches(fetchmany_batches(cursor.fetchmany_arrow, budget.batch_size), budget)
+                    else:
+                        table = cursor.fetchall_arrow()
+                    cursor.close()
+                    return arrow_to_pandas(table)
                 # Fetch column names from cursor description
                 columns = [desc[0] for desc in cursor.description] if cursor.description else []
-                rows = cursor.fetchall()
+                if budget is not None:
+                    df = read_rows_bounded(cursor.fetchmany, columns, budget)
+                else:
+                    df = pd.DataFrame(cursor.fetchall(), columns=columns)
                 cursor.close()
-                df = pd.DataFrame(rows, columns=columns)
             return df
         except Exception as e:
             print(f"Error executing SQL: {e}")
@@ -1,14 +1,25 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.clients.duckdb_session_cache import duckdb_session_cache, WarmDuckDBSession
+from app.data_sources.clients.fetch_guard import current_budget, fetchmany_batches, frame_nbytes
 
 import duckdb
+import glob
+import hashlib
+import os
+import uuid
 import pandas as pd
 from contextlib import contextmanager
 from typing import Generator, List
 from app.ai.prompt_formatters import Table, TableColumn, TableFormatter
 import urllib.parse
 
+REMOTE_SCHEMES = ("s3://", "s3a://", "gs://", "gcs://", "az://", "azure://", "abfss://", "wasbs://", "http://", "https://", "hf://")
+MATERIALIZE_MODES = ("auto", "none", "memory", "file")
+
 
 class DuckDBClient(DataSourceClient):
+    limit_pushdown = True
+
     def __init__(self,
                  uris: str | None = None,
                  database: str | None = None,
@@ -22,6 +33,8 @@ class DuckDBClient(DataSourceClient):
                  service_account_json: str | None = None,
                  # azure
                  connection_string: str | None = None,
+                 # none | memory | file | auto (memory when every URI is a local file)
+                 materialize: str | None = None,
                  ):
         self.uris_raw = uris or ""
         self.database = database  # Path to local .duckdb file
@@ -35,8 +48,9 @@ class DuckDBClient(DataSourceClient):
         # normalize list of URI patterns (one per line)
         self.uri_patterns: List[str] = [u.strip() for u in (self.uris_raw.splitlines() if self.uris_raw else []) if u.strip()]
 
-        # in-memory connection is fine; each connect() manages its own handle
-        self._con: duckdb.DuckDBPyConnection | None = None
+        self.materialize = (materialize or "auto").lower()
+        if self.materialize not in MATERIALIZE_MODES:
+            raise ValueError(f"Unsupported materialize mode: {materialize}")
 
     def _sql_literal(self, value: str | None) -> str:
         if value is None:
@@ -47,9 +61,6 @@ class DuckDBClient(DataSourceClient):
     def _configure_httpfs(self, con: duckdb.DuckDBPyConnection) -> None:
         con.execute("INSTALL httpfs;")
         con.execute("LOAD httpfs;")
-        # Prefer path-style addressing to avoid some bucket policy issues
-        con.execute("SET s3_url_style='path';")
-        con.execute("SET s3_use_ssl=true;")
         # Azure support (ADLS/Blob)
         try:
             con.execute("INSTALL azure;")
@@ -58,6 +69,13 @@ class DuckDBClient(DataSourceClient):
         except Exception:
             # Ignore if azure extension is unavailable in this build
             pass
+        self._apply_remote_settings(con)
+
+    def _apply_remote_settings(self, con: duckdb.DuckDBPyConnection) -> None:
+        """Apply object-store settings; cheap enough to re-run on every cursor."""
+        # Prefer path-style addressing to avoid some bucket policy issues
+        con.execute("SET s3_url_style='path';")
+        con.execute("SET s3_use_ssl=true;")
 
         # AWS
         if self.access_key and self.secret_key:
@@ -118,7 +136,7 @@ class DuckDBClient(DataSourceClient):
             return filename[match.end():]
         return filename
 
-    def _create_views(self, con: duckdb.DuckDBPyConnection) -> List[str]:
+    def _create_views(self, con: duckdb.DuckDBPyConnection, materialize: bool = False) -> List[str]:
         created: List[str] = []
         used: set[str] = set()
         import os
@@ -139,11 +157,13 @@ class DuckDBClient(DataSourceClient):
                 candidate = self._strip_upload_prefix(candidate)
             view = self._safe_view_name(candidate, used)
             lower = normalized.lower()
+            # Materialized relations are scanned (and CSV-sniffed) once, at session build
+            kind = "TABLE" if materialize else "VIEW"
             if lower.endswith(".parquet") or ".parquet" in lower:
-                con.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM read_parquet({self._sql_literal(normalized)})")
+                con.execute(f"CREATE OR REPLACE {kind} {view} AS SELECT * FROM read_parquet({self._sql_literal(normalized)})")
             else:
                 # default to CSV auto
-                con.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM read_csv_auto({self._sql_literal(normalized)})")
+                con.execute(f"CREATE OR REPLACE {kind} {view} AS SELECT * FROM read_csv_auto({self._sql_literal(normalized)})")
             created.append(view)
         return created
 
@@ -162,41 +182,151 @@ class DuckDBClient(DataSourceClient):
                 return pattern
         return None
 
+    def _is_remote(self, pattern: str) -> bool:
+        return pattern.lower().startswith(REMOTE_SCHEMES)
+
+    def _local_path(self, pattern: str) -> str:
+        return pattern[7:] if pattern.lower().startswith("file://") else pattern
+
+    def _has_remote_uris(self) -> bool:
+        return any(self._is_remote(p) for p in self.uri_patterns)
+
+    def _materialize_mode(self) -> str:
+        if self.materialize != "auto":
+            return self.materialize
+        # Uploaded spreadsheets and other local files are small enough to load once
+        if self.uri_patterns and not self._has_remote_uris():
+            return "memory"
+        return "none"
+
+    def _session_fingerprint(self) -> str:
+        parts = [
+            self.uris_raw, self.database or "", self._materialize_mode(),
+            self.access_key or "", self.secret_key or "", self.region or "",
+            self.session_token or "", self.service_account_json or "", self.connection_string or "",
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def _source_state(self) -> tuple:
+        """mtime/size of local source files, so edits to them rebuild the session.
+
+        Local globs are expanded, so adding or removing a matching file
+        changes the state as well.
+        """
+        paths = []
+        if self.database:
+            paths.append(self.database)
+        for pattern in self.uri_patterns:
+            if self._is_remote(pattern):
+                continue
+            local = self._local_path(pattern)
+            if any(ch in local for ch in "*?["):
+                paths.extend(sorted(glob.glob(local, recursive=True)))
+            else:
+                paths.append(local)
+        state = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                state.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                state.append((path, None, None))
+        return tuple(state)
+
+    def _build_session(self, fingerprint: str, source_state: tuple) -> WarmDuckDBSession:
+        local_db = self._find_local_duckdb_file()
+        if self.database or local_db:
+            # Open local .duckdb file directly (read-only for safety)
+            con = duckdb.connect(database=self.database or local_db, read_only=True)
+            return WarmDuckDBSession(con, scope=self.engine_scope, source_state=source_state)
+
+        mode = self._materialize_mode()
+        if mode == "file":
+            return self._build_file_session(fingerprint, source_state)
+
+        # In-memory database with views (or tables) from URI patterns
+        con = duckdb.connect(database=":memory:")
+        try:
+            if self._has_remote_uris():
+                self._configure_httpfs(con)
+            views = self._create_views(con, materialize=(mode == "memory"))
+        except Exception:
+            con.close()
+            raise
+        return WarmDuckDBSession(con, scope=self.engine_scope, source_state=source_state, views=views)
+
+    def _build_file_session(self, fingerprint: str, source_state: tuple) -> WarmDuckDBSession:
+        """Materialize URI sources into a local .duckdb cache file and open it read-only."""
+        cache_dir = os.path.abspath(duckdb_session_cache.cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        state_hash = hashlib.sha256(repr(source_state).encode("utf-8")).hexdigest()[:16]
+        cache_file = os.path.join(cache_dir, f"{fingerprint[:32]}_{state_hash}.duckdb")
+        if not os.path.exists(cache_file):
+            tmp_file = f"{cache_file}.{uuid.uuid4().hex}.tmp"
+            build_con = duckdb.connect(database=tmp_file)
+            try:
+                if self._has_remote_uris():
+                    self._configure_httpfs(build_con)
+                self._create_views(build_con, materialize=True)
+                build_con.execute("CHECKPOINT")
+            finally:
+                build_con.close()
+            # Atomic publish so concurrent workers never open a half-written file
+            os.replace(tmp_file, cache_file)
+        con = duckdb.connect(database=cache_file, read_only=True)
+        return WarmDuckDBSession(con, scope=self.engine_scope, source_state=source_state, cache_file=cache_file)
+
     @contextmanager
     def connect(self) -> Generator[duckdb.DuckDBPyConnection, None, None]:
-        con: duckdb.DuckDBPyConnection | None = None
+        """Yield a cursor on the warm session for this source, building it on first use."""
+        session: WarmDuckDBSession | None = None
+        cur: duckdb.DuckDBPyConnection | None = None
         try:
-            local_db = self._find_local_duckdb_file()
-
-            if self.database:
-                # Open local .duckdb file directly (read-only for safety)
-                con = duckdb.connect(database=self.database, read_only=True)
-            elif local_db:
-                # Direct connection to local .duckdb file specified in URIs
-                con = duckdb.connect(database=local_db, read_only=True)
-            else:
-                # In-memory database with views from URI patterns
-                con = duckdb.connect(database=":memory:")
-                self._configure_httpfs(con)
-                self._create_views(con)
-            yield con
+            fingerprint = self._session_fingerprint()
+            source_state = self._source_state()
+            session = duckdb_session_cache.get_or_create(
+                key=(self.engine_scope, fingerprint),
+                source_state=source_state,
+                factory=lambda: self._build_session(fingerprint, source_state),
+            )
+            cur = session.acquire()
+            if self._has_remote_uris() and self._materialize_mode() == "none":
+                # Views read remote files lazily, so cursors need the credentials too
+                self._apply_remote_settings(cur)
+            yield cur
         except Exception as e:
             raise RuntimeError(f"Error while connecting to DuckDB: {e}")
         finally:
-            try:
-                if con is not None:
-                    con.close()
-            except Exception:
-                pass
+            if cur is not None:
+                try:
+                    cur.close()
+                except Exception:
+                    pass
+                session.release()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         try:
             with self.connect() as con:
                 res = con.execute(sql)
+                budget = current_budget()
+                if budget is not None:
+                    return self._fetch_bounded(res, budget)
                 return res.df()
         except Exception as e:
             raise
 
+    def _fetch_bounded(self, res, budget) -> pd.DataFrame:
+        """Fetch ``res`` in chunks (of 2048-row vectors) until the fetch budget is spent."""
+        vectors = max(1, budget.batch_size // 2048)
+        frames = []
+        for frame in fetchmany_batches(res.fetch_df_chunk, vectors):
+            frames.append(frame)
+            if budget.consume(len(frame), frame_nbytes(frame)):
+                break
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat([f for f in frames if len(f)] or frames[:1], ignore_index=True)
+
     def _is_direct_db_connection(self) -> bool:
         """Check if we're connecting directly to a database file."""
         return bool(self.database or self._find_local_duckdb_file())
@@ -213,11 +343,11 @@ class DuckDBClient(DataSourceClient):
                     ORDER BY table_name
                 """).fetchall()
             else:
-                # list views in main schema (URI mode)
+                # list views (or materialized tables) in main schema (URI mode)
                 rows = con.execute("""
                     SELECT table_name
                     FROM information_schema.tables
-                    WHERE table_schema = 'main' AND table_type = 'VIEW'
+                    WHERE table_schema = 'main' AND table_type IN ('BASE TABLE', 'VIEW')
                     ORDER BY table_name
                 """).fetchall()
             for (name,) in rows:
@@ -280,7 +410,7 @@ class DuckDBClient(DataSourceClient):
                     return {"success": True, "message": f"DuckDB database connected: {local_db}"}
                 elif self.uri_patterns:
                     # Try reading first pattern minimally if present
-                    view_names = con.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='main' AND table_type='VIEW' ORDER BY table_name LIMIT 1").fetchall()
+                    view_names = con.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='main' AND table_type IN ('BASE TABLE', 'VIEW') ORDER BY table_name LIMIT 1").fetchall()
                     if view_names:
                         vn = view_names[0][0]
                         con.execute(f"SELECT * FROM {vn} LIMIT 1")
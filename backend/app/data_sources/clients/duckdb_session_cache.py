@@ -0,0 +1,202 @@
+"""Warm, reusable DuckDB sessions for file-backed data sources.
+
+Opening a fresh in-memory DuckDB per query means re-loading extensions,
+re-applying credentials and re-creating every ``read_csv_auto`` view, so CSV
+schema sniffing runs on every single query. Sessions are instead built once
+per (connection, config fingerprint) and handed out as per-query cursors,
+which DuckDB allows to be used concurrently from different threads.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_SESSIONS = 16
+DEFAULT_IDLE_TTL = 1800  # seconds
+DEFAULT_CACHE_DIR = os.path.join("uploads", "duckdb_cache")
+
+
+class WarmDuckDBSession:
+    """A long-lived DuckDB connection plus the bookkeeping to share it safely."""
+
+    def __init__(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        scope: Optional[str],
+        source_state: Hashable,
+        views: Optional[List[str]] = None,
+        cache_file: Optional[str] = None,
+    ):
+        self.con = con
+        self.scope = scope
+        self.source_state = source_state
+        self.views = views or []
+        self.cache_file = cache_file
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._retired = False
+
+    def acquire(self) -> duckdb.DuckDBPyConnection:
+        with self._lock:
+            self._in_use += 1
+            self.last_used = time.monotonic()
+        try:
+            return self.con.cursor()
+        except Exception:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_use -= 1
+            close_now = self._retired and self._in_use <= 0
+        if close_now:
+            self._close()
+
+    def retire(self, remove_cache_file: bool = False) -> None:
+        """Close once no cursor is using the session any more."""
+        with self._lock:
+            self._retired = True
+            close_now = self._in_use <= 0
+        if remove_cache_file and self.cache_file:
+            try:
+                os.remove(self.cache_file)
+            except OSError:
+                pass
+        if close_now:
+            self._close()
+
+    def _close(self) -> None:
+        try:
+            self.con.close()
+        except Exception:
+            pass
+
+
+class DuckDBSessionCache:
+    """Thread-safe LRU of :class:`WarmDuckDBSession` with idle eviction."""
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        idle_ttl: float = DEFAULT_IDLE_TTL,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.cache_dir = cache_dir
+        self._sessions: "OrderedDict[Hashable, WarmDuckDBSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[Hashable, threading.Lock] = {}
+
+    def configure(self, **options) -> None:
+        with self._lock:
+            for key, value in options.items():
+                if value is None:
+                    continue
+                if not hasattr(self, key):
+                    raise ValueError(f"Unknown DuckDB session cache option: {key}")
+                setattr(self, key, value)
+
+    def get_or_create(
+        self,
+        key: Hashable,
+        source_state: Hashable,
+        factory: Callable[[], WarmDuckDBSession],
+    ) -> WarmDuckDBSession:
+        """Return the warm session for ``key``, (re)building it when missing or stale.
+
+        ``source_state`` captures what the session was built from (e.g. local
+        file mtimes); a mismatch means the underlying files changed and any
+        materialized tables must be rebuilt.
+        """
+        session = self._lookup(key, source_state)
+        if session is not None:
+            return session
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            # Another thread may have finished building while we waited
+            session = self._lookup(key, source_state)
+            if session is not None:
+                return session
+            session = factory()
+            stale = []
+            with self._lock:
+                previous = self._sessions.pop(key, None)
+                if previous is not None:
+                    stale.append(previous)
+                self._sessions[key] = session
+                stale.extend(self._pop_idle_locked(time.monotonic(), keep=key))
+                while len(self._sessions) > self.max_sessions:
+                    _, evicted = self._sessions.popitem(last=False)
+                    stale.append(evicted)
+            for old in stale:
+                # A replaced session's cache file is outdated; LRU victims may be reused later
+                old.retire(remove_cache_file=(old is previous and old.cache_file != session.cache_file))
+            return session
+
+    def invalidate(self, scope: str) -> int:
+        """Drop every session built for ``scope`` (typically a connection id)."""
+        if scope is None:
+            return 0
+        scope = str(scope)
+        with self._lock:
+            keys = [k for k, s in self._sessions.items() if s.scope == scope]
+            stale = [self._sessions.pop(k) for k in keys]
+        for session in stale:
+            session.retire(remove_cache_file=True)
+        return len(stale)
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            stale = self._pop_idle_locked(time.monotonic())
+        for session in stale:
+            session.retire()
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            stale = list(self._sessions.values())
+            self._sessions.clear()
+        for session in stale:
+            session.retire()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _lookup(self, key: Hashable, source_state: Hashable) -> Optional[WarmDuckDBSession]:
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None or session.source_state != source_state:
+                return None
+            self._sessions.move_to_end(key)
+            session.last_used = time.monotonic()
+            return session
+
+    def _pop_idle_locked(self, now: float, keep=None) -> List[WarmDuckDBSession]:
+        if not self.idle_ttl:
+            return []
+        keys = [
+            k for k, s in self._sessions.items()
+            if k != keep and s._in_use <= 0 and now - s.last_used > self.idle_ttl
+        ]
+        return [self._sessions.pop(k) for k in keys]
+
+
+duckdb_session_cache = DuckDBSessionCache()
+
+
+def evict_idle_duckdb_sessions() -> int:
+    """Scheduler job: close this worker's warm DuckDB sessions that have sat idle."""
+    return duckdb_session_cache.evict_idle()
@@ -0,0 +1,179 @@
+"""Process-wide registry of pooled SQLAlchemy engines for SQL data source clients.
+
+Clients used to build a fresh engine per ``connect()`` and dispose it right
+after, paying a full TCP/TLS/auth handshake for every query. Engines are now
+shared across client instances and keyed by a fingerprint of the connection
+URL and engine options (which embeds the credentials), optionally scoped to a
+connection id so they can be dropped when that connection is edited.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import sqlalchemy
+from sqlalchemy.engine import Engine, URL
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_ENGINES = 64
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 5
+DEFAULT_POOL_RECYCLE = 1800  # seconds
+DEFAULT_IDLE_TTL = 900  # seconds an engine may go unused before disposal
+
+
+@dataclass
+class _EngineEntry:
+    engine: Engine
+    scope: Optional[str]
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def _fingerprint(url: Any, session_key: Optional[str], engine_kwargs: Dict[str, Any]) -> str:
+    """Stable hash of everything that makes two engines non-interchangeable."""
+    if isinstance(url, URL):
+        url_str = url.render_as_string(hide_password=False)
+    else:
+        url_str = str(url)
+    parts = [url_str, session_key or ""]
+    for k in sorted(engine_kwargs):
+        parts.append(f"{k}={engine_kwargs[k]!r}")
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class EngineRegistry:
+    """Thread-safe LRU of SQLAlchemy engines with idle eviction.
+
+    Every engine is created with ``pool_pre_ping`` so stale sockets (warehouse
+    restarts, idle-timeout disconnects) are detected on checkout instead of
+    failing the user's query.
+    """
+
+    def __init__(
+        self,
+        max_engines: int = DEFAULT_MAX_ENGINES,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_overflow: int = DEFAULT_MAX_OVERFLOW,
+        pool_recycle: int = DEFAULT_POOL_RECYCLE,
+        idle_ttl: float = DEFAULT_IDLE_TTL,
+    ):
+        self.max_engines = max_engines
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.idle_ttl = idle_ttl
+        self._engines: "OrderedDict[Tuple[Optional[str], str], _EngineEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, **options) -> None:
+        """Update pool options; only engines created afterwards are affected."""
+        with self._lock:
+            for key, value in options.items():
+                if value is None:
+                    continue
+                if not hasattr(self, key):
+                    raise ValueError(f"Unknown engine registry option: {key}")
+                setattr(self, key, value)
+
+    def get_engine(
+        self,
+        url: Any,
+        scope: Optional[str] = None,
+        session_key: Optional[str] = None,
+        **engine_kwargs,
+    ) -> Engine:
+        """Return a shared engine for ``url``, creating it on first use.
+
+        Args:
+            url: SQLAlchemy URL (string or ``URL``).
+            scope: Optional owner id (typically the connection id) used by
+                :meth:`invalidate`.
+            session_key: Extra discriminator for clients whose connections
+                carry per-session state (e.g. a ``search_path``) so pooled
+                connections are never shared across differing settings.
+            **engine_kwargs: Passed through to ``sqlalchemy.create_engine``.
+        """
+        key = (scope, _fingerprint(url, session_key, engine_kwargs))
+        stale = []
+        with self._lock:
+            now = time.monotonic()
+            entry = self._engines.get(key)
+            if entry is not None:
+                entry.last_used = now
+                self._engines.move_to_end(key)
+            else:
+                options = {
+                    "pool_pre_ping": True,
+                    "pool_size": self.pool_size,
+                    "max_overflow": self.max_overflow,
+                    "pool_recycle": self.pool_recycle,
+                }
+                options.update(engine_kwargs)
+                entry = _EngineEntry(engine=sqlalchemy.create_engine(url, **options), scope=scope)
+                self._engines[key] = entry
+            stale.extend(self._pop_idle_locked(now, keep=key))
+            while len(self._engines) > self.max_engines:
+                _, evicted = self._engines.popitem(last=False)
+                stale.append(evicted)
+        self._dispose(stale)
+        return entry.engine
+
+    def invalidate(self, scope: str) -> int:
+        """Dispose every engine registered under ``scope``. Returns the count."""
+        if scope is None:
+            return 0
+        scope = str(scope)
+        with self._lock:
+            keys = [k for k, e in self._engines.items() if e.scope == scope]
+            stale = [self._engines.pop(k) for k in keys]
+        self._dispose(stale)
+        return len(stale)
+
+    def evict_idle(self) -> int:
+        """Dispose engines unused for longer than ``idle_ttl``. Returns the count."""
+        with self._lock:
+            stale = self._pop_idle_locked(time.monotonic())
+        self._dispose(stale)
+        return len(stale)
+
+    def dispose_all(self) -> None:
+        with self._lock:
+            stale = list(self._engines.values())
+            self._engines.clear()
+        self._dispose(stale)
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def _pop_idle_locked(self, now: float, keep=None):
+        if not self.idle_ttl:
+            return []
+        keys = [
+            k for k, e in self._engines.items()
+            if k != keep and now - e.last_used > self.idle_ttl
+        ]
+        return [self._engines.pop(k) for k in keys]
+
+    @staticmethod
+    def _dispose(entries) -> None:
+        # Checked-out connections are left alone by dispose() and closed
+        # when their owner returns them, so in-flight queries are unaffected.
+        for entry in entries:
+            try:
+                entry.engine.dispose()
+            except Exception as e:
+                logger.warning(f"Failed to dispose pooled engine: {e}")
+
+
+engine_registry = EngineRegistry()
+
+
+def evict_idle_engines() -> int:
+    """Scheduler job: dispose this worker's pooled data source engines that have sat idle."""
+    return engine_registry.evict_idle()
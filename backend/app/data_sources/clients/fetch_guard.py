@@ -0,0 +1,254 @@
+"""Row/byte budget for queries issued by generated code.
+
+``format_df_for_widget`` only shows ``limit_row_count`` rows, but a careless
+``SELECT *`` on a fact table used to be fetched in full first, so one query
+could take down an API worker. While a query runs through
+:meth:`FetchGuard.execute`, a :class:`FetchBudget` is active for the calling
+thread:
+
+- clients flagged ``limit_pushdown`` get ``LIMIT max_rows + 1`` appended to
+  top-level ``SELECT``/``WITH`` statements that have no limit of their own,
+- clients consult :func:`current_budget` to fetch in batches (server-side
+  cursors, Arrow batches) and stop once the budget is spent,
+- results over ``max_rows`` are cut down, and the truncation is recorded in
+  ``df.attrs[FETCH_TRUNCATED_ATTR]`` so it ends up in the step's ``info``.
+
+The budget is a memory guard, not a display limit: generated code still
+aggregates in pandas, so it defaults to far more rows than a table shows.
+"""
+
+import contextvars
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_ROWS = 1_000_000
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_BATCH_SIZE = 50_000
+
+FETCH_TRUNCATED_ATTR = "fetch_truncated"
+
+_current_budget: contextvars.ContextVar[Optional["FetchBudget"]] = contextvars.ContextVar(
+    "fetch_budget", default=None
+)
+
+# Strings, quoted identifiers and comments are skipped; words, parens and ';' are kept
+_SQL_SCAN = re.compile(
+    r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|--[^\n]*|/\*.*?\*/|(\w+)|([();])""",
+    re.DOTALL,
+)
+_LIMITING_KEYWORDS = {"LIMIT", "FETCH", "OFFSET", "TOP"}
+
+
+def apply_limit(sql: str, limit: int) -> Optional[str]:
+    """``sql`` with ``LIMIT limit`` appended, or None if it is not a plain top-level query.
+
+    Statements that already limit (``LIMIT``/``FETCH``/``OFFSET``/``TOP``),
+    that are not ``SELECT``/``WITH``, or that contain several statements are
+    left alone.
+    """
+    stripped = sql.strip()
+    while stripped.endswith(";"):
+        stripped = stripped[:-1].rstrip()
+    depth = 0
+    first_word = None
+    for match in _SQL_SCAN.finditer(stripped):
+        word, punct = match.group(1), match.group(2)
+        if punct == "(":
+            depth += 1
+        elif punct == ")":
+            depth -= 1
+        elif punct == ";":
+            return None
+        elif word and depth == 0:
+            upper = word.upper()
+            if first_word is None:
+                first_word = upper
+            if upper in _LIMITING_KEYWORDS:
+                return None
+    if first_word not in ("SELECT", "WITH") or depth != 0:
+        return None
+    # Newline so a trailing line comment cannot swallow the clause
+    return f"{stripped}\nLIMIT {int(limit)}"
+
+
+class FetchBudget:
+    """Per-query budget; clients report what they fetched through :meth:`consume`."""
+
+    def __init__(self, max_rows: int, max_bytes: int, batch_size: int):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.rows = 0
+        self.bytes = 0
+        self.truncated_by: Optional[str] = None
+
+    def consume(self, rows: int, nbytes: int) -> bool:
+        """Account for a fetched batch; True once the budget is exhausted and fetching should stop."""
+        self.rows += rows
+        self.bytes += nbytes
+        if self.max_rows and self.rows > self.max_rows:
+            self.truncated_by = self.truncated_by or "rows"
+        elif self.max_bytes and self.bytes > self.max_bytes:
+            self.truncated_by = self.truncated_by or "bytes"
+        return self.truncated_by is not None
+
+    def mark(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Cut ``df`` down to ``max_rows`` and flag it if anything was left out."""
+        if self.max_rows and len(df) > self.max_rows:
+            df = df.iloc[: self.max_rows]
+            self.truncated_by = self.truncated_by or "rows"
+        if self.truncated_by:
+            df.attrs[FETCH_TRUNCATED_ATTR] = {"reason": self.truncated_by, "rows": int(len(df))}
+        return df
+
+
+def current_budget() -> Optional[FetchBudget]:
+    """Budget of the query running on this thread, if it is guarded."""
+    return _current_budget.get()
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def read_sql_bounded(conn, sql: str, budget: FetchBudget) -> pd.DataFrame:
+    """``pd.read_sql(text(sql), conn)`` through a server-side cursor, stopping at ``budget``."""
+    from sqlalchemy import text
+
+    result = conn.execution_options(stream_results=True, max_row_buffer=budget.batch_size).execute(text(sql))
+    try:
+        if not result.returns_rows:
+            return pd.DataFrame()
+        columns = list(result.keys())
+        frames = []
+        for batch in result.partitions(budget.batch_size):
+            frame = pd.DataFrame.from_records(batch, columns=columns, coerce_float=True)
+            frames.append(frame)
+            if budget.consume(len(frame), frame_nbytes(frame)):
+                break
+    finally:
+        result.close()
+    return _concat_frames(frames, columns)
+
+
+def read_rows_bounded(fetchmany, columns: List[str], budget: FetchBudget, coerce_float: bool = False) -> pd.DataFrame:
+    """DB-API ``fetchmany`` results as a DataFrame, fetched in batches until ``budget`` is spent.
+
+    ``max_rows == 0`` means no row cap; the byte budget still applies.
+    """
+    frames = []
+    while True:
+        size = budget.batch_size
+        if budget.max_rows:
+            # Stop one row past the cap so mark() can tell the result was cut
+            size = max(1, min(size, budget.max_rows + 1 - budget.rows))
+        batch = fetchmany(size)
+        if not batch:
+            break
+        frame = pd.DataFrame.from_records(batch, columns=columns, coerce_float=coerce_float)
+        frames.append(frame)
+        if budget.consume(len(frame), frame_nbytes(frame)):
+            break
+    return _concat_frames(frames, columns)
+
+
+def _concat_frames(frames: List[pd.DataFrame], columns: List[str]) -> pd.DataFrame:
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    if len(frames) == 1:
+        return frames[0]
+    # Batches can disagree on dtypes (e.g. a column that is all NULL in one of them)
+    return pd.concat(frames, ignore_index=True).infer_objects()
+
+
+def fetchmany_batches(fetchmany, size: int):
+    """Yield ``fetchmany(size)`` results until one comes back empty (yielded too, for its schema)."""
+    while True:
+        batch = fetchmany(size)
+        yield batch
+        if not len(batch):
+            return
+
+
+def read_arrow_batches(batches, budget: FetchBudget, schema=None):
+    """Concatenate Arrow record batches/tables until ``budget`` is spent."""
+    import pyarrow as pa
+
+    tables = []
+    for batch in batches:
+        table = batch if isinstance(batch, pa.Table) else pa.Table.from_batches([batch])
+        tables.append(table)
+        if budget.consume(table.num_rows, table.nbytes):
+            break
+    if not tables:
+        return schema.empty_table() if schema is not None else pa.table({})
+    return pa.concat_tables(tables)
+
+
+class FetchGuard:
+    """Applies the configured budget to queries made through wrapped clients."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        push_down_limit: bool = True,
+    ):
+        self.enabled = enabled
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.push_down_limit = push_down_limit
+        self._lock = threading.Lock()
+
+    def configure(self, **options) -> None:
+        with self._lock:
+            for key, value in options.items():
+                if value is None:
+                    continue
+                if not hasattr(self, key):
+                    raise ValueError(f"Unknown fetch guard option: {key}")
+                setattr(self, key, value)
+
+    def execute(self, client, query, *args, notices: Optional[List[Dict[str, Any]]] = None, **kwargs):
+        """Run ``client.execute_query`` (through the result cache) under a fetch budget."""
+        from app.data_sources.clients.query_result_cache import query_result_cache
+
+        if not self.enabled or not isinstance(query, str):
+            return query_result_cache.execute(client, query, *args, **kwargs)
+
+        budget = FetchBudget(self.max_rows, self.max_bytes, self.batch_size)
+        sql = query
+        if self.push_down_limit and self.max_rows and getattr(client, "limit_pushdown", False):
+            sql = apply_limit(query, self.max_rows + 1) or query
+        token = _current_budget.set(budget)
+        try:
+            result = query_result_cache.execute(client, sql, *args, **kwargs)
+        finally:
+            _current_budget.reset(token)
+
+        if not isinstance(result, pd.DataFrame):
+            return result
+        result = budget.mark(result)
+        if budget.truncated_by and notices is not None:
+            notices.append({
+                "query": query,
+                "reason": budget.truncated_by,
+                "rows": int(len(result)),
+                "max_rows": self.max_rows,
+                "max_bytes": self.max_bytes,
+            })
+            logger.warning(f"Query result truncated at {len(result)} rows ({budget.truncated_by} budget)")
+        return result
+
+
+fetch_guard = FetchGuard()
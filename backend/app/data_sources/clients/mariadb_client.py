@@ -1,4 +1,5 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.clients.engine_registry import engine_registry
 
 import pandas as pd
 import sqlalchemy
@@ -12,6 +13,8 @@ from urllib.parse import quote_plus
 
 
 class MariadbClient(DataSourceClient):
+    limit_pushdown = True
+
     def __init__(self, host, port, database, user, password):
         self.host = host
         self.port = port
@@ -38,10 +41,9 @@ class MariadbClient(DataSourceClient):
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to a MariaDB database using pymysql."""
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.mariadb_uri)
+            engine = engine_registry.get_engine(self.mariadb_uri, scope=self.engine_scope)
             conn = engine.connect()
 
             yield conn
@@ -50,14 +52,12 @@ class MariadbClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         """Execute SQL statement and return the result as a DataFrame."""
         try:
             with self.connect() as conn:
-                df = pd.read_sql(text(sql), conn)
+                df = self.read_sql(conn, sql)
             return df
         except Exception as e:
             print(f"Error executing SQL: {e}")
@@ -1,4 +1,5 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.clients.engine_registry import engine_registry
 
 import pandas as pd
 import sqlalchemy
@@ -29,10 +30,9 @@ class MSSQLClient(DataSourceClient):
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to a SQL Server database."""
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.sql_server_uri)
+            engine = engine_registry.get_engine(self.sql_server_uri, scope=self.engine_scope)
             conn = engine.connect()
             yield conn
         except Exception as e:
@@ -40,14 +40,12 @@ class MSSQLClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         """Execute SQL statement and return the result as a DataFrame."""
         try:
             with self.connect() as conn:
-                df = pd.read_sql(text(sql), conn)
+                df = self.read_sql(conn, sql)
             return df
         except Exception as e:
             print(f"Error executing SQL: {e}")
@@ -1,4 +1,5 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.clients.engine_registry import engine_registry
 
 import pandas as pd
 import sqlalchemy
@@ -12,6 +13,8 @@ from urllib.parse import quote_plus
 
 
 class MysqlClient(DataSourceClient):
+    limit_pushdown = True
+
     def __init__(self, host, port, database, user: Optional[str] = None, password: Optional[str] = None):
         self.host = host
         self.port = port
@@ -35,10 +38,9 @@ class MysqlClient(DataSourceClient):
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to a MySQL db."""
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.mysql_uri)
+            engine = engine_registry.get_engine(self.mysql_uri, scope=self.engine_scope)
             conn = engine.connect()
             yield conn
         except Exception as e:
@@ -46,14 +48,12 @@ class MysqlClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         """Execute SQL statement and return the result as a DataFrame."""
         try:
             with self.connect() as conn:
-                df = pd.read_sql(text(sql), conn)
+                df = self.read_sql(conn, sql)
             return df
         except Exception as e:
             print(f"Error executing SQL: {e}")
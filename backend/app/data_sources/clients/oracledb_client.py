@@ -1,4 +1,5 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.clients.engine_registry import engine_registry
 
 import pandas as pd
 import sqlalchemy
@@ -40,10 +41,13 @@ class OracledbClient(DataSourceClient):
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to an Oracle database."""
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.oracle_uri)
+            engine = engine_registry.get_engine(
+                self.oracle_uri,
+                scope=self.engine_scope,
+                session_key=",".join(self._schemas),
+            )
             conn = engine.connect()
             # Set current schema if provided (Oracle has no search_path; use first schema)
             if self._schemas:
@@ -58,14 +62,12 @@ class OracledbClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         """Execute SQL statement and return the result as a DataFrame."""
         try:
             with self.connect() as conn:
-                df = pd.read_sql(text(sql), conn)
+                df = self.read_sql(conn, sql)
             return df
         except Exception as e:
             print(f"Error executing SQL: {e}")
@@ -1,4 +1,5 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.clients.engine_registry import engine_registry
 
 import pandas as pd
 import sqlalchemy
@@ -11,6 +12,8 @@ from functools import cached_property
 
 
 class PostgresqlClient(DataSourceClient):
+    limit_pushdown = True
+
     def __init__(self, host, port, database, user, password="", schema=None):
         self.host = host
         self.port = port
@@ -42,10 +45,13 @@ class PostgresqlClient(DataSourceClient):
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to a Postgres db."""
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.pg_uri)
+            engine = engine_registry.get_engine(
+                self.pg_uri,
+                scope=self.engine_scope,
+                session_key=",".join(self._schemas),
+            )
             conn = engine.connect()
             # Set search_path if schemas are provided
             if self._schemas:
@@ -60,14 +66,12 @@ class PostgresqlClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         """Execute SQL statement and return the result as a DataFrame."""
         try:
             with self.connect() as conn:
-                df = pd.read_sql(text(sql), conn)
+                df = self.read_sql(conn, sql)
             return df
         except Exception as e:
             print(f"Error executing SQL: {e}")
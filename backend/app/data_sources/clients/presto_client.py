@@ -1,4 +1,5 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.clients.engine_registry import engine_registry
 import pandas as pd
 import sqlalchemy
 from sqlalchemy import text
@@ -15,6 +16,8 @@ logging.basicConfig(level=logging.INFO)
 
 
 class PrestoClient(DataSourceClient):
+    limit_pushdown = True
+
     def __init__(self, host, port, catalog, schema, user, password=None, protocol="http"):
         """
         Initialize the Presto client.
@@ -60,10 +63,9 @@ class PrestoClient(DataSourceClient):
         """
         Yield a connection to the Presto server.
         """
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.presto_uri)
+            engine = engine_registry.get_engine(self.presto_uri, scope=self.engine_scope)
             conn = engine.connect()
             yield conn
         except Exception as e:
@@ -72,8 +74,6 @@ class PrestoClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         """
@@ -87,7 +87,7 @@ class PrestoClient(DataSourceClient):
         """
         try:
             with self.connect() as conn:
-                df = pd.read_sql(text(sql), conn)
+                df = self.read_sql(conn, sql)
             return df
         except Exception as e:
             logger.error(f"Error executing SQL query: {e}")
@@ -0,0 +1,268 @@
+"""Opt-in cache of data source query results.
+
+Generated ``generate_df`` code, ``inspect_data`` probes, step reruns and
+dashboard refreshes all go through ``client.execute_query(sql)``, and retry
+loops re-run the same expensive first query after fixing a pandas bug further
+down. With the cache enabled, DataFrame results are stored as Parquet files
+keyed by:
+
+- the connection (``client.engine_scope``),
+- the credential scope (``client.credential_scope``: ``system`` or
+  ``user:<id>``), so per-user credentials never share results, and
+- the normalized SQL (comments and insignificant whitespace removed) plus any
+  extra ``execute_query`` arguments.
+
+The files on disk are the source of truth, so workers sharing the cache
+directory share hits. Freshness is ``mtime + ttl`` where the TTL comes from the
+connection's ``query_cache`` policy (``{"enabled": bool, "ttl": seconds}`` in
+its config) or ``default_ttl``; ``evict()`` enforces ``max_age`` and
+``max_bytes`` across the directory (oldest first). File names start with a
+digest of the connection so ``invalidate(scope)`` can drop a connection's
+results when it is edited or its files change.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.data_sources.clients.fetch_guard import current_budget
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CACHE_DIR = os.path.join("uploads", "query_cache")
+DEFAULT_TTL = 300  # seconds
+DEFAULT_MAX_AGE = 86400  # seconds; upper bound for any policy TTL when sweeping
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+# Quoted strings/identifiers are kept verbatim; comments and whitespace runs outside them are not
+_SQL_TOKENS = re.compile(
+    r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`)|(--[^\n]*|/\*.*?\*/)|(\s+)""",
+    re.DOTALL,
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """Canonical form of ``sql`` for cache keys."""
+
+    parts = []
+    pos = 0
+    for match in _SQL_TOKENS.finditer(sql):
+        if match.start() > pos:
+            parts.append(sql[pos:match.start()])
+        if match.group(1) is not None:
+            parts.append(match.group(1))
+        elif parts and not parts[-1].endswith(" "):
+            parts.append(" ")
+        pos = match.end()
+    parts.append(sql[pos:])
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def _scope_prefix(scope) -> str:
+    return hashlib.sha256(str(scope or "").encode("utf-8")).hexdigest()[:16]
+
+
+class QueryResultCache:
+    """Parquet-on-disk result cache shared by every wrapped data source client."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        default_ttl: int = DEFAULT_TTL,
+        max_age: int = DEFAULT_MAX_AGE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.enabled = enabled
+        self.cache_dir = cache_dir
+        self.default_ttl = default_ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> [lock, callers holding or waiting on it]
+        self._key_locks: Dict[str, List[Any]] = {}
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "skipped": 0}
+
+    def configure(self, **options) -> None:
+        with self._lock:
+            for key, value in options.items():
+                if value is None:
+                    continue
+                if not hasattr(self, key):
+                    raise ValueError(f"Unknown query result cache option: {key}")
+                setattr(self, key, value)
+
+    def ttl_for(self, client) -> int:
+        """TTL for ``client``'s connection; 0 means caching is off for it."""
+        if not self.enabled or getattr(client, "engine_scope", None) is None:
+            return 0
+        policy = getattr(client, "query_cache_policy", None) or {}
+        if policy.get("enabled") is False:
+            return 0
+        try:
+            ttl = int(policy.get("ttl", self.default_ttl))
+        except (TypeError, ValueError):
+            ttl = self.default_ttl
+        return max(0, min(ttl, self.max_age))
+
+    def key_for(self, client, query: str, args=(), kwargs=None) -> str:
+        material = json.dumps(
+            [
+                str(getattr(client, "engine_scope", "")),
+                str(getattr(client, "credential_scope", "system")),
+                normalize_sql(query),
+                list(args),
+                kwargs or {},
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(material.encode("utf-8")).hexdigest()
+        return f"{_scope_prefix(getattr(client, 'engine_scope', ''))}-{digest}"
+
+    def execute(self, client, query, *args, **kwargs):
+        """``client.execute_query(query, ...)`` served from the cache when fresh."""
+        ttl = self.ttl_for(client) if isinstance(query, str) else 0
+        if not ttl:
+            return client.execute_query(query, *args, **kwargs)
+
+        key = self.key_for(client, query, args, kwargs)
+        with self._lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            # Identical concurrent queries run once; the others wait and read the result
+            with entry[0]:
+                cached = self.get(key, ttl)
+                if cached is not None:
+                    return cached
+                result = client.execute_query(query, *args, **kwargs)
+                # A fetch cut short by the byte budget is not the query's result
+                budget = current_budget()
+                if isinstance(result, pd.DataFrame) and not (budget and budget.truncated_by):
+                    self.put(key, result)
+                return result
+        finally:
+            # Dropped once no caller holds or waits on it, also when the query raised
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    self._key_locks.pop(key, None)
+
+    def get(self, key: str, ttl: int) -> Optional[pd.DataFrame]:
+        path = self._path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            self._count("misses")
+            return None
+        if age > ttl:
+            self._count("misses")
+            return None
+        try:
+            df = pq.read_table(path).to_pandas()
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"Dropping unreadable query cache entry {path}: {e}")
+            self._remove(path)
+            self._count("misses")
+            return None
+        self._count("hits")
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> bool:
+        try:
+            table = pa.Table.from_pandas(df)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            # e.g. object columns holding mixed types; just don't cache them
+            logger.debug(f"Query result not cacheable: {e}")
+            self._count("skipped")
+            return False
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            pq.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"Failed to store query cache entry: {e}")
+            self._remove(tmp_path)
+            return False
+        self._count("stores")
+        if self.max_bytes and os.path.getsize(path) > self.max_bytes:
+            self._remove(path)
+        return True
+
+    def invalidate(self, scope: Optional[str] = None) -> int:
+        """Remove the cached results of connection ``scope`` (all of them if None)."""
+        prefix = f"{_scope_prefix(scope)}-" if scope is not None else ""
+        return self._sweep(max_age=0, max_bytes=None, prefix=prefix)
+
+    def evict(self) -> int:
+        """Remove entries older than ``max_age`` and the oldest ones beyond ``max_bytes``."""
+        return self._sweep(max_age=self.max_age, max_bytes=self.max_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _sweep(self, max_age: Optional[int], max_bytes: Optional[int], prefix: str = "") -> int:
+        try:
+            names = [n for n in os.listdir(self.cache_dir) if n.startswith(prefix) and n.endswith(".parquet")]
+        except OSError:
+            return 0
+        now = time.time()
+        entries = []
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            expired = max_age is not None and now - mtime >= max_age
+            over_budget = bool(max_bytes) and total > max_bytes
+            if not expired and not over_budget:
+                continue
+            if self._remove(path):
+                removed += 1
+                total -= size
+        return removed
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+query_result_cache = QueryResultCache()
+
+
+def evict_query_result_cache() -> int:
+    """Scheduler job: drop expired query results and keep the cache within its byte budget."""
+    return query_result_cache.evict()
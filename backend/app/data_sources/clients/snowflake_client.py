@@ -1,4 +1,6 @@
-from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.clients.base import DataSourceClient, arrow_to_pandas
+from app.data_sources.clients.fetch_guard import current_budget, read_arrow_batches, read_rows_bounded
+from app.data_sources.clients.engine_registry import engine_registry
 
 import pandas as pd
 import sqlalchemy
@@ -15,6 +17,8 @@ from cryptography.hazmat.backends import default_backend
 
 
 class SnowflakeClient(DataSourceClient):
+    limit_pushdown = True
+
     def __init__(
         self,
         account,
@@ -93,13 +97,11 @@ class SnowflakeClient(DataSourceClient):
             # Fallback to password-based auth
             connect_args["password"] = self.password
 
-        engine = sqlalchemy.create_engine(URL(**connect_args))
-        return engine
+        return engine_registry.get_engine(URL(**connect_args), scope=self.engine_scope)
 
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to a Snowflake database."""
-        engine = None
         conn = None
 
         try:
@@ -112,20 +114,47 @@ class SnowflakeClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         """Run SQL statement."""
         try:
             with self.connect() as conn:
-                # Wrap SQL query with text() to handle complex SQL
-                df = pd.read_sql(text(sql), conn)
+                if self.arrow_fetch:
+                    return self._read_arrow(conn, sql)
+                df = self.read_sql(conn, sql)
             return df
         except Exception as e:
             print(f"Error executing SQL: {e}")
             raise
 
+    def _read_arrow(self, conn, sql: str) -> pd.DataFrame:
+        """Run ``sql`` on the raw connector cursor and fetch its Arrow result batches."""
+        from snowflake.connector.errors import NotSupportedError
+
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(sql)
+            # Match read_sql, which reports case-insensitive identifiers in lower case
+            columns = [conn.dialect.normalize_name(desc[0]) for desc in cursor.description or []]
+            budget = current_budget()
+            try:
+                if budget is not None:
+                    table = read_arrow_batches(cursor.fetch_arrow_batches(), budget)
+                    if table.num_columns != len(columns):
+                        # No batches at all: empty result
+                        return pd.DataFrame(columns=columns)
+                else:
+                    table = cursor.fetch_arrow_all(force_return_table=True)
+            except NotSupportedError:
+                # Result came back as JSON (e.g. Arrow disabled for the account)
+                if budget is not None:
+                    return read_rows_bounded(cursor.fetchmany, columns, budget, coerce_float=True)
+                return pd.DataFrame.from_records(cursor.fetchall(), columns=columns, coerce_float=True)
+            # read_sql coerces NUMBER(p, s) decimals to floats; keep generated code seeing the same dtypes
+            return arrow_to_pandas(table.rename_columns(columns), decimals_as_float=True)
+        finally:
+            cursor.close()
+
     def get_tables(self) -> List[Table]:
         """Get tables with graceful fallback if enriched query fails, plus semantic views."""
         try:
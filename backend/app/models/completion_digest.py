@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, Index, UniqueConstraint
+
+from app.models.base import BaseSchema
+
+
+class CompletionDigest(BaseSchema):
+    """Rendered conversation-history line for one finished completion.
+
+    Written by ``MessageContextBuilder`` the first time it renders a completion
+    in a final status, and reused while ``fingerprint`` still matches, so the
+    planner's messages section does not reload blocks and tool executions of
+    the whole window on every loop. See ``conversation_digests`` for the format.
+    """
+    __tablename__ = "completion_digests"
+
+    completion_id = Column(String(36), ForeignKey("completions.id"), nullable=False)
+    report_id = Column(String(36), ForeignKey("reports.id"), nullable=False)
+    role = Column(String, nullable=False)
+
+    # Rendered text; text_without_data is only set when it differs (sample rows hidden)
+    text = Column(Text, nullable=True)
+    text_without_data = Column(Text, nullable=True)
+    mentions = Column(Text, nullable=True)
+
+    fingerprint = Column(String, nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        UniqueConstraint("completion_id", name="uq_compdigest_completion"),
+        Index("ix_compdigest_report", "report_id"),
+    )
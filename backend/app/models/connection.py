@@ -85,14 +85,16 @@ class Connection(BaseSchema):
                 client_params.update(decrypted_credentials)
             
             # Remove non-client params
-            for meta_key in ("auth_type", "demo_id", "is_file_upload"):
+            for meta_key in ("auth_type", "demo_id", "is_file_upload", "query_cache", "arrow_fetch"):
                 client_params.pop(meta_key, None)
             
             import logging
             logger = logging.getLogger(__name__)
             logger.info(f"Client params for {self.type}")
             
-            return ClientClass(**client_params)
+            client = ClientClass(**client_params)
+            client.engine_scope = str(self.id)
+            return client
         except (ImportError, AttributeError) as e:
             raise ValueError(f"Unable to load data source client for {self.type}: {str(e)}")
 
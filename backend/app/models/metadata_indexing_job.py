@@ -67,6 +67,9 @@ class MetadataIndexingJob(BaseSchema):
     # Link to the InstructionBuild created by this job (if instruction sync was involved)
     # Note: FK constraint not enforced at DB level for SQLite compatibility
     build_id = Column(String(36), nullable=True)
+
+    # INDEX_VERSION of the job's ranked search index (metadata_resource_terms); NULL until built
+    search_index_version = Column(Integer, nullable=True)
     
     # Relationships
     data_source = relationship("DataSource", back_populates="metadata_indexing_jobs")
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Float, ForeignKey, PrimaryKeyConstraint, Index
+
+from app.models.base import Base
+
+
+class MetadataResourceTerm(Base):
+    """Posting of the per-job search index over metadata resources.
+
+    One row per (job, term, resource) with the pair's precomputed BM25 score;
+    see ``app.services.metadata_search_index``. Rows are derived data and are
+    rebuilt whenever a job is (re)indexed, so the table has no surrogate id or
+    timestamps.
+    """
+    __tablename__ = "metadata_resource_terms"
+
+    metadata_indexing_job_id = Column(String(36), ForeignKey("metadata_indexing_jobs.id", ondelete="CASCADE"), nullable=False)
+    term = Column(String(128), nullable=False)
+    metadata_resource_id = Column(String(36), ForeignKey("metadata_resources.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("metadata_indexing_job_id", "term", "metadata_resource_id", name="pk_metadata_resource_terms"),
+        Index("ix_mrterms_resource", "metadata_resource_id"),
+    )
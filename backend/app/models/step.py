@@ -1,11 +1,13 @@
 # Path: backend/app/models/step.py
 
 from sqlalchemy import Column, Integer, String, ForeignKey, Text, JSON, UUID, event
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Session, object_session, relationship
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy.orm.base import PASSIVE_NO_INITIALIZE
 from .base import BaseSchema
 import asyncio
-from app.websocket_manager import websocket_manager
-import json
+import uuid
+from app.services.step_events import TRACKED_FIELDS, data_version, step_event_publisher
 from sqlalchemy import select
 from app.models.widget import Widget
 # from app.services.slack_notification_service import send_step_result_to_slack # This is removed
@@ -42,87 +44,218 @@ class Step(BaseSchema):
         lazy="selectin"
     )
 
+def _record_table_co_usage(connection, target, old_data_model, new_data_model):
+    try:
+        from app.services.table_co_usage_service import record_step_co_usage
+        record_step_co_usage(connection, target, old_data_model, new_data_model)
+    except Exception as e:
+        print(f"Error recording table co-usage for step {target.id}: {e}")
+
+# Artifact changes of the session's transaction, applied once it commits or rolls back
+_PENDING_ARTIFACTS_KEY = "step_data_artifacts"
+
+def _pending_artifacts(target):
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault(_PENDING_ARTIFACTS_KEY, {"written": [], "replaced": [], "deleted_steps": []})
+
+# Step events and notifications of the session's transaction, sent once it commits
+_PENDING_EVENTS_KEY = "step_events"
+
+def _pending_events(target):
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault(_PENDING_EVENTS_KEY, {"events": [], "succeeded": []})
+
+def _queue_step_event(target, event_data, changed):
+    pending = _pending_events(target)
+    if pending is not None:
+        pending["events"].append((event_data, changed))
+
+def _offload_step_data(target):
+    """Move large result rows into a columnar artifact, keeping a preview inline."""
+    try:
+        from app.services.step_data_store import artifact_path, step_data_store
+        if target.id is None:
+            target.id = str(uuid.uuid4())
+        data = step_data_store.offload(str(target.id), target.data)
+        if data is not target.data:
+            target.data = data
+            written = artifact_path(data)
+            pending = _pending_artifacts(target)
+            if written and pending is not None:
+                pending["written"].append(written)
+    except Exception as e:
+        print(f"Error storing data artifact for step {target.id}: {e}")
+
+def before_insert_step(mapper, connection, target):
+    _offload_step_data(target)
+
+def before_update_step(mapper, connection, target):
+    data_history = get_history(target, 'data', passive=PASSIVE_NO_INITIALIZE)
+    if data_history.has_changes():
+        if data_history.deleted:
+            old_data = data_history.deleted[0]
+        else:
+            old_data = connection.execute(
+                select(Step.__table__.c.data).where(Step.__table__.c.id == target.id)
+            ).scalar()
+        _offload_step_data(target)
+        # Removed once the new payload is committed (see after_update_step)
+        target._replaced_step_data = old_data
+
+    deleted_history = get_history(target, 'deleted_at', passive=PASSIVE_NO_INITIALIZE)
+    if deleted_history.added and deleted_history.added[0] is not None:
+        _queue_step_artifacts_delete(target)
+
+    history = get_history(target, 'data_model', passive=PASSIVE_NO_INITIALIZE)
+    if not history.has_changes():
+        return
+    if history.deleted:
+        old_data_model = history.deleted[0]
+    else:
+        # Attribute was expired when reassigned; the row still holds the old value
+        old_data_model = connection.execute(
+            select(Step.__table__.c.data_model).where(Step.__table__.c.id == target.id)
+        ).scalar()
+    _record_table_co_usage(connection, target, old_data_model, target.data_model)
+
 def after_update_step(mapper, connection, target):
+    replaced = target.__dict__.pop('_replaced_step_data', None)
+    if replaced is not None and replaced is not target.data:
+        try:
+            from app.services.step_data_store import artifact_path
+            if artifact_path(replaced) and artifact_path(replaced) != artifact_path(target.data):
+                # Still referenced by the committed row until this transaction commits
+                pending = _pending_artifacts(target)
+                if pending is not None:
+                    pending["replaced"].append(replaced)
+        except Exception as e:
+            print(f"Error queueing replaced data artifact for step {target.id}: {e}")
+
+    changed = [field for field in TRACKED_FIELDS if _field_changed(target, field)]
     try:
-        data = {
-            "event": "update_step",
-            "id": str(target.id),
-            "step_id": str(target.id),
-            "widget_id": str(target.widget_id),
-            "report_id": str(target.widget.report_id),
-            "title": target.title,
-            "slug": target.slug,
-            "status": target.status,
-            "prompt": target.prompt,
-            "code": target.code,
-            "data": target.data,
-            "description": target.description,
-            "type": target.type,
-            "data_model": target.data_model
-        }
-        #print(f"Broadcasting step update: {data}")
-        asyncio.create_task(broadcast_step_update(data))
+        report_id = _report_id_for(connection, target) if changed else None
+        if report_id is not None:
+            _queue_step_event(target, _step_event("update_step", target, report_id, changed), changed)
 
         if target.status == "success":
-            from app.services.slack_notification_service import send_step_result_to_slack
-            print(f"STEP_UPDATE: Triggering Slack DM for successful step {target.id}")
-            asyncio.create_task(send_step_result_to_slack(str(target.id)))
+            pending = _pending_events(target)
+            if pending is not None:
+                pending["succeeded"].append(str(target.id))
 
     except Exception as e:
         print(f"Error in after_update_step: {e}")
 
-async def broadcast_step_update(data):
+def _field_changed(target, field):
+    # PASSIVE_NO_INITIALIZE: never load an unloaded column (e.g. data) just to diff it
+    return get_history(target, field, passive=PASSIVE_NO_INITIALIZE).has_changes()
+
+def _report_id_for(connection, target):
+    widget = target.__dict__.get('widget')
+    if widget is not None:
+        return str(widget.report_id)
+    # Get report_id directly from the database using the widget_id
+    result = connection.execute(
+        select(Widget.report_id).filter(Widget.id == target.widget_id)
+    ).first()
+    if not result:
+        print(f"Warning: Widget {target.widget_id} not found for step {target.id}, skipping broadcast")
+        return None
+    return str(result[0])
+
+def _step_event(event_name, target, report_id, changed):
+    """Compact step event; clients fetch code/data through the API when they change."""
+    event_data = {
+        "event": event_name,
+        "id": str(target.id),
+        "step_id": str(target.id),
+        "widget_id": str(target.widget_id),
+        "report_id": report_id,
+        "title": target.title,
+        "status": target.status,
+        "status_reason": target.status_reason,
+        "type": target.type,
+    }
+    if "data" in changed:
+        event_data["data_version"] = data_version(target.data)
+    return event_data
+
+def after_insert_step(mapper, connection, target):
+    _record_table_co_usage(connection, target, None, target.data_model)
+
     try:
-        await websocket_manager.broadcast_to_report(
-            str(data["report_id"]),
-            json.dumps(data)
-        )
-        #print(f"Broadcasted step update: {data}")
+        report_id = _report_id_for(connection, target)
+        if report_id is None:
+            return
+        changed = [field for field in TRACKED_FIELDS if getattr(target, field, None) is not None]
+        _queue_step_event(target, _step_event("insert_step", target, report_id, changed), changed)
     except Exception as e:
-        print(f"Error broadcasting step update: {e}")
+        print(f"Error in after_insert_step: {e}")
+
+def _queue_step_artifacts_delete(target):
+    pending = _pending_artifacts(target)
+    if pending is not None and target.id is not None:
+        pending["deleted_steps"].append(str(target.id))
+
+def after_delete_step(mapper, connection, target):
+    _queue_step_artifacts_delete(target)
 
-async def broadcast_step_insert(data):
+def after_commit_step_artifacts(session):
+    """Remove artifacts the committed transaction replaced or orphaned."""
+    pending = session.info.pop(_PENDING_ARTIFACTS_KEY, None)
+    if not pending:
+        return
     try:
-        await websocket_manager.broadcast_to_report(
-            str(data["report_id"]),
-            json.dumps(data)
-        )
+        from app.services.step_data_store import step_data_store
+        for data in pending["replaced"]:
+            step_data_store.delete(data)
+        for step_id in pending["deleted_steps"]:
+            step_data_store.delete_for_step(step_id)
     except Exception as e:
-        print(f"Error broadcasting step insert: {e}")
+        print(f"Error removing step data artifacts after commit: {e}")
 
-def after_insert_step(mapper, connection, target):
+def after_rollback_step_artifacts(session):
+    """Remove artifacts written by the rolled-back transaction; rows still point at the old ones."""
+    pending = session.info.pop(_PENDING_ARTIFACTS_KEY, None)
+    if not pending:
+        return
     try:
-        # Get report_id directly from the database using the widget_id
-        result = connection.execute(
-            select(Widget.report_id).filter(Widget.id == target.widget_id)
-        ).first()
-        
-        if not result:
-            print(f"Warning: Widget {target.widget_id} not found for step {target.id}, skipping broadcast")
-            return
-            
-        report_id = result[0]
-        
-        data = {
-            "event": "insert_step",
-            "id": str(target.id),
-            "step_id": str(target.id),
-            "widget_id": str(target.widget_id),
-            "report_id": str(report_id),
-            "title": target.title,
-            "slug": target.slug,
-            "status": target.status,
-            "prompt": target.prompt,
-            "code": target.code,
-            "data": target.data,
-            "description": target.description,
-            "type": target.type,
-            "data_model": target.data_model
-        }
-        asyncio.create_task(broadcast_step_insert(data))
+        from app.services.step_data_store import step_data_store
+        for path in pending["written"]:
+            step_data_store.delete_path(path)
     except Exception as e:
-        print(f"Error in after_insert_step: {e}")
+        print(f"Error removing step data artifacts after rollback: {e}")
+
+def after_commit_step_events(session):
+    """Publish the committed transaction's step events; clients refetch what they report as changed."""
+    pending = session.info.pop(_PENDING_EVENTS_KEY, None)
+    if not pending:
+        return
+    try:
+        for event_data, changed in pending["events"]:
+            step_event_publisher.publish(event_data, changed)
+        if pending["succeeded"]:
+            from app.services.slack_notification_service import send_step_result_to_slack
+            for step_id in pending["succeeded"]:
+                print(f"STEP_UPDATE: Triggering Slack DM for successful step {step_id}")
+                asyncio.create_task(send_step_result_to_slack(step_id))
+    except Exception as e:
+        print(f"Error publishing step events after commit: {e}")
+
+def after_rollback_step_events(session):
+    """Drop events of the rolled-back transaction; nothing they describe was persisted."""
+    session.info.pop(_PENDING_EVENTS_KEY, None)
 
 # Register the event listener
+event.listen(Step, 'before_insert', before_insert_step)
+event.listen(Step, 'before_update', before_update_step)
 event.listen(Step, 'after_update', after_update_step)
-event.listen(Step, 'after_insert', after_insert_step)
\ No newline at end of file
+event.listen(Step, 'after_insert', after_insert_step)
+event.listen(Step, 'after_delete', after_delete_step)
+event.listen(Session, 'after_commit', after_commit_step_artifacts)
+event.listen(Session, 'after_rollback', after_rollback_step_artifacts)
+event.listen(Session, 'after_commit', after_commit_step_events)
+event.listen(Session, 'after_rollback', after_rollback_step_events)
\ No newline at end of file
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, Text, Date, BigInteger, ForeignKey, Index, text
+
+from app.models.base import BaseSchema
+
+
+class TableCoUsage(BaseSchema):
+    """Per-org, per-day count of steps whose data model uses two tables together.
+
+    Maintained incrementally by the Step insert/update listeners so the console
+    joins heatmap never has to load and re-parse step rows.
+    """
+    __tablename__ = "table_co_usage"
+
+    org_id = Column(String(36), ForeignKey("organizations.id"), nullable=False)
+    day = Column(Date, nullable=False)
+
+    # Pair is stored sorted (table1 < table2). A row with NULL table1/table2 is
+    # the day's count of multi-table queries (the heatmap's "queries analyzed").
+    table1 = Column(Text, nullable=True)
+    table2 = Column(Text, nullable=True)
+
+    join_count = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_tcousage_org_day", "org_id", "day"),
+        # NULLs are distinct in unique indexes, so pair rows and the query counter
+        # row get separate partial indexes; both serve as ON CONFLICT targets
+        Index(
+            "ux_tcousage_pair", "org_id", "day", "table1", "table2", unique=True,
+            postgresql_where=text("table1 IS NOT NULL"), sqlite_where=text("table1 IS NOT NULL"),
+        ),
+        Index(
+            "ux_tcousage_queries", "org_id", "day", unique=True,
+            postgresql_where=text("table1 IS NULL"), sqlite_where=text("table1 IS NULL"),
+        ),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, BigInteger, ForeignKey, Index, Float
+from sqlalchemy import Column, String, Text, DateTime, BigInteger, ForeignKey, Index, Float, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -43,6 +43,12 @@ class TableStats(BaseSchema):
     __table_args__ = (
         # Composite uniqueness for fast upserts per scope (now includes data_source_id)
         Index("ix_tabstats_org_report_ds_table", "org_id", "report_id", "data_source_id", "table_fqn", unique=True),
+        # NULLs are distinct in unique indexes, so org-level rollups need their own
+        # partial index to serve as the ON CONFLICT target for batched upserts
+        Index(
+            "ux_tabstats_rollup", "org_id", "data_source_id", "table_fqn", unique=True,
+            postgresql_where=text("report_id IS NULL"), sqlite_where=text("report_id IS NULL"),
+        ),
         Index("ix_tabstats_table", "table_fqn"),
         Index("ix_tabstats_dstbl", "datasource_table_id"),
     )
@@ -1,3 +1,4 @@
+import asyncio
 import re
 from typing import List, Dict, Any
 from io import BytesIO
@@ -21,6 +22,7 @@ from app.schemas.artifact_schema import (
 )
 from app.services.artifact_service import ArtifactService
 from app.services.pptx_export_service import PptxExportService
+from app.services.thumbnail_service import ThumbnailService
 
 
 router = APIRouter(prefix="/artifacts", tags=["artifacts"])
@@ -216,6 +218,22 @@ async def create_artifact(
     return ArtifactSchema.model_validate(artifact)
 
 
+@router.post("/thumbnails/regenerate", status_code=202)
+@requires_permission('manage_organization_settings')
+async def regenerate_thumbnails(
+    current_user: User = Depends(current_user_dep),
+    organization: Organization = Depends(get_current_organization),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Re-render the thumbnail of every report with an artifact in the organization.
+
+    Useful after upgrading the artifact libraries. Renders run in the background
+    through the shared browser pool.
+    """
+    asyncio.create_task(ThumbnailService().regenerate_all(organization_id=str(organization.id)))
+    return {"status": "scheduled"}
+
+
 @router.get("/{artifact_id}", response_model=ArtifactSchema)
 @requires_permission('view_reports', model=ArtifactModel, owner_only=True, allow_public=True)
 async def get_artifact(
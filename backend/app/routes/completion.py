@@ -1,11 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Header, HTTPException, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.dependencies import get_db
 from app.services.completion_service import CompletionService
 from app.schemas.completion_v2_schema import CompletionCreate, CompletionContextEstimateSchema
 from app.schemas.sse_schema import SSEEvent, format_sse_event
-from app.streaming.completion_stream import CompletionEventQueue
 from app.websocket_manager import websocket_manager
 from app.models.user import User
 from app.core.auth import current_user
@@ -86,6 +85,25 @@ async def create_completion(
         background=background,
     )
 
+@router.get("/api/reports/{report_id}/completions/{completion_id}/stream")
+@requires_permission('view_reports', model=Report)
+async def resume_completion_stream(
+    report_id: str,
+    completion_id: str,
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: User = Depends(current_user),
+    organization: Organization = Depends(get_current_organization),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Resume a completion's SSE stream after `Last-Event-ID` (header or `?last_event_id=`); 0 replays it from the start."""
+    if last_event_id is None:
+        try:
+            last_event_id = int(last_event_id_header) if last_event_id_header else 0
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    return await completion_service.resume_completion_stream(db, report_id, completion_id, last_event_id)
+
 @router.get("/api/reports/{report_id}/completions.legacy")
 @requires_permission('view_reports', model=Report)
 async def get_completions(report_id: str, current_user: User = Depends(current_user), organization: Organization = Depends(get_current_organization), db: AsyncSession = Depends(get_async_db)):
@@ -9,7 +9,7 @@ from app.dependencies import get_current_organization
 from app.models.user import User
 from app.models.organization import Organization
 from app.services.mention_service import MentionService
-from app.schemas.mention_schema import AvailableMentionsResponse
+from app.schemas.mention_schema import AvailableMentionsResponse, MentionSearchResponse
 
 
 router = APIRouter(prefix="/mentions", tags=["mentions"])
@@ -73,3 +73,47 @@ async def get_available_mentions(
     
     return result
 
+
+@router.get("/search", response_model=MentionSearchResponse)
+async def search_mentions(
+    q: Optional[str] = Query(None, description="Search text; matches name prefixes, name segments, column names and near-misses"),
+    data_source_ids: Optional[str] = Query(
+        None,
+        description="Comma-separated data source IDs to filter by (e.g., 'ds-1,ds-2')"
+    ),
+    categories: Optional[str] = Query(
+        None,
+        description="Comma-separated categories to return: data_sources, tables, files, entities (default: all)"
+    ),
+    limit: int = Query(10, ge=1, le=100, description="Maximum items per category"),
+    cursor: Optional[str] = Query(None, description="next_cursors value from a previous page; requires a single category"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth_current_user),
+    organization: Organization = Depends(get_current_organization)
+):
+    """
+    Search mentionable items for the prompt box, ranked and paginated server-side.
+
+    Same access control as /mentions/available. Tables of user_required data
+    sources are limited to the caller's overlay when one exists. Results are
+    ordered by match quality, then table usage (or entity mention counts).
+    """
+    ds_ids = None
+    if data_source_ids:
+        ds_ids = [id.strip() for id in data_source_ids.split(',') if id.strip()]
+
+    cats = None
+    if categories:
+        cats = [cat.strip() for cat in categories.split(',') if cat.strip()]
+
+    mention_service = MentionService()
+    return await mention_service.search_mentions(
+        db=db,
+        organization=organization,
+        current_user=current_user,
+        q=q,
+        data_source_ids=ds_ids,
+        categories=cats,
+        limit=limit,
+        cursor=cursor,
+    )
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Literal, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_async_db, get_current_organization
 from app.services.step_service import StepService
@@ -6,35 +7,40 @@ from app.models.user import User
 from app.models.organization import Organization
 from app.core.auth import current_user
 from app.core.permissions_decorator import requires_permission
-import io
 import logging
 from app.schemas.step_schema import StepSchema
+from app.services.step_data_store import StepDataUnavailable
 
 router = APIRouter(tags=["steps"])
 step_service = StepService()
 
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
 @router.get("/steps/{step_id}/export", response_class=Response)
 @requires_permission('view_reports')
 async def export_step(
     step_id: str,
+    format: Literal["csv", "xlsx"] = Query("csv"),
     current_user: User = Depends(current_user),
     organization: Organization = Depends(get_current_organization),
     db: AsyncSession = Depends(get_async_db)
 ):
-    logging.info(f"CSV export request received for step {step_id}")
+    logging.info(f"{format.upper()} export request received for step {step_id}")
     try:
-        df, step = await step_service.export_step_to_csv(db, step_id)
-        
-        csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False)
-        csv_buffer.seek(0)
-        
-        response = Response(content=csv_buffer.getvalue(), media_type="text/csv")
+        content, step = await step_service.export_step(db, step_id, format)
+
+        response = Response(content=content, media_type=EXPORT_MEDIA_TYPES[format])
         widget_title = "".join(c for c in step.widget.title if c.isalnum() or c in (' ', '_')).rstrip()
-        file_name = f"{widget_title}-{step.slug}.csv".replace(" ", "_")
+        file_name = f"{widget_title}-{step.slug}.{format}".replace(" ", "_")
         response.headers["Content-Disposition"] = f"attachment; filename=\"{file_name}\""
         return response
 
+    except StepDataUnavailable as e:
+        logging.error(f"Result data missing for step {step_id}: {str(e)}")
+        raise HTTPException(status_code=410, detail="The stored result rows for this step are no longer available; re-run the query.")
     except ValueError as e:
         logging.warning(f"Value error in export_step route for step {step_id}: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -43,6 +49,30 @@ async def export_step(
         raise HTTPException(status_code=500, detail=f"Internal server error during export: {str(e)}") 
 
 
+@router.get("/steps/{step_id}/rows", response_model=dict)
+@requires_permission('view_reports')
+async def get_step_rows(
+    step_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=10000),
+    columns: Optional[List[str]] = Query(None),
+    sort: Optional[str] = Query(None),
+    order: Literal["asc", "desc"] = Query("asc"),
+    current_user: User = Depends(current_user),
+    organization: Organization = Depends(get_current_organization),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        return await step_service.get_step_rows(
+            db, step_id, offset=offset, limit=limit, columns=columns, sort=sort, descending=(order == "desc")
+        )
+    except StepDataUnavailable as e:
+        logging.error(f"Result data missing for step {step_id}: {str(e)}")
+        raise HTTPException(status_code=410, detail="The stored result rows for this step are no longer available; re-run the query.")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.get("/steps/{step_id}", response_model=StepSchema)
 @requires_permission('view_reports')
 async def get_step(
@@ -375,6 +375,12 @@ class DuckDBConfig(BaseModel):
         description="Path to local .duckdb file, or URI pattern per line for parquet/csv files. Supports wildcards. Examples: /data/my.duckdb, s3://, az://",
         json_schema_extra={"ui:type": "textarea"}
     )
+    materialize: Optional[str] = Field(
+        "auto",
+        title="Materialize",
+        description="Load files into native DuckDB tables once instead of re-reading them per query. auto: in memory for local files, views for remote URIs; file: local .duckdb cache file",
+        json_schema_extra={"ui:type": "string"}
+    )
 
 # Apache Pinot
 class PinotConfig(BaseModel):
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from enum import Enum
 from datetime import datetime
 
@@ -89,6 +89,23 @@ class AvailableMentionsResponse(BaseModel):
     entities: List[EntityMention]
 
 
+class TableSearchMention(TableMention):
+    # Connection info (for multi-connection support)
+    connection_id: Optional[str] = None
+    connection_name: Optional[str] = None
+    connection_type: Optional[str] = None
+    matched_columns: List[str] = []  # Columns whose name matched the query
+
+
+class MentionSearchResponse(BaseModel):
+    data_sources: List[DataSourceMention]
+    tables: List[TableSearchMention]
+    files: List[FileMention]
+    entities: List[EntityMention]
+    # Per-category cursor for the next page (None when exhausted or not requested)
+    next_cursors: Dict[str, Optional[str]] = {}
+
+
 # =====================================================
 # Tracking schemas (for storing mentions on completions)
 # =====================================================
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Optional, Dict, Any
 from datetime import datetime
 
@@ -11,21 +11,38 @@ class SSEEvent(BaseModel):
     completion_id: Optional[str] = None
     agent_execution_id: Optional[str] = None
     seq: Optional[int] = None
+
+    # Encoded JSON payload, filled on first format and shared by every subscriber
+    _payload: Optional[str] = PrivateAttr(default=None)
     
     class Config:
         # Allow extra fields for future extensibility
         extra = "allow"
 
+    @classmethod
+    def internal(cls, event: str, data: Optional[Dict[str, Any]] = None, **fields) -> "SSEEvent":
+        """Build an event from trusted agent-side values without running validation.
+
+        For hot paths (token deltas, partial decisions) whose fields are already
+        the right types; anything built from external input should use the
+        regular constructor.
+        """
+        return cls.model_construct(
+            event=event,
+            data=data if data is not None else {},
+            timestamp=datetime.utcnow(),
+            **fields,
+        )
+
+    def payload(self) -> str:
+        """JSON for the ``data:`` line, encoded once per event."""
+        if self._payload is None:
+            self._payload = self.model_dump_json()
+        return self._payload
+
 
 def format_sse_event(event: SSEEvent, event_id: Optional[str] = None) -> str:
     """Format Pydantic event as SSE string."""
-    lines = []
-    
     if event_id:
-        lines.append(f"id: {event_id}")
-    
-    lines.append(f"event: {event.event}")
-    lines.append(f"data: {event.model_dump_json()}")
-    lines.append("")  # Empty line to end event
-    
-    return "\n".join(lines) + "\n"
\ No newline at end of file
+        return f"id: {event_id}\nevent: {event.event}\ndata: {event.payload()}\n\n"
+    return f"event: {event.event}\ndata: {event.payload()}\n\n"
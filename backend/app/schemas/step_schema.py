@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field, model_validator, field_validator
 from typing import List, Optional
 from datetime import datetime
 from app.schemas.view_schema import ViewSchema
+from app.services.step_data_store import step_data_store
 
 class StepBase(BaseModel):
     title: str
@@ -26,6 +27,12 @@ class StepSchema(StepBase):
     class Config:
         from_attributes = True
 
+    @field_validator("data", mode="before")
+    @classmethod
+    def _hydrate_data(cls, v):
+        # Large results live in a columnar artifact; responses keep the full row payload
+        return step_data_store.hydrate(v)
+
     @field_validator("data", "data_model", mode="before")
     @classmethod
     def _none_to_dict(cls, v):
@@ -71,6 +78,12 @@ class PublicStepSchema(BaseModel):
     class Config:
         from_attributes = True
 
+    @field_validator("data", mode="before")
+    @classmethod
+    def _hydrate_data(cls, v):
+        # Large results live in a columnar artifact; responses keep the full row payload
+        return step_data_store.hydrate(v)
+
     @field_validator("data", "data_model", mode="before")
     @classmethod
     def _none_to_dict(cls, v):
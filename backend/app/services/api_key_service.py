@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import HTTPException
 
+from app.core.auth_cache import ApiKeyEntry, auth_cache
 from app.models.api_key import ApiKey
 from app.models.user import User
 from app.models.organization import Organization
@@ -112,17 +113,20 @@ class ApiKeyService:
         # Soft delete
         api_key.deleted_at = datetime.utcnow()
         await db.commit()
+        auth_cache.invalidate_api_key(api_key.id)
         
         return True
 
-    async def get_user_by_api_key(
+    async def _resolve_api_key(
         self,
         db: AsyncSession,
         api_key: str,
-    ) -> Optional[User]:
-        """Validate an API key and return the associated user.
-        
-        Returns None if the key is invalid, expired, or deleted.
+    ) -> Optional[ApiKeyEntry]:
+        """Look up a key's user and organization, going through the auth cache.
+
+        On a miss the rows are loaded in a short-lived session on the same
+        engine, so the cached objects are detached and never touched by a
+        request.
         """
         if not api_key or not api_key.startswith("bow_"):
             return None
@@ -130,30 +134,54 @@ class ApiKeyService:
         # Hash the provided key
         key_hash = self._hash_api_key(api_key)
         
-        # Look up the API key
-        result = await db.execute(
-            select(ApiKey)
-            .where(ApiKey.key_hash == key_hash)
-            .where(ApiKey.deleted_at.is_(None))
-        )
-        api_key_obj = result.scalar_one_or_none()
+        entry = auth_cache.get_api_key(key_hash)
+        if entry is None:
+            async with AsyncSession(db.bind, expire_on_commit=False) as lookup:
+                # Look up the API key
+                result = await lookup.execute(
+                    select(ApiKey)
+                    .where(ApiKey.key_hash == key_hash)
+                    .where(ApiKey.deleted_at.is_(None))
+                )
+                api_key_obj = result.scalar_one_or_none()
+                
+                if not api_key_obj:
+                    return None
+                
+                user = await lookup.get(User, api_key_obj.user_id)
+                organization = await lookup.get(Organization, api_key_obj.organization_id)
+                entry = ApiKeyEntry(
+                    api_key_id=api_key_obj.id,
+                    user=user,
+                    organization=organization,
+                    expires_at=api_key_obj.expires_at,
+                )
+            auth_cache.put_api_key(key_hash, entry)
         
-        if not api_key_obj:
+        # Check expiration
+        if entry.is_expired():
             return None
         
-        # Check expiration
-        if api_key_obj.expires_at and api_key_obj.expires_at < datetime.utcnow():
+        return entry
+
+    async def get_user_by_api_key(
+        self,
+        db: AsyncSession,
+        api_key: str,
+    ) -> Optional[User]:
+        """Validate an API key and return the associated user.
+        
+        Returns None if the key is invalid, expired, or deleted.
+        ``last_used_at`` is buffered and written by the scheduler in bulk.
+        """
+        entry = await self._resolve_api_key(db, api_key)
+        if entry is None or entry.user is None:
             return None
         
-        # Update last_used_at
-        api_key_obj.last_used_at = datetime.utcnow()
-        await db.commit()
+        auth_cache.touch(entry.api_key_id)
         
-        # Get the user
-        user_result = await db.execute(
-            select(User).where(User.id == api_key_obj.user_id)
-        )
-        return user_result.scalar_one_or_none()
+        # Attach a copy of the cached user to this session without a query
+        return await db.merge(entry.user, load=False)
 
     async def get_organization_by_api_key(
         self,
@@ -164,31 +192,8 @@ class ApiKeyService:
         
         Returns None if the key is invalid, expired, or deleted.
         """
-        if not api_key or not api_key.startswith("bow_"):
-            return None
-        
-        # Hash the provided key
-        key_hash = self._hash_api_key(api_key)
-        
-        # Look up the API key
-        result = await db.execute(
-            select(ApiKey)
-            .where(ApiKey.key_hash == key_hash)
-            .where(ApiKey.deleted_at.is_(None))
-        )
-        api_key_obj = result.scalar_one_or_none()
-        
-        if not api_key_obj:
-            return None
-        
-        # Check expiration
-        if api_key_obj.expires_at and api_key_obj.expires_at < datetime.utcnow():
+        entry = await self._resolve_api_key(db, api_key)
+        if entry is None or entry.organization is None:
             return None
         
-        # Get the organization
-        org_result = await db.execute(
-            select(Organization).where(Organization.id == api_key_obj.organization_id)
-        )
-        return org_result.scalar_one_or_none()
-
-
+        return await db.merge(entry.organization, load=False)
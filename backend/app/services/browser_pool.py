@@ -0,0 +1,308 @@
+"""Long-lived headless Chromium shared by thumbnail rendering and artifact validation.
+
+Launching Chromium is most of the cost of a screenshot, so the browser is
+started once per worker and kept alive. Pages are opened in a small set of
+reusable ``BrowserContext`` objects (recycled after ``context_max_uses``
+renders to bound memory growth), and every render goes through a bounded
+queue: at most ``max_concurrency`` pages are open at once and at most
+``max_queue`` callers may wait for a slot before ``BrowserPoolBusy`` is
+raised. A crashed or disconnected browser is relaunched on the next render,
+and an idle browser is closed by a periodic job.
+
+Readiness is signalled by the page itself: artifact HTML sets
+``window.__ARTIFACT_RENDER_COMPLETE__`` once React has mounted and charts have
+settled, so callers wait on that flag instead of sleeping.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_MAX_QUEUE = 100
+DEFAULT_CONTEXT_MAX_USES = 50
+DEFAULT_RENDER_TIMEOUT = 15  # seconds
+DEFAULT_IDLE_TIMEOUT = 600  # seconds
+
+DEFAULT_VIEWPORT = {"width": 1280, "height": 720}
+
+RENDER_COMPLETE_EXPRESSION = "window.__ARTIFACT_RENDER_COMPLETE__ === true"
+
+# Resolves after two animation frames, i.e. once the last DOM/canvas update has been painted
+NEXT_PAINT_EXPRESSION = (
+    "() => new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(() => resolve(true))))"
+)
+
+
+class BrowserPoolUnavailable(Exception):
+    """Raised when Playwright (or its Chromium build) is not installed."""
+    pass
+
+
+class BrowserPoolBusy(Exception):
+    """Raised when the render queue is full."""
+    pass
+
+
+class _PooledContext:
+    __slots__ = ("context", "uses")
+
+    def __init__(self, context: Any):
+        self.context = context
+        self.uses = 0
+
+
+class BrowserPool:
+    """One Chromium per worker with reusable contexts and a bounded render queue."""
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        context_max_uses: int = DEFAULT_CONTEXT_MAX_USES,
+        render_timeout: float = DEFAULT_RENDER_TIMEOUT,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.context_max_uses = context_max_uses
+        self.render_timeout = render_timeout
+        self.idle_timeout = idle_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._playwright: Any = None
+        self._browser: Any = None
+        self._idle_contexts: List[_PooledContext] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._waiting = 0
+        self._active = 0
+        self._last_used = time.monotonic()
+        self._stats = {"launches": 0, "pages": 0, "failed": 0, "rejected": 0, "contexts_created": 0}
+
+    def configure(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        context_max_uses: Optional[int] = None,
+        render_timeout: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+    ) -> None:
+        if max_concurrency is not None and max_concurrency != self.max_concurrency:
+            self.max_concurrency = max_concurrency
+            self._semaphore = None  # recreated on next use; in-flight renders keep the old one
+        if max_queue is not None:
+            self.max_queue = max_queue
+        if context_max_uses is not None:
+            self.context_max_uses = context_max_uses
+        if render_timeout is not None:
+            self.render_timeout = render_timeout
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = dict(self._stats)
+        snapshot.update(
+            running=self._browser is not None,
+            active=self._active,
+            waiting=self._waiting,
+            idle_contexts=len(self._idle_contexts),
+            max_concurrency=self.max_concurrency,
+        )
+        return snapshot
+
+    @asynccontextmanager
+    async def page(self, viewport: Optional[Dict[str, int]] = None):
+        """Open a page in a pooled context; waits for a free slot first.
+
+        Raises:
+            BrowserPoolBusy: if ``max_queue`` callers are already waiting.
+            BrowserPoolUnavailable: if Playwright is not installed.
+        """
+        self._bind_loop()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._semaphore
+        if semaphore.locked() and self._waiting >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise BrowserPoolBusy(f"Render queue is full ({self._waiting} waiting)")
+
+        self._waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._active += 1
+        pooled: Optional[_PooledContext] = None
+        page = None
+        healthy = False
+        try:
+            pooled = await self._checkout_context()
+            page = await pooled.context.new_page()
+            await page.set_viewport_size(viewport or DEFAULT_VIEWPORT)
+            yield page
+            healthy = True
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    healthy = False
+            if pooled is not None:
+                await self._checkin_context(pooled, healthy)
+            self._active -= 1
+            self._stats["pages"] += 1
+            self._last_used = time.monotonic()
+            semaphore.release()
+
+    async def screenshot(
+        self,
+        html: str,
+        viewport: Optional[Dict[str, int]] = None,
+        ready_expression: str = RENDER_COMPLETE_EXPRESSION,
+        timeout: Optional[float] = None,
+    ) -> bytes:
+        """Render ``html`` and screenshot the viewport once the page reports it is ready."""
+        viewport = viewport or DEFAULT_VIEWPORT
+        async with self.page(viewport) as page:
+            await page.set_content(html, wait_until="load")
+            await wait_until_ready(page, ready_expression, timeout if timeout is not None else self.render_timeout)
+            return await page.screenshot(
+                type="png",
+                clip={"x": 0, "y": 0, "width": viewport["width"], "height": viewport["height"]},
+            )
+
+    async def close_if_idle(self) -> bool:
+        """Close the browser when nothing has rendered for ``idle_timeout`` seconds."""
+        if self._browser is None or self._active or self._waiting:
+            return False
+        if time.monotonic() - self._last_used < self.idle_timeout:
+            return False
+        await self.close()
+        return True
+
+    async def close(self) -> None:
+        contexts, self._idle_contexts = self._idle_contexts, []
+        browser, self._browser = self._browser, None
+        playwright, self._playwright = self._playwright, None
+        for pooled in contexts:
+            try:
+                await pooled.context.close()
+            except Exception:
+                pass
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                logger.debug("Error closing pooled browser", exc_info=True)
+        if playwright is not None:
+            try:
+                await playwright.stop()
+            except Exception:
+                logger.debug("Error stopping Playwright", exc_info=True)
+
+    def _bind_loop(self) -> None:
+        # Playwright objects and asyncio primitives belong to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._playwright = None
+            self._browser = None
+            self._idle_contexts = []
+            self._semaphore = None
+            self._launch_lock = None
+            self._waiting = 0
+            self._active = 0
+
+    async def _ensure_browser(self) -> Any:
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._browser is not None:
+                logger.warning("Pooled browser disconnected; relaunching")
+                await self.close()
+            self._playwright, self._browser = await self._launch()
+            self._stats["launches"] += 1
+            return self._browser
+
+    async def _launch(self):
+        try:
+            from playwright.async_api import async_playwright
+        except ImportError as e:
+            raise BrowserPoolUnavailable("Playwright not installed") from e
+        playwright = await async_playwright().start()
+        try:
+            browser = await playwright.chromium.launch(headless=True)
+        except Exception:
+            await playwright.stop()
+            raise
+        return playwright, browser
+
+    async def _checkout_context(self) -> _PooledContext:
+        browser = await self._ensure_browser()
+        while self._idle_contexts:
+            pooled = self._idle_contexts.pop()
+            if pooled.uses < self.context_max_uses:
+                return pooled
+            await self._discard(pooled)
+        self._stats["contexts_created"] += 1
+        return _PooledContext(await browser.new_context(viewport=DEFAULT_VIEWPORT))
+
+    async def _checkin_context(self, pooled: _PooledContext, healthy: bool) -> None:
+        pooled.uses += 1
+        browser = self._browser
+        if (
+            healthy
+            and browser is not None
+            and browser.is_connected()
+            and pooled.uses < self.context_max_uses
+            and len(self._idle_contexts) < self.max_concurrency
+        ):
+            self._idle_contexts.append(pooled)
+        else:
+            await self._discard(pooled)
+
+    @staticmethod
+    async def _discard(pooled: _PooledContext) -> None:
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+
+async def wait_until_ready(page: Any, ready_expression: str = RENDER_COMPLETE_EXPRESSION, timeout: float = DEFAULT_RENDER_TIMEOUT) -> bool:
+    """Wait for the page's render-complete signal, then for the next paint.
+
+    Returns False if the signal did not arrive within ``timeout`` seconds; a
+    partially rendered screenshot is still better than none for thumbnails.
+    """
+    ready = True
+    try:
+        await page.wait_for_function(ready_expression, timeout=timeout * 1000)
+    except Exception:
+        ready = False
+    try:
+        await page.evaluate(NEXT_PAINT_EXPRESSION)
+    except Exception:
+        pass
+    return ready
+
+
+browser_pool = BrowserPool()
+
+
+async def close_idle_browser() -> None:
+    """Scheduler job: release Chromium after a quiet period."""
+    await browser_pool.close_if_idle()
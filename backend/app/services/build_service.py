@@ -806,6 +806,13 @@ class BuildService:
         await db.commit()
         await db.refresh(build)
 
+        # Compile the new main build's retrieval index now rather than on the next agent run
+        try:
+            from app.ai.context.builders.instruction_context_builder import InstructionContextBuilder
+            await InstructionContextBuilder.load_build_index(db, build)
+        except Exception as e:
+            logger.warning(f"Failed to warm instruction index for build {build.id}: {e}")
+
         # Audit log
         try:
             await audit_service.log(
@@ -30,7 +30,7 @@ from app.serializers.completion_v2 import serialize_block_v2, serialize_block_v2
 from app.models.visualization import Visualization
 from app.schemas.agent_execution_schema import PlanDecisionSchema
 from app.schemas.sse_schema import SSEEvent, format_sse_event
-from app.streaming.completion_stream import CompletionEventQueue
+from app.streaming.completion_stream import completion_streams, stream_sse
 
 
 from app.services.step_service import StepService
@@ -60,6 +60,16 @@ from app.models.agent_execution import AgentExecution
 from app.models.instruction import Instruction
 
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Disable nginx buffering
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization, Last-Event-ID",
+}
+
+
 async def _get_instruction_suggestions_for_completion(
     db: AsyncSession,
     completion: Completion,
@@ -1572,8 +1582,16 @@ class CompletionService:
             org_settings = await organization.get_settings(db)
             resolved_build_id = await self._resolve_build_id(db, organization, build_id)
 
-            # Create event queue for streaming
-            event_queue = CompletionEventQueue()
+            # Event log for streaming; resumable by either completion id
+            event_queue = completion_streams.create([completion.id, system_completion.id])
+            event_queue.append(SSEEvent(
+                event="completion.started",
+                completion_id=str(completion.id),
+                data={
+                    "system_completion_id": str(system_completion.id),
+                    "user_prompt": completion_data.prompt.content,
+                }
+            ))
 
             async def run_agent_with_streaming():
                 """Run agent in background and stream events."""
@@ -1705,54 +1723,24 @@ class CompletionService:
                         except Exception:
                             pass
                     finally:
-                        # Mark queue as finished
+                        # Close the log with the stream-level finish event
+                        event_queue.append(SSEEvent(
+                            event="completion.finished",
+                            completion_id=str(completion.id),
+                            data={
+                                "system_completion_id": str(system_completion.id),
+                            }
+                        ))
                         event_queue.finish()
 
             # Start agent execution in background
             asyncio.create_task(run_agent_with_streaming())
 
-            # Stream events
-            async def completion_stream_generator():
-                """Generate SSE-formatted events for streaming completion."""
-                
-                # Send initial event
-                start_event = SSEEvent(
-                    event="completion.started",
-                    completion_id=str(completion.id),
-                    data={
-                        "system_completion_id": str(system_completion.id),
-                        "user_prompt": completion_data.prompt.content,
-                    }
-                )
-                yield format_sse_event(start_event)
-                
-                # Stream agent events
-                async for event in event_queue.get_events():
-                    yield format_sse_event(event)
-                
-                # Send completion event
-                finish_event = SSEEvent(
-                    event="completion.finished",
-                    completion_id=str(completion.id),
-                    data={
-                        "system_completion_id": str(system_completion.id),
-                    }
-                )
-                yield format_sse_event(finish_event)
-                yield "data: [DONE]\n\n"
-
             # Return streaming response
             return StreamingResponse(
-                completion_stream_generator(),
+                stream_sse(event_queue, heartbeat=completion_streams.heartbeat, coalesce_bytes=completion_streams.coalesce_bytes),
                 media_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                    "X-Accel-Buffering": "no",  # Disable nginx buffering
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type, Authorization",
-                }
+                headers=SSE_HEADERS,
             )
 
         except HTTPException as he:
@@ -1767,6 +1755,46 @@ class CompletionService:
                 detail=f"Unexpected error: {str(e)}"
             )
     
+    async def resume_completion_stream(
+        self,
+        db: AsyncSession,
+        report_id: str,
+        completion_id: str,
+        last_event_id: int = 0,
+    ):
+        """Re-attach to a streamed completion, replaying events after ``last_event_id``.
+
+        ``completion_id`` may be the user or the system completion. When this
+        worker no longer holds the stream's event log, a single
+        ``completion.resync`` event with the persisted status is sent instead.
+        """
+        result = await db.execute(
+            select(Completion).where(Completion.id == completion_id, Completion.report_id == report_id)
+        )
+        completion = result.scalar_one_or_none()
+        if not completion:
+            raise HTTPException(status_code=404, detail="Completion not found")
+
+        event_log = completion_streams.get(completion_id)
+        if event_log is not None:
+            stream = stream_sse(
+                event_log,
+                after_id=last_event_id,
+                heartbeat=completion_streams.heartbeat,
+                coalesce_bytes=completion_streams.coalesce_bytes,
+            )
+        else:
+            async def resync_only():
+                yield format_sse_event(SSEEvent(
+                    event="completion.resync",
+                    completion_id=str(completion.id),
+                    data={"reason": "stream_unavailable", "status": completion.status},
+                ))
+                yield "data: [DONE]\n\n"
+            stream = resync_only()
+
+        return StreamingResponse(stream, media_type="text/event-stream", headers=SSE_HEADERS)
+
     async def _get_response_completions(self, db: AsyncSession, head_completion: Completion, current_user: User, organization: Organization):
         response_completions = await db.execute(
             select(Completion)
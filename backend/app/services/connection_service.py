@@ -23,6 +23,9 @@ from app.models.user import User
 from app.models.user_connection_credentials import UserConnectionCredentials
 from app.models.user_connection_overlay import UserConnectionTable, UserConnectionColumn
 from app.schemas.data_source_registry import resolve_client_class, list_available_data_sources
+from app.data_sources.clients.engine_registry import engine_registry
+from app.data_sources.clients.duckdb_session_cache import duckdb_session_cache
+from app.data_sources.clients.query_result_cache import query_result_cache
 from app.ee.audit.service import audit_service
 
 logger = logging.getLogger(__name__)
@@ -298,6 +301,12 @@ class ConnectionService:
         try:
             await db.commit()
 
+            # Drop pooled engines/sessions and cached results built from the previous config/credentials
+            if connection_changed:
+                engine_registry.invalidate(str(connection.id))
+                duckdb_session_cache.invalidate(str(connection.id))
+                query_result_cache.invalidate(str(connection.id))
+
             # Refresh tables if connection changed
             if connection_changed and connection.auth_policy == "system_only":
                 await self.refresh_schema(db=db, connection=connection)
@@ -365,6 +374,9 @@ class ConnectionService:
 
         await db.delete(connection)
         await db.commit()
+        engine_registry.invalidate(str(connection_id))
+        duckdb_session_cache.invalidate(str(connection_id))
+        query_result_cache.invalidate(str(connection_id))
 
         # Audit log
         try:
@@ -642,7 +654,7 @@ class ConnectionService:
         params = {**(config or {}), **(creds or {})}
 
         # Strip meta keys
-        meta_keys = {"auth_type", "auth_policy", "allowed_user_auth_modes", "is_file_upload"}
+        meta_keys = {"auth_type", "auth_policy", "allowed_user_auth_modes", "is_file_upload", "query_cache", "arrow_fetch"}
         params = {k: v for k, v in params.items() if v is not None and k not in meta_keys}
 
         # Narrow to constructor signature
@@ -654,7 +666,9 @@ class ConnectionService:
             allowed = params
 
         logger.info(f"construct_client: Final param keys={list(allowed.keys())}")
-        return ClientClass(**allowed)
+        client = ClientClass(**allowed)
+        client.engine_scope = str(connection.id)
+        return client
 
     async def resolve_credentials(
         self,
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text, literal, Integer
+from sqlalchemy import select, func, text, literal, Integer, case
 from app.models.organization import Organization
 from app.models.user import User
 from app.models.completion import Completion
@@ -8,6 +8,9 @@ from app.models.step import Step
 from app.models.widget import Widget
 from app.models.completion_feedback import CompletionFeedback
 from app.models.table_stats import TableStats
+from app.models.table_co_usage import TableCoUsage
+from app.services.table_co_usage_service import extract_tables_from_data_model, parse_table_from_source
+from app.services.step_data_store import step_data_store
 from app.schemas.console_schema import (
     SimpleMetrics, MetricsQueryParams, MetricsComparison, 
     TimeSeriesMetrics, ActivityMetrics, PerformanceMetrics,
@@ -314,16 +317,41 @@ class ConsoleService:
         # Your existing implementation here
         pass
 
+    def _date_bucket(self, db: AsyncSession, column, granularity: str):
+        """SQL expression that labels ``column`` with its time bucket.
+
+        Labels are strings so they compare equal across the separate metric
+        queries: ``YYYY-MM-DD`` for day/week (weeks start on Monday) and
+        ``YYYY-MM-DD HH:00`` for hour.
+        """
+        bind = db.get_bind()
+        dialect_name = bind.dialect.name if bind else "sqlite"
+        if dialect_name == "postgresql":
+            if granularity == "hour":
+                return func.to_char(func.date_trunc('hour', column), 'YYYY-MM-DD HH24:00')
+            return func.to_char(func.date_trunc(granularity, column), 'YYYY-MM-DD')
+        if granularity == "hour":
+            return func.strftime('%Y-%m-%d %H:00', column)
+        if granularity == "week":
+            # Step back six days, then forward to the next Monday: the Monday on/before
+            return func.date(column, '-6 days', 'weekday 1')
+        return func.date(column)
+
     async def get_timeseries_metrics(
         self,
         db: AsyncSession,
         organization: Organization,
         params: MetricsQueryParams
     ) -> TimeSeriesMetrics:
-        """Get time-series metrics data for charts"""
+        """Get time-series metrics data for charts.
+
+        Each metric family is a single GROUP BY over date buckets rather than
+        a round trip per day.
+        """
 
         start_date, end_date = self._normalize_date_range(params.start_date, params.end_date)
         parsed_data_source_ids = self._parse_data_source_ids(params.data_source_ids)
+        granularity = params.granularity or "day"
 
         # Build data source filter subquery if needed
         ds_filter_subquery = None
@@ -333,15 +361,67 @@ class ConsoleService:
                 .where(report_data_source_association.c.data_source_id.in_(parsed_data_source_ids))
             )
 
-        # Generate daily intervals
-        intervals = []
-        current = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        while current <= end_date:
-            next_day = current + timedelta(days=1)
-            intervals.append((current, next_day))
-            current = next_day
+        # Completions: message count, accuracy inputs and judge averages per bucket
+        completion_bucket = self._date_bucket(db, Completion.created_at, granularity).label('bucket')
+        judged = Completion.instructions_effectiveness.isnot(None)
+        completions_query = (
+            select(
+                completion_bucket,
+                func.count(Completion.id).label('messages'),
+                func.sum(Completion.response_score).label('response_score_sum'),
+                func.avg(case((judged, Completion.instructions_effectiveness))).label('avg_instructions_effectiveness'),
+                func.avg(case((judged, Completion.context_effectiveness))).label('avg_context_effectiveness'),
+                func.avg(case((judged, Completion.response_score))).label('avg_response_score'),
+            )
+            .join(Report)
+            .where(
+                Report.organization_id == organization.id,
+                Completion.created_at >= start_date,
+                Completion.created_at <= end_date
+            )
+            .group_by(completion_bucket)
+        )
+        if ds_filter_subquery is not None:
+            completions_query = completions_query.where(Report.id.in_(ds_filter_subquery))
+        completion_rows = {row.bucket: row for row in (await db.execute(completions_query)).all()}
+
+        # Queries (steps) per bucket
+        step_bucket = self._date_bucket(db, Step.created_at, granularity).label('bucket')
+        queries_query = (
+            select(step_bucket, func.count(Step.id).label('queries'))
+            .join(Widget).join(Report)
+            .where(
+                Report.organization_id == organization.id,
+                Step.created_at >= start_date,
+                Step.created_at <= end_date
+            )
+            .group_by(step_bucket)
+        )
+        if ds_filter_subquery is not None:
+            queries_query = queries_query.where(Report.id.in_(ds_filter_subquery))
+        queries_by_bucket = {row.bucket: row.queries for row in (await db.execute(queries_query)).all()}
+
+        # Feedback totals and positives per bucket
+        feedback_bucket = self._date_bucket(db, CompletionFeedback.created_at, granularity).label('bucket')
+        feedback_query = (
+            select(
+                feedback_bucket,
+                func.count(CompletionFeedback.id).label('total'),
+                func.sum(case((CompletionFeedback.direction > 0, 1), else_=0)).label('positive'),
+            )
+            .join(Completion, CompletionFeedback.completion_id == Completion.id)
+            .join(Report, Completion.report_id == Report.id)
+            .where(
+                Report.organization_id == organization.id,
+                CompletionFeedback.created_at >= start_date,
+                CompletionFeedback.created_at <= end_date
+            )
+            .group_by(feedback_bucket)
+        )
+        if ds_filter_subquery is not None:
+            feedback_query = feedback_query.where(Report.id.in_(ds_filter_subquery))
+        feedback_by_bucket = {row.bucket: row for row in (await db.execute(feedback_query)).all()}
 
-        # Get data for each day
         messages_data = []
         queries_data = []
         accuracy_data = []
@@ -350,170 +430,65 @@ class ConsoleService:
         context_effectiveness_data = []
         response_quality_data = []
         feedback_data = []
-        
+
         # For smoothing - keep track of last non-zero values
         last_instructions_effectiveness = 0.0
         last_context_effectiveness = 0.0
         last_response_quality = 0.0
-        
-        for interval_start, interval_end in intervals:
-            # Messages count for this day
-            messages_query = (
-                select(func.count(Completion.id))
-                .join(Report)
-                .where(
-                    Report.organization_id == organization.id,
-                    Completion.created_at >= interval_start,
-                    Completion.created_at < interval_end
-                )
-            )
-            if ds_filter_subquery is not None:
-                messages_query = messages_query.where(Report.id.in_(ds_filter_subquery))
-            messages_result = await db.execute(messages_query)
-            messages_count = messages_result.scalar() or 0
-
-            # Queries count for this day
-            queries_query = (
-                select(func.count(Step.id))
-                .join(Widget).join(Report)
-                .where(
-                    Report.organization_id == organization.id,
-                    Step.created_at >= interval_start,
-                    Step.created_at < interval_end
-                )
-            )
-            if ds_filter_subquery is not None:
-                queries_query = queries_query.where(Report.id.in_(ds_filter_subquery))
-            queries_result = await db.execute(queries_query)
-            queries_count = queries_result.scalar() or 0
-
-            # Calculate accuracy rate from response scores for this day
-            # Count ALL completions for this day
-            total_completions_query = (
-                select(func.count(Completion.id))
-                .join(Report)
-                .where(
-                    Report.organization_id == organization.id,
-                    Completion.created_at >= interval_start,
-                    Completion.created_at < interval_end
-                )
-            )
-            if ds_filter_subquery is not None:
-                total_completions_query = total_completions_query.where(Report.id.in_(ds_filter_subquery))
-            total_completions_result = await db.execute(total_completions_query)
-            total_completions = total_completions_result.scalar() or 0
 
-            # Sum response scores (only non-null ones)
-            response_score_query = (
-                select(func.sum(Completion.response_score))
-                .join(Report)
-                .where(
-                    Report.organization_id == organization.id,
-                    Completion.created_at >= interval_start,
-                    Completion.created_at < interval_end,
-                    Completion.response_score.isnot(None)
-                )
-            )
-            if ds_filter_subquery is not None:
-                response_score_query = response_score_query.where(Report.id.in_(ds_filter_subquery))
-            response_score_result = await db.execute(response_score_query)
-            response_score_sum = response_score_result.scalar() or 0
+        # Only buckets with activity (messages or queries) are emitted; judge
+        # scores only exist on completions so no smoothing state is skipped.
+        for bucket in sorted(set(completion_rows) | set(queries_by_bucket)):
+            completion_row = completion_rows.get(bucket)
+            messages_count = completion_row.messages if completion_row else 0
+            queries_count = queries_by_bucket.get(bucket, 0)
+            if messages_count <= 0 and queries_count <= 0:
+                continue
 
             # Calculate accuracy: sum of scores / total completions * 20
-            accuracy_rate = (response_score_sum / total_completions * 20) if total_completions > 0 else 0
+            response_score_sum = (completion_row.response_score_sum or 0) if completion_row else 0
+            accuracy_rate = (response_score_sum / messages_count * 20) if messages_count > 0 else 0
 
-            # Positive feedback rate for this day (for feedback metric)
-            total_feedbacks_query = (
-                select(func.count(CompletionFeedback.id))
-                .join(Completion, CompletionFeedback.completion_id == Completion.id)
-                .join(Report, Completion.report_id == Report.id)
-                .where(
-                    Report.organization_id == organization.id,
-                    CompletionFeedback.created_at >= interval_start,
-                    CompletionFeedback.created_at < interval_end
-                )
-            )
-            if ds_filter_subquery is not None:
-                total_feedbacks_query = total_feedbacks_query.where(Report.id.in_(ds_filter_subquery))
-            total_feedbacks_result = await db.execute(total_feedbacks_query)
-            total_feedbacks = total_feedbacks_result.scalar() or 0
-
-            positive_feedbacks_query = (
-                select(func.count(CompletionFeedback.id))
-                .join(Completion, CompletionFeedback.completion_id == Completion.id)
-                .join(Report, Completion.report_id == Report.id)
-                .where(
-                    Report.organization_id == organization.id,
-                    CompletionFeedback.created_at >= interval_start,
-                    CompletionFeedback.created_at < interval_end,
-                    CompletionFeedback.direction > 0
-                )
-            )
-            if ds_filter_subquery is not None:
-                positive_feedbacks_query = positive_feedbacks_query.where(Report.id.in_(ds_filter_subquery))
-            positive_feedbacks_result = await db.execute(positive_feedbacks_query)
-            positive_feedbacks = positive_feedbacks_result.scalar() or 0
+            feedback_row = feedback_by_bucket.get(bucket)
+            total_feedbacks = feedback_row.total if feedback_row else 0
+            positive_feedbacks = (feedback_row.positive or 0) if feedback_row else 0
             positive_rate = (positive_feedbacks / total_feedbacks * 100) if total_feedbacks > 0 else 0
 
-            # Calculate judge metrics for this day
-            judge_metrics_query = (
-                select(
-                    func.avg(Completion.instructions_effectiveness).label('avg_instructions_effectiveness'),
-                    func.avg(Completion.context_effectiveness).label('avg_context_effectiveness'),
-                    func.avg(Completion.response_score).label('avg_response_score')
-                )
-                .join(Report)
-                .where(
-                    Report.organization_id == organization.id,
-                    Completion.created_at >= interval_start,
-                    Completion.created_at < interval_end,
-                    Completion.instructions_effectiveness.isnot(None)
-                )
-            )
-            if ds_filter_subquery is not None:
-                judge_metrics_query = judge_metrics_query.where(Report.id.in_(ds_filter_subquery))
-            judge_metrics_result = await db.execute(judge_metrics_query)
-            judge_data = judge_metrics_result.first()
-            
             # Apply smoothing logic and convert to 1-100 scale
-            current_instructions_effectiveness = (judge_data.avg_instructions_effectiveness or 0.0) * 20
-            current_context_effectiveness = (judge_data.avg_context_effectiveness or 0.0) * 20
-            current_response_quality = (judge_data.avg_response_score or 0.0) * 20
-            
+            current_instructions_effectiveness = ((completion_row.avg_instructions_effectiveness if completion_row else None) or 0.0) * 20
+            current_context_effectiveness = ((completion_row.avg_context_effectiveness if completion_row else None) or 0.0) * 20
+            current_response_quality = ((completion_row.avg_response_score if completion_row else None) or 0.0) * 20
+
             # For smoothing: if no queries (scores are 0), keep last non-zero value
             if current_instructions_effectiveness > 0:
                 last_instructions_effectiveness = current_instructions_effectiveness
             elif last_instructions_effectiveness > 0:
                 current_instructions_effectiveness = last_instructions_effectiveness
-                
+
             if current_context_effectiveness > 0:
                 last_context_effectiveness = current_context_effectiveness
             elif last_context_effectiveness > 0:
                 current_context_effectiveness = last_context_effectiveness
-                
+
             if current_response_quality > 0:
                 last_response_quality = current_response_quality
             elif last_response_quality > 0:
                 current_response_quality = last_response_quality
-            
-            # Show all days with activity (messages or queries)
-            has_activity = messages_count > 0 or queries_count > 0
-            
-            if has_activity:
-                date_str = interval_start.strftime('%Y-%m-%d')
-                
-                # Create TimeSeriesPoint objects
-                messages_data.append(TimeSeriesPoint(date=date_str, value=messages_count))
-                queries_data.append(TimeSeriesPoint(date=date_str, value=queries_count))
-                
-                # Create TimeSeriesPointFloat objects for percentages
-                accuracy_data.append(TimeSeriesPointFloat(date=date_str, value=accuracy_rate))
-                coverage_data.append(TimeSeriesPointFloat(date=date_str, value=90.0))  # Placeholder for instruction coverage
-                instructions_effectiveness_data.append(TimeSeriesPointFloat(date=date_str, value=current_instructions_effectiveness))
-                context_effectiveness_data.append(TimeSeriesPointFloat(date=date_str, value=current_context_effectiveness))
-                response_quality_data.append(TimeSeriesPointFloat(date=date_str, value=current_response_quality))
-                feedback_data.append(TimeSeriesPointFloat(date=date_str, value=positive_rate))
-        
+
+            date_str = str(bucket)
+
+            # Create TimeSeriesPoint objects
+            messages_data.append(TimeSeriesPoint(date=date_str, value=messages_count))
+            queries_data.append(TimeSeriesPoint(date=date_str, value=queries_count))
+
+            # Create TimeSeriesPointFloat objects for percentages
+            accuracy_data.append(TimeSeriesPointFloat(date=date_str, value=float(accuracy_rate)))
+            coverage_data.append(TimeSeriesPointFloat(date=date_str, value=90.0))  # Placeholder for instruction coverage
+            instructions_effectiveness_data.append(TimeSeriesPointFloat(date=date_str, value=float(current_instructions_effectiveness)))
+            context_effectiveness_data.append(TimeSeriesPointFloat(date=date_str, value=float(current_context_effectiveness)))
+            response_quality_data.append(TimeSeriesPointFloat(date=date_str, value=float(current_response_quality)))
+            feedback_data.append(TimeSeriesPointFloat(date=date_str, value=float(positive_rate)))
+
         return TimeSeriesMetrics(
             date_range=DateRange(
                 start=start_date.isoformat(),
@@ -789,51 +764,31 @@ class ConsoleService:
         """Get table joins heatmap showing which tables are used together"""
         
         start_date, end_date = self._normalize_date_range(params.start_date, params.end_date)
-        
-        # Get all steps within date range for this organization
-        steps_query = (
-            select(Step)
-            .join(Widget).join(Report)
-            .where(
-                Report.organization_id == organization.id,
-                Step.created_at >= start_date,
-                Step.created_at <= end_date,
-                Step.data_model.isnot(None)
-            )
+
+        # Aggregate the precomputed co-usage index instead of loading steps
+        day_filter = (
+            TableCoUsage.org_id == organization.id,
+            TableCoUsage.day >= start_date.date(),
+            TableCoUsage.day <= end_date.date(),
         )
-        
-        result = await db.execute(steps_query)
-        steps = result.scalars().all()
-        
-        # Track table co-occurrence
+        pair_total = func.sum(TableCoUsage.join_count)
+        pairs_query = (
+            select(TableCoUsage.table1, TableCoUsage.table2, pair_total.label('join_count'))
+            .where(*day_filter, TableCoUsage.table1.isnot(None))
+            .group_by(TableCoUsage.table1, TableCoUsage.table2)
+            .having(pair_total > 0)
+        )
+        result = await db.execute(pairs_query)
+
         table_pairs = Counter()
         all_tables = set()
-        total_queries = 0
-        
-        for step in steps:
-            if not step.data_model:
-                continue
-                
-            try:
-                data_model = step.data_model if isinstance(step.data_model, dict) else json.loads(step.data_model)
-                tables_in_query = self._extract_tables_from_data_model(data_model)
-                
-                if len(tables_in_query) > 1:  # Only count queries with multiple tables
-                    total_queries += 1
-                    tables_list = list(tables_in_query)
-                    all_tables.update(tables_list)
-                    
-                    # Count all pairs of tables in this query
-                    for i, table1 in enumerate(tables_list):
-                        for table2 in tables_list[i+1:]:
-                            # Sort to ensure consistent pair ordering
-                            pair = tuple(sorted([table1, table2]))
-                            table_pairs[pair] += 1
-                            
-            except (json.JSONDecodeError, KeyError, TypeError) as e:
-                logger.warning(f"Failed to parse data_model for step {step.id}: {e}")
-                continue
-        
+        for table1, table2, count in result.all():
+            table_pairs[(table1, table2)] = int(count)
+            all_tables.update((table1, table2))
+
+        total_queries_query = select(func.coalesce(pair_total, 0)).where(*day_filter, TableCoUsage.table1.is_(None))
+        total_queries = int((await db.execute(total_queries_query)).scalar() or 0)
+
         # Convert to list of TableJoinData
         join_data = [
             TableJoinData(
@@ -1312,7 +1267,7 @@ class ConsoleService:
                 status=step.status,
                 code=step.code,
                 data_model=step.data_model,
-                data=step.data,
+                data=step_data_store.hydrate(step.data),
                 created_at=step.created_at,
                 completion_id=str(step_completion.id) if step_completion else "",
                 has_issue=has_issue
@@ -1345,40 +1300,11 @@ class ConsoleService:
 
     def _extract_tables_from_data_model(self, data_model: dict) -> set:
         """Extract unique table names from a data model"""
-        tables = set()
-        
-        # Extract from columns
-        columns = data_model.get('columns', [])
-        for column in columns:
-            source = column.get('source', '')
-            table = self._parse_table_from_source(source)
-            if table:
-                tables.add(table)
-        
-        return tables
+        return extract_tables_from_data_model(data_model)
 
     def _parse_table_from_source(self, source: str) -> Optional[str]:
         """Parse table name from source string like 'dvdrental.customer.first_name' or 'customer.first_name'"""
-        if not source:
-            return None
-            
-        # Handle function calls like 'SUM(dvdrental.payment.amount)'
-        # Extract table reference from within functions
-        if '(' in source and ')' in source:
-            # Extract content inside parentheses
-            match = re.search(r'\((.*?)\)', source)
-            if match:
-                source = match.group(1)
-        
-        # Split by dots and extract table part
-        parts = source.split('.')
-        
-        if len(parts) >= 3:  # database.table.column
-            return f"{parts[0]}.{parts[1]}"
-        elif len(parts) == 2:  # table.column  
-            return parts[0]
-        else:
-            return None
+        return parse_table_from_source(source)
 
     def _extract_database_name(self, table_name: str) -> Optional[str]:
         """Extract database name from table name like 'dvdrental.customer'"""
@@ -30,6 +30,7 @@ from app.schemas.metadata_resource_schema import MetadataResourceSchema
 
 from pydantic import BaseModel
 from app.ai.agents.data_source.data_source import DataSourceAgent
+from app.ai.context.builders.schema_snapshot_cache import schema_snapshot_cache
 from fastapi import HTTPException
 
 import uuid
@@ -1287,7 +1288,7 @@ class DataSourceService:
         creds = await self.resolve_credentials(db=db, data_source=data_source, current_user=current_user)
         params = {**(config or {}), **(creds or {})}
         # Strip meta keys
-        meta_keys = {"auth_type", "auth_policy", "allowed_user_auth_modes"}
+        meta_keys = {"auth_type", "auth_policy", "allowed_user_auth_modes", "query_cache", "arrow_fetch"}
         params = {k: v for k, v in (params or {}).items() if v is not None and k not in meta_keys}
         # Narrow to constructor signature
         try:
@@ -1296,7 +1297,22 @@ class DataSourceService:
             allowed = {k: v for k, v in params.items() if k in sig.parameters and k != "self"}
         except Exception:
             allowed = params
-        return ClientClass(**allowed)
+        client = ClientClass(**allowed)
+        self._scope_client(client, conn, config, current_user)
+        return client
+
+    def _scope_client(self, client, conn, config: dict, current_user: User | None) -> None:
+        """Tag a client with the scopes its engine and cached query results are shared under."""
+        client.engine_scope = str(conn.id)
+        if (conn.auth_policy or "system_only") == "user_required" and current_user:
+            client.credential_scope = f"user:{current_user.id}"
+        else:
+            client.credential_scope = "system"
+        # Per-connection result cache policy, e.g. {"enabled": false} or {"ttl": 3600}
+        policy = (config or {}).get("query_cache")
+        client.query_cache_policy = policy if isinstance(policy, dict) else None
+        if (config or {}).get("arrow_fetch") is False:
+            client.arrow_fetch = False
 
     async def construct_clients(self, db: AsyncSession, data_source: DataSource, current_user: User | None) -> Dict[str, Any]:
         """
@@ -1336,7 +1352,7 @@ class DataSourceService:
             params = {**(config or {}), **(creds or {})}
 
             # Strip meta keys
-            meta_keys = {"auth_type", "auth_policy", "allowed_user_auth_modes"}
+            meta_keys = {"auth_type", "auth_policy", "allowed_user_auth_modes", "query_cache", "arrow_fetch"}
             params = {k: v for k, v in (params or {}).items() if v is not None and k not in meta_keys}
 
             # Narrow to constructor signature
@@ -1347,6 +1363,7 @@ class DataSourceService:
                 allowed = params
 
             clients[key] = ClientClass(**allowed)
+            self._scope_client(clients[key], conn, config, current_user)
 
         # Backward compatibility: add legacy key aliases for single-connection domains
         # This supports old code patterns like ds_clients.get("domain_name") or ds_clients["domain_name"]
@@ -1426,7 +1443,7 @@ class DataSourceService:
                 client_params.update(credentials)
 
             # Strip meta keys (e.g., auth_type) that are not part of client signatures
-            meta_keys = {"auth_type", "auth_policy", "allowed_user_auth_modes"}
+            meta_keys = {"auth_type", "auth_policy", "allowed_user_auth_modes", "query_cache", "arrow_fetch"}
             client_params = {k: v for k, v in (client_params or {}).items() if k not in meta_keys}
 
             return ClientClass(**client_params)
@@ -2258,6 +2275,8 @@ class DataSourceService:
             print(f"Error saving tables: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to save database tables: {e}")
 
+        schema_snapshot_cache.invalidate(str(data_source.id), signals=False)
+
         # Return full schema including inactive for downstream context
         schemas = await data_source.get_schemas(db=db, include_inactive=True)
         return schemas
@@ -12,6 +12,7 @@ from app.models.step import Step
 from app.models.query import Query
 from app.services.step_service import StepService
 from app.services.query_service import QueryService
+from app.services.step_data_store import step_data_store
 from app.schemas.entity_schema import EntityCreate, EntityUpdate
 from datetime import datetime
 from app.schemas.entity_schema import EntityRunPayload
@@ -92,7 +93,7 @@ class EntityService:
             description=description,
             tags=[],
             code=step.code or "",
-            data=step.data or {},
+            data=step_data_store.hydrate(step.data) or {},
             original_data_model=step.data_model or {},
             view=(chosen_view or getattr(step, "view", None) or {"type": "table"}),
             last_refreshed_at=step.updated_at,
@@ -480,9 +481,9 @@ class EntityService:
             ds_clients.update(ds_conns)
         excel_files = []
 
-        executor = StreamingCodeExecutor()
+        executor = StreamingCodeExecutor(organization_id=organization.id)
         try:
-            exec_df, execution_log, _ = executor.execute_code(code=code_to_run, ds_clients=ds_clients, excel_files=excel_files)
+            exec_df, execution_log, _ = await executor.execute_code_async(code=code_to_run, ds_clients=ds_clients, excel_files=excel_files)
             df = executor.format_df_for_widget(exec_df)
             # Persist execution results
             entity.data = df
@@ -541,9 +542,9 @@ class EntityService:
             ds_clients.update(ds_conns)
         excel_files = []
 
-        executor = StreamingCodeExecutor()
+        executor = StreamingCodeExecutor(organization_id=organization.id)
         try:
-            exec_df, execution_log, _ = executor.execute_code(code=code_to_run, ds_clients=ds_clients, excel_files=excel_files)
+            exec_df, execution_log, _ = await executor.execute_code_async(code=code_to_run, ds_clients=ds_clients, excel_files=excel_files)
             df = executor.format_df_for_widget(exec_df)
             return {"data": df, "execution_log": execution_log}
         except Exception as e:
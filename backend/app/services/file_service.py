@@ -19,6 +19,8 @@ import aiofiles
 from sqlalchemy import select, exists, func
 from app.core.telemetry import telemetry
 from app.services.file_preview import generate_file_preview
+from app.data_sources.clients.duckdb_session_cache import duckdb_session_cache
+from app.data_sources.clients.query_result_cache import query_result_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -388,6 +390,9 @@ class FileService:
         connection.config = json.dumps(config)
 
         await db.commit()
+        # The warm DuckDB session and cached results were built for the previous URI list
+        duckdb_session_cache.invalidate(str(connection.id))
+        query_result_cache.invalidate(str(connection.id))
 
         # 6. Refresh schema to discover new tables
         connection_service = ConnectionService()
@@ -1,3 +1,5 @@
+import os
+import time
 from datetime import datetime, timedelta
 from typing import Tuple, Dict
 from sqlalchemy import text, select
@@ -7,10 +9,15 @@ from app.settings.logging_config import get_logger
 from app.models.organization import Organization
 from app.models.organization_settings import OrganizationSettings
 from app.ee.license import has_feature
+from app.models.step import Step
+from app.services.step_data_store import artifact_path, step_data_store
 
 logger = get_logger(__name__)
 
 RETENTION_DAYS_DEFAULT = 14
+# Artifacts younger than this may belong to a transaction that has not committed yet
+ORPHAN_ARTIFACT_GRACE_SECONDS = 6 * 3600
+ORPHAN_ARTIFACT_BATCH = 500
 
 
 async def get_all_organization_retention_settings() -> Dict[str, int]:
@@ -59,9 +66,11 @@ async def purge_step_payloads_for_organization(
     """
     cutoff = datetime.utcnow() - timedelta(days=retention_days)
     set_clause = ", ".join(f"{field} = NULL" for field in null_fields)
+    # Large step results live in artifact files next to steps.data; they go with it
+    purges_data = "data" in null_fields
     nonnull_predicate = " OR ".join(f"s.{field} IS NOT NULL" for field in null_fields)
 
-    sql = text(f"""
+    sql = f"""
     WITH ranked AS (
       SELECT
         s.id,
@@ -92,17 +101,29 @@ async def purge_step_payloads_for_organization(
       AND ({nonnull_predicate})
       AND (rep.conversation_share_enabled IS NOT TRUE)
       AND (rep.status IS DISTINCT FROM 'published')
-    """)
+    """
 
     async with async_session_maker() as session:
         purged = 0
+        if purges_data:
+            # SQLite only resolves RETURNING columns against the updated table, unqualified
+            bind = session.get_bind()
+            dialect_name = bind.dialect.name if bind else "sqlite"
+            sql += "RETURNING s.id" if dialect_name == "postgresql" else "RETURNING id"
         try:
-            result = await session.execute(sql, {
+            result = await session.execute(text(sql), {
                 "cutoff": cutoff,
                 "org_id": organization_id
             })
-            await session.commit()
-            purged = result.rowcount or 0
+            if purges_data:
+                step_ids = [row[0] for row in result.fetchall()]
+                await session.commit()
+                purged = len(step_ids)
+                for step_id in step_ids:
+                    step_data_store.delete_for_step(step_id)
+            else:
+                await session.commit()
+                purged = result.rowcount or 0
             if purged > 0:
                 logger.debug(
                     "Purged step payloads for organization",
@@ -177,3 +198,32 @@ async def purge_step_payloads_keep_latest_per_query(
     The retention_days parameter is ignored in favor of per-org settings.
     """
     return await purge_step_payloads_per_organization(null_fields=null_fields)
+
+
+async def purge_orphaned_step_artifacts(grace_seconds: int = ORPHAN_ARTIFACT_GRACE_SECONDS) -> int:
+    """
+    Daily maintenance task: remove step data artifacts no live step references.
+    Covers steps and reports removed outside the ORM (bulk deletes, FK cascades),
+    soft-deleted steps, and files left behind by a crash between write and commit.
+    """
+    cutoff = time.time() - grace_seconds
+    candidates = [(step_id, path) for step_id, path, mtime in step_data_store.list_artifacts() if mtime < cutoff]
+    removed = 0
+    for start in range(0, len(candidates), ORPHAN_ARTIFACT_BATCH):
+        batch = candidates[start:start + ORPHAN_ARTIFACT_BATCH]
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Step.id, Step.data)
+                .where(Step.id.in_({step_id for step_id, _ in batch}))
+                .where(Step.deleted_at.is_(None))
+            )
+            referenced = {str(step_id): artifact_path(data) for step_id, data in result.all()}
+        for step_id, path in batch:
+            current = referenced.get(step_id)
+            if current and os.path.abspath(current) == os.path.abspath(path):
+                continue
+            if step_data_store.delete_path(path):
+                removed += 1
+    if removed:
+        logger.info("Removed orphaned step data artifacts", extra={"removed": removed})
+    return removed
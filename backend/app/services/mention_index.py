@@ -0,0 +1,210 @@
+"""Search index behind the @-mention picker.
+
+``MentionIndex`` holds plain documents (data sources, tables, files, entities)
+with two lookups over their lowercased names:
+
+  - a sorted term list for prefix matches on the full name, on each name
+    segment (``sales.orders`` → ``orders``) and, for tables, on column names;
+  - a trigram inverted index for substring and typo-tolerant matches on names.
+
+Results are ordered by match quality, then by a per-document ``rank`` signal
+(TableStats usage for tables, mention counts for entities, recency for files)
+and paginated with an opaque keyset cursor, so pages stay stable while the
+index is rebuilt between requests.
+
+Table indexes are the expensive part and are cached per data source (and per
+user for ``user_required`` data sources, whose visible tables come from the
+user's overlay). Like ``SchemaSnapshotCache``, entries carry a revision built
+from the local invalidation counters plus a ``count``/``max(updated_at)``
+fingerprint, so writes from other workers are picked up on the next search.
+"""
+import base64
+import bisect
+import json
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 300  # seconds
+
+# Match quality; higher is better
+SCORE_EXACT = 100.0
+SCORE_PREFIX = 80.0
+SCORE_SEGMENT_PREFIX = 60.0
+SCORE_SUBSTRING = 40.0
+SCORE_COLUMN = 30.0
+SCORE_FUZZY = 20.0  # scaled by trigram similarity
+
+MIN_FUZZY_SIMILARITY = 0.5
+
+_SEGMENT_SPLIT = re.compile(r"[._\s/-]+")
+
+SortKey = Tuple[float, float, str, str]
+
+
+def trigrams(text: str) -> set:
+    text = text.lower()
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass
+class MentionDoc:
+    id: str
+    name: str
+    payload: Dict[str, Any]
+    rank: float = 0.0
+    columns: List[str] = field(default_factory=list)
+
+
+@dataclass
+class MentionHit:
+    doc: MentionDoc
+    score: float
+    matched_columns: List[str] = field(default_factory=list)
+
+    @property
+    def sort_key(self) -> SortKey:
+        return (-self.score, -self.doc.rank, self.doc.name.lower(), self.doc.id)
+
+
+class MentionIndex:
+    """Immutable prefix + trigram index over a list of ``MentionDoc``."""
+
+    def __init__(self, docs: Iterable[MentionDoc]):
+        self.docs: List[MentionDoc] = list(docs)
+        self._names: List[str] = [d.name.lower() for d in self.docs]
+        terms: List[Tuple[str, int, int]] = []  # (term, kind, doc index); kind 0=name, 1=segment, 2=column
+        postings: Dict[str, List[int]] = {}
+        for i, (doc, name) in enumerate(zip(self.docs, self._names)):
+            terms.append((name, 0, i))
+            for segment in set(_SEGMENT_SPLIT.split(name)):
+                if segment and segment != name:
+                    terms.append((segment, 1, i))
+            for column in {c.lower() for c in doc.columns if c}:
+                terms.append((column, 2, i))
+            for gram in trigrams(name):
+                postings.setdefault(gram, []).append(i)
+        terms.sort()
+        self._terms = terms
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def search(self, query: str) -> List[MentionHit]:
+        """All documents matching ``query``, best first; an empty query matches everything."""
+        query = (query or "").strip().lower()
+        if not query:
+            hits = [MentionHit(doc, 0.0) for doc in self.docs]
+            hits.sort(key=lambda h: h.sort_key)
+            return hits
+
+        scores: Dict[int, float] = {}
+        columns: Dict[int, List[str]] = {}
+        start = bisect.bisect_left(self._terms, (query,))
+        for term, kind, i in self._terms[start:]:
+            if not term.startswith(query):
+                break
+            if kind == 0:
+                score = SCORE_EXACT if term == query else SCORE_PREFIX
+            elif kind == 1:
+                score = SCORE_SEGMENT_PREFIX
+            else:
+                score = SCORE_COLUMN
+                columns.setdefault(i, []).append(term)
+            if score > scores.get(i, 0.0):
+                scores[i] = score
+
+        query_grams = trigrams(query)
+        if len(query) >= 3 and query_grams:
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._postings.get(gram, ()))
+            for i, count in shared.items():
+                if scores.get(i, 0.0) >= SCORE_SUBSTRING:
+                    continue
+                if query in self._names[i]:
+                    score = SCORE_SUBSTRING
+                else:
+                    similarity = count / len(query_grams)
+                    if similarity < MIN_FUZZY_SIMILARITY:
+                        continue
+                    score = SCORE_FUZZY * similarity
+                if score > scores.get(i, 0.0):
+                    scores[i] = score
+
+        hits = [MentionHit(self.docs[i], score, sorted(columns.get(i, []))) for i, score in scores.items()]
+        hits.sort(key=lambda h: h.sort_key)
+        return hits
+
+
+def paginate(hits: List[MentionHit], limit: int, cursor: Optional[str]) -> Tuple[List[MentionHit], Optional[str]]:
+    """Slice sorted ``hits`` after ``cursor``; returns the page and the cursor for the next one."""
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is not None:
+            keys = [h.sort_key for h in hits]
+            hits = hits[bisect.bisect_right(keys, after):]
+    page = hits[:limit]
+    next_cursor = encode_cursor(page[-1].sort_key) if len(hits) > limit else None
+    return page, next_cursor
+
+
+def encode_cursor(key: SortKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Optional[SortKey]:
+    try:
+        score, rank, name, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (float(score), float(rank), str(name), str(doc_id))
+    except Exception:
+        return None
+
+
+class MentionIndexCache:
+    """Thread-safe LRU of table indexes keyed by (data source, overlay user)."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, data_source_id: str, user_id: Optional[str], revision: Hashable) -> Optional[MentionIndex]:
+        key = (str(data_source_id), user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cached_revision, created_at, index = entry
+            if cached_revision != revision or (self.ttl and time.monotonic() - created_at > self.ttl):
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return index
+
+    def put(self, data_source_id: str, user_id: Optional[str], revision: Hashable, index: MentionIndex) -> None:
+        key = (str(data_source_id), user_id)
+        with self._lock:
+            self._entries[key] = (revision, time.monotonic(), index)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+mention_index_cache = MentionIndexCache()
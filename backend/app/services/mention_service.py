@@ -12,8 +12,23 @@ from app.services.file_service import FileService
 from app.services.data_source_service import DataSourceService
 from app.services.entity_service import EntityService
 from app.models.table_stats import TableStats
+from app.models.datasource_table import DataSourceTable
+from app.models.connection_table import ConnectionTable
+from app.models.user_data_source_overlay import UserDataSourceTable, UserDataSourceColumn
+from app.models.file import File
+from app.ai.context.builders.schema_snapshot_cache import schema_snapshot_cache
+from app.services.mention_index import MentionDoc, MentionHit, MentionIndex, mention_index_cache, paginate
+from sqlalchemy.orm import selectinload
 
 
+# Creation timestamps are scaled below 1 so they only break ties between equal mention counts
+_RECENCY_SCALE = 1e10
+
+
+def entity_rank(mention_count: int, created_at: float) -> float:
+    """Mention-index rank of an entity: mention count first, then recency (epoch seconds)."""
+    return float(mention_count) + max(created_at, 0.0) / _RECENCY_SCALE
+
 
 class MentionService:
 
@@ -278,6 +293,17 @@ class MentionService:
         current_user: User,
         data_source_ids: Optional[List[str]]
     ) -> List[Dict[str, Any]]:
+        ranked = await self._get_ranked_entities(db, organization, current_user, data_source_ids)
+        return [self._entity_payload(entity) for entity, _ in ranked]
+
+    async def _get_ranked_entities(
+        self,
+        db: AsyncSession,
+        organization: Organization,
+        current_user: User,
+        data_source_ids: Optional[List[str]]
+    ) -> List[tuple]:
+        """Published entities with their mention counts, most mentioned first, then newest, then by id."""
         try:
             entities = await self.entity_service.list_entities(
                 db=db,
@@ -317,31 +343,288 @@ class MentionService:
             except Exception:
                 mention_counts = {}
 
-            # Sort by mention count desc, then created_at desc
+            ranked = [(e, mention_counts.get(str(getattr(e, 'id', '')), 0)) for e in entities]
+            # Sort by mention count desc, then created_at desc, then id
+            ranked.sort(key=lambda pair: str(getattr(pair[0], 'id', '')))
             try:
-                entities.sort(
-                    key=lambda e: (
-                        mention_counts.get(str(getattr(e, 'id', '')), 0),
-                        getattr(e, 'created_at', None) or 0
-                    ),
+                ranked.sort(
+                    key=lambda pair: (pair[1], getattr(pair[0], 'created_at', None) or 0),
                     reverse=True,
                 )
             except Exception:
                 pass
-
-            return [
-                {
-                    'id': str(entity.id),
-                    'type': 'entity',
-                    'title': entity.title,
-                    'slug': entity.slug,
-                    'entity_type': entity.type,
-                    'description': entity.description,
-                    'status': entity.status,
-                    'tags': entity.tags or [],
-                    'data_source_ids': [str(ds.id) for ds in (entity.data_sources or [])],
-                }
-                for entity in entities
-            ]
+            return ranked
         except Exception:
-            return []
\ No newline at end of file
+            return []
+
+    @staticmethod
+    def _entity_payload(entity) -> Dict[str, Any]:
+        return {
+            'id': str(entity.id),
+            'type': 'entity',
+            'title': entity.title,
+            'slug': entity.slug,
+            'entity_type': entity.type,
+            'description': entity.description,
+            'status': entity.status,
+            'tags': entity.tags or [],
+            'data_source_ids': [str(ds.id) for ds in (entity.data_sources or [])],
+        }
+    # =============================
+    # Mention search (indexed, paginated)
+    # =============================
+    async def search_mentions(
+        self,
+        db: AsyncSession,
+        organization: Organization,
+        current_user: User,
+        q: Optional[str] = None,
+        data_source_ids: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Ranked, paginated mention search.
+
+        Each requested category gets up to ``limit`` items and its own
+        ``next_cursors`` entry; pass that cursor back with ``categories`` set to
+        the single category to fetch the next page.
+        """
+        all_categories = ['data_sources', 'tables', 'files', 'entities']
+        requested_categories = [c for c in all_categories if c in set(categories or all_categories)]
+        result: Dict[str, Any] = {c: [] for c in all_categories}
+        result['next_cursors'] = {}
+
+        data_sources = []
+        if 'data_sources' in requested_categories or 'tables' in requested_categories:
+            data_sources = await self.data_source_service.get_active_data_sources(
+                db=db,
+                organization=organization,
+                current_user=current_user
+            )
+            if data_source_ids:
+                id_set = set(data_source_ids)
+                data_sources = [ds for ds in data_sources if str(ds.id) in id_set]
+
+        for category in requested_categories:
+            if category == 'data_sources':
+                hits = MentionIndex(self._data_source_docs(data_sources)).search(q)
+            elif category == 'tables':
+                hits = await self._search_tables(db, organization, current_user, data_sources, q)
+            elif category == 'files':
+                hits = MentionIndex(await self._file_docs(db, organization)).search(q)
+            else:
+                hits = MentionIndex(await self._entity_docs(db, organization, current_user, data_source_ids)).search(q)
+
+            page, next_cursor = paginate(hits, limit, cursor if len(requested_categories) == 1 else None)
+            items = []
+            for hit in page:
+                item = dict(hit.doc.payload)
+                if category == 'tables':
+                    item['matched_columns'] = hit.matched_columns
+                items.append(item)
+            result[category] = items
+            result['next_cursors'][category] = next_cursor
+        return result
+
+    def _data_source_docs(self, data_sources) -> List[MentionDoc]:
+        return [
+            MentionDoc(
+                id=str(ds.id),
+                name=getattr(ds, 'name', '') or '',
+                payload={
+                    'id': str(ds.id),
+                    'type': 'data_source',
+                    'name': getattr(ds, 'name', ''),
+                    'data_source_type': getattr(ds, 'type', '') or '',
+                    'description': getattr(ds, 'description', None),
+                    'is_active': True,
+                    'is_public': None,
+                    'auth_policy': getattr(ds, 'auth_policy', None) or 'system_only',
+                },
+            )
+            for ds in data_sources
+        ]
+
+    async def _search_tables(self, db: AsyncSession, organization: Organization, current_user: User, data_sources, q: Optional[str]) -> List[MentionHit]:
+        """Search the cached per-data-source table indexes and merge their hits."""
+        if not data_sources:
+            return []
+        ds_by_id = {str(ds.id): ds for ds in data_sources}
+        ds_ids = list(ds_by_id)
+        overlay_ds_ids = [
+            ds_id for ds_id, ds in ds_by_id.items()
+            if (getattr(ds, 'auth_policy', None) or 'system_only') == 'user_required'
+        ]
+
+        # One round trip per signal for all data sources: (count, max(updated_at)) fingerprints
+        table_fp = {
+            row[0]: tuple(row[1:]) for row in (await db.execute(
+                select(DataSourceTable.datasource_id, func.count(DataSourceTable.id), func.max(DataSourceTable.updated_at))
+                .where(DataSourceTable.datasource_id.in_(ds_ids))
+                .group_by(DataSourceTable.datasource_id)
+            )).all()
+        }
+        stats_fp = {
+            row[0]: tuple(row[1:]) for row in (await db.execute(
+                select(TableStats.data_source_id, func.count(TableStats.id), func.max(TableStats.updated_at))
+                .where(
+                    TableStats.org_id == str(organization.id),
+                    TableStats.report_id == None,
+                    TableStats.data_source_id.in_(ds_ids),
+                )
+                .group_by(TableStats.data_source_id)
+            )).all()
+        }
+        overlay_fp: Dict[str, tuple] = {}
+        if overlay_ds_ids:
+            overlay_fp = {
+                row[0]: tuple(row[1:]) for row in (await db.execute(
+                    select(UserDataSourceTable.data_source_id, func.count(UserDataSourceTable.id), func.max(UserDataSourceTable.updated_at))
+                    .where(
+                        UserDataSourceTable.data_source_id.in_(overlay_ds_ids),
+                        UserDataSourceTable.user_id == str(current_user.id),
+                    )
+                    .group_by(UserDataSourceTable.data_source_id)
+                )).all()
+            }
+
+        hits: List[MentionHit] = []
+        for ds_id, ds in ds_by_id.items():
+            # Only user_required sources with overlay rows are user-scoped; otherwise
+            # the canonical tables are shown, as get_data_source_schema falls back to
+            user_id = str(current_user.id) if ds_id in overlay_fp else None
+            revision = (
+                schema_snapshot_cache.local_revision("schema", ds_id),
+                schema_snapshot_cache.local_revision("signals", ds_id),
+                table_fp.get(ds_id),
+                stats_fp.get(ds_id),
+                overlay_fp.get(ds_id),
+            )
+            index = mention_index_cache.get(ds_id, user_id, revision)
+            if index is None:
+                index = await self._build_table_index(db, organization, ds, user_id)
+                mention_index_cache.put(ds_id, user_id, revision, index)
+            hits.extend(index.search(q))
+        hits.sort(key=lambda h: h.sort_key)
+        return hits
+
+    async def _build_table_index(self, db: AsyncSession, organization: Organization, ds, user_id: Optional[str]) -> MentionIndex:
+        ds_id = str(ds.id)
+        usage_map: Dict[str, int] = {}
+        stats_rows = await db.execute(
+            select(TableStats.table_fqn, TableStats.usage_count)
+            .where(
+                TableStats.org_id == str(organization.id),
+                TableStats.report_id == None,
+                TableStats.data_source_id == ds_id,
+            )
+        )
+        for table_fqn, usage_count in stats_rows.all():
+            usage_map[(table_fqn or '').lower()] = int(usage_count or 0)
+
+        canonical_rows = await db.execute(
+            select(DataSourceTable)
+            .options(selectinload(DataSourceTable.connection_table).selectinload(ConnectionTable.connection))
+            .where(DataSourceTable.datasource_id == ds_id, DataSourceTable.is_active == True)
+        )
+        canonical = {t.name: t for t in canonical_rows.scalars().all()}
+
+        def table_payload(table_id: str, name: str, columns: List[Dict[str, Any]], canonical_table=None) -> Dict[str, Any]:
+            conn = None
+            if canonical_table is not None and canonical_table.connection_table is not None:
+                conn = canonical_table.connection_table.connection
+            return {
+                'id': table_id,
+                'type': 'datasource_table',
+                'name': name,
+                'datasource_id': ds_id,
+                'columns': columns,
+                'is_active': True,
+                'data_source_name': ds.name,
+                'data_source_type': ds.type,
+                'connection_id': str(conn.id) if conn else None,
+                'connection_name': conn.name if conn else None,
+                'connection_type': (conn.type if conn else None) or ds.type,
+            }
+
+        docs: List[MentionDoc] = []
+        if user_id is None:
+            for name, t in canonical.items():
+                columns = [{'name': c.get('name'), 'dtype': c.get('dtype')} for c in (t.columns or [])]
+                docs.append(MentionDoc(
+                    id=str(t.id),
+                    name=name,
+                    payload=table_payload(str(t.id), name, columns, t),
+                    rank=usage_map.get(name.lower(), 0),
+                    columns=[c['name'] for c in columns if c['name']],
+                ))
+            return MentionIndex(docs)
+
+        overlay_rows = (await db.execute(
+            select(UserDataSourceTable).where(
+                UserDataSourceTable.data_source_id == ds_id,
+                UserDataSourceTable.user_id == user_id,
+                UserDataSourceTable.is_accessible == True,
+            )
+        )).scalars().all()
+        columns_by_table: Dict[str, List[Dict[str, Any]]] = {}
+        if overlay_rows:
+            column_rows = await db.execute(
+                select(UserDataSourceColumn.user_data_source_table_id, UserDataSourceColumn.column_name, UserDataSourceColumn.data_type)
+                .where(
+                    UserDataSourceColumn.user_data_source_table_id.in_([r.id for r in overlay_rows]),
+                    UserDataSourceColumn.is_accessible == True,
+                )
+            )
+            for table_id, column_name, data_type in column_rows.all():
+                columns_by_table.setdefault(table_id, []).append({'name': column_name, 'dtype': data_type})
+        for row in overlay_rows:
+            canonical_table = canonical.get(row.table_name)
+            table_id = str(canonical_table.id) if canonical_table is not None else str(row.data_source_table_id or row.id)
+            columns = columns_by_table.get(row.id, [])
+            docs.append(MentionDoc(
+                id=table_id,
+                name=row.table_name,
+                payload=table_payload(table_id, row.table_name, columns, canonical_table),
+                rank=usage_map.get(row.table_name.lower(), 0),
+                columns=[c['name'] for c in columns if c['name']],
+            ))
+        return MentionIndex(docs)
+
+    async def _file_docs(self, db: AsyncSession, organization: Organization) -> List[MentionDoc]:
+        rows = await db.execute(
+            select(File.id, File.filename, File.content_type, File.path, File.created_at)
+            .where(File.organization_id == organization.id, File.deleted_at.is_(None))
+        )
+        docs = []
+        for file_id, filename, content_type, path, created_at in rows.all():
+            docs.append(MentionDoc(
+                id=str(file_id),
+                name=filename or '',
+                payload={
+                    'id': str(file_id),
+                    'type': 'file',
+                    'filename': filename,
+                    'content_type': content_type,
+                    'path': path,
+                    'created_at': created_at.isoformat() if created_at else None,
+                },
+                rank=created_at.timestamp() if created_at else 0.0,
+            ))
+        return docs
+
+    async def _entity_docs(self, db: AsyncSession, organization: Organization, current_user: User, data_source_ids: Optional[List[str]]) -> List[MentionDoc]:
+        # Rank from the entity itself, not its list position, so cursors stay valid
+        # while entities are added or removed between pages
+        docs = []
+        for entity, mention_count in await self._get_ranked_entities(db, organization, current_user, data_source_ids):
+            payload = self._entity_payload(entity)
+            created_at = getattr(entity, 'created_at', None)
+            docs.append(MentionDoc(
+                id=payload['id'],
+                name=payload.get('title') or '',
+                payload=payload,
+                rank=entity_rank(mention_count, created_at.timestamp() if created_at else 0.0),
+            ))
+        return docs
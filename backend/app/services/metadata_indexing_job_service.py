@@ -25,6 +25,7 @@ from app.dependencies import async_session_maker # Import the session maker
 from app.settings.config import settings
 from app.services.instruction_sync_service import InstructionSyncService
 from app.services.build_service import BuildService
+from app.services.metadata_search_index import build_job_index
 
 logger = logging.getLogger(__name__)
 
@@ -1184,6 +1185,16 @@ class MetadataIndexingJobService:
                         # Pre-created build stays in draft for user review
                         logger.info(f"Job {job_id}: Build {sync_build.id} left in draft status for manual review")
 
+                # Ranked search index over this job's resources (ResourceContextBuilder)
+                if job_status == 'completed':
+                    try:
+                        indexed = await build_job_index(db, job_id)
+                        await db.commit()
+                        logger.info(f"Job {job_id}: Built search index over {indexed} resources")
+                    except Exception as index_error:
+                        await db.rollback()
+                        logger.warning(f"Job {job_id}: Failed to build search index, it will be built on first search: {index_error}")
+
                 # All database operations below will use the new session
                 await db.execute(
                     update(MetadataIndexingJob)
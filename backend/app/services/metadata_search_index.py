@@ -0,0 +1,256 @@
+"""
+Ranked keyword search over the metadata resources of an indexing job.
+
+Each completed ``MetadataIndexingJob`` gets an inverted index in
+``metadata_resource_terms``: one row per (term, resource) holding that pair's
+precomputed BM25 contribution. Term frequencies are field weighted (name,
+columns, description, SQL identifiers, path/type). A job's resources do not
+change after it completes, so collection statistics (document count, average
+length, document frequencies) are fixed and the score can be stored. A query
+is then one grouped ``SUM(score)`` over the rows for the prompt's terms, and
+only the top-k resources' payloads have to be loaded.
+
+Indexes are built at the end of ``_run_indexing_job``. Jobs that finished
+before this existed (or whose build failed) are indexed on first search.
+Postings of a repository's older jobs are dropped once a newer job is indexed.
+"""
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, delete, update, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.metadata_indexing_job import MetadataIndexingJob
+from app.models.metadata_resource import MetadataResource
+from app.models.metadata_resource_term import MetadataResourceTerm
+from app.settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+# Bump when tokenization or scoring changes; jobs indexed with an older version are re-indexed on search
+INDEX_VERSION = 1
+
+K1 = 1.2
+B = 0.75
+
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "columns": 2.0,
+    "description": 1.0,
+    "sql": 1.0,
+    "path": 1.0,
+}
+
+MAX_TERMS_PER_RESOURCE = 256  # highest-frequency terms kept per resource
+MAX_TERM_LENGTH = 128
+INSERT_BATCH_SIZE = 1000
+
+STOPWORDS = frozenset({
+    # English / prompt filler
+    'the', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'like', 'through',
+    'over', 'before', 'between', 'after', 'since', 'without', 'under', 'within', 'along', 'following', 'across',
+    'behind', 'beyond', 'plus', 'except', 'up', 'out', 'around', 'down', 'off', 'above', 'near', 'show', 'me',
+    'get', 'find', 'what', 'where', 'when', 'who', 'how', 'why', 'which', 'create', 'make', 'list', 'all', 'is',
+    'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'can', 'could',
+    'will', 'would', 'shall', 'should', 'may', 'might', 'must', 'of', 'it', 'this', 'that', 'these', 'those',
+    'my', 'our', 'we', 'you', 'your', 'please', 'give', 'each', 'per',
+    # SQL / Jinja keywords (business words such as order, group or count are kept)
+    'select', 'from', 'join', 'left', 'right', 'inner', 'outer', 'cross', 'having', 'limit', 'as', 'not',
+    'null', 'case', 'then', 'else', 'end', 'distinct', 'union', 'insert', 'into', 'values', 'asc', 'desc',
+    'coalesce', 'cast', 'true', 'false', 'ref', 'config', 'if', 'endif', 'using',
+})
+
+_WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_SQL_NOISE_RE = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'", re.S)
+
+
+def normalize_term(word: str) -> str:
+    """Lowercase and strip a plural ending so 'orders'/'order' and 'categories'/'category' match."""
+    word = word.lower()
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Terms of ``text``: identifiers as a whole plus their snake_case / camelCase parts."""
+    if not text:
+        return []
+    terms: List[str] = []
+    for raw in _WORD_RE.findall(text):
+        parts = [p for piece in raw.split("_") if piece for p in _CAMEL_RE.findall(piece)]
+        candidates = [raw] if len(parts) <= 1 else [raw, *parts]
+        for candidate in candidates:
+            lower = candidate.lower()
+            if len(lower) < 2 or len(lower) > MAX_TERM_LENGTH or lower in STOPWORDS or lower.isdigit():
+                continue
+            terms.append(normalize_term(lower))
+    return terms
+
+
+def query_terms(text: Optional[str]) -> List[str]:
+    """Distinct terms of a prompt, in order of appearance."""
+    return list(dict.fromkeys(tokenize(text)))
+
+
+def _columns_text(columns: Any) -> str:
+    if not isinstance(columns, list):
+        return ""
+    parts: List[str] = []
+    for column in columns:
+        if isinstance(column, dict):
+            for key in ("name", "field_name", "label", "description"):
+                value = column.get(key)
+                if value:
+                    parts.append(str(value))
+        elif column:
+            parts.append(str(column))
+    return " ".join(parts)
+
+
+def resource_fields(resource) -> Dict[str, str]:
+    """Searchable text per field for a resource row (ORM object or projected row)."""
+    return {
+        "name": resource.name or "",
+        "columns": _columns_text(resource.columns),
+        "description": resource.description or "",
+        "sql": _SQL_NOISE_RE.sub(" ", resource.sql_content or ""),
+        "path": f"{resource.path or ''} {resource.resource_type or ''}",
+    }
+
+
+def term_frequencies(fields: Dict[str, str]) -> Dict[str, float]:
+    """Field-weighted term frequencies, capped to the ``MAX_TERMS_PER_RESOURCE`` strongest terms."""
+    tf: Counter = Counter()
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS.get(field, 1.0)
+        for term in tokenize(text):
+            tf[term] += weight
+    if len(tf) > MAX_TERMS_PER_RESOURCE:
+        tf = Counter(dict(tf.most_common(MAX_TERMS_PER_RESOURCE)))
+    return dict(tf)
+
+
+def bm25_postings(documents: Dict[str, Dict[str, float]]) -> Iterable[Tuple[str, str, float]]:
+    """``(resource_id, term, score)`` for every term of every document."""
+    n_docs = len(documents)
+    if not n_docs:
+        return
+    lengths = {doc_id: sum(tf.values()) for doc_id, tf in documents.items()}
+    avg_length = (sum(lengths.values()) / n_docs) or 1.0
+    df: Counter = Counter()
+    for tf in documents.values():
+        df.update(tf.keys())
+
+    for doc_id, tf in documents.items():
+        norm = K1 * (1 - B + B * lengths[doc_id] / avg_length)
+        for term, freq in tf.items():
+            idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+            yield doc_id, term, idf * freq * (K1 + 1) / (freq + norm)
+
+
+async def build_job_index(db: AsyncSession, job_id: str) -> int:
+    """(Re)build the postings for ``job_id`` in ``db``'s transaction; returns the number of documents.
+
+    The caller commits. Resources are read with only the searchable columns.
+    """
+    stmt = select(
+        MetadataResource.id,
+        MetadataResource.name,
+        MetadataResource.resource_type,
+        MetadataResource.path,
+        MetadataResource.description,
+        MetadataResource.columns,
+        MetadataResource.sql_content,
+    ).where(MetadataResource.metadata_indexing_job_id == job_id)
+
+    documents: Dict[str, Dict[str, float]] = {}
+    result = await db.execute(stmt)
+    for row in result:
+        documents[str(row.id)] = term_frequencies(resource_fields(row))
+
+    await db.execute(delete(MetadataResourceTerm).where(MetadataResourceTerm.metadata_indexing_job_id == job_id))
+    batch: List[Dict[str, Any]] = []
+    for resource_id, term, score in bm25_postings(documents):
+        batch.append({
+            "metadata_indexing_job_id": job_id,
+            "term": term,
+            "metadata_resource_id": resource_id,
+            "score": score,
+        })
+        if len(batch) >= INSERT_BATCH_SIZE:
+            await db.execute(insert(MetadataResourceTerm), batch)
+            batch = []
+    if batch:
+        await db.execute(insert(MetadataResourceTerm), batch)
+
+    # Only the latest job of a repository is searched; drop postings of the older ones
+    repository_id = (await db.execute(
+        select(MetadataIndexingJob.git_repository_id).where(MetadataIndexingJob.id == job_id)
+    )).scalar()
+    if repository_id:
+        older_jobs = select(MetadataIndexingJob.id).where(
+            MetadataIndexingJob.git_repository_id == repository_id,
+            MetadataIndexingJob.id != job_id,
+        )
+        await db.execute(delete(MetadataResourceTerm).where(MetadataResourceTerm.metadata_indexing_job_id.in_(older_jobs)))
+        await db.execute(
+            update(MetadataIndexingJob)
+            .where(MetadataIndexingJob.id.in_(older_jobs))
+            .values(search_index_version=None)
+        )
+
+    await db.execute(
+        update(MetadataIndexingJob)
+        .where(MetadataIndexingJob.id == job_id)
+        .values(search_index_version=INDEX_VERSION)
+    )
+    return len(documents)
+
+
+async def ensure_job_index(job: MetadataIndexingJob) -> None:
+    """Index ``job`` in its own session if it has no current index (best-effort)."""
+    if job.search_index_version == INDEX_VERSION:
+        return
+    from app.dependencies import async_session_maker
+
+    try:
+        async with async_session_maker() as session:
+            count = await build_job_index(session, str(job.id))
+            await session.commit()
+        job.search_index_version = INDEX_VERSION
+        logger.info(f"Built metadata search index for job {job.id} ({count} resources)")
+    except Exception as e:
+        logger.warning(f"Failed to build metadata search index for job {job.id}: {e}")
+
+
+async def search_resources(
+    db: AsyncSession,
+    job_id: str,
+    text: Optional[str],
+    limit: int = 10,
+) -> List[Tuple[str, float]]:
+    """Active resources of ``job_id`` best matching ``text``, as ``(resource_id, score)``, best first."""
+    terms = query_terms(text)
+    if not terms or limit <= 0:
+        return []
+    score = func.sum(MetadataResourceTerm.score).label("score")
+    rows = await db.execute(
+        select(MetadataResourceTerm.metadata_resource_id, score)
+        .join(MetadataResource, MetadataResource.id == MetadataResourceTerm.metadata_resource_id)
+        .where(
+            MetadataResourceTerm.metadata_indexing_job_id == job_id,
+            MetadataResourceTerm.term.in_(terms),
+            MetadataResource.is_active == True,
+        )
+        .group_by(MetadataResourceTerm.metadata_resource_id)
+        .order_by(score.desc(), MetadataResourceTerm.metadata_resource_id)
+        .limit(limit)
+    )
+    return [(str(resource_id), float(total)) for resource_id, total in rows.all()]
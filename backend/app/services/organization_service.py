@@ -22,6 +22,7 @@ import asyncio
 from typing import Optional
 from app.settings.logging_config import get_logger
 from app.core.telemetry import telemetry
+from app.core.auth_cache import auth_cache
 
 logger = get_logger(__name__)
 
@@ -188,6 +189,7 @@ class OrganizationService:
 
         await db.execute(delete(Membership).where(Membership.id == membership_id))
         await db.commit()
+        auth_cache.invalidate_membership(membership.user_id, membership.organization_id)
     
     async def update_member(self, db: AsyncSession, membership_id: str, organization_id: str, membership_data: MembershipUpdate, current_user: User, organization: Organization) -> MembershipSchema:
         membership = await self.get_member(db, membership_id, organization_id, current_user)
@@ -204,6 +206,7 @@ class OrganizationService:
         membership.role = membership_data.role
         await db.commit()
         await db.refresh(membership)
+        auth_cache.invalidate_membership(membership.user_id, membership.organization_id)
 
         return MembershipSchema.from_orm(membership)
 
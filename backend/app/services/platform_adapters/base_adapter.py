@@ -10,6 +10,11 @@ class PlatformAdapter(ABC):
         self.platform = platform
         self.config = platform.platform_config
         self.credentials = platform.decrypt_credentials()
+
+    @property
+    def delivery_tenant(self) -> str:
+        """Outbound rate-limit key: a 429 only holds back calls of the same connected platform."""
+        return str(self.platform.id)
     
     @abstractmethod
     async def process_incoming_message(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
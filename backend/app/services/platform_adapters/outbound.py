@@ -0,0 +1,303 @@
+"""Shared HTTP clients and a rate-limit-aware outbound queue for Slack and Teams.
+
+Adapters used to open a new ``httpx.AsyncClient`` in every method, so each
+message paid for a TCP and TLS handshake, and concurrent conversations had no
+common view of the platform's rate limits: a fan-out to many users kept
+hitting 429s and the failed sends were only printed.
+
+Every outbound call now goes through ``platform_delivery``:
+
+  - one keep-alive ``httpx.AsyncClient`` per platform (per event loop),
+  - calls that post into a channel are serialized per ``(platform, channel)``
+    and spaced by ``channel_interval`` seconds (Slack allows about one message
+    per second per channel); at most ``max_queue_per_channel`` callers wait on
+    one channel before ``OutboundQueueFull`` is raised,
+  - a 429 blocks the tenant (Slack workspace / Teams bot, i.e. whose rate
+    limit was hit) until its ``Retry-After`` has passed, so its other
+    conversations back off too instead of being throttled in turn, while other
+    tenants keep sending; the call is retried (the platform did not process it),
+  - connection failures are always retried (nothing was sent); timeouts after
+    sending and 5xx responses are only retried for ``idempotent`` calls, since
+    chat.postMessage and Bot Connector activities have no idempotency key.
+
+``stats()`` reports per-platform counters and queue depth.
+"""
+
+import asyncio
+import email.utils
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 30  # seconds
+DEFAULT_TIMEOUT = 30  # seconds
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_MAX_RETRY_AFTER = 60  # seconds; longer Retry-After values are capped
+DEFAULT_CHANNEL_INTERVAL = 1.0  # seconds between posts to the same channel
+DEFAULT_MAX_QUEUE_PER_CHANNEL = 500
+
+MAX_IDLE_CHANNELS = 1024  # idle channel queues kept for their spacing before pruning
+
+
+class OutboundQueueFull(Exception):
+    """Raised when too many messages are already waiting for the same channel."""
+    pass
+
+
+class _ChannelQueue:
+    __slots__ = ("lock", "waiting", "next_at")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+        self.next_at = 0.0
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """``Retry-After`` of a response in seconds (delta-seconds or HTTP date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class PlatformDelivery:
+    """Pooled clients and per-channel outbound queues, by platform type."""
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+        channel_interval: float = DEFAULT_CHANNEL_INTERVAL,
+        max_queue_per_channel: int = DEFAULT_MAX_QUEUE_PER_CHANNEL,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.channel_interval = channel_interval
+        self.max_queue_per_channel = max_queue_per_channel
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._channels: Dict[Tuple[str, str], _ChannelQueue] = {}
+        self._blocked_until: Dict[Tuple[str, str], float] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def configure(self, **options) -> None:
+        for key, value in options.items():
+            if value is None:
+                continue
+            if not hasattr(self, key):
+                raise ValueError(f"Unknown platform delivery option: {key}")
+            setattr(self, key, value)
+
+    def client(self, platform: str) -> httpx.AsyncClient:
+        """Keep-alive client for ``platform``, created on first use in the running loop."""
+        self._bind_loop()
+        client = self._clients.get(platform)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+            self._clients[platform] = client
+        return client
+
+    async def request(
+        self,
+        platform: str,
+        method: str,
+        url: str,
+        *,
+        channel: Optional[str] = None,
+        tenant: Optional[str] = None,
+        idempotent: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request through the platform's pooled client.
+
+        ``channel`` serializes and spaces the call with other posts to the same
+        channel. ``tenant`` identifies whose rate limit the call counts against
+        (a 429 only holds back calls of the same tenant); without it, the URL's
+        host and the ``Authorization`` header are used. The last response is
+        returned once retries are exhausted (a 429 included); transport errors
+        are re-raised.
+
+        Raises:
+            OutboundQueueFull: if ``max_queue_per_channel`` calls already wait on ``channel``.
+        """
+        self._bind_loop()
+        counters = self._counters(platform)
+        queue = self._channel_queue(platform, channel) if channel else None
+        if queue is not None:
+            if queue.waiting >= self.max_queue_per_channel:
+                counters["rejected"] += 1
+                raise OutboundQueueFull(f"{queue.waiting} messages already queued for {platform} channel {channel}")
+            queue.waiting += 1
+            try:
+                await queue.lock.acquire()
+            finally:
+                queue.waiting -= 1
+        try:
+            if queue is not None:
+                delay = queue.next_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            rate_key = self._rate_limit_key(platform, url, tenant, kwargs.get("headers"))
+            return await self._send(platform, rate_key, method, url, idempotent, counters, **kwargs)
+        finally:
+            if queue is not None:
+                queue.next_at = time.monotonic() + self.channel_interval
+                queue.lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        snapshot: Dict[str, Any] = {}
+        for platform, counters in self._stats.items():
+            queues = [q for (p, _), q in self._channels.items() if p == platform]
+            blocked = [until - now for (p, _), until in self._blocked_until.items() if p == platform and until > now]
+            snapshot[platform] = dict(
+                counters,
+                queued=sum(q.waiting for q in queues),
+                busy_channels=sum(1 for q in queues if q.lock.locked()),
+                max_channel_depth=max((q.waiting for q in queues), default=0),
+                blocked_tenants=len(blocked),
+                blocked_for=max(blocked, default=0.0),
+            )
+        return snapshot
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception:
+                logger.debug("Error closing platform HTTP client", exc_info=True)
+
+    async def _send(
+        self,
+        platform: str,
+        rate_key: Tuple[str, str],
+        method: str,
+        url: str,
+        idempotent: bool,
+        counters: Dict[str, int],
+        **kwargs: Any,
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            blocked = self._blocked_until.get(rate_key, 0.0) - time.monotonic()
+            if blocked > 0:
+                await asyncio.sleep(blocked)
+            counters["requests"] += 1
+            try:
+                response = await self.client(platform).request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # The request never reached the platform, so it is safe to resend
+                if attempt >= self.max_retries:
+                    counters["failed"] += 1
+                    raise
+                delay = self._backoff(attempt)
+            except httpx.TransportError:
+                if not idempotent or attempt >= self.max_retries:
+                    counters["failed"] += 1
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code == 429:
+                    counters["throttled"] += 1
+                    retry_after = retry_after_seconds(response)
+                    delay = min(retry_after if retry_after is not None else self._backoff(attempt), self.max_retry_after)
+                    # Every conversation of this tenant waits, not just this one
+                    self._block(rate_key, delay)
+                    if attempt >= self.max_retries:
+                        counters["failed"] += 1
+                        logger.warning(f"{platform} rate limit persisted after {attempt} retries: {method} {url}")
+                        return response
+                    delay = 0.0  # the tenant-wide wait above applies
+                elif response.status_code >= 500 and idempotent and attempt < self.max_retries:
+                    delay = self._backoff(attempt)
+                else:
+                    return response
+            attempt += 1
+            counters["retried"] += 1
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def _block(self, rate_key: Tuple[str, str], delay: float) -> None:
+        now = time.monotonic()
+        if len(self._blocked_until) >= MAX_IDLE_CHANNELS:
+            self._blocked_until = {key: until for key, until in self._blocked_until.items() if until > now}
+        self._blocked_until[rate_key] = max(self._blocked_until.get(rate_key, 0.0), now + delay)
+
+    @staticmethod
+    def _rate_limit_key(platform: str, url: str, tenant: Optional[str], headers: Any) -> Tuple[str, str]:
+        if tenant is not None:
+            return platform, str(tenant)
+        # Same host and credential: same workspace/bot. Only a digest of the token is kept.
+        credential = httpx.Headers(headers or {}).get("Authorization", "")
+        digest = hashlib.sha256(credential.encode()).hexdigest()[:16] if credential else ""
+        return platform, f"{httpx.URL(url).host}:{digest}"
+
+    def _backoff(self, attempt: int) -> float:
+        return min(0.5 * (2 ** attempt), self.max_retry_after)
+
+    def _counters(self, platform: str) -> Dict[str, int]:
+        counters = self._stats.get(platform)
+        if counters is None:
+            counters = {"requests": 0, "retried": 0, "throttled": 0, "failed": 0, "rejected": 0}
+            self._stats[platform] = counters
+        return counters
+
+    def _channel_queue(self, platform: str, channel: str) -> _ChannelQueue:
+        key = (platform, str(channel))
+        queue = self._channels.get(key)
+        if queue is None:
+            if len(self._channels) >= MAX_IDLE_CHANNELS:
+                self._prune_channels()
+            queue = _ChannelQueue()
+            self._channels[key] = queue
+        return queue
+
+    def _prune_channels(self) -> None:
+        now = time.monotonic()
+        for key, queue in list(self._channels.items()):
+            if not queue.lock.locked() and not queue.waiting and queue.next_at <= now:
+                del self._channels[key]
+
+    def _bind_loop(self) -> None:
+        # httpx clients and asyncio locks belong to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._clients = {}
+            self._channels = {}
+
+
+platform_delivery = PlatformDelivery()
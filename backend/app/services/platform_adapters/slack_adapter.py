@@ -16,6 +16,7 @@ from app.models.organization import Organization
 from app.models.user import User
 from app.schemas.external_user_mapping_schema import ExternalUserMappingCreate
 from app.services.external_user_mapping_service import ExternalUserMappingService
+from app.services.platform_adapters.outbound import platform_delivery
 from app.settings.config import settings
 
 class SlackAdapter(PlatformAdapter):
@@ -35,19 +36,20 @@ class SlackAdapter(PlatformAdapter):
             if not bot_token:
                 return None
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://slack.com/api/auth.test",
-                    headers={"Authorization": f"Bearer {bot_token}"}
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get("ok"):
-                        self.bot_user_id = result.get("user_id")
-                        return self.bot_user_id
-                
-                return None
+            response = await platform_delivery.request(
+                "slack", "POST", "https://slack.com/api/auth.test",
+                tenant=self.delivery_tenant,
+                idempotent=True,
+                headers={"Authorization": f"Bearer {bot_token}"}
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                if result.get("ok"):
+                    self.bot_user_id = result.get("user_id")
+                    return self.bot_user_id
+            
+            return None
                 
         except Exception as e:
             print(f"Error getting bot user ID: {e}")
@@ -136,25 +138,28 @@ class SlackAdapter(PlatformAdapter):
                 print("Error: No text or blocks specified")
                 return False
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://slack.com/api/chat.postMessage",
-                    headers={
-                        "Authorization": f"Bearer {bot_token}",
-                        "Content-Type": "application/json"
-                    },
-                    json=slack_message
-                )
-                
-                print(f"Slack API response status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"Slack API response: {result}")
-                    return result.get("ok", False)
-                else:
-                    print(f"Slack API error: {response.status_code} - {response.text}")
-                    return False
+            # Queued per channel; not idempotent (a resent message would be posted twice)
+            response = await platform_delivery.request(
+                "slack", "POST", "https://slack.com/api/chat.postMessage",
+                tenant=self.delivery_tenant,
+                channel=slack_message["channel"],
+                timeout=30.0,
+                headers={
+                    "Authorization": f"Bearer {bot_token}",
+                    "Content-Type": "application/json"
+                },
+                json=slack_message
+            )
+            
+            print(f"Slack API response status: {response.status_code}")
+            
+            if response.status_code == 200:
+                result = response.json()
+                print(f"Slack API response: {result}")
+                return result.get("ok", False)
+            else:
+                print(f"Slack API error: {response.status_code} - {response.text}")
+                return False
                     
         except httpx.ConnectTimeout:
             print("Slack API connection timeout")
@@ -174,24 +179,25 @@ class SlackAdapter(PlatformAdapter):
             if not bot_token:
                 return {}
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://slack.com/api/users.info?user={external_user_id}",
-                    headers={"Authorization": f"Bearer {bot_token}"}
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get("ok"):
-                        user_info = result.get("user", {})
-                        return {
-                            "id": user_info.get("id"),
-                            "name": user_info.get("name"),
-                            "email": user_info.get("profile", {}).get("email"),
-                            "real_name": user_info.get("profile", {}).get("real_name")
-                        }
-                
-                return {}
+            response = await platform_delivery.request(
+                "slack", "GET", f"https://slack.com/api/users.info?user={external_user_id}",
+                tenant=self.delivery_tenant,
+                idempotent=True,
+                headers={"Authorization": f"Bearer {bot_token}"}
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                if result.get("ok"):
+                    user_info = result.get("user", {})
+                    return {
+                        "id": user_info.get("id"),
+                        "name": user_info.get("name"),
+                        "email": user_info.get("profile", {}).get("email"),
+                        "real_name": user_info.get("profile", {}).get("real_name")
+                    }
+            
+            return {}
                 
         except Exception as e:
             print(f"Error getting Slack user info: {e}")
@@ -245,6 +251,88 @@ class SlackAdapter(PlatformAdapter):
             print(f"Error sending verification message: {e}")
             return False
 
+    async def _open_dm(self, bot_token: str, user_id: str) -> Optional[str]:
+        """Open (or reuse) the DM channel with a user and return its ID."""
+        open_resp = await platform_delivery.request(
+            "slack", "POST", "https://slack.com/api/conversations.open",
+            tenant=self.delivery_tenant,
+            idempotent=True,
+            headers={
+                "Authorization": f"Bearer {bot_token}",
+                "Content-Type": "application/json"
+            },
+            json={"users": user_id}
+        )
+        open_data = open_resp.json()
+        if not open_data.get("ok"):
+            print(f"Failed to open DM: {open_data}")
+            return None
+        return open_data["channel"]["id"]
+
+    async def _upload_file(self, bot_token: str, channel_id: str, file_path: str, title: str, thread_ts: str = None) -> bool:
+        """Share a file in a channel (optionally in a thread) with the external upload flow."""
+        # 1. Get the upload URL
+        file_size = os.path.getsize(file_path)
+        file_name = os.path.basename(file_path)
+
+        get_url_resp = await platform_delivery.request(
+            "slack", "GET", "https://slack.com/api/files.getUploadURLExternal",
+            tenant=self.delivery_tenant,
+            idempotent=True,
+            timeout=60.0,
+            headers={"Authorization": f"Bearer {bot_token}"},
+            params={"filename": file_name, "length": file_size}
+        )
+        get_url_data = get_url_resp.json()
+        if not get_url_data.get("ok"):
+            print(f"Failed to get upload URL: {get_url_data}")
+            return False
+
+        upload_url = get_url_data["upload_url"]
+        file_id = get_url_data["file_id"]
+
+        # 2. Upload the file to the provided URL (re-uploading to the same file ID is safe)
+        with open(file_path, "rb") as f:
+            upload_resp = await platform_delivery.request(
+                "slack", "POST", upload_url,
+                tenant=self.delivery_tenant,
+                idempotent=True,
+                timeout=60.0,
+                content=f.read(),
+                headers={"Content-Type": "application/octet-stream"}
+            )
+
+        if upload_resp.status_code != 200:
+            print(f"Failed to upload file to URL. Status: {upload_resp.status_code}, Response: {upload_resp.text}")
+            return False
+
+        # 3. Complete the upload, which posts the file into the channel
+        complete_payload = {
+            "files": [{"id": file_id, "title": title}],
+            "channel_id": channel_id,
+            "initial_comment": title,
+        }
+
+        # Add thread_ts if provided
+        if thread_ts:
+            complete_payload["thread_ts"] = thread_ts
+
+        complete_upload_resp = await platform_delivery.request(
+            "slack", "POST", "https://slack.com/api/files.completeUploadExternal",
+            tenant=self.delivery_tenant,
+            channel=channel_id,
+            timeout=60.0,
+            headers={"Authorization": f"Bearer {bot_token}"},
+            json=complete_payload
+        )
+
+        complete_upload_data = complete_upload_resp.json()
+        if not complete_upload_data.get("ok"):
+            print(f"Failed to complete file upload: {complete_upload_data}")
+            return False
+
+        return True
+
     async def _upload_file_v2(self, user_id: str, file_path: str, title: str) -> bool:
         """
         Uploads a file to Slack using the new multi-step process.
@@ -259,66 +347,11 @@ class SlackAdapter(PlatformAdapter):
             return False
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                # 1. Open a DM channel to get the channel_id
-                open_resp = await client.post(
-                    "https://slack.com/api/conversations.open",
-                    headers={"Authorization": f"Bearer {bot_token}"},
-                    json={"users": user_id}
-                )
-                open_data = open_resp.json()
-                if not open_data.get("ok"):
-                    print(f"Failed to open DM: {open_data}")
-                    return False
-                channel_id = open_data["channel"]["id"]
-
-                # 2. Get the upload URL
-                file_size = os.path.getsize(file_path)
-                file_name = os.path.basename(file_path)
-                
-                get_url_resp = await client.get(
-                    "https://slack.com/api/files.getUploadURLExternal",
-                    headers={"Authorization": f"Bearer {bot_token}"},
-                    params={"filename": file_name, "length": file_size}
-                )
-                get_url_data = get_url_resp.json()
-                if not get_url_data.get("ok"):
-                    print(f"Failed to get upload URL: {get_url_data}")
-                    return False
-                
-                upload_url = get_url_data["upload_url"]
-                file_id = get_url_data["file_id"]
-
-                # 3. Upload the file to the provided URL
-                with open(file_path, "rb") as f:
-                    upload_resp = await client.post(
-                        upload_url,
-                        content=f.read(),
-                        headers={"Content-Type": "application/octet-stream"}
-                    )
-                
-                if upload_resp.status_code != 200:
-                    print(f"Failed to upload file to URL. Status: {upload_resp.status_code}, Response: {upload_resp.text}")
-                    return False
-                
-                # 4. Complete the upload
-                files_data = [{"id": file_id, "title": title}]
-                complete_upload_resp = await client.post(
-                    "https://slack.com/api/files.completeUploadExternal",
-                    headers={"Authorization": f"Bearer {bot_token}"},
-                    json={
-                        "files": files_data,
-                        "channel_id": channel_id,
-                        "initial_comment": title,
-                    }
-                )
-
-                complete_upload_data = complete_upload_resp.json()
-                if not complete_upload_data.get("ok"):
-                    print(f"Failed to complete file upload: {complete_upload_data}")
-                    return False
-                
-                return True
+            # Open a DM channel to get the channel_id
+            channel_id = await self._open_dm(bot_token, user_id)
+            if not channel_id:
+                return False
+            return await self._upload_file(bot_token, channel_id, file_path, title)
 
         except Exception as e:
             print(f"Error in new file upload process: {e}")
@@ -334,34 +367,23 @@ class SlackAdapter(PlatformAdapter):
             return False
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Open a DM channel
-                open_resp = await client.post(
-                    "https://slack.com/api/conversations.open",
-                    headers={
-                        "Authorization": f"Bearer {bot_token}",
-                        "Content-Type": "application/json"
-                    },
-                    json={"users": user_id}
-                )
-                open_data = open_resp.json()
-                if not open_data.get("ok"):
-                    print(f"Failed to open DM: {open_data}")
-                    return False
-                channel_id = open_data["channel"]["id"]
+            # Open a DM channel
+            channel_id = await self._open_dm(bot_token, user_id)
+            if not channel_id:
+                return False
 
-                # Use your existing send_response method
-                return await self.send_response({
-                    "channel": channel_id,
-                    "text": text, # Fallback for notifications
-                    "blocks": [{
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": text
-                        }
-                    }]
-                })
+            # Use your existing send_response method
+            return await self.send_response({
+                "channel": channel_id,
+                "text": text, # Fallback for notifications
+                "blocks": [{
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": text
+                    }
+                }]
+            })
         except Exception as e:
             print(f"Error sending DM: {e}")
             return False
@@ -395,25 +417,27 @@ class SlackAdapter(PlatformAdapter):
 
         print(f"Adding reaction '{emoji}' to channel={channel_id}, ts={timestamp}")
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    "https://slack.com/api/reactions.add",
-                    headers={
-                        "Authorization": f"Bearer {bot_token}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "channel": channel_id,
-                        "timestamp": timestamp,
-                        "name": emoji  # emoji name without colons, e.g., "eyes"
-                    }
-                )
-                result = response.json()
-                if not result.get("ok"):
-                    # already_reacted is not an error
-                    if result.get("error") != "already_reacted":
-                        print(f"Failed to add reaction: {result}")
-                return result.get("ok", False) or result.get("error") == "already_reacted"
+            response = await platform_delivery.request(
+                "slack", "POST", "https://slack.com/api/reactions.add",
+                tenant=self.delivery_tenant,
+                idempotent=True,  # a repeat is answered with already_reacted
+                timeout=10.0,
+                headers={
+                    "Authorization": f"Bearer {bot_token}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "channel": channel_id,
+                    "timestamp": timestamp,
+                    "name": emoji  # emoji name without colons, e.g., "eyes"
+                }
+            )
+            result = response.json()
+            if not result.get("ok"):
+                # already_reacted is not an error
+                if result.get("error") != "already_reacted":
+                    print(f"Failed to add reaction: {result}")
+            return result.get("ok", False) or result.get("error") == "already_reacted"
         except Exception as e:
             print(f"Error adding reaction: {e}")
             return False
@@ -426,25 +450,27 @@ class SlackAdapter(PlatformAdapter):
             return False
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    "https://slack.com/api/reactions.remove",
-                    headers={
-                        "Authorization": f"Bearer {bot_token}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "channel": channel_id,
-                        "timestamp": timestamp,
-                        "name": emoji
-                    }
-                )
-                result = response.json()
-                if not result.get("ok"):
-                    # no_reaction is not an error (reaction already removed or never existed)
-                    if result.get("error") != "no_reaction":
-                        print(f"Failed to remove reaction: {result}")
-                return result.get("ok", False) or result.get("error") == "no_reaction"
+            response = await platform_delivery.request(
+                "slack", "POST", "https://slack.com/api/reactions.remove",
+                tenant=self.delivery_tenant,
+                idempotent=True,  # a repeat is answered with no_reaction
+                timeout=10.0,
+                headers={
+                    "Authorization": f"Bearer {bot_token}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "channel": channel_id,
+                    "timestamp": timestamp,
+                    "name": emoji
+                }
+            )
+            result = response.json()
+            if not result.get("ok"):
+                # no_reaction is not an error (reaction already removed or never existed)
+                if result.get("error") != "no_reaction":
+                    print(f"Failed to remove reaction: {result}")
+            return result.get("ok", False) or result.get("error") == "no_reaction"
         except Exception as e:
             print(f"Error removing reaction: {e}")
             return False
@@ -464,20 +490,9 @@ class SlackAdapter(PlatformAdapter):
         try:
             # If no channel_id provided, open a DM with the user
             if not channel_id:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    open_resp = await client.post(
-                        "https://slack.com/api/conversations.open",
-                        headers={
-                            "Authorization": f"Bearer {bot_token}",
-                            "Content-Type": "application/json"
-                        },
-                        json={"users": user_id}
-                    )
-                    open_data = open_resp.json()
-                    if not open_data.get("ok"):
-                        print(f"Failed to open DM: {open_data}")
-                        return False
-                    channel_id = open_data["channel"]["id"]
+                channel_id = await self._open_dm(bot_token, user_id)
+                if not channel_id:
+                    return False
 
             # Build message payload
             message_data = {
@@ -517,72 +532,13 @@ class SlackAdapter(PlatformAdapter):
             return False
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                # If no channel_id provided, open a DM with the user
+            # If no channel_id provided, open a DM with the user
+            if not channel_id:
+                channel_id = await self._open_dm(bot_token, user_id)
                 if not channel_id:
-                    open_resp = await client.post(
-                        "https://slack.com/api/conversations.open",
-                        headers={"Authorization": f"Bearer {bot_token}"},
-                        json={"users": user_id}
-                    )
-                    open_data = open_resp.json()
-                    if not open_data.get("ok"):
-                        print(f"Failed to open DM: {open_data}")
-                        return False
-                    channel_id = open_data["channel"]["id"]
-
-                # 2. Get the upload URL
-                file_size = os.path.getsize(file_path)
-                file_name = os.path.basename(file_path)
-
-                get_url_resp = await client.get(
-                    "https://slack.com/api/files.getUploadURLExternal",
-                    headers={"Authorization": f"Bearer {bot_token}"},
-                    params={"filename": file_name, "length": file_size}
-                )
-                get_url_data = get_url_resp.json()
-                if not get_url_data.get("ok"):
-                    print(f"Failed to get upload URL: {get_url_data}")
-                    return False
-
-                upload_url = get_url_data["upload_url"]
-                file_id = get_url_data["file_id"]
-
-                # 3. Upload the file
-                with open(file_path, "rb") as f:
-                    upload_resp = await client.post(
-                        upload_url,
-                        content=f.read(),
-                        headers={"Content-Type": "application/octet-stream"}
-                    )
-
-                if upload_resp.status_code != 200:
-                    print(f"Failed to upload file. Status: {upload_resp.status_code}")
-                    return False
-
-                # 4. Complete the upload with thread context
-                complete_payload = {
-                    "files": [{"id": file_id, "title": title}],
-                    "channel_id": channel_id,
-                    "initial_comment": title,
-                }
-
-                # Add thread_ts if provided
-                if thread_ts:
-                    complete_payload["thread_ts"] = thread_ts
-
-                complete_upload_resp = await client.post(
-                    "https://slack.com/api/files.completeUploadExternal",
-                    headers={"Authorization": f"Bearer {bot_token}"},
-                    json=complete_payload
-                )
-
-                complete_upload_data = complete_upload_resp.json()
-                if not complete_upload_data.get("ok"):
-                    print(f"Failed to complete file upload: {complete_upload_data}")
                     return False
 
-                return True
+            return await self._upload_file(bot_token, channel_id, file_path, title, thread_ts=thread_ts)
 
         except Exception as e:
             print(f"Error in file upload with thread: {e}")
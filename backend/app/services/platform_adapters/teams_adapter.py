@@ -5,6 +5,7 @@ import httpx
 import jwt
 from typing import Dict, Any, Optional
 from .base_adapter import PlatformAdapter
+from app.services.platform_adapters.outbound import platform_delivery
 from app.settings.config import settings
 
 
@@ -43,26 +44,28 @@ class TeamsAdapter(PlatformAdapter):
 
         try:
             token_url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token"
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                response = await client.post(
-                    token_url,
-                    data={
-                        "grant_type": "client_credentials",
-                        "client_id": self.app_id,
-                        "client_secret": self.client_secret,
-                        "scope": self.TOKEN_SCOPE,
-                    },
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    TeamsAdapter._token_cache = {
-                        "token": data["access_token"],
-                        "expires_at": time.time() + data.get("expires_in", 3600),
-                    }
-                    return data["access_token"]
-                else:
-                    print(f"TEAMS: Failed to get access token: {response.status_code} {response.text}")
-                    return None
+            response = await platform_delivery.request(
+                "teams", "POST", token_url,
+                tenant=self.delivery_tenant,
+                idempotent=True,
+                timeout=15.0,
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.app_id,
+                    "client_secret": self.client_secret,
+                    "scope": self.TOKEN_SCOPE,
+                },
+            )
+            if response.status_code == 200:
+                data = response.json()
+                TeamsAdapter._token_cache = {
+                    "token": data["access_token"],
+                    "expires_at": time.time() + data.get("expires_in", 3600),
+                }
+                return data["access_token"]
+            else:
+                print(f"TEAMS: Failed to get access token: {response.status_code} {response.text}")
+                return None
         except Exception as e:
             print(f"TEAMS: Error getting access token: {e}")
             return None
@@ -79,21 +82,20 @@ class TeamsAdapter(PlatformAdapter):
             return self._jwks_cache["keys"]
 
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # Get OpenID metadata to find jwks_uri
-                meta_resp = await client.get(self.OPENID_METADATA_URL)
-                metadata = meta_resp.json()
-                jwks_uri = metadata["jwks_uri"]
-
-                # Fetch the actual signing keys
-                keys_resp = await client.get(jwks_uri)
-                jwks = keys_resp.json()
-
-                TeamsAdapter._jwks_cache = {
-                    "keys": jwks,
-                    "fetched_at": time.time(),
-                }
-                return jwks
+            # Get OpenID metadata to find jwks_uri
+            meta_resp = await platform_delivery.request("teams", "GET", self.OPENID_METADATA_URL, idempotent=True, timeout=15.0)
+            metadata = meta_resp.json()
+            jwks_uri = metadata["jwks_uri"]
+
+            # Fetch the actual signing keys
+            keys_resp = await platform_delivery.request("teams", "GET", jwks_uri, idempotent=True, timeout=15.0)
+            jwks = keys_resp.json()
+
+            TeamsAdapter._jwks_cache = {
+                "keys": jwks,
+                "fetched_at": time.time(),
+            }
+            return jwks
         except Exception as e:
             print(f"TEAMS: Error fetching signing keys: {e}")
             return self._jwks_cache.get("keys")
@@ -293,22 +295,25 @@ class TeamsAdapter(PlatformAdapter):
             url = f"{service_url.rstrip('/')}/v3/conversations/{conversation_id}/activities"
             print(f"TEAMS: Sending message to {url}")
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    url,
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "Content-Type": "application/json",
-                    },
-                    json=activity,
-                )
-
-                print(f"TEAMS: API response status: {response.status_code}")
-                if response.status_code in (200, 201):
-                    return True
-                else:
-                    print(f"TEAMS: API error: {response.status_code} - {response.text}")
-                    return False
+            # Queued per conversation; not idempotent (a resent activity would be posted twice)
+            response = await platform_delivery.request(
+                "teams", "POST", url,
+                tenant=self.delivery_tenant,
+                channel=conversation_id,
+                timeout=30.0,
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Content-Type": "application/json",
+                },
+                json=activity,
+            )
+
+            print(f"TEAMS: API response status: {response.status_code}")
+            if response.status_code in (200, 201):
+                return True
+            else:
+                print(f"TEAMS: API error: {response.status_code} - {response.text}")
+                return False
 
         except httpx.ConnectTimeout:
             print("TEAMS: API connection timeout")
@@ -332,19 +337,21 @@ class TeamsAdapter(PlatformAdapter):
             # For now, return basic info from what we have
             url = f"{self.service_url.rstrip('/')}/v3/conversations/placeholder/members/{external_user_id}"
 
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                response = await client.get(
-                    url,
-                    headers={"Authorization": f"Bearer {token}"},
-                )
-                if response.status_code == 200:
-                    user_data = response.json()
-                    return {
-                        "id": user_data.get("id"),
-                        "name": user_data.get("name"),
-                        "email": user_data.get("email"),
-                        "real_name": user_data.get("givenName", "") + " " + user_data.get("surname", ""),
-                    }
+            response = await platform_delivery.request(
+                "teams", "GET", url,
+                tenant=self.delivery_tenant,
+                idempotent=True,
+                timeout=15.0,
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            if response.status_code == 200:
+                user_data = response.json()
+                return {
+                    "id": user_data.get("id"),
+                    "name": user_data.get("name"),
+                    "email": user_data.get("email"),
+                    "real_name": user_data.get("givenName", "") + " " + user_data.get("surname", ""),
+                }
             return {}
         except Exception as e:
             print(f"TEAMS: Error getting user info: {e}")
@@ -425,21 +432,24 @@ class TeamsAdapter(PlatformAdapter):
                 "isGroup": False,
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    url,
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "Content-Type": "application/json",
-                    },
-                    json=payload,
-                )
-                if response.status_code in (200, 201):
-                    data = response.json()
-                    return data.get("id")
-                else:
-                    print(f"TEAMS: Failed to create conversation: {response.status_code} {response.text}")
-                    return None
+            # Creating a 1:1 conversation that already exists returns the same ID
+            response = await platform_delivery.request(
+                "teams", "POST", url,
+                tenant=self.delivery_tenant,
+                idempotent=True,
+                timeout=30.0,
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Content-Type": "application/json",
+                },
+                json=payload,
+            )
+            if response.status_code in (200, 201):
+                data = response.json()
+                return data.get("id")
+            else:
+                print(f"TEAMS: Failed to create conversation: {response.status_code} {response.text}")
+                return None
         except Exception as e:
             print(f"TEAMS: Error creating conversation: {e}")
             return None
@@ -531,19 +541,21 @@ class TeamsAdapter(PlatformAdapter):
 
                 url = f"{self.service_url.rstrip('/')}/v3/conversations/{channel_id}/activities"
 
-                async with httpx.AsyncClient(timeout=60.0) as client:
-                    response = await client.post(
-                        url,
-                        headers={
-                            "Authorization": f"Bearer {token}",
-                            "Content-Type": "application/json",
-                        },
-                        json=activity,
-                    )
-                    if response.status_code in (200, 201):
-                        return True
-                    print(f"TEAMS: Failed to send file: {response.status_code} {response.text}")
-                    return False
+                response = await platform_delivery.request(
+                    "teams", "POST", url,
+                    tenant=self.delivery_tenant,
+                    channel=channel_id,
+                    timeout=60.0,
+                    headers={
+                        "Authorization": f"Bearer {token}",
+                        "Content-Type": "application/json",
+                    },
+                    json=activity,
+                )
+                if response.status_code in (200, 201):
+                    return True
+                print(f"TEAMS: Failed to send file: {response.status_code} {response.text}")
+                return False
             else:
                 # For larger files, send a message with a note
                 await self.send_dm_in_thread(
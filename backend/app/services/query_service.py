@@ -216,9 +216,9 @@ class QueryService:
             ds_conns = await ds_service.construct_clients(db, ds, current_user=None)
             ds_clients.update(ds_conns)
         excel_files = report.files
-        executor = StreamingCodeExecutor()
+        executor = StreamingCodeExecutor(organization_id=report.organization_id)
         try:
-            exec_df, execution_log, _ = executor.execute_code(code=step.code, ds_clients=ds_clients, excel_files=excel_files)
+            exec_df, execution_log, _ = await executor.execute_code_async(code=step.code, ds_clients=ds_clients, excel_files=excel_files)
             df = executor.format_df_for_widget(exec_df)
             # Persist results on the new step
             step.data = df
@@ -335,10 +335,10 @@ class QueryService:
             ds_conns = await ds_service.construct_clients(db, ds, current_user=None)
             ds_clients.update(ds_conns)
         excel_files = report.files
-        executor = StreamingCodeExecutor()
+        executor = StreamingCodeExecutor(organization_id=report.organization_id)
 
         try:
-            exec_df, execution_log, _ = executor.execute_code(code=request.code or "", ds_clients=ds_clients, excel_files=excel_files)
+            exec_df, execution_log, _ = await executor.execute_code_async(code=request.code or "", ds_clients=ds_clients, excel_files=excel_files)
             df = executor.format_df_for_widget(exec_df)
             return {"preview": df, "execution_log": execution_log}
         except Exception as e:
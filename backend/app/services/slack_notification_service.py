@@ -14,6 +14,7 @@ from app.models.completion import Completion
 from app.models.external_platform import ExternalPlatform
 from app.settings.database import create_async_session_factory
 from app.services.platform_adapters.adapter_factory import PlatformAdapterFactory
+from app.services.step_data_store import step_data_store
 
 def create_plot(data_model: dict, data: dict, title: str) -> str:
     """Creates a plot from a step's data and data_model."""
@@ -168,15 +169,16 @@ def _format_markdown_table(data: dict, title: str, max_rows: int = 20) -> str:
 async def _handle_table_step_dm(adapter, external_user_id: str, step: 'Step', thread_ts: str = None, channel_id: str = None, platform_type: str = None):
     """Handles sending table data, optionally in a thread."""
     title = step.title or "Table Data"
+    data = step_data_store.hydrate(step.data)
 
     # Teams: send as markdown table text (Bot Connector doesn't support data: URLs for file uploads)
     if platform_type == "teams":
-        md_table = _format_markdown_table(step.data, title)
+        md_table = _format_markdown_table(data, title)
         if md_table:
             return await adapter.send_dm_in_thread(external_user_id, md_table, thread_ts, channel_id=channel_id)
         return False
 
-    file_path = df_to_csv(step.data)
+    file_path = df_to_csv(data)
     if not file_path:
         return False
 
@@ -197,7 +199,7 @@ async def _handle_chart_step_dm(adapter, external_user_id: str, step: 'Step', th
         msg = f"**{title}**\n_Chart visualization is available in the web report._"
         return await adapter.send_dm_in_thread(external_user_id, msg, thread_ts, channel_id=channel_id)
 
-    file_path = create_plot(step.data_model, step.data, title)
+    file_path = create_plot(step.data_model, step_data_store.hydrate(step.data), title)
 
     if not file_path:
         return False
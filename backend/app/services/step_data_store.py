@@ -0,0 +1,386 @@
+"""Columnar storage for step result data.
+
+``Step.data`` used to hold the full ``format_df_for_widget`` payload: rows as
+JSON records (every column name repeated per row) plus ``info``. Large results
+are instead written once as a zstd-compressed Parquet artifact and ``Step.data``
+keeps a small inline preview:
+
+    {"rows": [...first inline_rows...], "columns": [...], "loadingColumn": False,
+     "info": {...}, "artifact": {"format": "parquet", "path": ..., "rows": n, "bytes": size}}
+
+``hydrate()`` restores the full legacy payload for API responses, while grid
+paging (``read_rows``) and exports read only the row groups / columns they
+need straight from the artifact. Payloads that cannot be represented as Arrow
+(mixed-type columns, oversized ints) simply stay inline.
+
+A lost artifact is never papered over with the preview: ``hydrate()`` flags the
+payload with ``info.artifact_missing`` and paging/exports raise
+:class:`StepDataUnavailable`.
+"""
+
+import glob
+import io
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BASE_DIR = os.path.join("uploads", "step_data")
+DEFAULT_INLINE_ROWS = 100
+DEFAULT_COMPRESSION = "zstd"
+DEFAULT_ROW_GROUP_SIZE = 10_000
+DEFAULT_CACHE_ENTRIES = 32
+
+ARTIFACT_KEY = "artifact"
+
+
+class StepDataUnavailable(Exception):
+    """Raised when a step's rows live in an artifact that can no longer be read."""
+    pass
+
+
+def _fields(data: Dict[str, Any]) -> List[str]:
+    return [col["field"] for col in (data.get("columns") or []) if isinstance(col, dict) and "field" in col]
+
+
+def _headers(data: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        col["field"]: str(col.get("headerName", col["field"]))
+        for col in (data.get("columns") or [])
+        if isinstance(col, dict) and "field" in col
+    }
+
+
+class StepDataStore:
+    """Writes and reads step result artifacts; thread-safe."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        base_dir: str = DEFAULT_BASE_DIR,
+        inline_rows: int = DEFAULT_INLINE_ROWS,
+        compression: str = DEFAULT_COMPRESSION,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        cache_entries: int = DEFAULT_CACHE_ENTRIES,
+    ):
+        self.enabled = enabled
+        self.base_dir = base_dir
+        self.inline_rows = inline_rows
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.cache_entries = cache_entries
+        # Recently written/read tables keyed by path; avoids re-reading the file
+        # for the broadcasts and responses that follow a write.
+        self._tables: "OrderedDict[str, pa.Table]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, **options) -> None:
+        with self._lock:
+            for key, value in options.items():
+                if value is None:
+                    continue
+                if not hasattr(self, key):
+                    raise ValueError(f"Unknown step data storage option: {key}")
+                setattr(self, key, value)
+
+    # ------------------------------------------------------------------ #
+    # Writing
+    # ------------------------------------------------------------------ #
+
+    def offload(self, step_id: str, data: Any) -> Any:
+        """Persist ``data`` as an artifact and return the inline preview payload.
+
+        Returns ``data`` unchanged when storage is disabled, the payload is small
+        or already offloaded, or its rows cannot be converted to Arrow.
+        """
+        if not self.enabled or not is_offloadable(data):
+            return data
+        rows = data["rows"]
+        if len(rows) <= self.inline_rows:
+            return data
+        fields = _fields(data)
+        field_set = set(fields)
+        if any(not isinstance(row, dict) or not field_set.issuperset(row) for row in rows):
+            return data
+        try:
+            table = _rows_to_table(rows, fields)
+            if any(pa.types.is_nested(t) for t in table.schema.types):
+                # Structs would gain keys on the round trip; keep the JSON as-is
+                raise ValueError("nested column values")
+        except (pa.ArrowException, TypeError, ValueError, OverflowError) as e:
+            logger.debug(f"Keeping step {step_id} data inline: {e}")
+            return data
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        # Versioned file name: the previous artifact stays valid until the new payload is flushed
+        path = os.path.join(self.base_dir, f"{step_id}-{uuid.uuid4().hex[:8]}.parquet")
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, compression=self.compression, row_group_size=self.row_group_size)
+        os.replace(tmp_path, path)
+        self._remember(path, table)
+
+        slim = {k: v for k, v in data.items() if k != "rows"}
+        slim["rows"] = rows[: self.inline_rows]
+        slim[ARTIFACT_KEY] = {
+            "format": "parquet",
+            "path": path,
+            "rows": table.num_rows,
+            "bytes": os.path.getsize(path),
+        }
+        return slim
+
+    def delete(self, data: Any) -> None:
+        """Remove the artifact referenced by ``data`` (no-op for inline payloads)."""
+        path = artifact_path(data)
+        if path:
+            self.delete_path(path)
+
+    def delete_path(self, path: str) -> bool:
+        """Remove one artifact file; False if it was already gone."""
+        with self._lock:
+            self._tables.pop(path, None)
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def delete_for_step(self, step_id: str) -> int:
+        """Remove every artifact written for ``step_id``."""
+        pattern = os.path.join(glob.escape(self.base_dir), f"{glob.escape(str(step_id))}-*.parquet")
+        return sum(1 for path in glob.glob(pattern) if self.delete_path(path))
+
+    def list_artifacts(self) -> List[Tuple[str, str, float]]:
+        """``(step_id, path, mtime)`` of every artifact file under ``base_dir``."""
+        artifacts = []
+        for path in glob.glob(os.path.join(glob.escape(self.base_dir), "*-*.parquet")):
+            step_id = os.path.basename(path)[: -len(".parquet")].rsplit("-", 1)[0]
+            try:
+                artifacts.append((step_id, path, os.path.getmtime(path)))
+            except OSError:
+                continue
+        return artifacts
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+
+    def hydrate(self, data: Any) -> Any:
+        """Full legacy payload (all rows inline) for ``data``.
+
+        When the artifact is missing only the inline preview is left, and
+        ``info.artifact_missing`` tells consumers the rows are incomplete.
+        """
+        path = artifact_path(data)
+        if not path:
+            return data
+        hydrated = {k: v for k, v in data.items() if k != ARTIFACT_KEY}
+        table = self._read_table(path)
+        if table is not None:
+            hydrated["rows"] = table.to_pylist()
+        else:
+            logger.warning(f"Serving the {len(data.get('rows') or [])}-row preview for missing artifact {path}")
+            hydrated["info"] = {**(data.get("info") or {}), "artifact_missing": True}
+        return hydrated
+
+    def row_count(self, data: Any) -> int:
+        """Number of stored rows (not ``info.total_rows``, which ignores the row limit)."""
+        if not isinstance(data, dict):
+            return 0
+        artifact = data.get(ARTIFACT_KEY)
+        if isinstance(artifact, dict) and "rows" in artifact:
+            return int(artifact["rows"])
+        return len(data.get("rows") or [])
+
+    def read_rows(
+        self,
+        data: Any,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
+    ) -> Dict[str, Any]:
+        """A window of rows, optionally projected to ``columns`` and ordered by ``sort``.
+
+        Unsorted windows only decode the Parquet row groups they overlap.
+        """
+        data = data if isinstance(data, dict) else {}
+        fields = _fields(data)
+        if columns:
+            wanted = set(columns)
+            fields = [f for f in fields if f in wanted]
+        offset = max(int(offset or 0), 0)
+        total = self.row_count(data)
+        stop = total if limit is None else min(total, offset + max(int(limit), 0))
+
+        if sort not in _fields(data):
+            # Unknown names are ignored, as they are for ``columns``
+            sort = None
+
+        path = artifact_path(data)
+        if path:
+            if sort is None:
+                table = self._read_window(path, offset, stop, fields)
+            else:
+                table = self._read_table(path)
+                if table is not None:
+                    order = "descending" if descending else "ascending"
+                    table = table.sort_by([(sort, order)]).select(fields).slice(offset, max(stop - offset, 0))
+            if table is None:
+                raise StepDataUnavailable(f"Step data artifact is missing: {path}")
+            rows = table.to_pylist()
+        else:
+            inline = data.get("rows") or []
+            if sort is not None:
+                inline = _sorted_rows(inline, sort, descending)
+            rows = [{f: row.get(f) for f in fields} for row in inline[offset:stop]]
+        field_set = set(fields)
+        return {
+            "rows": rows,
+            "columns": [c for c in (data.get("columns") or []) if isinstance(c, dict) and c.get("field") in field_set],
+            "offset": offset,
+            "total_rows": total,
+        }
+
+    def to_arrow(self, data: Any) -> pa.Table:
+        """All stored rows as an Arrow table with display headers as column names."""
+        data = data if isinstance(data, dict) else {}
+        fields = _fields(data)
+        path = artifact_path(data)
+        if path:
+            table = self._read_table(path)
+            if table is None:
+                raise StepDataUnavailable(f"Step data artifact is missing: {path}")
+        else:
+            table = _rows_to_table(data.get("rows") or [], fields)
+        headers = _headers(data)
+        return table.select(fields).rename_columns([headers[f] for f in fields])
+
+    def to_dataframe(self, data: Any) -> pd.DataFrame:
+        if not isinstance(data, dict) or not data.get("columns"):
+            return pd.DataFrame()
+        try:
+            return self.to_arrow(data).to_pandas()
+        except (pa.ArrowException, TypeError, ValueError, OverflowError):
+            headers = _headers(data)
+            fields = _fields(data)
+            rows = self.hydrate(data).get("rows") or []
+            return pd.DataFrame([[row.get(f) for f in fields] for row in rows], columns=[headers[f] for f in fields])
+
+    def export_csv(self, data: Any) -> bytes:
+        """CSV bytes written straight from Arrow (pandas is only used for nested columns)."""
+        if not isinstance(data, dict) or not data.get("columns"):
+            return b""
+        try:
+            buffer = io.BytesIO()
+            pa_csv.write_csv(self.to_arrow(data), buffer, pa_csv.WriteOptions(quoting_style="needed"))
+            return buffer.getvalue()
+        except (pa.ArrowException, TypeError, ValueError, OverflowError):
+            return self.to_dataframe(data).to_csv(index=False).encode("utf-8")
+
+    def export_xlsx(self, data: Any) -> bytes:
+        buffer = io.BytesIO()
+        self.to_dataframe(data).to_excel(buffer, index=False, engine="openpyxl")
+        return buffer.getvalue()
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._tables.clear()
+
+    def _remember(self, path: str, table: pa.Table) -> None:
+        if not self.cache_entries:
+            return
+        with self._lock:
+            self._tables[path] = table
+            self._tables.move_to_end(path)
+            while len(self._tables) > self.cache_entries:
+                self._tables.popitem(last=False)
+
+    def _read_table(self, path: str) -> Optional[pa.Table]:
+        with self._lock:
+            table = self._tables.get(path)
+            if table is not None:
+                self._tables.move_to_end(path)
+                return table
+        try:
+            table = pq.read_table(path, memory_map=True)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"Step data artifact unavailable at {path}: {e}")
+            return None
+        self._remember(path, table)
+        return table
+
+    def _read_window(self, path: str, start: int, stop: int, fields: List[str]) -> Optional[pa.Table]:
+        with self._lock:
+            cached = self._tables.get(path)
+        if cached is not None:
+            return cached.select(fields).slice(start, max(stop - start, 0))
+        try:
+            parquet_file = pq.ParquetFile(path, memory_map=True)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"Step data artifact unavailable at {path}: {e}")
+            return None
+        groups = []
+        first_row = None
+        row = 0
+        for i in range(parquet_file.num_row_groups):
+            n = parquet_file.metadata.row_group(i).num_rows
+            if row + n > start and row < stop:
+                groups.append(i)
+                if first_row is None:
+                    first_row = row
+            row += n
+        if not groups:
+            return parquet_file.schema_arrow.empty_table().select(fields)
+        table = parquet_file.read_row_groups(groups, columns=fields)
+        return table.slice(start - first_row, stop - start)
+
+
+def is_offloadable(data: Any) -> bool:
+    return (
+        isinstance(data, dict)
+        and ARTIFACT_KEY not in data
+        and isinstance(data.get("rows"), list)
+        and isinstance(data.get("columns"), list)
+    )
+
+
+def artifact_path(data: Any) -> Optional[str]:
+    if not isinstance(data, dict):
+        return None
+    artifact = data.get(ARTIFACT_KEY)
+    if isinstance(artifact, dict):
+        return artifact.get("path")
+    return None
+
+
+def _sorted_rows(rows: List[Dict[str, Any]], field: str, descending: bool) -> List[Dict[str, Any]]:
+    """Inline rows ordered by ``field``, nulls last like Arrow's ``sort_by``."""
+    present = [row for row in rows if row.get(field) is not None]
+    nulls = [row for row in rows if row.get(field) is None]
+    try:
+        present.sort(key=lambda row: row[field], reverse=descending)
+    except TypeError:
+        # Mixed-type columns (the reason the payload stayed inline) sort as text
+        present.sort(key=lambda row: str(row[field]), reverse=descending)
+    return present + nulls
+
+
+def _rows_to_table(rows: List[Dict[str, Any]], fields: List[str]) -> pa.Table:
+    if len(set(fields)) != len(fields):
+        raise ValueError("duplicate column fields")
+    return pa.table({field: pa.array([row.get(field) for row in rows]) for field in fields})
+
+
+step_data_store = StepDataStore()
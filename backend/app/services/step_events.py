@@ -0,0 +1,112 @@
+"""Compact, coalesced WebSocket events for step changes.
+
+Step flush hooks used to ``json.dumps`` the whole step (code and every result
+row) inside the flush and broadcast it once per UPDATE, so an agent run that
+touches a step four times pushed the full result set four times to every open
+tab. Hooks now collect a small event on the session, and it is handed to
+:data:`step_event_publisher` once the transaction commits (events of a
+rolled-back transaction are dropped), so a client that refetches never reads
+the pre-commit row:
+
+    {"event": "update_step", "id", "step_id", "widget_id", "report_id",
+     "status", "status_reason", "title", "changed": [...], "data_version"}
+
+Events for the same step arriving within ``window`` seconds are merged
+(``changed`` is the union, scalar fields keep the latest value) and serialized
+in a task on the event loop rather than on the flush path. Clients fetch the
+result payload (``GET /steps/{id}``) when ``"data"`` is in ``changed``.
+"""
+
+import asyncio
+import json
+import logging
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_WINDOW = 0.1  # seconds
+
+# Step columns worth reporting in ``changed``; bookkeeping columns are left out
+TRACKED_FIELDS = (
+    "title", "slug", "status", "status_reason", "prompt", "code", "data",
+    "description", "type", "data_model", "view", "query_id",
+)
+
+
+def data_version(data: Any) -> Optional[str]:
+    """Short etag for a step's data payload.
+
+    Offloaded results are versioned by their artifact file; inline payloads are
+    small enough (bounded by the inline row limit) to checksum.
+    """
+    if data is None:
+        return None
+    from app.services.step_data_store import artifact_path
+    path = artifact_path(data)
+    if path:
+        return path.rsplit("-", 1)[-1].split(".", 1)[0]
+    try:
+        encoded = json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    except (TypeError, ValueError):
+        return None
+    return format(zlib.crc32(encoded), "08x")
+
+
+class StepEventPublisher:
+    """Merges step events per step and broadcasts them after a short window."""
+
+    def __init__(self, window: float = DEFAULT_WINDOW):
+        self.window = window
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def publish(self, event: Dict[str, Any], changed: Iterable[str] = ()) -> None:
+        """Queue ``event``; must be called on the event loop thread (e.g. from an after_commit hook)."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Events queued on a loop that has since gone away can never be delivered
+            self._loop = loop
+            self._pending = {}
+            self._flush_handle = None
+        key = (event["event"], event["step_id"])
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = {**event, "changed": []}
+        else:
+            pending.update({k: v for k, v in event.items() if k != "changed"})
+        for field in changed:
+            if field not in pending["changed"]:
+                pending["changed"].append(field)
+        if self._flush_handle is None:
+            if self.window:
+                self._flush_handle = loop.call_later(self.window, self._schedule_flush)
+            else:
+                self._flush_handle = loop.call_soon(self._schedule_flush)
+
+    def _schedule_flush(self) -> None:
+        self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            asyncio.get_running_loop().create_task(self._broadcast(list(pending.values())))
+
+    async def _broadcast(self, events) -> None:
+        from app.websocket_manager import websocket_manager
+        for event in events:
+            try:
+                await websocket_manager.broadcast_to_report(str(event["report_id"]), json.dumps(event, default=str))
+            except Exception as e:
+                logger.warning(f"Error broadcasting {event.get('event')} for step {event.get('step_id')}: {e}")
+
+    async def flush(self) -> None:
+        """Broadcast everything pending right away."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        await self._broadcast(list(pending.values()))
+
+
+step_event_publisher = StepEventPublisher()
@@ -17,6 +17,7 @@ from sqlalchemy import select
 from app.models.report import Report
 
 from app.ai.code_execution.code_execution import CodeExecutionManager
+from app.services.step_data_store import step_data_store
 
 
 
@@ -43,26 +44,24 @@ class StepService:
         step = await self.get_step_by_id(db, step_id)
         if not step:
             raise ValueError(f"Step {step_id} not found")
+        return step_data_store.to_dataframe(step.data), step
 
-        data = step.data
-        if not data or 'rows' not in data or 'columns' not in data:
-            return pd.DataFrame(), step
-
-        rows = data.get('rows', [])
-        columns = data.get('columns', [])
-
-        if not rows or not columns:
-            return pd.DataFrame(), step
-
-        headers = [col.get('headerName', col.get('field', '')) for col in columns if 'field' in col]
-        fields = [col['field'] for col in columns if 'field' in col]
-
-        data_for_df = []
-        for row in rows:
-            data_for_df.append([row.get(field) for field in fields])
+    async def export_step(self, db: AsyncSession, step_id: str, file_format: str = "csv") -> tuple[bytes, Step]:
+        """Serialize a step's result rows as CSV or XLSX bytes."""
+        step = await self.get_step_by_id(db, step_id)
+        if not step:
+            raise ValueError(f"Step {step_id} not found")
+        if file_format == "xlsx":
+            return step_data_store.export_xlsx(step.data), step
+        return step_data_store.export_csv(step.data), step
 
-        df = pd.DataFrame(data_for_df, columns=headers)
-        return df, step
+    async def get_step_rows(self, db: AsyncSession, step_id: str, offset: int = 0, limit: int = 100, columns: list[str] | None = None, sort: str | None = None, descending: bool = False) -> dict:
+        """A page of a step's result rows, projected to ``columns`` and ordered by ``sort`` when given."""
+        result = await db.execute(select(Step).filter(Step.id == step_id))
+        step = result.scalar_one_or_none()
+        if not step:
+            raise ValueError(f"Step {step_id} not found")
+        return step_data_store.read_rows(step.data, offset=offset, limit=limit, columns=columns, sort=sort, descending=descending)
 
     async def create_step(self, db: AsyncSession, widget_id: str, completion_id: str) -> StepSchema:
 
@@ -132,7 +131,9 @@ class StepService:
         code_execution_manager = CodeExecutionManager()
         code = step.code
         
-        df, output_log, _ = code_execution_manager.execute_code(code=code, db_clients=db_clients, excel_files=excel_files)
+        df, output_log, _ = await code_execution_manager.execute_code_async(
+            code=code, db_clients=db_clients, excel_files=excel_files, organization_id=report.organization_id
+        )
         df = code_execution_manager.format_df_for_widget(df)
         
         # Update existing step instead of creating new one
@@ -0,0 +1,216 @@
+"""Table co-usage index backing the console joins heatmap.
+
+Table pairs are extracted from a step's ``data_model`` once, when the step is
+written, and folded into ``table_co_usage`` as per-org/day deltas. The
+functions here take a plain (sync) ``Connection`` because they run inside the
+``Step`` mapper events, during the flush.
+"""
+
+import json
+import re
+import sqlite3
+import uuid
+from datetime import datetime, date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+
+from app.models.table_co_usage import TableCoUsage
+from app.models.widget import Widget
+from app.models.report import Report
+from app.settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+Pair = Tuple[str, str]
+
+# ON CONFLICT targets; must match the partial unique indexes on TableCoUsage
+PAIR_INDEX_COLUMNS = ("org_id", "day", "table1", "table2")
+PAIR_INDEX_WHERE = text("table1 IS NOT NULL")
+QUERIES_INDEX_COLUMNS = ("org_id", "day")
+QUERIES_INDEX_WHERE = text("table1 IS NULL")
+UPSERT_CHUNK_ROWS = 500
+
+
+def parse_table_from_source(source: str) -> Optional[str]:
+    """Parse table name from source string like 'dvdrental.customer.first_name' or 'customer.first_name'"""
+    if not source:
+        return None
+
+    # Handle function calls like 'SUM(dvdrental.payment.amount)'
+    # Extract table reference from within functions
+    if '(' in source and ')' in source:
+        match = re.search(r'\((.*?)\)', source)
+        if match:
+            source = match.group(1)
+
+    parts = source.split('.')
+
+    if len(parts) >= 3:  # database.table.column
+        return f"{parts[0]}.{parts[1]}"
+    elif len(parts) == 2:  # table.column
+        return parts[0]
+    else:
+        return None
+
+
+def extract_tables_from_data_model(data_model: Any) -> Set[str]:
+    """Extract unique table names from a data model (dict or JSON string)."""
+    if not data_model:
+        return set()
+    if isinstance(data_model, str):
+        try:
+            data_model = json.loads(data_model)
+        except json.JSONDecodeError:
+            return set()
+    if not isinstance(data_model, dict):
+        return set()
+
+    tables = set()
+    for column in data_model.get('columns') or []:
+        if not isinstance(column, dict):
+            continue
+        table = parse_table_from_source(column.get('source', ''))
+        if table:
+            tables.add(table)
+    return tables
+
+
+def table_pairs(data_model: Any) -> Set[Pair]:
+    """Sorted table pairs used together by a data model (empty for single-table queries)."""
+    tables = sorted(extract_tables_from_data_model(data_model))
+    return {
+        (table1, table2)
+        for i, table1 in enumerate(tables)
+        for table2 in tables[i + 1:]
+    }
+
+
+def co_usage_deltas(old_data_model: Any, new_data_model: Any) -> Dict[Optional[Pair], int]:
+    """Count changes between two versions of a step's data model.
+
+    The ``None`` key is the multi-table query counter.
+    """
+    old_pairs = table_pairs(old_data_model)
+    new_pairs = table_pairs(new_data_model)
+    deltas: Dict[Optional[Pair], int] = {}
+    for pair in new_pairs - old_pairs:
+        deltas[pair] = 1
+    for pair in old_pairs - new_pairs:
+        deltas[pair] = -1
+    query_delta = int(bool(new_pairs)) - int(bool(old_pairs))
+    if query_delta:
+        deltas[None] = query_delta
+    return deltas
+
+
+def _supports_upsert(dialect_name: str) -> bool:
+    if dialect_name == "postgresql":
+        return True
+    return dialect_name == "sqlite" and sqlite3.sqlite_version_info >= (3, 24, 0)
+
+
+def _upsert_statement(dialect_name: str, rows: List[Dict[str, Any]], index_elements, index_where):
+    table = TableCoUsage.__table__
+    stmt = (pg_insert if dialect_name == "postgresql" else sqlite_insert)(table).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=list(index_elements),
+        index_where=index_where,
+        set_={
+            "join_count": table.c.join_count + stmt.excluded.join_count,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def _update_then_insert(connection: Connection, row: Dict[str, Any]) -> None:
+    table = TableCoUsage.__table__
+    result = connection.execute(
+        update(table)
+        .where(
+            table.c.org_id == row["org_id"],
+            table.c.day == row["day"],
+            table.c.table1.is_not_distinct_from(row["table1"]),
+            table.c.table2.is_not_distinct_from(row["table2"]),
+        )
+        .values(join_count=table.c.join_count + row["join_count"], updated_at=row["updated_at"])
+    )
+    if result.rowcount == 0 and row["join_count"] > 0:
+        connection.execute(insert(table).values(**row))
+
+
+def apply_co_usage_deltas(
+    connection: Connection,
+    org_id: str,
+    day: date,
+    deltas: Dict[Optional[Pair], int],
+) -> None:
+    """Fold ``deltas`` into the org/day rows, inserting rows on first use.
+
+    Increments are written with ``INSERT ... ON CONFLICT DO UPDATE`` against
+    the partial unique indexes (``ux_tcousage_pair`` / ``ux_tcousage_queries``),
+    so racing flushes add to the same row. Decrements only update existing
+    rows. Dialects without a usable upsert fall back to UPDATE-then-INSERT.
+    """
+    dialect_name = connection.dialect.name
+    now = datetime.utcnow()
+    pair_rows: List[Dict[str, Any]] = []
+    query_rows: List[Dict[str, Any]] = []
+    for pair, delta in deltas.items():
+        table1, table2 = pair if pair is not None else (None, None)
+        row = {
+            "id": str(uuid.uuid4()),
+            "org_id": org_id,
+            "day": day,
+            "table1": table1,
+            "table2": table2,
+            "join_count": delta,
+            "created_at": now,
+            "updated_at": now,
+        }
+        if delta < 0 or not _supports_upsert(dialect_name):
+            _update_then_insert(connection, row)
+        elif pair is None:
+            query_rows.append(row)
+        else:
+            pair_rows.append(row)
+
+    for i in range(0, len(pair_rows), UPSERT_CHUNK_ROWS):
+        connection.execute(
+            _upsert_statement(dialect_name, pair_rows[i:i + UPSERT_CHUNK_ROWS], PAIR_INDEX_COLUMNS, PAIR_INDEX_WHERE)
+        )
+    if query_rows:
+        connection.execute(_upsert_statement(dialect_name, query_rows, QUERIES_INDEX_COLUMNS, QUERIES_INDEX_WHERE))
+
+
+def record_step_co_usage(connection: Connection, step, old_data_model: Any, new_data_model: Any) -> None:
+    """Update the co-usage index for a step whose data model changed."""
+    deltas = co_usage_deltas(old_data_model, new_data_model)
+    if not deltas:
+        return
+    org_id = connection.execute(
+        select(Report.organization_id)
+        .join(Widget, Widget.report_id == Report.id)
+        .where(Widget.id == step.widget_id)
+    ).scalar()
+    if not org_id:
+        return
+    day = (step.created_at or datetime.utcnow()).date()
+    apply_co_usage_deltas(connection, str(org_id), day, deltas)
+
+
+def rows_for_steps(steps: Iterable[Tuple[str, Any, Any]]) -> Dict[Tuple[str, date, Optional[Pair]], int]:
+    """Aggregate (org_id, created_at, data_model) tuples into index rows (used for backfills)."""
+    counts: Dict[Tuple[str, date, Optional[Pair]], int] = {}
+    for org_id, created_at, data_model in steps:
+        if not org_id or created_at is None:
+            continue
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        day = created_at.date()
+        for key, delta in co_usage_deltas(None, data_model).items():
+            counts[(str(org_id), day, key)] = counts.get((str(org_id), day, key), 0) + delta
+    return counts
@@ -0,0 +1,400 @@
+"""In-process buffer for table usage/feedback events and their ``TableStats`` deltas.
+
+Recording a usage event used to commit the event and then run SELECT → mutate
+→ commit → refresh on ``TableStats`` twice, per table, inside the agent's tool
+call; concurrent agents touching the same table could also lose increments.
+Events are now appended to a per-worker buffer, their stat deltas are folded
+per (org, data source, table) in memory, and a scheduler job writes each batch:
+stats with a single ``INSERT ... ON CONFLICT DO UPDATE`` that increments
+counters in the database, and events with a bulk INSERT in a separate
+transaction. Dialects without a usable upsert (SQLite < 3.24, others) fall
+back to UPDATE-then-INSERT per row.
+
+Events reference steps, reports and feedback that may be deleted before the
+batch is written. When the bulk insert hits an integrity error, the events are
+inserted one by one under SAVEPOINTs and only the failing rows are dropped, so
+one stale event cannot make every retry of the batch (and the stats of every
+org) fail.
+
+Org-level rollups (``report_id IS NULL``) are made unique by the partial index
+``ux_tabstats_rollup``; ``compact_table_stats`` merges any duplicates that
+predate it or that the index cannot see (NULL ``data_source_id``).
+"""
+
+import asyncio
+import logging
+import sqlite3
+import uuid
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, text, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.models.table_feedback_event import TableFeedbackEvent
+from app.models.table_stats import TableStats
+from app.models.table_usage_event import TableUsageEvent
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_PENDING = 2000
+DEFAULT_MAX_FAILED_FLUSHES = 3
+UPSERT_CHUNK_ROWS = 500  # keeps multi-row VALUES under driver/SQLite bind-parameter limits
+
+StatsKey = Tuple[str, str, str]  # (org_id, data_source_id, table_fqn)
+
+ROLLUP_INDEX_COLUMNS = ("org_id", "data_source_id", "table_fqn")
+ROLLUP_INDEX_WHERE = text("report_id IS NULL")
+
+
+@dataclass
+class StatsDelta:
+    """Pending increments for one org-level ``TableStats`` row; field names match its columns."""
+    usage_count: int = 0
+    success_count: int = 0
+    weighted_usage_count: float = 0.0
+    pos_feedback_count: int = 0
+    neg_feedback_count: int = 0
+    weighted_pos_feedback: float = 0.0
+    weighted_neg_feedback: float = 0.0
+    unique_users: int = 0
+    trusted_usage_count: int = 0
+    failure_count: int = 0
+    last_used_at: Optional[datetime] = None
+    last_feedback_at: Optional[datetime] = None
+    datasource_table_id: Optional[str] = None
+
+    def merge(self, other: "StatsDelta") -> None:
+        for name in COUNTER_COLUMNS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in TIMESTAMP_COLUMNS:
+            mine, theirs = getattr(self, name), getattr(other, name)
+            if theirs is not None and (mine is None or theirs > mine):
+                setattr(self, name, theirs)
+        self.datasource_table_id = self.datasource_table_id or other.datasource_table_id
+
+
+COUNTER_COLUMNS = tuple(
+    f.name for f in fields(StatsDelta)
+    if f.name not in ("last_used_at", "last_feedback_at", "datasource_table_id")
+)
+TIMESTAMP_COLUMNS = ("last_used_at", "last_feedback_at")
+
+
+def _stats_rows(stats: Dict[StatsKey, StatsDelta], now: datetime) -> List[Dict[str, Any]]:
+    rows = []
+    for (org_id, data_source_id, table_fqn), delta in stats.items():
+        row = {name: getattr(delta, name) for name in COUNTER_COLUMNS + TIMESTAMP_COLUMNS}
+        row.update(
+            id=str(uuid.uuid4()),
+            org_id=org_id,
+            report_id=None,
+            data_source_id=data_source_id,
+            table_fqn=table_fqn,
+            datasource_table_id=delta.datasource_table_id,
+            created_at=now,
+            updated_at=now,
+            updated_at_stats=now,
+        )
+        rows.append(row)
+    return rows
+
+
+def _supports_upsert(dialect_name: str) -> bool:
+    if dialect_name == "postgresql":
+        return True
+    return dialect_name == "sqlite" and sqlite3.sqlite_version_info >= (3, 24, 0)
+
+
+def _upsert_statement(dialect_name: str, rows: List[Dict[str, Any]]):
+    table = TableStats.__table__
+    stmt = (pg_insert if dialect_name == "postgresql" else sqlite_insert)(table).values(rows)
+    excluded = stmt.excluded
+    set_ = {name: table.c[name] + excluded[name] for name in COUNTER_COLUMNS}
+    for name in TIMESTAMP_COLUMNS:
+        set_[name] = func.coalesce(excluded[name], table.c[name])
+    set_["datasource_table_id"] = func.coalesce(table.c.datasource_table_id, excluded.datasource_table_id)
+    set_["updated_at_stats"] = excluded.updated_at_stats
+    set_["updated_at"] = excluded.updated_at
+    return stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_INDEX_COLUMNS),
+        index_where=ROLLUP_INDEX_WHERE,
+        set_=set_,
+    )
+
+
+async def _update_then_insert(session, rows: List[Dict[str, Any]]) -> None:
+    table = TableStats.__table__
+    for row in rows:
+        values = {name: table.c[name] + row[name] for name in COUNTER_COLUMNS}
+        for name in TIMESTAMP_COLUMNS:
+            if row[name] is not None:
+                values[name] = row[name]
+        values["datasource_table_id"] = func.coalesce(table.c.datasource_table_id, row["datasource_table_id"])
+        values["updated_at_stats"] = row["updated_at_stats"]
+        values["updated_at"] = row["updated_at"]
+        result = await session.execute(
+            update(table)
+            .where(
+                table.c.org_id == row["org_id"],
+                table.c.report_id.is_(None),
+                table.c.data_source_id == row["data_source_id"],
+                table.c.table_fqn == row["table_fqn"],
+            )
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            await session.execute(insert(table).values(**row))
+
+
+async def upsert_table_stats(session, stats: Dict[StatsKey, StatsDelta]) -> None:
+    """Add ``stats`` to the org-level ``TableStats`` rows, creating rows on first use."""
+    if not stats:
+        return
+    rows = _stats_rows(stats, datetime.utcnow())
+    dialect_name = session.bind.dialect.name
+    if _supports_upsert(dialect_name):
+        for i in range(0, len(rows), UPSERT_CHUNK_ROWS):
+            await session.execute(_upsert_statement(dialect_name, rows[i:i + UPSERT_CHUNK_ROWS]))
+    else:
+        await _update_then_insert(session, rows)
+
+
+def _insert_events_statement(table, dialect_name: str):
+    """Bulk INSERT that skips rows violating a unique constraint where the dialect allows it."""
+    if dialect_name == "postgresql":
+        return pg_insert(table).on_conflict_do_nothing()
+    if _supports_upsert(dialect_name):
+        return sqlite_insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+async def insert_events(session, batches: List[Tuple[Any, List[Dict[str, Any]]]]) -> int:
+    """Insert ``(table, rows)`` batches; returns how many rows were dropped.
+
+    Rows that violate a constraint ``ON CONFLICT DO NOTHING`` does not cover
+    (e.g. a foreign key to a deleted step) are skipped, the rest are kept.
+    """
+    dialect_name = session.bind.dialect.name
+    try:
+        async with session.begin_nested():
+            for table, rows in batches:
+                if rows:
+                    await session.execute(_insert_events_statement(table, dialect_name), rows)
+        return 0
+    except IntegrityError:
+        pass
+
+    dropped = 0
+    for table, rows in batches:
+        stmt = _insert_events_statement(table, dialect_name)
+        for row in rows:
+            try:
+                async with session.begin_nested():
+                    await session.execute(stmt, [row])
+            except IntegrityError as e:
+                dropped += 1
+                logger.debug(f"Dropping {table.name} row {row.get('id')}: {e.orig}")
+    if dropped:
+        logger.warning(f"Dropped {dropped} table usage/feedback events that violate constraints (deleted step, report or feedback)")
+    return dropped
+
+
+class TableStatsBuffer:
+    """Per-worker buffer of pending events and stat deltas.
+
+    Everything runs on the event loop; a flush swaps the buffers out before
+    its first await, so records added meanwhile go to the next batch.
+    """
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING, max_failed_flushes: int = DEFAULT_MAX_FAILED_FLUSHES):
+        self.max_pending = max_pending
+        self.max_failed_flushes = max_failed_flushes
+        self._usage_events: List[Dict[str, Any]] = []
+        self._feedback_events: List[Dict[str, Any]] = []
+        self._stats: Dict[StatsKey, StatsDelta] = {}
+        self._failed_flushes = 0
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def configure(self, max_pending: Optional[int] = None, **_ignored) -> None:
+        if max_pending is not None:
+            self.max_pending = max_pending
+
+    def add_usage(self, event: Dict[str, Any], key: StatsKey, delta: StatsDelta) -> None:
+        self._usage_events.append(event)
+        self._add_delta(key, delta)
+
+    def add_feedback(self, event: Dict[str, Any], key: StatsKey, delta: StatsDelta) -> None:
+        self._feedback_events.append(event)
+        self._add_delta(key, delta)
+
+    def pending(self) -> int:
+        return len(self._usage_events) + len(self._feedback_events)
+
+    def _add_delta(self, key: StatsKey, delta: StatsDelta) -> None:
+        current = self._stats.get(key)
+        if current is None:
+            self._stats[key] = delta
+        else:
+            current.merge(delta)
+        if self.pending() >= self.max_pending:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_task = loop.create_task(self.flush())
+
+    def _take(self):
+        batch = (self._usage_events, self._feedback_events, self._stats)
+        self._usage_events, self._feedback_events, self._stats = [], [], {}
+        return batch
+
+    def _restore(self, usage_events, feedback_events, stats) -> None:
+        self._usage_events[:0] = usage_events
+        self._feedback_events[:0] = feedback_events
+        for key, delta in stats.items():
+            current = self._stats.get(key)
+            if current is None:
+                self._stats[key] = delta
+            else:
+                current.merge(delta)
+
+    async def flush(self, session_maker=None) -> int:
+        """Write buffered stat deltas, then events, in separate transactions; returns the number of events written."""
+        usage_events, feedback_events, stats = self._take()
+        if not usage_events and not feedback_events and not stats:
+            return 0
+
+        if session_maker is None:
+            from app.dependencies import async_session_maker as session_maker
+
+        errors = []
+        failed_stats: Dict[StatsKey, StatsDelta] = {}
+        if stats:
+            try:
+                async with session_maker() as session:
+                    await upsert_table_stats(session, stats)
+                    await session.commit()
+            except Exception as e:
+                errors.append(e)
+                failed_stats = stats
+
+        written = 0
+        failed_events = False
+        if usage_events or feedback_events:
+            try:
+                async with session_maker() as session:
+                    dropped = await insert_events(session, [
+                        (TableUsageEvent.__table__, usage_events),
+                        (TableFeedbackEvent.__table__, feedback_events),
+                    ])
+                    await session.commit()
+                written = len(usage_events) + len(feedback_events) - dropped
+            except Exception as e:
+                errors.append(e)
+                failed_events = True
+
+        if errors:
+            self._failed_flushes += 1
+            if self._failed_flushes >= self.max_failed_flushes:
+                logger.error(
+                    f"Dropping {len(usage_events) + len(feedback_events) if failed_events else 0} table usage events "
+                    f"and {len(failed_stats)} stats deltas after {self._failed_flushes} failed flushes: {errors[0]}"
+                )
+                self._failed_flushes = 0
+            else:
+                logger.warning(f"Failed to flush table usage events, will retry: {errors[0]}")
+                self._restore(
+                    usage_events if failed_events else [],
+                    feedback_events if failed_events else [],
+                    failed_stats,
+                )
+        else:
+            self._failed_flushes = 0
+
+        if stats and not failed_stats:
+            from app.ai.context.builders.schema_snapshot_cache import schema_snapshot_cache
+            for data_source_id in {key[1] for key in stats}:
+                schema_snapshot_cache.invalidate(str(data_source_id), schema=False)
+        return written
+
+
+table_stats_buffer = TableStatsBuffer()
+
+
+async def flush_table_stats() -> int:
+    """Scheduler job: write this worker's buffered usage and feedback events and table stats to the database."""
+    return await table_stats_buffer.flush()
+
+
+def merge_duplicate_stats_rows(rows: List[Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Fold duplicate rollup rows into the oldest one.
+
+    Returns the column values to write to the kept row and the ids to delete.
+    """
+    rows = sorted(rows, key=lambda r: (r.created_at or datetime.min, r.id))
+    keep, extras = rows[0], rows[1:]
+    merged = {name: getattr(keep, name) or 0 for name in COUNTER_COLUMNS}
+    latest = {name: getattr(keep, name) for name in TIMESTAMP_COLUMNS}
+    datasource_table_id = keep.datasource_table_id
+    for row in extras:
+        for name in COUNTER_COLUMNS:
+            merged[name] += getattr(row, name) or 0
+        for name in TIMESTAMP_COLUMNS:
+            value = getattr(row, name)
+            if value is not None and (latest[name] is None or value > latest[name]):
+                latest[name] = value
+        datasource_table_id = datasource_table_id or row.datasource_table_id
+    merged.update(latest)
+    merged["datasource_table_id"] = datasource_table_id
+    return {"id": keep.id, **merged}, [row.id for row in extras]
+
+
+async def compact_table_stats(session_maker=None) -> int:
+    """Merge duplicate org-level ``TableStats`` rows; returns the number of rows removed.
+
+    Scheduler entrypoint. Duplicates can only come from rows written before
+    ``ux_tabstats_rollup`` existed or rows with a NULL ``data_source_id``,
+    which a unique index treats as distinct.
+    """
+    if session_maker is None:
+        from app.dependencies import async_session_maker as session_maker
+
+    table = TableStats.__table__
+    removed = 0
+    async with session_maker() as session:
+        dupes = await session.execute(
+            select(table.c.org_id, table.c.data_source_id, table.c.table_fqn)
+            .where(table.c.report_id.is_(None))
+            .group_by(table.c.org_id, table.c.data_source_id, table.c.table_fqn)
+            .having(func.count() > 1)
+        )
+        for org_id, data_source_id, table_fqn in dupes.all():
+            result = await session.execute(
+                select(table).where(
+                    table.c.org_id == org_id,
+                    table.c.report_id.is_(None),
+                    table.c.data_source_id.is_not_distinct_from(data_source_id),
+                    table.c.table_fqn == table_fqn,
+                )
+            )
+            values, extra_ids = merge_duplicate_stats_rows(result.all())
+            keep_id = values.pop("id")
+            await session.execute(delete(table).where(table.c.id.in_(extra_ids)))
+            await session.execute(
+                update(table).where(table.c.id == keep_id).values(**values, updated_at_stats=datetime.utcnow())
+            )
+            removed += len(extra_ids)
+        await session.commit()
+    if removed:
+        logger.info(f"Compacted {removed} duplicate table_stats rows")
+    return removed
@@ -1,11 +1,10 @@
-from typing import Optional, List
+import uuid
+from typing import Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
+from sqlalchemy import select
 
-from app.models.table_usage_event import TableUsageEvent
-from app.models.table_feedback_event import TableFeedbackEvent
-from app.models.table_stats import TableStats
+from app.services.table_stats_buffer import StatsDelta, table_stats_buffer
 from app.models.data_source import DataSource
 from app.models.data_source_membership import DataSourceMembership, PRINCIPAL_TYPE_USER
 from app.schemas.table_usage_schema import (
@@ -13,8 +12,6 @@ from app.schemas.table_usage_schema import (
     TableUsageEventSchema,
     TableFeedbackEventCreate,
     TableFeedbackEventSchema,
-    TableStatsUpsert,
-    TableStatsSchema,
 )
 
 
@@ -29,6 +26,7 @@ class TableUsageService:
         }
 
     async def record_usage_event(self, db: AsyncSession, payload: TableUsageEventCreate) -> TableUsageEventSchema:
+        """Queue a usage event and its org-level stat deltas for the next batched flush."""
         # Guard: ensure data_source exists within org and user can access
         if not await self._validate_data_source_access(db, payload.org_id, payload.data_source_id, payload.user_id):
             return None  # silently skip emission if DS invalid/inaccessible
@@ -37,76 +35,27 @@ class TableUsageService:
         if role_weight is None and payload.user_role:
             role_weight = self.role_weights.get(payload.user_role.lower(), 1.0)
 
-        event = TableUsageEvent(
-            org_id=payload.org_id,
-            report_id=payload.report_id,
-            data_source_id=payload.data_source_id,
-            step_id=payload.step_id,
-            user_id=payload.user_id,
-            table_fqn=payload.table_fqn,
-            datasource_table_id=payload.datasource_table_id,
-            source_type=payload.source_type,
-            columns=payload.columns,
-            success=payload.success,
-            user_role=payload.user_role,
-            role_weight=role_weight,
-        )
-
-        db.add(event)
-        try:
-            await db.commit()
-        except Exception:
-            # Unique constraint might trip if called twice; ignore duplicates
-            await db.rollback()
-
-        # Upsert aggregate only at org-level (report_id None)
-        await self._upsert_stats(
-            db=db,
-            up=TableStatsUpsert(
-                org_id=payload.org_id,
-                report_id=None,
-                data_source_id=payload.data_source_id,
-                table_fqn=payload.table_fqn,
-                datasource_table_id=payload.datasource_table_id,
-                usage_count_delta=1,
-            ),
-        )
+        now = datetime.utcnow()
+        event = payload.dict()
+        event.update(id=str(uuid.uuid4()), role_weight=role_weight, used_at=now, created_at=now, updated_at=now)
 
+        # Aggregate only at org-level (report_id None); failures count as attempts but not usage weight
+        delta = StatsDelta(usage_count=1, datasource_table_id=payload.datasource_table_id)
         if payload.success:
-            trusted_flag = (payload.user_role and payload.user_role.lower() in ("admin", "trusted"))
-            await self._upsert_stats(
-                db=db,
-                up=TableStatsUpsert(
-                    org_id=payload.org_id,
-                    report_id=None,
-                    data_source_id=payload.data_source_id,
-                    table_fqn=payload.table_fqn,
-                    datasource_table_id=payload.datasource_table_id,
-                    success_count_delta=1,
-                    weighted_usage_delta=role_weight or 1.0,
-                    unique_user_delta=1 if payload.user_id else 0,
-                    admin_usage_delta=1 if trusted_flag else 0,
-                    last_used_at=datetime.utcnow(),
-                ),
-            )
+            trusted_flag = bool(payload.user_role and payload.user_role.lower() in ("admin", "trusted"))
+            delta.success_count = 1
+            delta.weighted_usage_count = role_weight or 1.0
+            delta.unique_users = 1 if payload.user_id else 0
+            delta.trusted_usage_count = 1 if trusted_flag else 0
+            delta.last_used_at = now
         else:
-            # Record failure attempts to stats (do not increment usage)
-            await self._upsert_stats(
-                db=db,
-                up=TableStatsUpsert(
-                    org_id=payload.org_id,
-                    report_id=None,
-                    data_source_id=payload.data_source_id,
-                    table_fqn=payload.table_fqn,
-                    datasource_table_id=payload.datasource_table_id,
-                    failure_delta=1,
-                ),
-            )
+            delta.failure_count = 1
 
-        await db.refresh(event)
-        return TableUsageEventSchema.from_orm(event)
+        table_stats_buffer.add_usage(event, (payload.org_id, payload.data_source_id, payload.table_fqn), delta)
+        return TableUsageEventSchema(**event)
 
     async def record_feedback_event(self, db: AsyncSession, payload: TableFeedbackEventCreate, *, user_role: Optional[str] = None, role_weight: Optional[float] = None) -> TableFeedbackEventSchema:
+        """Queue a feedback event and its org-level stat deltas for the next batched flush."""
         # Guard: ensure data_source exists within org and user can access
         if not await self._validate_data_source_access(db, payload.org_id, payload.data_source_id, None):
             return None
@@ -116,98 +65,23 @@ class TableUsageService:
         if w is None and user_role:
             w = self.role_weights.get(user_role.lower(), 1.0)
 
-        event = TableFeedbackEvent(
-            org_id=payload.org_id,
-            report_id=payload.report_id,
-            data_source_id=payload.data_source_id,
-            step_id=payload.step_id,
-            completion_feedback_id=payload.completion_feedback_id,
-            table_fqn=payload.table_fqn,
-            datasource_table_id=payload.datasource_table_id,
-            feedback_type=payload.feedback_type,
-        )
-        db.add(event)
-        await db.commit()
-        await db.refresh(event)
+        now = datetime.utcnow()
+        event = payload.dict()
+        event.update(id=str(uuid.uuid4()), created_at_event=now, created_at=now, updated_at=now)
 
-        # Update stats for both scopes
         pos_delta = 1 if payload.feedback_type == "positive" else 0
         neg_delta = 1 if payload.feedback_type == "negative" else 0
-        weighted_pos = (w or 1.0) if pos_delta else 0.0
-        weighted_neg = (w or 1.0) if neg_delta else 0.0
-
-        await self._upsert_stats(
-            db=db,
-            up=TableStatsUpsert(
-                org_id=payload.org_id,
-                report_id=None,
-                data_source_id=payload.data_source_id,
-                table_fqn=payload.table_fqn,
-                datasource_table_id=payload.datasource_table_id,
-                pos_feedback_delta=pos_delta,
-                neg_feedback_delta=neg_delta,
-                weighted_pos_delta=weighted_pos,
-                weighted_neg_delta=weighted_neg,
-                last_feedback_at=datetime.utcnow(),
-            ),
-        )
-
-        return TableFeedbackEventSchema.from_orm(event)
-
-    async def _upsert_stats(self, db: AsyncSession, up: TableStatsUpsert) -> TableStatsSchema:
-        # Try select first
-        stmt = select(TableStats).where(
-            TableStats.org_id == up.org_id,
-            TableStats.report_id == up.report_id,
-            TableStats.data_source_id == up.data_source_id,
-            TableStats.table_fqn == up.table_fqn,
+        delta = StatsDelta(
+            pos_feedback_count=pos_delta,
+            neg_feedback_count=neg_delta,
+            weighted_pos_feedback=(w or 1.0) if pos_delta else 0.0,
+            weighted_neg_feedback=(w or 1.0) if neg_delta else 0.0,
+            last_feedback_at=now,
+            datasource_table_id=payload.datasource_table_id,
         )
-        res = await db.execute(stmt)
-        row: TableStats = res.scalar_one_or_none()
-
-        if row is None:
-            row = TableStats(
-                org_id=up.org_id,
-                report_id=up.report_id,
-                data_source_id=up.data_source_id,
-                table_fqn=up.table_fqn,
-                datasource_table_id=up.datasource_table_id,
-                usage_count=max(0, up.usage_count_delta),
-                success_count=max(0, getattr(up, 'success_count_delta', 0)),
-                weighted_usage_count=max(0.0, up.weighted_usage_delta),
-                pos_feedback_count=max(0, up.pos_feedback_delta),
-                neg_feedback_count=max(0, up.neg_feedback_delta),
-                weighted_pos_feedback=max(0.0, up.weighted_pos_delta),
-                weighted_neg_feedback=max(0.0, up.weighted_neg_delta),
-                unique_users=max(0, up.unique_user_delta),
-                trusted_usage_count=max(0, up.admin_usage_delta),
-                failure_count=max(0, up.failure_delta),
-                last_used_at=up.last_used_at,
-                last_feedback_at=up.last_feedback_at,
-                updated_at_stats=datetime.utcnow(),
-            )
-            db.add(row)
-        else:
-            # Incremental updates
-            row.datasource_table_id = row.datasource_table_id or up.datasource_table_id
-            row.data_source_id = row.data_source_id or up.data_source_id
-            row.usage_count = row.usage_count + up.usage_count_delta
-            row.success_count = row.success_count + getattr(up, 'success_count_delta', 0)
-            row.weighted_usage_count = row.weighted_usage_count + up.weighted_usage_delta
-            row.pos_feedback_count = row.pos_feedback_count + up.pos_feedback_delta
-            row.neg_feedback_count = row.neg_feedback_count + up.neg_feedback_delta
-            row.weighted_pos_feedback = row.weighted_pos_feedback + up.weighted_pos_delta
-            row.weighted_neg_feedback = row.weighted_neg_feedback + up.weighted_neg_delta
-            row.unique_users = row.unique_users + up.unique_user_delta
-            row.trusted_usage_count = row.trusted_usage_count + up.admin_usage_delta
-            row.failure_count = row.failure_count + up.failure_delta
-            row.last_used_at = up.last_used_at or row.last_used_at
-            row.last_feedback_at = up.last_feedback_at or row.last_feedback_at
-            row.updated_at_stats = datetime.utcnow()
 
-        await db.commit()
-        await db.refresh(row)
-        return TableStatsSchema.from_orm(row)
+        table_stats_buffer.add_feedback(event, (payload.org_id, payload.data_source_id, payload.table_fqn), delta)
+        return TableFeedbackEventSchema(**event)
 
     async def _validate_data_source_access(self, db: AsyncSession, org_id: str, data_source_id: Optional[str], user_id: Optional[str]) -> bool:
         if not data_source_id:
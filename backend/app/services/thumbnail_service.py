@@ -4,18 +4,74 @@ import asyncio
 import json
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 
 from app.services.artifact_libs import get_inline_scripts
+from app.services.browser_pool import BrowserPoolUnavailable, browser_pool
+from app.services.step_data_store import step_data_store
 
 logger = logging.getLogger(__name__)
 
 
+# Prefer the page's own render-complete flag; HTML that predates it falls back
+# to "React mounted and no spinner visible".
+THUMBNAIL_READY_EXPRESSION = """
+() => {
+    if (typeof window.__ARTIFACT_RENDER_COMPLETE__ !== 'undefined') {
+        return window.__ARTIFACT_RENDER_COMPLETE__ === true;
+    }
+    const root = document.getElementById('root');
+    if (!root || root.children.length === 0) return false;
+    const spinners = root.querySelectorAll('svg animateTransform');
+    for (let i = 0; i < spinners.length; i++) {
+        const svg = spinners[i].closest('svg');
+        if (svg && svg.offsetWidth > 0 && svg.offsetHeight > 0) return false;
+    }
+    return true;
+}
+"""
+
+# Sets window.__ARTIFACT_RENDER_COMPLETE__ once the artifact has mounted, its
+# spinners are gone and (if it draws charts) their entry animations have run.
+RENDER_COMPLETE_SCRIPT = """
+  <script>
+    (function detectRenderComplete() {
+      var startTime = Date.now();
+      var MAX_WAIT = 15000;
+      function check() {
+        if (Date.now() - startTime > MAX_WAIT) {
+          window.__ARTIFACT_RENDER_COMPLETE__ = true;
+          return;
+        }
+        var root = document.getElementById('root') || document.body;
+        if (!root || root.children.length === 0) {
+          setTimeout(check, 200);
+          return;
+        }
+        var spinners = root.querySelectorAll('svg animateTransform');
+        for (var i = 0; i < spinners.length; i++) {
+          var svg = spinners[i].closest('svg');
+          if (svg && svg.offsetWidth > 0 && svg.offsetHeight > 0) {
+            setTimeout(check, 200);
+            return;
+          }
+        }
+        var hasCharts = root.querySelectorAll('canvas').length > 0;
+        setTimeout(function() {
+          window.__ARTIFACT_RENDER_COMPLETE__ = true;
+        }, hasCharts ? 1500 : 300);
+      }
+      setTimeout(check, 200);
+    })();
+  </script>"""
+
+
 class ThumbnailService:
     """Service for generating thumbnail screenshots of artifacts using Playwright."""
 
     THUMBNAIL_WIDTH = 400
     THUMBNAIL_HEIGHT = 300
+    VIEWPORT = {"width": 1280, "height": 720}
     UPLOADS_DIR = Path(__file__).parent.parent.parent / "uploads" / "thumbnails"
 
     def __init__(self):
@@ -37,73 +93,45 @@ class ThumbnailService:
         Returns:
             Relative path to thumbnail file (e.g. "thumbnails/{id}.png"), or None on failure
         """
-        try:
-            from playwright.async_api import async_playwright
-        except ImportError:
-            logger.warning("Playwright not installed, skipping thumbnail generation")
-            return None
-
         thumbnail_path = self.UPLOADS_DIR / f"{artifact_id}.png"
 
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page(viewport={"width": 1280, "height": 720})
-
-                await page.set_content(html_content, wait_until="networkidle")
-
-                # Wait for React to mount content and loading spinners to disappear
-                try:
-                    await page.wait_for_function("""
-                        () => {
-                            const root = document.getElementById('root');
-                            if (!root || root.children.length === 0) return false;
-                            const spinners = root.querySelectorAll('svg animateTransform');
-                            for (let i = 0; i < spinners.length; i++) {
-                                const svg = spinners[i].closest('svg');
-                                if (svg && svg.offsetWidth > 0 && svg.offsetHeight > 0) return false;
-                            }
-                            return true;
-                        }
-                    """, timeout=15000)
-                except Exception:
-                    pass  # Timeout is acceptable for thumbnails
-
-                # Wait for ECharts animations to complete
-                await asyncio.sleep(2)
-
-                # Take screenshot
-                screenshot_bytes = await page.screenshot(
-                    type="png",
-                    clip={"x": 0, "y": 0, "width": 1280, "height": 720},
-                )
+            screenshot_bytes = await browser_pool.screenshot(
+                html_content,
+                viewport=self.VIEWPORT,
+                ready_expression=THUMBNAIL_READY_EXPRESSION,
+            )
 
-                await browser.close()
+            # Resizing is CPU-bound; keep it off the event loop
+            await asyncio.to_thread(self._save_thumbnail, screenshot_bytes, thumbnail_path)
 
-            # Save and resize using PIL
-            try:
-                from PIL import Image
-                import io
+            return f"thumbnails/{artifact_id}.png"
 
-                # Load screenshot
-                img = Image.open(io.BytesIO(screenshot_bytes))
+        except BrowserPoolUnavailable:
+            logger.warning("Playwright not installed, skipping thumbnail generation")
+            return None
+        except Exception as e:
+            logger.exception(f"Failed to generate thumbnail for artifact {artifact_id}: {e}")
+            return None
 
-                # Resize to thumbnail dimensions while maintaining aspect ratio
-                img.thumbnail((self.THUMBNAIL_WIDTH, self.THUMBNAIL_HEIGHT), Image.Resampling.LANCZOS)
+    def _save_thumbnail(self, screenshot_bytes: bytes, thumbnail_path: Path) -> None:
+        try:
+            from PIL import Image
+            import io
 
-                # Save thumbnail
-                img.save(thumbnail_path, "PNG", optimize=True)
+            # Load screenshot
+            img = Image.open(io.BytesIO(screenshot_bytes))
 
-            except ImportError:
-                # Fallback: save raw screenshot if PIL not available
-                logger.warning("PIL not installed, saving full-size screenshot")
-                thumbnail_path.write_bytes(screenshot_bytes)
+            # Resize to thumbnail dimensions while maintaining aspect ratio
+            img.thumbnail((self.THUMBNAIL_WIDTH, self.THUMBNAIL_HEIGHT), Image.Resampling.LANCZOS)
 
-            return f"thumbnails/{artifact_id}.png"
+            # Save thumbnail
+            img.save(thumbnail_path, "PNG", optimize=True)
 
-        except Exception as e:
-            logger.exception(f"Failed to generate thumbnail for artifact {artifact_id}: {e}")
-            return None
+        except ImportError:
+            # Fallback: save raw screenshot if PIL not available
+            logger.warning("PIL not installed, saving full-size screenshot")
+            thumbnail_path.write_bytes(screenshot_bytes)
 
     def get_thumbnail_path(self, artifact_id: str) -> Optional[Path]:
         """Get the filesystem path to an existing thumbnail.
@@ -147,7 +175,7 @@ class ThumbnailService:
         """Regenerate thumbnail for the latest artifact of a report.
 
         Loads the artifact, visualization data, and rebuilds the HTML for screenshot.
-        Runs in background with its own database session.
+        Runs in background with its own database sessions.
 
         Returns:
             Relative path to the new thumbnail, or None on failure
@@ -210,16 +238,19 @@ class ThumbnailService:
                         )
                         step = step_result.scalar_one_or_none()
 
+                    step_data = step_data_store.hydrate(step.data) if step and step.data else {}
                     viz_data.append({
                         "id": str(viz.id),
                         "title": viz.title or query.title or "Untitled",
                         "view": viz.view or {},
-                        "rows": step.data.get("rows", []) if step and step.data else [],
-                        "columns": step.data.get("columns", []) if step and step.data else [],
+                        "rows": step_data.get("rows", []),
+                        "columns": step_data.get("columns", []),
                         "dataModel": step.data_model or {} if step else {},
                     })
 
                 # Build the HTML
+                artifact_id = str(artifact.id)
+                artifact_mode = artifact.mode or "page"
                 artifact_code = artifact.content.get("code", "")
                 html_content = self._build_thumbnail_html(
                     report_id=str(report.id),
@@ -227,31 +258,71 @@ class ThumbnailService:
                     report_theme=report.theme_name,
                     artifact_code=artifact_code,
                     visualizations=viz_data,
-                    mode=artifact.mode or "page",
+                    mode=artifact_mode,
                 )
 
-                # Delete old thumbnail if exists
-                self.delete_thumbnail(str(artifact.id))
-
-                # Generate new thumbnail
-                thumbnail_path = await self.generate_thumbnail(
-                    artifact_id=str(artifact.id),
-                    html_content=html_content,
-                    mode=artifact.mode or "page",
-                )
-
-                if thumbnail_path:
-                    # Update artifact with new thumbnail path
-                    stmt = update(Artifact).where(Artifact.id == artifact.id).values(thumbnail_path=thumbnail_path)
+            # Render outside the session so a queued screenshot does not hold a connection.
+            # The new file overwrites the old one, which stays in place if rendering fails.
+            thumbnail_path = await self.generate_thumbnail(
+                artifact_id=artifact_id,
+                html_content=html_content,
+                mode=artifact_mode,
+            )
+
+            if thumbnail_path:
+                async with async_session_maker() as db:
+                    stmt = update(Artifact).where(Artifact.id == artifact_id).values(thumbnail_path=thumbnail_path)
                     await db.execute(stmt)
                     await db.commit()
 
-                return thumbnail_path
+            return thumbnail_path
 
         except Exception as e:
             logger.exception(f"Failed to regenerate thumbnail for report {report_id}: {e}")
             return None
 
+    async def regenerate_for_reports(
+        self,
+        report_ids: Iterable[str],
+        concurrency: Optional[int] = None,
+    ) -> Dict[str, Optional[str]]:
+        """Regenerate thumbnails for many reports through the shared browser pool.
+
+        A fixed number of workers feed the pool, so a large batch never
+        overflows its render queue; by default twice the pool's concurrency,
+        which lets HTML for the next reports be loaded while others render.
+
+        Returns:
+            Mapping of report ID to the new thumbnail path (None on failure)
+        """
+        pending = list(dict.fromkeys(str(report_id) for report_id in report_ids))
+        results: Dict[str, Optional[str]] = {}
+        queue = iter(pending)
+
+        async def worker():
+            for report_id in queue:
+                results[report_id] = await self.regenerate_for_report(report_id)
+
+        workers = min(concurrency or browser_pool.max_concurrency * 2, len(pending))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+        failed = sum(1 for path in results.values() if not path)
+        logger.info(f"Regenerated thumbnails for {len(results) - failed}/{len(results)} reports")
+        return results
+
+    async def regenerate_all(self, organization_id: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """Regenerate thumbnails for every report with an artifact, e.g. after upgrading artifact libraries."""
+        from app.dependencies import async_session_maker
+        from app.models.artifact import Artifact
+        from sqlalchemy import select
+
+        stmt = select(Artifact.report_id).where(Artifact.deleted_at.is_(None)).distinct()
+        if organization_id:
+            stmt = stmt.where(Artifact.organization_id == organization_id)
+        async with async_session_maker() as db:
+            report_ids: List[str] = list((await db.execute(stmt)).scalars().all())
+        return await self.regenerate_for_reports(report_ids)
+
     def _build_thumbnail_html(
         self,
         report_id: str,
@@ -283,8 +354,12 @@ class ThumbnailService:
   {slides_scripts}
 </head>
 <body class="bg-slate-900">
-  <script>window.ARTIFACT_DATA = {data_json};</script>
+  <script>
+    window.ARTIFACT_DATA = {data_json};
+    window.__ARTIFACT_RENDER_COMPLETE__ = false;
+  </script>
   {artifact_code}
+  {RENDER_COMPLETE_SCRIPT}
 </body>
 </html>"""
 
@@ -304,35 +379,6 @@ class ThumbnailService:
     window.__ARTIFACT_RENDER_COMPLETE__ = false;
   </script>
   {artifact_code}
-  <script>
-    (function detectRenderComplete() {{
-      var startTime = Date.now();
-      var MAX_WAIT = 15000;
-      function check() {{
-        if (Date.now() - startTime > MAX_WAIT) {{
-          window.__ARTIFACT_RENDER_COMPLETE__ = true;
-          return;
-        }}
-        var root = document.getElementById('root');
-        if (!root || root.children.length === 0) {{
-          setTimeout(check, 200);
-          return;
-        }}
-        var spinners = root.querySelectorAll('svg animateTransform');
-        for (var i = 0; i < spinners.length; i++) {{
-          var svg = spinners[i].closest('svg');
-          if (svg && svg.offsetWidth > 0 && svg.offsetHeight > 0) {{
-            setTimeout(check, 200);
-            return;
-          }}
-        }}
-        var hasCharts = root.querySelectorAll('canvas').length > 0;
-        setTimeout(function() {{
-          window.__ARTIFACT_RENDER_COMPLETE__ = true;
-        }}, hasCharts ? 1500 : 300);
-      }}
-      setTimeout(check, 200);
-    }})();
-  </script>
+  {RENDER_COMPLETE_SCRIPT}
 </body>
 </html>"""
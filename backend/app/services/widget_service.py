@@ -5,6 +5,7 @@ from app.schemas.step_schema import StepSchema
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.step_service import StepService
+from app.services.step_data_store import step_data_store
 from app.models.step import Step
 import uuid
 from fastapi import HTTPException
@@ -142,9 +143,7 @@ class WidgetService:
             logging.info(f"Got last step: {last_step}")
             
             # read the last_step.data[rows] and columns as df
-            columns = last_step.data['columns']
-            rows = last_step.data['rows']
-            df = pd.DataFrame(rows, columns=[col['headerName'] for col in columns])
+            df = step_data_store.to_dataframe(last_step.data)
             
             return df
 
@@ -112,6 +112,109 @@ class Database(BaseModel):
     )
     auth: Optional[DatabaseAuth] = None
 
+class DataSourcePool(BaseModel):
+    """Pooling of SQLAlchemy engines used by SQL data source clients."""
+    max_engines: int = 64
+    pool_size: int = 5
+    max_overflow: int = 5
+    pool_recycle: int = 1800
+    idle_ttl: int = 900
+
+class CodeExecution(BaseModel):
+    """Worker pool running generated code off the event loop."""
+    mode: str = "thread"  # thread | inline
+    max_workers: int = 8
+    per_organization_limit: int = 4
+
+class DuckDBSessions(BaseModel):
+    """Warm DuckDB sessions for file-backed data sources."""
+    max_sessions: int = 16
+    idle_ttl: int = 1800
+    cache_dir: str = "uploads/duckdb_cache"
+
+class QueryCache(BaseModel):
+    """Opt-in Parquet cache of data source query results; connections can override with a ``query_cache`` config."""
+    enabled: bool = False
+    cache_dir: str = "uploads/query_cache"
+    default_ttl: int = 300
+    max_age: int = 86400
+    max_bytes: int = 1024 ** 3
+
+class FetchGuard(BaseModel):
+    """Row/byte budget for each query made by generated code, so one careless query cannot exhaust a worker's memory."""
+    enabled: bool = True
+    max_rows: int = 1_000_000
+    max_bytes: int = 2 * 1024 ** 3
+    batch_size: int = 50_000
+    push_down_limit: bool = True  # append LIMIT to top-level SELECTs on dialects that support it
+
+class StepDataStorage(BaseModel):
+    """Columnar (Parquet) artifacts for large step results; only a preview stays in the database."""
+    enabled: bool = True
+    base_dir: str = "uploads/step_data"
+    inline_rows: int = 100
+    compression: str = "zstd"
+
+class WebSocketPubSub(BaseModel):
+    """Fan-out of report WebSocket broadcasts across workers."""
+    backend: str = "inprocess"  # inprocess (single worker) | postgres (LISTEN/NOTIFY)
+    dsn: Optional[str] = None  # defaults to database.url for the postgres backend
+    channel: str = "metricchat_ws"
+
+class AuthCache(BaseModel):
+    """Per-worker cache of API key and membership lookups; API key last_used_at is written in batches."""
+    enabled: bool = True
+    ttl: int = 30
+    max_entries: int = 10_000
+    last_used_flush_interval: int = 60
+
+class TableStatsPipeline(BaseModel):
+    """Per-worker buffering of table usage/feedback events, flushed to TableStats in batches."""
+    flush_interval: int = 5  # seconds
+    max_pending: int = 2000  # events buffered before an early flush
+
+class BrowserRendering(BaseModel):
+    """Shared headless Chromium for artifact thumbnails and validation screenshots."""
+    max_concurrency: int = 2  # pages rendered at once per worker
+    max_queue: int = 100  # renders allowed to wait for a slot
+    context_max_uses: int = 50  # pages per browser context before it is recycled
+    render_timeout: int = 15  # seconds to wait for the render-complete signal
+    idle_timeout: int = 600  # seconds before an unused browser is closed
+
+class SlidePreviews(BaseModel):
+    """LibreOffice conversion and rasterization of generated slide decks."""
+    converter_mode: str = "auto"  # auto | uno (warm daemon) | subprocess (one-shot soffice)
+    converter_instances: int = 1
+    convert_timeout: int = 60
+    max_jobs_per_instance: int = 200
+    prewarm: bool = False  # start LibreOffice at boot instead of on the first deck
+    raster_workers: int = 4
+    cache_dir: str = "uploads/pptx_previews/_cache"
+    cache_max_bytes: int = 512 * 1024 ** 2
+
+class CompletionStreams(BaseModel):
+    """Resumable per-completion SSE event logs, mirrored to other workers over websocket_pubsub."""
+    max_events: int = 10_000  # ring buffer size per completion
+    retention: int = 300  # seconds a finished stream can still be resumed
+    heartbeat: int = 15  # seconds between keep-alive comments on idle streams
+    coalesce_bytes: int = 16_384  # max merged token text per frame for a client that lags behind; 0 disables
+    token_flush_ms: int = 50  # planner text is emitted at most this often per field...
+    token_flush_chars: int = 200  # ...unless this many characters are pending
+    partial_flush_ms: int = 250  # min interval between decision.partial snapshots
+    relay_channel: str = "metricchat_sse"  # pub/sub channel for log appends (non-inprocess backends)
+    relay_batch: int = 64  # appends relayed per pub/sub message
+
+class PlatformDelivery(BaseModel):
+    """Pooled HTTP clients and per-channel outbound queues for Slack and Teams."""
+    max_connections: int = 20  # per platform
+    max_keepalive_connections: int = 10
+    keepalive_expiry: int = 30  # seconds
+    timeout: int = 30  # seconds; default for calls that do not set their own
+    max_retries: int = 3
+    max_retry_after: int = 60  # cap on a platform's Retry-After, in seconds
+    channel_interval: float = 1.0  # min seconds between posts to the same channel
+    max_queue_per_channel: int = 500  # messages allowed to wait on one channel
+
 def generate_fernet_key():
     # Generate a valid Fernet-compatible key (32 url-safe base64-encoded bytes)
     key = secrets.token_bytes(32)
@@ -136,6 +239,19 @@ class AppConfig(BaseModel):
     intercom: Intercom = Intercom()
     telemetry: Telemetry = Telemetry()
     license: LicenseConfig = LicenseConfig()
+    data_source_pool: DataSourcePool = DataSourcePool()
+    code_execution: CodeExecution = CodeExecution()
+    duckdb_sessions: DuckDBSessions = DuckDBSessions()
+    query_cache: QueryCache = QueryCache()
+    fetch_guard: FetchGuard = FetchGuard()
+    step_data_storage: StepDataStorage = StepDataStorage()
+    websocket_pubsub: WebSocketPubSub = WebSocketPubSub()
+    auth_cache: AuthCache = AuthCache()
+    table_stats: TableStatsPipeline = TableStatsPipeline()
+    browser_rendering: BrowserRendering = BrowserRendering()
+    slide_previews: SlidePreviews = SlidePreviews()
+    completion_streams: CompletionStreams = CompletionStreams()
+    platform_delivery: PlatformDelivery = PlatformDelivery()
 
     @validator('encryption_key')
     def validate_encryption_key(cls, v):
@@ -1,28 +1,372 @@
+"""Per-completion event logs backing the completion SSE streams.
+
+Agent events are appended to a ``CompletionEventQueue`` with monotonically
+increasing ids instead of being handed to a single consumer. Any number of
+subscribers can read the same log, each from its own position, and a client
+whose connection dropped resumes with ``Last-Event-ID``: it receives every
+event after that id and then follows the live tail. Subscribers sleep until
+the next append (broadcast wakeup) rather than polling.
+
+Streamed completions are registered in ``completion_streams`` and kept for
+``retention`` seconds after they finish, so a reload shortly after the answer
+completes can still replay it. Logs hold at most ``max_events`` events; a
+subscriber that falls behind the retained window gets ``EventLogGap`` and is
+told to resync from the API.
+
+Logs are written by the worker that runs the agent. With several workers,
+``CompletionStreamRegistry.start_relay`` relays every append (in small
+batches) through a pub/sub backend (see ``app.websocket_pubsub``), and the
+other workers keep a mirror of the log with the same event ids. A reconnect
+with ``Last-Event-ID`` can land on any worker and resume from its mirror; a
+mirror that missed a relayed batch drops what it had, so subscribers behind
+the missing events get ``EventLogGap`` (resync) rather than a silent hole.
+
+Each event is JSON-encoded once and the frame text is shared by every
+subscriber. A slow client is not sent the backlog token by token: while a
+subscriber is behind the tail, consecutive ``block.delta.token`` events for the
+same block field are merged into one frame (up to ``coalesce_bytes``) carrying
+the id of the last merged event, so resuming from it stays exact.
+"""
+
 import asyncio
-from typing import AsyncIterator
-from app.schemas.sse_schema import SSEEvent
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from app.schemas.sse_schema import SSEEvent, format_sse_event
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_EVENTS = 10_000
+DEFAULT_RETENTION = 300  # seconds a finished stream stays resumable
+DEFAULT_HEARTBEAT = 15  # seconds between keep-alive comments on an idle stream
+DEFAULT_COALESCE_BYTES = 16_384  # max merged token text per frame for a lagging subscriber
+
+DEFAULT_RELAY_CHANNEL = "metricchat_sse"
+DEFAULT_RELAY_BATCH = 64  # appends relayed per pub/sub message
+MIRROR_IDLE_TIMEOUT = 3600  # seconds; mirrors whose finish was never relayed are dropped
+
+TOKEN_EVENT = "block.delta.token"
+
+# Called with (event_id, event) on append and (last_id, None) on finish
+AppendListener = Callable[[int, Optional[SSEEvent]], None]
+
+
+class EventLogGap(Exception):
+    """Raised when a subscriber asks for events the log no longer retains."""
+    pass
 
 
 class CompletionEventQueue:
-    """Queue for streaming SSE events during completion."""
-    
-    def __init__(self):
-        self.queue: asyncio.Queue[SSEEvent] = asyncio.Queue()
+    """Append-only event log for one completion stream.
+
+    ``max_events=None`` keeps every event (used by internal consumers such as
+    test runs); streamed completions use a bounded ring buffer.
+    """
+
+    def __init__(self, max_events: Optional[int] = None, listener: Optional[AppendListener] = None):
+        self._events: Deque[Tuple[int, SSEEvent]] = deque(maxlen=max_events)
+        self._next_id = 1
+        self._changed = asyncio.Event()
+        self._listener = listener
+        self.mirror = False  # copy of a log another worker writes
         self.finished = False
-    
-    async def put(self, event: SSEEvent):
-        """Add validated Pydantic event to queue."""
-        await self.queue.put(event)
-    
+        self.finished_at: Optional[float] = None
+        self.updated_at = time.monotonic()
+
+    @property
+    def last_id(self) -> int:
+        return self._next_id - 1
+
+    @property
+    def first_id(self) -> int:
+        """Id of the oldest retained event (``last_id + 1`` when empty)."""
+        return self._events[0][0] if self._events else self._next_id
+
+    async def put(self, event: SSEEvent) -> int:
+        """Add validated Pydantic event to the log; returns its id."""
+        return self.append(event)
+
+    def append(self, event: SSEEvent, event_id: Optional[int] = None) -> int:
+        """Add ``event``; ``event_id`` is given when mirroring another worker's log."""
+        if event_id is None:
+            event_id = self._next_id
+        elif event_id < self._next_id:
+            return event_id  # already mirrored
+        elif event_id > self._next_id:
+            # Relayed events were lost; keep only what follows so readers resync
+            self._events.clear()
+        self._next_id = event_id + 1
+        self._events.append((event_id, event))
+        self.updated_at = time.monotonic()
+        self._notify()
+        if self._listener is not None:
+            self._listener(event_id, event)
+        return event_id
+
+    def finish(self):
+        """Mark the log as finished (no more events will be added)."""
+        if not self.finished:
+            self.finished = True
+            self.finished_at = time.monotonic()
+            self._notify()
+            if self._listener is not None:
+                self._listener(self.last_id, None)
+
+    def has_gap(self, after_id: int) -> bool:
+        """True if events after ``after_id`` have already been dropped."""
+        return after_id + 1 < self.first_id
+
+    async def subscribe(
+        self,
+        after_id: int = 0,
+        heartbeat: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[Optional[int], Optional[SSEEvent]]]:
+        """Yield ``(id, event)`` for every event after ``after_id``, then follow the log until it finishes.
+
+        With ``heartbeat``, ``(None, None)`` is yielded after that many idle seconds.
+
+        Raises:
+            EventLogGap: if the subscriber is (or falls) behind the retained window.
+        """
+        cursor = max(after_id, 0)
+        while True:
+            # Capture the wakeup before reading so an append in between is not missed
+            changed = self._changed
+            if self.has_gap(cursor):
+                raise EventLogGap(f"Events after {cursor} are no longer available (oldest is {self.first_id})")
+            if cursor < self.last_id:
+                start = cursor - self.first_id + 1
+                for event_id, event in list(itertools.islice(self._events, start, None)):
+                    cursor = event_id
+                    yield event_id, event
+                continue
+            if self.finished:
+                return
+            if heartbeat:
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None, None
+            else:
+                await changed.wait()
+
     async def get_events(self) -> AsyncIterator[SSEEvent]:
-        """Yield validated Pydantic events."""
-        while not self.finished or not self.queue.empty():
-            try:
-                event = await asyncio.wait_for(self.queue.get(), timeout=0.1)
-                yield event
-            except asyncio.TimeoutError:
+        """Yield validated Pydantic events from the start of the log."""
+        async for _, event in self.subscribe(0):
+            yield event
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+def _token_key(event: SSEEvent) -> Optional[Tuple[Any, Any]]:
+    if event.event != TOKEN_EVENT:
+        return None
+    return event.data.get("block_id"), event.data.get("field")
+
+
+def _merge_tokens(events: List[SSEEvent]) -> SSEEvent:
+    """One token event carrying the concatenated text of ``events`` (same block field)."""
+    if len(events) == 1:
+        return events[0]
+    last = events[-1]
+    return SSEEvent.internal(
+        TOKEN_EVENT,
+        data={**last.data, "token": "".join(e.data.get("token") or "" for e in events)},
+        completion_id=last.completion_id,
+        agent_execution_id=last.agent_execution_id,
+        seq=last.seq,
+    )
+
+
+async def stream_sse(
+    log: CompletionEventQueue,
+    after_id: int = 0,
+    heartbeat: Optional[float] = DEFAULT_HEARTBEAT,
+    coalesce_bytes: Optional[int] = DEFAULT_COALESCE_BYTES,
+) -> AsyncIterator[str]:
+    """SSE frames (with ``id:`` lines) for ``log`` after ``after_id``, ending with ``[DONE]``.
+
+    Token deltas that are already queued behind the one being sent are merged
+    (see module docstring); ``coalesce_bytes=None`` or ``0`` disables this.
+    """
+    pending: List[SSEEvent] = []
+    pending_id = 0
+    pending_size = 0
+
+    def flush() -> str:
+        nonlocal pending, pending_size
+        frame = format_sse_event(_merge_tokens(pending), event_id=str(pending_id))
+        pending, pending_size = [], 0
+        return frame
+
+    try:
+        async for event_id, event in log.subscribe(after_id, heartbeat=heartbeat):
+            if event is None:
+                yield ": keep-alive\n\n"
                 continue
-    
-    def finish(self):
-        """Mark the queue as finished (no more events will be added)."""
-        self.finished = True
+            key = _token_key(event) if coalesce_bytes else None
+            if pending and (key != _token_key(pending[0]) or pending_size >= coalesce_bytes):
+                yield flush()
+            if key is not None and (pending or event_id < log.last_id):
+                # More events are already waiting: hold this delta and merge the next ones into it
+                pending.append(event)
+                pending_id = event_id
+                pending_size += len(event.data.get("token") or "")
+                if event_id < log.last_id:
+                    continue
+                yield flush()
+                continue
+            yield format_sse_event(event, event_id=str(event_id))
+        if pending:
+            yield flush()
+    except EventLogGap:
+        pending = []
+        yield format_sse_event(SSEEvent(
+            event="completion.resync",
+            data={"reason": "events_expired", "first_event_id": log.first_id},
+        ))
+    yield "data: [DONE]\n\n"
+
+
+class CompletionStreamRegistry:
+    """Event logs of streamed completions (own and mirrored), by completion id."""
+
+    def __init__(
+        self,
+        max_events: int = DEFAULT_MAX_EVENTS,
+        retention: float = DEFAULT_RETENTION,
+        heartbeat: float = DEFAULT_HEARTBEAT,
+        coalesce_bytes: int = DEFAULT_COALESCE_BYTES,
+        token_flush_ms: int = 50,
+        token_flush_chars: int = 200,
+        partial_flush_ms: int = 250,
+        relay_channel: str = DEFAULT_RELAY_CHANNEL,
+        relay_batch: int = DEFAULT_RELAY_BATCH,
+    ):
+        self.max_events = max_events
+        self.retention = retention
+        self.heartbeat = heartbeat
+        self.coalesce_bytes = coalesce_bytes
+        # Producer-side batching of planner text, read by the agent when it starts streaming a block
+        self.token_flush_ms = token_flush_ms
+        self.token_flush_chars = token_flush_chars
+        self.partial_flush_ms = partial_flush_ms
+        self.relay_channel = relay_channel
+        self.relay_batch = relay_batch
+        self._logs: Dict[str, CompletionEventQueue] = {}
+        self._lock = threading.Lock()
+        self._relay = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._relay_task: Optional[asyncio.Task] = None
+
+    def configure(self, **options) -> None:
+        for key, value in options.items():
+            if value is None:
+                continue
+            if not hasattr(self, key):
+                raise ValueError(f"Unknown completion stream option: {key}")
+            setattr(self, key, value)
+
+    def create(self, completion_ids: Iterable[str]) -> CompletionEventQueue:
+        """New log registered under each of ``completion_ids`` (user and system completion)."""
+        keys = [str(completion_id) for completion_id in completion_ids]
+        listener = self._relay_listener(keys) if self._relay is not None else None
+        log = CompletionEventQueue(max_events=self.max_events, listener=listener)
+        with self._lock:
+            for key in keys:
+                self._logs[key] = log
+        return log
+
+    async def start_relay(self, backend) -> None:
+        """Relay appends to, and mirror the logs of, the other workers on ``backend``."""
+        await backend.start(self._on_relayed)
+        self._relay = backend
+        self._outbox = asyncio.Queue()
+        self._relay_task = asyncio.get_running_loop().create_task(self._drain_outbox())
+
+    async def stop_relay(self) -> None:
+        relay, self._relay = self._relay, None
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            self._relay_task = None
+        self._outbox = None
+        if relay is not None:
+            await relay.stop()
+
+    def _relay_listener(self, keys: List[str]) -> AppendListener:
+        def listener(event_id: int, event: Optional[SSEEvent]) -> None:
+            if self._outbox is not None:
+                self._outbox.put_nowait((keys, event_id, event.payload() if event is not None else None))
+        return listener
+
+    async def _drain_outbox(self) -> None:
+        outbox = self._outbox
+        while True:
+            batch = [await outbox.get()]
+            while len(batch) < self.relay_batch and not outbox.empty():
+                batch.append(outbox.get_nowait())
+            # One message per run of appends to the same log, in order
+            for keys, group in itertools.groupby(batch, key=lambda item: item[0]):
+                message = json.dumps({
+                    "ids": keys,
+                    "events": [[event_id, payload] for _, event_id, payload in group],
+                })
+                try:
+                    await self._relay.publish(keys[0], message)
+                except Exception as e:
+                    logger.warning(f"Error relaying completion stream {keys[0]}: {e}")
+
+    async def _on_relayed(self, key: str, message: str) -> None:
+        relayed = json.loads(message)
+        keys = relayed["ids"]
+        with self._lock:
+            log = self._logs.get(keys[0])
+            if log is None:
+                log = CompletionEventQueue(max_events=self.max_events)
+                log.mirror = True
+                for k in keys:
+                    self._logs[k] = log
+            elif not log.mirror:
+                return  # this worker writes the log
+        for event_id, payload in relayed["events"]:
+            if payload is None:
+                log.finish()
+                continue
+            event = SSEEvent.model_validate_json(payload)
+            event._payload = payload
+            log.append(event, event_id=event_id)
+
+    def get(self, completion_id: str) -> Optional[CompletionEventQueue]:
+        with self._lock:
+            return self._logs.get(str(completion_id))
+
+    def evict_finished(self) -> int:
+        """Forget logs that finished more than ``retention`` seconds ago, and stale mirrors."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                key for key, log in self._logs.items()
+                if (log.finished and log.finished_at is not None and now - log.finished_at > self.retention)
+                or (log.mirror and not log.finished and now - log.updated_at > MIRROR_IDLE_TIMEOUT)
+            ]
+            for key in expired:
+                del self._logs[key]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._logs)
+
+
+completion_streams = CompletionStreamRegistry()
+
+
+async def evict_finished_completion_streams() -> None:
+    """Scheduler job: drop event logs past their resume window."""
+    completion_streams.evict_finished()
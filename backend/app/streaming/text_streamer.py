@@ -16,6 +16,10 @@ class PlanningTextStreamer:
     - Low time threshold (16ms = ~60fps) for responsive feel
     - Character threshold (5 chars) to emit on small batches regardless of time
     - Large chunk splitting for models that return text in bursts (e.g., GPT-5, o1)
+
+    The agent passes the flush window and size from ``completion_streams`` so
+    one delta event covers many LLM chunks. Events are built with
+    ``SSEEvent.internal`` (no re-validation) since every field is ours.
     """
 
     def __init__(
@@ -57,6 +61,9 @@ class PlanningTextStreamer:
 
     @staticmethod
     def _delta(prev: str, new: str) -> str:
+        # Text normally only grows; avoid the per-character scan on that path
+        if new.startswith(prev):
+            return new[len(prev):]
         # Compute delta via common prefix
         i = 0
         limit = min(len(prev), len(new))
@@ -67,8 +74,8 @@ class PlanningTextStreamer:
     async def _emit_field_delta(self, field: str, delta: str):
         """Emit a single token delta for a field."""
         seq = await self.seq_fn()
-        await self.emit(SSEEvent(
-            event="block.delta.token",
+        await self.emit(SSEEvent.internal(
+            "block.delta.token",
             completion_id=self.completion_id,
             agent_execution_id=self.agent_execution_id,
             seq=seq,
@@ -136,8 +143,8 @@ class PlanningTextStreamer:
             self.last_snapshot = now
             if self.prev_reasoning:
                 seq = await self.seq_fn()
-                await self.emit(SSEEvent(
-                    event="block.delta.text",
+                await self.emit(SSEEvent.internal(
+                    "block.delta.text",
                     completion_id=self.completion_id,
                     agent_execution_id=self.agent_execution_id,
                     seq=seq,
@@ -149,8 +156,8 @@ class PlanningTextStreamer:
                 ))
             if self.prev_content:
                 seq = await self.seq_fn()
-                await self.emit(SSEEvent(
-                    event="block.delta.text",
+                await self.emit(SSEEvent.internal(
+                    "block.delta.text",
                     completion_id=self.completion_id,
                     agent_execution_id=self.agent_execution_id,
                     seq=seq,
@@ -167,8 +174,8 @@ class PlanningTextStreamer:
         # Final snapshots
         if self.prev_reasoning:
             seq = await self.seq_fn()
-            await self.emit(SSEEvent(
-                event="block.delta.text",
+            await self.emit(SSEEvent.internal(
+                "block.delta.text",
                 completion_id=self.completion_id,
                 agent_execution_id=self.agent_execution_id,
                 seq=seq,
@@ -180,8 +187,8 @@ class PlanningTextStreamer:
             ))
         if self.prev_content:
             seq = await self.seq_fn()
-            await self.emit(SSEEvent(
-                event="block.delta.text",
+            await self.emit(SSEEvent.internal(
+                "block.delta.text",
                 completion_id=self.completion_id,
                 agent_execution_id=self.agent_execution_id,
                 seq=seq,
@@ -194,8 +201,8 @@ class PlanningTextStreamer:
         # Completion markers
         for field in ("reasoning", "content"):
             seq = await self.seq_fn()
-            await self.emit(SSEEvent(
-                event="block.delta.text.complete",
+            await self.emit(SSEEvent.internal(
+                "block.delta.text.complete",
                 completion_id=self.completion_id,
                 agent_execution_id=self.agent_execution_id,
                 seq=seq,
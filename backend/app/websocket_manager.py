@@ -1,15 +1,41 @@
 # app/websocket_manager.py
 
-from typing import List, Dict, Callable
+from typing import List, Dict, Callable, Optional
 from fastapi import WebSocket
-import json
 import asyncio
+import logging
+
+from app.websocket_pubsub import InProcessPubSub, PubSubBackend, create_backend
+
+logger = logging.getLogger(__name__)
 
 class WebSocketManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}  # report_id -> connections
+    def __init__(self, backend: Optional[PubSubBackend] = None):
+        self.active_connections: Dict[str, List[WebSocket]] = {}  # report_id -> connections (this worker only)
         self.ping_interval = 25  # Heroku's timeout is 55 seconds, so ping every 25 seconds
         self.message_handlers: List[Callable] = []  # Add this line for message handlers
+        # Relays broadcasts to the managers of other workers
+        self.backend: PubSubBackend = backend or InProcessPubSub()
+        self._started = False
+
+    def configure(self, backend: str = "inprocess", dsn: Optional[str] = None, channel: Optional[str] = None) -> None:
+        """Swap the pub/sub backend; call before ``start()``."""
+        if self._started:
+            raise RuntimeError("Cannot reconfigure the WebSocket pub/sub backend after start()")
+        options = {"channel": channel} if channel else {}
+        self.backend = create_backend(backend, dsn=dsn, **options)
+
+    async def start(self) -> None:
+        if self._started:
+            return
+        await self.backend.start(self._deliver_local)
+        self._started = True
+
+    async def stop(self) -> None:
+        if not self._started:
+            return
+        self._started = False
+        await self.backend.stop()
 
     async def connect(self, websocket: WebSocket, report_id: str):
         await websocket.accept()
@@ -25,14 +51,22 @@ class WebSocketManager:
                 del self.active_connections[report_id]
 
     async def broadcast_to_report(self, report_id: str, message: str):
-        if report_id in self.active_connections:
-            for connection in self.active_connections[report_id]:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    print(f"Error sending message: {e}")
-                    await self.disconnect(connection, report_id)
-        
+        """Send ``message`` to every socket on ``report_id``, across all workers."""
+        await self._deliver_local(report_id, message)
+        try:
+            await self.backend.publish(report_id, message)
+        except Exception as e:
+            logger.warning(f"Error relaying WebSocket message for report {report_id}: {e}")
+
+    async def _deliver_local(self, report_id: str, message: str):
+        """Deliver to this worker's sockets and message handlers."""
+        for connection in list(self.active_connections.get(report_id, [])):
+            try:
+                await connection.send_text(message)
+            except Exception as e:
+                print(f"Error sending message: {e}")
+                self.disconnect(connection, report_id)
+
         # Add this: Notify all message handlers
         try:
             for handler in self.message_handlers:
@@ -59,4 +93,4 @@ class WebSocketManager:
             self.message_handlers.remove(handler)
 
 # Create an instance of WebSocketManager to use in your service
-websocket_manager = WebSocketManager()
\ No newline at end of file
+websocket_manager = WebSocketManager()
@@ -0,0 +1,241 @@
+# app/websocket_pubsub.py
+"""Pub/sub backends that fan WebSocket broadcasts out across workers.
+
+``WebSocketManager`` always delivers a broadcast to the sockets connected to
+its own process and then hands it to a backend, which relays it to every
+other worker. Workers receiving a relayed message deliver it to their local
+sockets (and message handlers) only, so delivery stays report-scoped.
+
+- ``InProcessPubSub`` relays between managers living in the same process
+  (a single worker has nobody to relay to; tests use several managers on one
+  bus to stand in for several workers).
+- ``PostgresPubSub`` relays through ``LISTEN``/``NOTIFY`` on the application
+  database, so N uvicorn workers on any number of nodes can share sockets
+  without extra infrastructure.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+MessageCallback = Callable[[str, str], Awaitable[None]]  # (report_id, message)
+
+DEFAULT_CHANNEL = "metricchat_ws"
+# NOTIFY payloads are capped at 8000 bytes; leave room for the envelope
+MAX_NOTIFY_CHUNK = 7000  # bytes
+
+
+class PubSubBackend:
+    """Relay for broadcasts between workers."""
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._on_message: Optional[MessageCallback] = None
+
+    async def start(self, on_message: MessageCallback) -> None:
+        self._on_message = on_message
+
+    async def publish(self, report_id: str, message: str) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        self._on_message = None
+
+    async def _deliver(self, report_id: str, message: str) -> None:
+        if self._on_message is None:
+            return
+        try:
+            await self._on_message(report_id, message)
+        except Exception as e:
+            logger.warning(f"Error delivering relayed WebSocket message for report {report_id}: {e}")
+
+
+class LocalBus:
+    """Process-local bus connecting ``InProcessPubSub`` backends."""
+
+    def __init__(self):
+        self.subscribers: List["InProcessPubSub"] = []
+
+
+_default_bus = LocalBus()
+
+
+class InProcessPubSub(PubSubBackend):
+    def __init__(self, bus: Optional[LocalBus] = None):
+        super().__init__()
+        self.bus = bus or _default_bus
+
+    async def start(self, on_message: MessageCallback) -> None:
+        await super().start(on_message)
+        if self not in self.bus.subscribers:
+            self.bus.subscribers.append(self)
+
+    async def publish(self, report_id: str, message: str) -> None:
+        for subscriber in list(self.bus.subscribers):
+            if subscriber is not self:
+                await subscriber._deliver(report_id, message)
+
+    async def stop(self) -> None:
+        if self in self.bus.subscribers:
+            self.bus.subscribers.remove(self)
+        await super().stop()
+
+
+def _split_message(message: str, max_bytes: int) -> List[str]:
+    parts: List[str] = []
+    i = 0
+    while i < len(message) or not parts:
+        size = max_bytes
+        part = message[i:i + size]
+        # Escaping and multi-byte characters can make a chunk larger than its length
+        while size > 1 and len(json.dumps(part, ensure_ascii=False).encode("utf-8")) > max_bytes:
+            size //= 2
+            part = message[i:i + size]
+        parts.append(part)
+        i += len(part)
+    return parts
+
+
+def encode_notifications(origin: str, report_id: str, message: str, max_chunk: int = MAX_NOTIFY_CHUNK) -> List[str]:
+    """Split a broadcast into NOTIFY payloads small enough for Postgres."""
+    message_id = uuid.uuid4().hex
+    parts = _split_message(message, max_chunk)
+    return [
+        json.dumps(
+            {"o": origin, "r": report_id, "id": message_id, "i": i, "n": len(parts), "m": part},
+            ensure_ascii=False,
+        )
+        for i, part in enumerate(parts)
+    ]
+
+
+class NotificationAssembler:
+    """Reassembles chunked NOTIFY payloads, bounding how many partial messages are kept."""
+
+    def __init__(self, max_pending: int = 256):
+        self.max_pending = max_pending
+        self._pending: Dict[str, List[str]] = {}
+
+    def feed(self, payload: str) -> Optional[Tuple[str, str, str]]:
+        """Return ``(origin, report_id, message)`` once all chunks of a message arrived."""
+        envelope = json.loads(payload)
+        total = envelope["n"]
+        if total == 1:
+            return envelope["o"], envelope["r"], envelope["m"]
+        parts = self._pending.setdefault(envelope["id"], [None] * total)
+        parts[envelope["i"]] = envelope["m"]
+        if any(part is None for part in parts):
+            while len(self._pending) > self.max_pending:
+                self._pending.pop(next(iter(self._pending)))
+            return None
+        del self._pending[envelope["id"]]
+        return envelope["o"], envelope["r"], "".join(parts)
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """Plain ``postgresql://`` DSN for asyncpg from a SQLAlchemy URL."""
+    scheme, sep, rest = database_url.partition("://")
+    if scheme.startswith("postgres"):
+        scheme = "postgresql"
+    return f"{scheme}{sep}{rest}"
+
+
+class PostgresPubSub(PubSubBackend):
+    """``LISTEN``/``NOTIFY`` relay; reconnects the listener if the connection drops."""
+
+    def __init__(self, dsn: str, channel: str = DEFAULT_CHANNEL, reconnect_delay: float = 2.0):
+        super().__init__()
+        self.dsn = asyncpg_dsn(dsn)
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._assembler = NotificationAssembler()
+        self._listen_conn = None
+        self._pool = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self, on_message: MessageCallback) -> None:
+        import asyncpg
+
+        await super().start(on_message)
+        self._stopping = False
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=4)
+        await self._listen()
+
+    async def publish(self, report_id: str, message: str) -> None:
+        if self._pool is None:
+            return
+        async with self._pool.acquire() as conn:
+            for payload in encode_notifications(self.origin, report_id, message):
+                await conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._listen_conn is not None:
+            try:
+                await self._listen_conn.close()
+            except Exception:
+                pass
+            self._listen_conn = None
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+        await super().stop()
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        conn = await asyncpg.connect(self.dsn)
+        conn.add_termination_listener(self._on_terminated)
+        await conn.add_listener(self.channel, self._on_notify)
+        self._listen_conn = conn
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            assembled = self._assembler.feed(payload)
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring malformed WebSocket notification: {e}")
+            return
+        if assembled is None:
+            return
+        origin, report_id, message = assembled
+        if origin == self.origin:
+            # Already delivered locally by the publishing manager
+            return
+        asyncio.get_running_loop().create_task(self._deliver(report_id, message))
+
+    def _on_terminated(self, connection) -> None:
+        self._listen_conn = None
+        if not self._stopping and self._reconnect_task is None:
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        try:
+            while not self._stopping:
+                await asyncio.sleep(self.reconnect_delay)
+                try:
+                    await self._listen()
+                    logger.info("WebSocket pub/sub listener reconnected")
+                    return
+                except Exception as e:
+                    logger.warning(f"WebSocket pub/sub listener reconnect failed: {e}")
+        finally:
+            self._reconnect_task = None
+
+
+def create_backend(backend: str = "inprocess", dsn: Optional[str] = None, channel: str = DEFAULT_CHANNEL) -> PubSubBackend:
+    if backend == "inprocess":
+        return InProcessPubSub()
+    if backend == "postgres":
+        if not dsn:
+            raise ValueError("The postgres WebSocket pub/sub backend needs a database DSN")
+        return PostgresPubSub(dsn, channel=channel)
+    raise ValueError(f"Unknown WebSocket pub/sub backend: {backend}")
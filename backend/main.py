@@ -1,3 +1,4 @@
+import asyncio
 import os
 import json
 import uvicorn
@@ -31,9 +32,23 @@ from app.schemas.user_schema import UserCreate, UserRead, UserUpdate
 from app.settings.config import settings
 from app.settings.logging_config import setup_logging, get_logger
 from app.core.cors import init_cors
-from app.core.scheduler import scheduler
+from app.core.scheduler import scheduler, LOCAL_JOBSTORE
+from app.core.auth_cache import auth_cache, evict_expired_auth_cache, flush_api_key_last_used
 from app.models.user import User
-from app.services.maintenance_service import purge_step_payloads_keep_latest_per_query
+from app.services.maintenance_service import purge_step_payloads_keep_latest_per_query, purge_orphaned_step_artifacts
+from app.services.table_stats_buffer import table_stats_buffer, flush_table_stats, compact_table_stats
+from app.services.browser_pool import browser_pool, close_idle_browser
+from app.services.platform_adapters.outbound import platform_delivery
+from app.ai.code_execution.slide_previews import office_converter, slide_preview_store, prune_slide_preview_store
+from app.streaming.completion_stream import completion_streams, evict_finished_completion_streams
+from app.websocket_pubsub import create_backend as create_pubsub_backend
+from app.data_sources.clients.engine_registry import engine_registry, evict_idle_engines
+from app.ai.code_execution.execution_pool import code_execution_pool
+from app.data_sources.clients.duckdb_session_cache import duckdb_session_cache, evict_idle_duckdb_sessions
+from app.data_sources.clients.query_result_cache import query_result_cache, evict_query_result_cache
+from app.data_sources.clients.fetch_guard import fetch_guard
+from app.services.step_data_store import step_data_store
+from app.websocket_manager import websocket_manager
 
 from app.routes import (
     report,
@@ -314,9 +329,215 @@ async def startup_event():
             kwargs={"null_fields": ("data", "data_model", "view")},
         )
         logger.info("Scheduled job: purge_step_payloads_keep_latest_per_query @ 03:00 daily")
+        scheduler.add_job(
+            purge_orphaned_step_artifacts,
+            trigger="cron",
+            hour=3,
+            minute=30,
+            id="purge_orphaned_step_artifacts_daily",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=3600,
+        )
     except Exception as e:
         logger.error(f"Failed to schedule purge job: {e}")
 
+    # Pooled data source engines: apply config and sweep idle engines
+    try:
+        engine_registry.configure(**settings.app_config.data_source_pool.dict())
+        scheduler.add_job(
+            evict_idle_engines,
+            trigger="interval",
+            minutes=5,
+            id="evict_idle_data_source_engines",
+            jobstore=LOCAL_JOBSTORE,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+    except Exception as e:
+        logger.error(f"Failed to configure data source engine pool: {e}")
+
+    try:
+        duckdb_session_cache.configure(**settings.app_config.duckdb_sessions.dict())
+        scheduler.add_job(
+            evict_idle_duckdb_sessions,
+            trigger="interval",
+            minutes=5,
+            id="evict_idle_duckdb_sessions",
+            jobstore=LOCAL_JOBSTORE,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+    except Exception as e:
+        logger.error(f"Failed to configure DuckDB session cache: {e}")
+
+    try:
+        query_result_cache.configure(**settings.app_config.query_cache.dict())
+        if query_result_cache.enabled:
+            scheduler.add_job(
+                evict_query_result_cache,
+                trigger="interval",
+                minutes=10,
+                id="evict_query_result_cache",
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+            )
+    except Exception as e:
+        logger.error(f"Failed to configure query result cache: {e}")
+
+    try:
+        fetch_guard.configure(**settings.app_config.fetch_guard.dict())
+    except Exception as e:
+        logger.error(f"Failed to configure query fetch guard: {e}")
+
+    try:
+        code_execution_pool.configure(**settings.app_config.code_execution.dict())
+    except Exception as e:
+        logger.error(f"Failed to configure code execution pool: {e}")
+
+    try:
+        step_data_store.configure(**settings.app_config.step_data_storage.dict())
+    except Exception as e:
+        logger.error(f"Failed to configure step data storage: {e}")
+
+    try:
+        pubsub_config = settings.app_config.websocket_pubsub
+        websocket_manager.configure(
+            backend=pubsub_config.backend,
+            dsn=pubsub_config.dsn or settings.app_config.database.url,
+            channel=pubsub_config.channel,
+        )
+        await websocket_manager.start()
+    except Exception as e:
+        logger.error(f"Failed to start WebSocket pub/sub backend: {e}")
+
+    try:
+        auth_cache_config = settings.app_config.auth_cache
+        auth_cache.configure(**auth_cache_config.dict())
+        scheduler.add_job(
+            flush_api_key_last_used,
+            trigger="interval",
+            seconds=auth_cache_config.last_used_flush_interval,
+            id="flush_api_key_last_used",
+            jobstore=LOCAL_JOBSTORE,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+        scheduler.add_job(
+            evict_expired_auth_cache,
+            trigger="interval",
+            minutes=5,
+            id="evict_expired_auth_cache",
+            jobstore=LOCAL_JOBSTORE,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+    except Exception as e:
+        logger.error(f"Failed to configure auth cache: {e}")
+
+    try:
+        table_stats_config = settings.app_config.table_stats
+        table_stats_buffer.configure(**table_stats_config.dict())
+        scheduler.add_job(
+            flush_table_stats,
+            trigger="interval",
+            seconds=table_stats_config.flush_interval,
+            id="flush_table_stats",
+            jobstore=LOCAL_JOBSTORE,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+        scheduler.add_job(
+            compact_table_stats,
+            trigger="cron",
+            hour=3,
+            minute=30,
+            id="compact_table_stats_daily",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=3600,
+        )
+    except Exception as e:
+        logger.error(f"Failed to configure table stats pipeline: {e}")
+
+    try:
+        browser_pool.configure(**settings.app_config.browser_rendering.dict())
+        scheduler.add_job(
+            close_idle_browser,
+            trigger="interval",
+            minutes=1,
+            id="close_idle_browser",
+            jobstore=LOCAL_JOBSTORE,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+    except Exception as e:
+        logger.error(f"Failed to configure browser pool: {e}")
+
+    try:
+        slide_config = settings.app_config.slide_previews
+        office_converter.configure(
+            mode=slide_config.converter_mode,
+            instances=slide_config.converter_instances,
+            timeout=slide_config.convert_timeout,
+            max_jobs_per_instance=slide_config.max_jobs_per_instance,
+        )
+        slide_preview_store.configure(
+            cache_dir=slide_config.cache_dir,
+            max_bytes=slide_config.cache_max_bytes,
+            raster_workers=slide_config.raster_workers,
+        )
+        if slide_config.prewarm:
+            asyncio.get_running_loop().run_in_executor(None, office_converter.warm)
+        scheduler.add_job(
+            prune_slide_preview_store,
+            trigger="interval",
+            hours=1,
+            id="prune_slide_preview_store",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+    except Exception as e:
+        logger.error(f"Failed to configure slide previews: {e}")
+
+    try:
+        completion_streams.configure(**settings.app_config.completion_streams.dict())
+        pubsub_config = settings.app_config.websocket_pubsub
+        if pubsub_config.backend != "inprocess":
+            # Other workers mirror this worker's logs so a reconnect can resume on any of them
+            await completion_streams.start_relay(create_pubsub_backend(
+                pubsub_config.backend,
+                dsn=pubsub_config.dsn or settings.app_config.database.url,
+                channel=completion_streams.relay_channel,
+            ))
+        scheduler.add_job(
+            evict_finished_completion_streams,
+            trigger="interval",
+            minutes=1,
+            id="evict_finished_completion_streams",
+            jobstore=LOCAL_JOBSTORE,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+    except Exception as e:
+        logger.error(f"Failed to configure completion streams: {e}")
+
+    try:
+        platform_delivery.configure(**settings.app_config.platform_delivery.dict())
+    except Exception as e:
+        logger.error(f"Failed to configure platform delivery: {e}")
+
     scheduler.start()
 
     # Validate license at startup
@@ -343,6 +564,16 @@ Starting server with configuration:
 @app.on_event("shutdown")
 async def shutdown_event():
     scheduler.shutdown()
+    engine_registry.dispose_all()
+    code_execution_pool.shutdown()
+    duckdb_session_cache.clear()
+    await websocket_manager.stop()
+    await completion_streams.stop_relay()
+    await flush_api_key_last_used()
+    await table_stats_buffer.flush()
+    await browser_pool.close()
+    await platform_delivery.close()
+    office_converter.shutdown()
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,142 @@
+"""Agent-loop latency benchmarks, replayed from LLM cassettes.
+
+Each scenario streams completions through the API and times the phases of
+``AgentV2.main_execution`` (see ``tests/utils/phase_timer.py``). LLM calls
+come from a cassette in ``tests/benchmarks/cassettes``; tools, queries, DB
+writes and SSE framing run for real, so the numbers are comparable between
+backends and commits.
+
+    # record once (live calls, OPENAI_API_KEY_TEST)
+    pytest tests/benchmarks --cassette-mode record
+    # replay against SQLite, or a local Postgres (TEST_POSTGRES_URL) / container
+    pytest tests/benchmarks -m benchmark --benchmark-rounds 5
+    pytest tests/benchmarks -m benchmark --db postgres --token-timing fixed --first-token-ms 300 --token-ms 15
+
+Scenarios without a cassette are skipped. The chat cassette is committed so
+the suite runs without API keys; its responses were written by hand in the
+recorded format (prompts differ per run, so calls match by kind and order).
+Each round replays the whole cassette.
+"""
+import sqlite3
+import time
+
+import pytest
+
+from tests.fixtures.benchmark import report_benchmark
+
+
+def _stream_round(create_report, create_completion_stream, *, title, prompt, user_token, org_id, data_sources):
+    report = create_report(title=title, user_token=user_token, org_id=org_id, data_sources=data_sources)
+    started = time.perf_counter()
+    first_event_ms = None
+    events = []
+    for raw in create_completion_stream(report_id=report["id"], prompt=prompt, user_token=user_token, org_id=org_id):
+        line = raw.decode() if isinstance(raw, (bytes, bytearray)) else raw
+        if line.startswith("event: "):
+            if first_event_ms is None:
+                first_event_ms = (time.perf_counter() - started) * 1000.0
+            events.append(line.split(":", 1)[1].strip())
+        if line.strip() == "data: [DONE]":
+            break
+    wall_ms = (time.perf_counter() - started) * 1000.0
+    return events, wall_ms, first_event_ms
+
+
+def _run_scenario(request, llm_cassette, phase_timer, create_report, create_completion_stream, *, prompt, user_token, org_id, data_sources=None):
+    rounds = 1 if llm_cassette.mode == "record" else request.config.getoption("--benchmark-rounds")
+    results = []
+    for n in range(rounds):
+        phase_timer.reset()
+        if llm_cassette.mode == "replay":
+            llm_cassette.rewind()
+        events, wall_ms, first_event_ms = _stream_round(
+            create_report,
+            create_completion_stream,
+            title=f"Benchmark {n}",
+            prompt=prompt,
+            user_token=user_token,
+            org_id=org_id,
+            data_sources=data_sources or [],
+        )
+        assert "completion.finished" in events
+        results.append({
+            "round": n,
+            "wall_ms": round(wall_ms, 3),
+            "first_event_ms": round(first_event_ms or 0.0, 3),
+            "events": len(events),
+            "phases": phase_timer.summary(),
+        })
+    db_backend = request.config.getoption("--db")
+    report_benchmark(f"{request.node.name} [{db_backend}, {llm_cassette.mode}]", results)
+    return results
+
+
+@pytest.mark.benchmark
+def test_agent_loop_chat(
+    request,
+    llm_cassette,
+    phase_timer,
+    create_benchmark_provider,
+    create_report,
+    create_completion_stream,
+    create_user,
+    login_user,
+    whoami,
+):
+    user = create_user()
+    user_token = login_user(user["email"], user["password"])
+    org_id = whoami(user_token)['organizations'][0]['id']
+    create_benchmark_provider(user_token, org_id)
+
+    results = _run_scenario(
+        request, llm_cassette, phase_timer, create_report, create_completion_stream,
+        prompt="What kind of questions can you help me answer?",
+        user_token=user_token,
+        org_id=org_id,
+    )
+    assert all(r["phases"]["context_priming"]["calls"] > 0 for r in results)
+
+
+@pytest.mark.benchmark
+def test_agent_loop_data_question(
+    request,
+    llm_cassette,
+    phase_timer,
+    create_benchmark_provider,
+    create_data_source,
+    create_report,
+    create_completion_stream,
+    create_user,
+    login_user,
+    whoami,
+    dynamic_sqlite_db,
+):
+    conn = sqlite3.connect(dynamic_sqlite_db)
+    conn.executemany("INSERT INTO users (id, name) VALUES (?, ?)", [(i, f"user {i}") for i in range(1, 51)])
+    conn.executemany(
+        "INSERT INTO orders (id, user_id, amount) VALUES (?, ?, ?)",
+        [(i, i % 50 + 1, round(10 + (i * 7) % 90, 2)) for i in range(1, 501)],
+    )
+    conn.commit()
+    conn.close()
+
+    user = create_user()
+    user_token = login_user(user["email"], user["password"])
+    org_id = whoami(user_token)['organizations'][0]['id']
+    create_benchmark_provider(user_token, org_id)
+    data_source = create_data_source(
+        name="benchmark sqlite",
+        type="sqlite",
+        config={"database": dynamic_sqlite_db},
+        user_token=user_token,
+        org_id=org_id,
+    )
+
+    results = _run_scenario(
+        request, llm_cassette, phase_timer, create_report, create_completion_stream,
+        prompt="Show the top 5 users by total order amount",
+        user_token=user_token,
+        org_id=org_id,
+        data_sources=[data_source["id"]],
+    )
+    assert all(r["phases"]["tool_execution"]["calls"] > 0 for r in results)
@@ -33,7 +33,11 @@ def _setup_test_database():
     db_backend = _get_db_backend_from_argv()
     print(f"\n📊 Test database backend: {db_backend}")
     
-    if db_backend == "postgres":
+    if db_backend == "postgres" and os.environ.get("TEST_POSTGRES_URL"):
+        # A local, disposable Postgres instead of a container (its public schema is reset per test)
+        os.environ["TEST_DATABASE_URL"] = os.environ["TEST_POSTGRES_URL"]
+        print("🐘 Using local PostgreSQL from TEST_POSTGRES_URL")
+    elif db_backend == "postgres":
         from testcontainers.postgres import PostgresContainer
         
         print("🐘 Starting PostgreSQL container...")
@@ -85,12 +89,37 @@ def pytest_addoption(parser):
         choices=["sqlite", "postgres"],
         help="Database backend for tests: sqlite (default, fast) or postgres (thorough)"
     )
+    parser.addoption(
+        "--cassette-mode",
+        action="store",
+        default=os.environ.get("LLM_CASSETTE_MODE", "replay"),
+        choices=["record", "replay"],
+        help="Benchmarks: record LLM responses into cassettes (needs API keys) or replay them (default)"
+    )
+    parser.addoption(
+        "--token-timing",
+        action="store",
+        default="recorded",
+        choices=["recorded", "fixed"],
+        help="Benchmarks: replay chunk timing as recorded (scaled by --time-scale) or fixed (--first-token-ms, --token-ms)"
+    )
+    parser.addoption("--time-scale", action="store", type=float, default=1.0, help="Benchmarks: multiplier for recorded LLM timing (0 disables delays)")
+    parser.addoption("--first-token-ms", action="store", type=float, default=0.0, help="Benchmarks: fixed time to first token in ms")
+    parser.addoption("--token-ms", action="store", type=float, default=0.0, help="Benchmarks: fixed time per streamed chunk or token in ms")
+    parser.addoption("--benchmark-rounds", action="store", type=int, default=3, help="Benchmarks: replay rounds per scenario")
+    parser.addoption("--benchmark-report", action="store", default=None, help="Benchmarks: write per-round phase timings as JSON to this path")
 
 
 def pytest_configure(config):
     """Configure pytest markers."""
     config.addinivalue_line("markers", "e2e: marks tests as end-to-end tests")
     config.addinivalue_line("markers", "unit: marks tests as unit tests")
+    config.addinivalue_line("markers", "benchmark: marks agent-loop benchmarks replayed from LLM cassettes")
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Print benchmark phase timings collected during the session."""
+    write_benchmark_summary(terminalreporter, config.getoption("--benchmark-report"))
 
 @pytest.fixture(scope="session", autouse=True)
 def disable_telemetry_for_tests():
@@ -104,6 +133,7 @@ from tests.fixtures.organization import create_organization, add_organization_me
 from tests.fixtures.llm import create_llm_provider_and_models, get_models, get_default_model, set_llm_provider_as_default, toggle_llm_active_status, delete_llm_provider, create_openai_provider_with_base_url, update_llm_provider_base_url, create_azure_provider_and_models
 from tests.fixtures.report import create_report, get_reports, get_report, update_report, delete_report, publish_report, rerun_report, schedule_report, get_public_report
 from tests.fixtures.completion import create_completion, get_completions, create_completion_stream
+from tests.fixtures.benchmark import llm_cassette, create_benchmark_provider, phase_timer, write_benchmark_summary
 from tests.fixtures.data_source import (
     create_data_source,
     get_data_sources,
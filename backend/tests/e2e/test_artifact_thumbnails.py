@@ -0,0 +1,30 @@
+import pytest
+
+
+@pytest.mark.e2e
+def test_regenerate_thumbnails_is_scheduled(
+    test_client,
+    monkeypatch,
+    create_user,
+    login_user,
+    whoami,
+):
+    calls = []
+
+    async def fake_regenerate_all(self, organization_id=None):
+        calls.append(organization_id)
+        return {}
+
+    monkeypatch.setattr("app.services.thumbnail_service.ThumbnailService.regenerate_all", fake_regenerate_all)
+
+    user = create_user()
+    user_token = login_user(user["email"], user["password"])
+    org_id = whoami(user_token)['organizations'][0]['id']
+
+    response = test_client.post(
+        "/api/artifacts/thumbnails/regenerate",
+        headers={"Authorization": f"Bearer {user_token}", "X-Organization-Id": str(org_id)},
+    )
+    assert response.status_code == 202, response.json()
+    assert response.json() == {"status": "scheduled"}
+    assert calls == [str(org_id)]
@@ -143,6 +143,26 @@ def test_timeseries_metrics(
         assert field in performance
         assert isinstance(performance[field], list)
 
+@pytest.mark.e2e
+def test_timeseries_metrics_granularity(
+    get_timeseries_metrics,
+    create_user,
+    login_user,
+    whoami
+):
+    """Test timeseries metrics accept hour/day/week buckets and reject others"""
+    user = create_user()
+    user_token = login_user(user["email"], user["password"])
+    org_id = whoami(user_token)['organizations'][0]['id']
+
+    for granularity in ["hour", "day", "week"]:
+        response = get_timeseries_metrics(user_token=user_token, org_id=org_id, granularity=granularity)
+        assert response.status_code == 200
+        assert isinstance(response.json()["activity_metrics"]["messages"], list)
+
+    response = get_timeseries_metrics(user_token=user_token, org_id=org_id, granularity="month")
+    assert response.status_code == 422
+
 @pytest.mark.e2e
 def test_table_usage_metrics(
     get_table_usage_metrics,
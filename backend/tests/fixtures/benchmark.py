@@ -0,0 +1,91 @@
+import json
+import os
+import re
+
+import pytest
+
+from app.ai.llm.cassette import Cassette, use_cassette
+from tests.utils.phase_timer import PhaseTimer, agent_loop_phases, format_phase_table
+
+CASSETTE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks", "cassettes")
+REPLAY_API_KEY = "cassette-replay"
+
+# Titles and per-round summaries of the session's benchmarks, printed at the end
+benchmark_results = []
+
+
+@pytest.fixture
+def llm_cassette(request):
+    """Cassette named after the test; LLMs created while it is active record or replay through it."""
+    config = request.config
+    mode = config.getoption("--cassette-mode")
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", request.node.name)
+    cassette = Cassette(
+        os.path.join(CASSETTE_DIR, f"{name}.json"),
+        mode,
+        timing=config.getoption("--token-timing"),
+        time_scale=config.getoption("--time-scale"),
+        first_token_ms=config.getoption("--first-token-ms"),
+        token_ms=config.getoption("--token-ms"),
+    )
+    if mode == "record":
+        if not os.getenv("OPENAI_API_KEY_TEST"):
+            pytest.skip("OPENAI_API_KEY_TEST is not set (needed to record cassettes)")
+    elif not os.path.exists(cassette.path):
+        pytest.skip(f"No cassette at {cassette.path}; record one with --cassette-mode record")
+    else:
+        cassette.load()
+    with use_cassette(cassette):
+        yield cassette
+
+
+@pytest.fixture
+def create_benchmark_provider(test_client, llm_cassette):
+    """OpenAI provider for the cassette: the real key when recording, a placeholder for replay."""
+    def _create_benchmark_provider(user_token=None, org_id=None):
+        api_key = os.getenv("OPENAI_API_KEY_TEST") if llm_cassette.mode == "record" else REPLAY_API_KEY
+        response = test_client.post(
+            "/api/llm/providers",
+            json={"name": "benchmark provider",
+                  "provider_type": "openai",
+                  "credentials": {"api_key": api_key},
+                  "models": [
+                      {
+                          "model_id": "gpt-4.1",
+                          "name": "GPT-4.1",
+                          "is_custom": False
+                      },
+                      {
+                          "model_id": "gpt-4.1-mini",
+                          "name": "GPT-4.1 Mini",
+                          "is_custom": False
+                      }
+                  ]},
+            headers={"Authorization": f"Bearer {user_token}", "X-Organization-Id": str(org_id)}
+        )
+        assert response.status_code == 200, response.json()
+        return response.json()
+
+    return _create_benchmark_provider
+
+
+@pytest.fixture
+def phase_timer():
+    with PhaseTimer(agent_loop_phases()) as timer:
+        yield timer
+
+
+def report_benchmark(title, rounds):
+    benchmark_results.append((title, rounds))
+
+
+def write_benchmark_summary(terminalreporter, report_path=None):
+    if not benchmark_results:
+        return
+    terminalreporter.section("agent loop benchmarks")
+    for title, rounds in benchmark_results:
+        terminalreporter.write_line(format_phase_table(title, rounds))
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump([{"title": title, "rounds": rounds} for title, rounds in benchmark_results], f, indent=2)
+        terminalreporter.write_line(f"Benchmark report written to {report_path}")
@@ -51,7 +51,7 @@ def get_console_metrics_comparison(test_client):
 
 @pytest.fixture
 def get_timeseries_metrics(test_client):
-    def _get_timeseries_metrics(user_token=None, org_id=None, start_date=None, end_date=None):
+    def _get_timeseries_metrics(user_token=None, org_id=None, start_date=None, end_date=None, granularity=None):
         headers = {}
         if user_token:
             headers["Authorization"] = f"Bearer {user_token}"
@@ -63,6 +63,8 @@ def get_timeseries_metrics(test_client):
             params["start_date"] = start_date.isoformat()
         if end_date:
             params["end_date"] = end_date.isoformat()
+        if granularity:
+            params["granularity"] = granularity
         
         response = test_client.get(
             "/api/console/metrics/timeseries",
@@ -0,0 +1,151 @@
+"""Unit tests for Arrow-native result fetching in warehouse clients."""
+
+from contextlib import contextmanager
+
+import pyarrow as pa
+import pytest
+
+from app.data_sources.clients.base import arrow_to_pandas
+from app.data_sources.clients.clickhouse_client import ClickhouseClient
+from app.data_sources.clients.databricks_sql_client import DatabricksSqlClient
+from app.data_sources.clients.fetch_guard import FetchBudget, _current_budget
+from app.data_sources.clients.snowflake_client import SnowflakeClient
+
+
+def _table():
+    return pa.table({"ID": [1, 2, 3], "AMOUNT": [1.5, None, 3.0], "NAME": ["a", "b", None]})
+
+
+class _Cursor:
+    def __init__(self, arrow_error=None):
+        self.description = [("ID",), ("AMOUNT",), ("NAME",)]
+        self.arrow_error = arrow_error
+        self.closed = False
+
+    def execute(self, sql):
+        self.sql = sql
+
+    def fetch_arrow_all(self, force_return_table=False):
+        if self.arrow_error:
+            raise self.arrow_error
+        return _table()
+
+    def fetchall_arrow(self):
+        return _table()
+
+    def fetchall(self):
+        return [(1, 1.5, "a")]
+
+    def fetchmany(self, size):
+        rows = getattr(self, "rows", None)
+        if rows is None:
+            rows = self.rows = [(i, i * 1.5, f"n{i}") for i in range(250)]
+        batch, self.rows = rows[:size], rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class _Dialect:
+    @staticmethod
+    def normalize_name(name):
+        return name.lower() if name.isupper() else name
+
+
+class _SAConnection:
+    def __init__(self, cursor):
+        self.dialect = _Dialect()
+        self.connection = self
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def _with_connection(client, conn):
+    @contextmanager
+    def connect():
+        yield conn
+    client.connect = connect
+    return client
+
+
+@pytest.mark.unit
+class TestArrowFetch:
+    def test_arrow_to_pandas_keeps_numpy_dtypes(self):
+        df = arrow_to_pandas(_table())
+        assert str(df["ID"].dtype) == "int64"
+        assert str(df["AMOUNT"].dtype) == "float64"
+        assert df["NAME"].tolist() == ["a", "b", None]
+
+    def test_databricks_fetches_arrow(self):
+        cursor = _Cursor()
+
+        class _Conn:
+            def cursor(self):
+                return cursor
+
+        client = _with_connection(DatabricksSqlClient.__new__(DatabricksSqlClient), _Conn())
+        df = client.execute_query("SELECT 1")
+        assert list(df.columns) == ["ID", "AMOUNT", "NAME"] and len(df) == 3
+        assert cursor.closed
+
+    def test_clickhouse_uses_query_arrow(self):
+        class _Conn:
+            def query_arrow(self, sql, use_strings=None):
+                assert use_strings is True
+                return _table()
+
+            def query(self, sql):
+                raise AssertionError("row path used")
+
+        client = _with_connection(ClickhouseClient.__new__(ClickhouseClient), _Conn())
+        assert client.execute_query("SELECT 1")["ID"].sum() == 6
+
+    def test_snowflake_normalizes_names_and_falls_back_to_rows(self):
+        from snowflake.connector.errors import NotSupportedError
+
+        client = _with_connection(SnowflakeClient.__new__(SnowflakeClient), _SAConnection(_Cursor()))
+        df = client.execute_query("SELECT 1")
+        assert list(df.columns) == ["id", "amount", "name"] and len(df) == 3
+
+        cursor = _Cursor(arrow_error=NotSupportedError("json result"))
+        client = _with_connection(SnowflakeClient.__new__(SnowflakeClient), _SAConnection(cursor))
+        df = client.execute_query("SELECT 1")
+        assert df.to_dict("records") == [{"id": 1, "amount": 1.5, "name": "a"}]
+        assert cursor.closed
+
+    def test_row_fallbacks_treat_zero_max_rows_as_uncapped(self):
+        from snowflake.connector.errors import NotSupportedError
+
+        class _Conn:
+            def __init__(self, cursor):
+                self._cursor = cursor
+
+            def cursor(self):
+                return self._cursor
+
+        token = _current_budget.set(FetchBudget(max_rows=0, max_bytes=0, batch_size=100))
+        try:
+            client = _with_connection(DatabricksSqlClient.__new__(DatabricksSqlClient), _Conn(_Cursor()))
+            client.arrow_fetch = False
+            assert len(client.execute_query("SELECT 1")) == 250
+
+            cursor = _Cursor(arrow_error=NotSupportedError("json result"))
+            cursor.fetch_arrow_batches = lambda: cursor.fetch_arrow_all()
+            client = _with_connection(SnowflakeClient.__new__(SnowflakeClient), _SAConnection(cursor))
+            df = client.execute_query("SELECT 1")
+            assert len(df) == 250 and list(df.columns) == ["id", "amount", "name"]
+        finally:
+            _current_budget.reset(token)
+
+        budget = FetchBudget(max_rows=0, max_bytes=1, batch_size=100)
+        token = _current_budget.set(budget)
+        try:
+            client = _with_connection(DatabricksSqlClient.__new__(DatabricksSqlClient), _Conn(_Cursor()))
+            client.arrow_fetch = False
+            assert len(client.execute_query("SELECT 1")) == 100
+            assert budget.truncated_by == "bytes"
+        finally:
+            _current_budget.reset(token)
@@ -0,0 +1,139 @@
+"""Unit tests for the API key / membership auth cache."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import auth_cache as auth_cache_module
+from app.core.auth_cache import ApiKeyEntry, AuthCache, flush_api_key_last_used, get_membership_role
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+
+class _FakeDB:
+    def __init__(self, role):
+        self.role = role
+        self.calls = 0
+
+    async def execute(self, stmt, params=None):
+        self.calls += 1
+        return _Result(self.role)
+
+
+class _RecordingSession:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.executed = []
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.executed.append(params)
+
+    async def commit(self):
+        self.committed = True
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = AuthCache(ttl=30)
+    monkeypatch.setattr(auth_cache_module, "auth_cache", cache)
+    return cache
+
+
+def _entry(key_id="key-1", expires_at=None):
+    return ApiKeyEntry(api_key_id=key_id, user=object(), organization=object(), expires_at=expires_at)
+
+
+@pytest.mark.unit
+class TestAuthCache:
+    def test_api_key_entries_expire_after_ttl(self, cache, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(auth_cache_module.time, "monotonic", lambda: now[0])
+        cache.put_api_key("hash-1", _entry())
+        assert cache.get_api_key("hash-1") is not None
+        now[0] += 31
+        assert cache.get_api_key("hash-1") is None
+
+    def test_invalidate_api_key_drops_entry_and_pending_touch(self, cache):
+        cache.put_api_key("hash-1", _entry("key-1"))
+        cache.put_api_key("hash-2", _entry("key-2"))
+        cache.touch("key-1")
+        cache.invalidate_api_key("key-1")
+        assert cache.get_api_key("hash-1") is None
+        assert cache.get_api_key("hash-2") is not None
+        assert cache.take_last_used() == {}
+
+    def test_expired_key_is_reported(self):
+        assert _entry(expires_at=datetime.utcnow() - timedelta(seconds=1)).is_expired()
+        assert not _entry(expires_at=datetime.utcnow() + timedelta(days=1)).is_expired()
+        assert not _entry().is_expired()
+
+    def test_lru_bound(self):
+        cache = AuthCache(max_entries=2)
+        for i in range(3):
+            cache.put_api_key(f"hash-{i}", _entry(f"key-{i}"))
+        assert cache.get_api_key("hash-0") is None
+        assert cache.get_api_key("hash-2") is not None
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = AuthCache(enabled=False)
+        cache.put_api_key("hash-1", _entry())
+        cache.put_role("user-1", "org-1", "admin")
+        assert cache.get_api_key("hash-1") is None
+        assert cache.get_role("user-1", "org-1") is None
+
+
+@pytest.mark.unit
+class TestMembershipRole:
+    def test_role_is_cached_until_invalidated(self, cache):
+        db = _FakeDB("member")
+        assert asyncio.run(get_membership_role(db, "user-1", "org-1")) == "member"
+        assert asyncio.run(get_membership_role(db, "user-1", "org-1")) == "member"
+        assert db.calls == 1
+
+        db.role = "admin"
+        cache.invalidate_membership("user-1", "org-1")
+        assert asyncio.run(get_membership_role(db, "user-1", "org-1")) == "admin"
+        assert db.calls == 2
+
+    def test_non_members_are_not_cached(self, cache):
+        db = _FakeDB(None)
+        assert asyncio.run(get_membership_role(db, "user-1", "org-1")) is None
+        db.role = "member"
+        assert asyncio.run(get_membership_role(db, "user-1", "org-1")) == "member"
+        assert db.calls == 2
+
+
+@pytest.mark.unit
+class TestLastUsedFlush:
+    def test_touches_are_flushed_in_one_statement(self, cache):
+        cache.touch("key-1")
+        cache.touch("key-2")
+        cache.touch("key-1")
+        session = _RecordingSession()
+        assert asyncio.run(flush_api_key_last_used(lambda: session)) == 2
+        assert len(session.executed) == 1
+        assert {row["id"] for row in session.executed[0]} == {"key-1", "key-2"}
+        assert session.committed
+        assert asyncio.run(flush_api_key_last_used(lambda: session)) == 0
+
+    def test_failed_flush_keeps_newer_timestamps(self, cache):
+        cache.touch("key-1")
+        assert asyncio.run(flush_api_key_last_used(lambda: _RecordingSession(fail=True))) == 0
+        pending = cache.take_last_used()
+        assert set(pending) == {"key-1"}
@@ -0,0 +1,161 @@
+"""Unit tests for the shared headless browser pool (Playwright is faked)."""
+
+import asyncio
+
+import pytest
+
+from app.services.browser_pool import BrowserPool, BrowserPoolBusy
+
+
+class _FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def set_viewport_size(self, viewport):
+        pass
+
+    async def set_content(self, html, wait_until=None):
+        self.html = html
+
+    async def wait_for_function(self, expression, timeout=None):
+        if self.browser.never_ready:
+            raise TimeoutError("not ready")
+
+    async def evaluate(self, expression):
+        return True
+
+    async def screenshot(self, **kwargs):
+        self.browser.open_pages += 1
+        self.browser.peak_pages = max(self.browser.peak_pages, self.browser.open_pages)
+        await asyncio.sleep(0.01)
+        self.browser.open_pages -= 1
+        return b"png:" + self.html.encode()
+
+    async def close(self):
+        pass
+
+
+class _FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def new_page(self):
+        return _FakePage(self.browser)
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+        self.open_pages = 0
+        self.peak_pages = 0
+        self.never_ready = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        context = _FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+class _FakePlaywright:
+    async def stop(self):
+        pass
+
+
+class _Pool(BrowserPool):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.browsers = []
+        self.never_ready = False
+
+    async def _launch(self):
+        browser = _FakeBrowser()
+        browser.never_ready = self.never_ready
+        self.browsers.append(browser)
+        return _FakePlaywright(), browser
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.unit
+class TestBrowserPool:
+    def test_browser_and_contexts_are_reused(self):
+        pool = _Pool(max_concurrency=2)
+
+        async def render():
+            return [await pool.screenshot(f"<p>{i}</p>") for i in range(5)]
+
+        assert _run(render())[-1] == b"png:<p>4</p>"
+        assert pool.stats()["launches"] == 1
+        assert len(pool.browsers[0].contexts) == 1
+
+    def test_concurrency_is_bounded(self):
+        pool = _Pool(max_concurrency=2)
+
+        async def render():
+            await asyncio.gather(*(pool.screenshot(f"<p>{i}</p>") for i in range(8)))
+
+        _run(render())
+        assert pool.browsers[0].peak_pages == 2
+        assert len(pool.browsers[0].contexts) == 2
+
+    def test_full_queue_rejects(self):
+        pool = _Pool(max_concurrency=1, max_queue=1)
+
+        async def render():
+            return await asyncio.gather(*(pool.screenshot("<p/>") for _ in range(3)), return_exceptions=True)
+
+        results = _run(render())
+        assert sum(isinstance(r, BrowserPoolBusy) for r in results) == 1
+        assert pool.stats()["rejected"] == 1
+
+    def test_contexts_are_recycled_after_max_uses(self):
+        pool = _Pool(max_concurrency=1, context_max_uses=2)
+
+        async def render():
+            for _ in range(5):
+                await pool.screenshot("<p/>")
+
+        _run(render())
+        contexts = pool.browsers[0].contexts
+        assert len(contexts) == 3
+        assert [c.closed for c in contexts] == [True, True, False]
+
+    def test_disconnected_browser_is_relaunched(self):
+        pool = _Pool()
+
+        async def render():
+            await pool.screenshot("<p/>")
+            pool.browsers[0].connected = False
+            await pool.screenshot("<p/>")
+
+        _run(render())
+        assert pool.stats()["launches"] == 2
+
+    def test_missing_render_signal_still_screenshots(self):
+        pool = _Pool(render_timeout=0.01)
+        pool.never_ready = True
+        assert _run(pool.screenshot("<p/>")) == b"png:<p/>"
+
+    def test_idle_browser_is_closed(self):
+        pool = _Pool(idle_timeout=0)
+
+        async def render():
+            await pool.screenshot("<p/>")
+            return await pool.close_if_idle()
+
+        assert _run(render()) is True
+        assert not pool.browsers[0].connected
+        assert pool.stats()["running"] is False
@@ -0,0 +1,157 @@
+"""Unit tests for the generated-code execution pool."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.ai.code_execution.execution_pool import CodeExecutionCancelled, CodeExecutionPool
+
+
+@pytest.mark.unit
+class TestCodeExecutionPool:
+    def test_runs_off_the_event_loop_thread(self):
+        pool = CodeExecutionPool(max_workers=2)
+
+        async def main():
+            loop_thread = threading.get_ident()
+            worker_thread = await pool.run(threading.get_ident)
+            return loop_thread, worker_thread
+
+        loop_thread, worker_thread = asyncio.run(main())
+        assert loop_thread != worker_thread
+        stats = pool.stats()
+        assert stats["completed"] == 1
+        assert stats["queued"] == 0 and stats["running"] == 0
+        pool.shutdown()
+
+    def test_event_loop_stays_responsive(self):
+        pool = CodeExecutionPool(max_workers=1)
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            await pool.run(time.sleep, 0.2)
+            task.cancel()
+            return ticks
+
+        assert asyncio.run(main()) >= 5
+        pool.shutdown()
+
+    def test_per_organization_limit(self):
+        pool = CodeExecutionPool(max_workers=4, per_organization_limit=1)
+        active = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def job():
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+
+        async def main():
+            await asyncio.gather(*(pool.run(job, organization_id="org-1") for _ in range(3)))
+
+        asyncio.run(main())
+        assert active["peak"] == 1
+        assert pool.stats()["completed"] == 3
+        pool.shutdown()
+
+    def test_sigkill_cancels_waiting_job(self):
+        pool = CodeExecutionPool(max_workers=1, per_organization_limit=1)
+
+        async def main():
+            sigkill = asyncio.Event()
+            first = asyncio.create_task(pool.run(time.sleep, 0.2, organization_id="org-1"))
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(pool.run(time.sleep, 0.2, organization_id="org-1", sigkill_event=sigkill))
+            await asyncio.sleep(0.01)
+            sigkill.set()
+            with pytest.raises(CodeExecutionCancelled):
+                await second
+            await first
+
+        asyncio.run(main())
+        stats = pool.stats()
+        assert stats["cancelled"] == 1
+        assert stats["completed"] == 1
+        assert stats["queued"] == 0
+        pool.shutdown()
+
+    def test_cancelled_caller_keeps_org_slot_until_thread_ends(self):
+        pool = CodeExecutionPool(max_workers=2, per_organization_limit=1)
+        timeline = []
+
+        def job(name, seconds):
+            timeline.append((name, "start", time.monotonic()))
+            time.sleep(seconds)
+            timeline.append((name, "end", time.monotonic()))
+
+        async def main():
+            first = asyncio.create_task(pool.run(job, "first", 0.2, organization_id="org-1"))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            await pool.run(job, "second", 0, organization_id="org-1")
+
+        asyncio.run(main())
+        at = {(name, event): when for name, event, when in timeline}
+        assert at[("second", "start")] >= at[("first", "end")]
+        stats = pool.stats()
+        assert stats["cancelled"] == 1 and stats["completed"] == 2
+        assert stats["queued"] == 0 and stats["running"] == 0
+        pool.shutdown()
+
+    def test_cancelled_caller_drops_job_that_has_not_started(self):
+        pool = CodeExecutionPool(max_workers=1)
+        ran = []
+
+        async def main():
+            busy = asyncio.create_task(pool.run(time.sleep, 0.1))
+            await asyncio.sleep(0.01)
+            waiting = asyncio.create_task(pool.run(ran.append, "waiting"))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            await busy
+
+        asyncio.run(main())
+        assert ran == []
+        stats = pool.stats()
+        assert stats["cancelled"] == 1 and stats["queued"] == 0
+        pool.shutdown()
+
+    def test_exceptions_propagate(self):
+        pool = CodeExecutionPool(max_workers=1)
+
+        def boom():
+            raise ValueError("bad code")
+
+        with pytest.raises(ValueError):
+            asyncio.run(pool.run(boom))
+        assert pool.stats()["failed"] == 1
+        pool.shutdown()
+
+    def test_inline_mode(self):
+        pool = CodeExecutionPool()
+        pool.configure(mode="inline")
+
+        async def main():
+            return threading.get_ident(), await pool.run(threading.get_ident)
+
+        loop_thread, run_thread = asyncio.run(main())
+        assert loop_thread == run_thread
+        with pytest.raises(ValueError):
+            pool.configure(mode="process")
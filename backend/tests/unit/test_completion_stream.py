@@ -0,0 +1,196 @@
+"""Unit tests for resumable completion event logs."""
+
+import asyncio
+
+import pytest
+
+from app.schemas.sse_schema import SSEEvent, format_sse_event
+from app.streaming.completion_stream import (
+    CompletionEventQueue,
+    CompletionStreamRegistry,
+    EventLogGap,
+    stream_sse,
+)
+from app.websocket_pubsub import InProcessPubSub, LocalBus
+
+
+def _event(n):
+    return SSEEvent(event="block.delta.token", data={"token": str(n)})
+
+
+async def _collect(log, after_id=0):
+    return [(event_id, event.data["token"]) async for event_id, event in log.subscribe(after_id)]
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.unit
+class TestCompletionEventQueue:
+    def test_concurrent_subscribers_see_every_event(self):
+        async def scenario():
+            log = CompletionEventQueue()
+            readers = [asyncio.create_task(_collect(log)) for _ in range(3)]
+            await asyncio.sleep(0)
+            for n in range(5):
+                await log.put(_event(n))
+                await asyncio.sleep(0)
+            log.finish()
+            return await asyncio.gather(*readers)
+
+        expected = [(n + 1, str(n)) for n in range(5)]
+        assert _run(scenario()) == [expected] * 3
+
+    def test_resume_after_last_event_id(self):
+        async def scenario():
+            log = CompletionEventQueue()
+            for n in range(5):
+                log.append(_event(n))
+            log.finish()
+            return await _collect(log, after_id=3)
+
+        assert _run(scenario()) == [(4, "3"), (5, "4")]
+
+    def test_subscriber_behind_ring_buffer_gets_gap(self):
+        async def scenario():
+            log = CompletionEventQueue(max_events=3)
+            for n in range(5):
+                log.append(_event(n))
+            log.finish()
+            assert await _collect(log, after_id=2) == [(3, "2"), (4, "3"), (5, "4")]
+            with pytest.raises(EventLogGap):
+                await _collect(log, after_id=1)
+
+        _run(scenario())
+
+    def test_heartbeat_while_idle(self):
+        async def scenario():
+            log = CompletionEventQueue()
+            frames = []
+
+            async def read():
+                async for frame in stream_sse(log, heartbeat=0.01):
+                    frames.append(frame)
+
+            reader = asyncio.create_task(read())
+            await asyncio.sleep(0.05)
+            log.append(_event(0))
+            log.finish()
+            await reader
+            return frames
+
+        frames = _run(scenario())
+        assert frames[0] == ": keep-alive\n\n"
+        assert any(frame.startswith("id: 1\nevent: block.delta.token\n") for frame in frames)
+        assert frames[-1] == "data: [DONE]\n\n"
+
+    def test_gap_is_reported_as_resync(self):
+        async def scenario():
+            log = CompletionEventQueue(max_events=1)
+            log.append(_event(0))
+            log.append(_event(1))
+            log.finish()
+            return [frame async for frame in stream_sse(log, after_id=0, heartbeat=None)]
+
+        frames = _run(scenario())
+        assert frames[0].startswith("event: completion.resync\n")
+        assert frames[-1] == "data: [DONE]\n\n"
+
+
+@pytest.mark.unit
+class TestCompletionStreamRegistry:
+    def test_registered_under_both_ids_and_evicted_after_retention(self):
+        registry = CompletionStreamRegistry(retention=0)
+        log = registry.create(["user-completion", "system-completion"])
+        assert registry.get("user-completion") is log
+        assert registry.get("system-completion") is log
+
+        assert registry.evict_finished() == 0  # still running
+        log.finish()
+        assert registry.evict_finished() == 2
+        assert registry.get("system-completion") is None
+
+
+    def test_other_worker_resumes_from_relayed_log(self):
+        async def scenario():
+            bus = LocalBus()
+            agent_worker = CompletionStreamRegistry()
+            other_worker = CompletionStreamRegistry()
+            await agent_worker.start_relay(InProcessPubSub(bus))
+            await other_worker.start_relay(InProcessPubSub(bus))
+            try:
+                log = agent_worker.create(["user-completion", "system-completion"])
+                for n in range(5):
+                    log.append(_event(n))
+                await asyncio.sleep(0.01)
+
+                mirror = other_worker.get("system-completion")
+                assert mirror is not None and mirror is other_worker.get("user-completion")
+                reader = asyncio.create_task(_collect(mirror, after_id=3))
+                log.append(_event(5))
+                log.finish()
+                resumed = await asyncio.wait_for(reader, timeout=1)
+                # The agent worker does not mirror its own log
+                assert agent_worker.get("user-completion") is log and not log.mirror
+                return resumed
+            finally:
+                await agent_worker.stop_relay()
+                await other_worker.stop_relay()
+
+        assert _run(scenario()) == [(4, "3"), (5, "4"), (6, "5")]
+
+    def test_mirror_that_missed_events_resyncs(self):
+        async def scenario():
+            mirror = CompletionEventQueue()
+            mirror.append(_event(0), event_id=1)
+            mirror.append(_event(0), event_id=1)  # duplicate is ignored
+            mirror.append(_event(3), event_id=4)
+            mirror.finish()
+            assert await _collect(mirror, after_id=3) == [(4, "3")]
+            with pytest.raises(EventLogGap):
+                await _collect(mirror, after_id=1)
+
+        _run(scenario())
+
+
+def _token(text, block_id="b1", field="content"):
+    return SSEEvent.internal("block.delta.token", data={"block_id": block_id, "field": field, "token": text})
+
+
+@pytest.mark.unit
+class TestBacklogCoalescing:
+    def _frames(self, log, **kwargs):
+        async def scenario():
+            return [frame async for frame in stream_sse(log, heartbeat=None, **kwargs)]
+
+        return _run(scenario())
+
+    def test_lagging_subscriber_gets_merged_token_frames(self):
+        log = CompletionEventQueue()
+        for text in ("Hel", "lo", " wor", "ld"):
+            log.append(_token(text))
+        log.append(SSEEvent(event="block.delta.text.complete", data={"block_id": "b1"}))
+        log.append(_token("!", field="reasoning"))
+        log.finish()
+
+        frames = self._frames(log)
+        assert len(frames) == 4
+        assert frames[0].startswith("id: 4\nevent: block.delta.token\n")
+        assert '"token":"Hello world"' in frames[0]
+        assert frames[1].startswith("id: 5\nevent: block.delta.text.complete\n")
+        assert frames[2].startswith("id: 6\n") and '"token":"!"' in frames[2]
+
+    def test_merge_is_bounded_and_can_be_disabled(self):
+        log = CompletionEventQueue()
+        for text in ("aa", "bb", "cc", "dd"):
+            log.append(_token(text))
+        log.finish()
+
+        assert len(self._frames(log, coalesce_bytes=4)) == 3  # "aabb", "ccdd", [DONE]
+        assert len(self._frames(log, coalesce_bytes=0)) == 5
+
+    def test_payload_is_encoded_once(self):
+        event = _token("x")
+        assert event.payload() is event.payload()
+        assert format_sse_event(event, event_id="7") == f"id: 7\nevent: block.delta.token\ndata: {event.payload()}\n\n"
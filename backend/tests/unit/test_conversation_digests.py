@@ -0,0 +1,96 @@
+"""Unit tests for the per-completion conversation digests used by MessageContextBuilder."""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai.context.builders.conversation_digests import (
+    CompletionDigestEntry,
+    is_final,
+    system_fingerprint,
+    system_text,
+    tool_digest,
+    user_text,
+)
+
+
+def _tool(name="create_data", status="success", result_json=None, **kwargs):
+    fields = dict(
+        id="t1", tool_name=name, tool_action=None, status=status, result_json=result_json,
+        arguments_json={}, error_message=None, created_widget_id=None, created_step_id=None, result_summary=None,
+    )
+    fields.update(kwargs)
+    return SimpleNamespace(**fields)
+
+
+def _block(reasoning=None, content=None, tool_execution_id=None):
+    return SimpleNamespace(reasoning=reasoning, content=content, tool_execution_id=tool_execution_id)
+
+
+def _completion(role="system", status="success", completion=None, prompt=None):
+    return SimpleNamespace(
+        id="c1", role=role, status=status, completion=completion, prompt=prompt,
+        updated_at=datetime(2026, 1, 1, 12, 0),
+    )
+
+
+@pytest.mark.unit
+class TestToolDigest:
+    def test_create_data_digest_respects_data_visibility(self):
+        tool = _tool(result_json={
+            "data": {"columns": [{"field": "a"}, {"field": "b"}], "rows": [{"a": 1, "b": 2}]},
+            "data_model": {"type": "bar_chart"},
+            "created_visualization_ids": ["v1"],
+        })
+        assert tool_digest(tool, True) == (
+            'Tool: create_data (success) - 1 rows × 2 cols; cols: a, b; top row: {"a": 1, "b": 2}; chart: bar_chart; viz_id: v1'
+        )
+        assert "top row" not in tool_digest(tool, False)
+
+    def test_describe_tables_reads_names_from_excerpt(self):
+        tool = _tool("describe_tables", result_json={"schemas_excerpt": '<table name="orders"/><table x="1" name="users"/>'})
+        assert tool_digest(tool, True) == "Tool: describe_tables (success) - tables: orders, users"
+
+    def test_widget_fallback_only_with_titles(self):
+        tool = _tool("modify_widget", result_json={}, created_widget_id="w1")
+        assert tool_digest(tool, True) == "Tool: modify_widget (success)"
+        assert tool_digest(tool, True, widget_titles={"w1": "Revenue"}, step_titles={}) == "Tool: modify_widget (success) - Widget: 'Revenue'"
+        assert tool_digest(tool, True, widget_titles={}, step_titles={}) == "Tool: modify_widget (success) - Widget #w1"
+
+    def test_error_is_truncated(self):
+        tool = _tool(status="error", error_message="x" * 80)
+        assert tool_digest(tool, True) == f"Tool: create_data (error) - Error: {'x' * 50}..."
+
+
+@pytest.mark.unit
+class TestSystemText:
+    def test_blocks_and_tools_are_joined(self):
+        tools = {"t1": _tool("answer_question", result_json={"answer": "42"})}
+        blocks = [_block(reasoning=" thinking "), _block(content="Done", tool_execution_id="t1")]
+        assert system_text(_completion(), blocks, tools, True) == (
+            "Thinking: thinking | Response: Done | Tool: answer_question (success) - AI answer: 42"
+        )
+
+    def test_falls_back_to_completion_payload(self):
+        completion = _completion(completion={"content": " hello "})
+        assert system_text(completion, [], {}, True) == "Response: hello"
+        assert system_text(_completion(completion={}), [], {}, True) is None
+
+
+@pytest.mark.unit
+class TestDigestEntry:
+    def test_text_without_data_is_used_only_when_hidden(self):
+        entry = CompletionDigestEntry("c1", "system", "fp", text="with rows", text_without_data="without rows")
+        assert entry.text_for(True) == "with rows"
+        assert entry.text_for(False) == "without rows"
+        same = CompletionDigestEntry("c1", "system", "fp", text="no data here")
+        assert same.text_for(False) == "no data here"
+
+    def test_finality_and_fingerprints(self):
+        assert is_final(_completion(role="user", status="in_progress"))
+        assert not is_final(_completion(status="in_progress"))
+        assert is_final(_completion(status="stopped"))
+        completion = _completion()
+        assert system_fingerprint(completion, 2, "a", None) != system_fingerprint(completion, 3, "a", None)
+        assert user_text(_completion(role="user", prompt={"content": "  hi "})) == "hi"
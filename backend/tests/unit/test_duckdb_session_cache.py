@@ -0,0 +1,120 @@
+"""Unit tests for warm DuckDB sessions used by file-backed data sources."""
+
+import os
+import threading
+
+import pytest
+
+from app.data_sources.clients.duckdb_client import DuckDBClient
+from app.data_sources.clients.duckdb_session_cache import DuckDBSessionCache, duckdb_session_cache
+
+
+@pytest.fixture
+def sales_csv(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text("amount,region\n1,eu\n2,us\n")
+    return path
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(tmp_path):
+    original_dir = duckdb_session_cache.cache_dir
+    duckdb_session_cache.cache_dir = str(tmp_path / "duckdb_cache")
+    yield
+    duckdb_session_cache.clear()
+    duckdb_session_cache.cache_dir = original_dir
+
+
+def _client(uris, scope="conn-1", **kwargs):
+    client = DuckDBClient(uris=str(uris), **kwargs)
+    client.engine_scope = scope
+    return client
+
+
+@pytest.mark.unit
+class TestDuckDBWarmSessions:
+    def test_session_is_reused_across_queries(self, sales_csv):
+        client = _client(sales_csv)
+        assert client.execute_query("SELECT SUM(amount) AS s FROM sales")["s"][0] == 3
+        session = next(iter(duckdb_session_cache._sessions.values()))
+        assert client.execute_query("SELECT COUNT(*) AS n FROM sales")["n"][0] == 2
+        assert next(iter(duckdb_session_cache._sessions.values())) is session
+        assert [t.name for t in client.get_tables()] == ["sales"]
+
+    def test_local_files_are_materialized_by_default(self, sales_csv):
+        client = _client(sales_csv)
+        kinds = client.execute_query(
+            "SELECT table_type FROM information_schema.tables WHERE table_name = 'sales'"
+        )["table_type"].tolist()
+        assert kinds == ["BASE TABLE"]
+        views = _client(sales_csv, scope="conn-2", materialize="none").execute_query(
+            "SELECT table_type FROM information_schema.tables WHERE table_name = 'sales'"
+        )["table_type"].tolist()
+        assert views == ["VIEW"]
+
+    def test_file_change_rebuilds_session(self, sales_csv):
+        client = _client(sales_csv)
+        assert client.execute_query("SELECT COUNT(*) AS n FROM sales")["n"][0] == 2
+        with open(sales_csv, "a") as f:
+            f.write("3,apac\n")
+        os.utime(sales_csv, ns=(1, 10**18))
+        assert client.execute_query("SELECT COUNT(*) AS n FROM sales")["n"][0] == 3
+        assert len(duckdb_session_cache) == 1
+
+    def test_glob_file_set_change_rebuilds_session(self, tmp_path):
+        folder = tmp_path / "orders"
+        folder.mkdir()
+        (folder / "a.csv").write_text("amount\n1\n")
+        client = _client(folder / "*.csv")
+        assert client.execute_query("SELECT COUNT(*) AS n FROM orders")["n"][0] == 1
+        (folder / "b.csv").write_text("amount\n2\n3\n")
+        assert client.execute_query("SELECT COUNT(*) AS n FROM orders")["n"][0] == 3
+        (folder / "a.csv").unlink()
+        assert client.execute_query("SELECT COUNT(*) AS n FROM orders")["n"][0] == 2
+        assert len(duckdb_session_cache) == 1
+
+    def test_file_materialization_and_invalidation(self, sales_csv):
+        client = _client(sales_csv, materialize="file")
+        assert client.execute_query("SELECT COUNT(*) AS n FROM sales")["n"][0] == 2
+        cache_files = os.listdir(duckdb_session_cache.cache_dir)
+        assert len(cache_files) == 1 and cache_files[0].endswith(".duckdb")
+        assert duckdb_session_cache.invalidate("conn-1") == 1
+        assert os.listdir(duckdb_session_cache.cache_dir) == []
+
+    def test_concurrent_queries(self, sales_csv):
+        client = _client(sales_csv)
+        errors = []
+
+        def run():
+            try:
+                for _ in range(10):
+                    client.execute_query("SELECT SUM(amount) FROM sales")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert len(duckdb_session_cache) == 1
+
+    def test_invalid_materialize_mode(self, sales_csv):
+        with pytest.raises(ValueError):
+            DuckDBClient(uris=str(sales_csv), materialize="disk")
+
+
+@pytest.mark.unit
+class TestDuckDBSessionCacheLRU:
+    def test_lru_bound(self, tmp_path):
+        cache = DuckDBSessionCache(max_sessions=1)
+        a = _client(tmp_path / "a.csv", scope="a")
+        b = _client(tmp_path / "b.csv", scope="b")
+        for name in ("a.csv", "b.csv"):
+            (tmp_path / name).write_text("x\n1\n")
+        first = cache.get_or_create(("a",), (), lambda: a._build_session("fa", ()))
+        cache.get_or_create(("b",), (), lambda: b._build_session("fb", ()))
+        assert len(cache) == 1
+        assert cache.get_or_create(("a",), (), lambda: a._build_session("fa", ())) is not first
+        cache.clear()
@@ -0,0 +1,64 @@
+"""Unit tests for the pooled data source engine registry."""
+
+import pytest
+from sqlalchemy import text
+
+from app.data_sources.clients.engine_registry import EngineRegistry
+
+
+@pytest.fixture
+def sqlite_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'pool.db'}"
+
+
+@pytest.mark.unit
+class TestEngineRegistry:
+    def test_engine_is_reused_for_same_url(self, sqlite_url):
+        registry = EngineRegistry()
+        first = registry.get_engine(sqlite_url, scope="conn-1")
+        second = registry.get_engine(sqlite_url, scope="conn-1")
+        assert first is second
+        assert len(registry) == 1
+        with first.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+
+    def test_session_key_and_scope_separate_engines(self, sqlite_url):
+        registry = EngineRegistry()
+        base = registry.get_engine(sqlite_url, scope="conn-1")
+        assert registry.get_engine(sqlite_url, scope="conn-2") is not base
+        assert registry.get_engine(sqlite_url, scope="conn-1", session_key="public") is not base
+        assert len(registry) == 3
+
+    def test_invalidate_drops_only_matching_scope(self, sqlite_url, tmp_path):
+        registry = EngineRegistry()
+        registry.get_engine(sqlite_url, scope="conn-1")
+        registry.get_engine(f"sqlite:///{tmp_path / 'other.db'}", scope="conn-1")
+        kept = registry.get_engine(sqlite_url, scope="conn-2")
+        assert registry.invalidate("conn-1") == 2
+        assert len(registry) == 1
+        assert registry.get_engine(sqlite_url, scope="conn-2") is kept
+
+    def test_lru_bound(self, tmp_path):
+        registry = EngineRegistry(max_engines=2)
+        urls = [f"sqlite:///{tmp_path / f'db{i}.db'}" for i in range(3)]
+        first = registry.get_engine(urls[0])
+        registry.get_engine(urls[1])
+        registry.get_engine(urls[2])
+        assert len(registry) == 2
+        assert registry.get_engine(urls[0]) is not first
+
+    def test_idle_eviction(self, sqlite_url, monkeypatch):
+        registry = EngineRegistry(idle_ttl=10)
+        registry.get_engine(sqlite_url)
+        import app.data_sources.clients.engine_registry as module
+        real_monotonic = module.time.monotonic
+        monkeypatch.setattr(module.time, "monotonic", lambda: real_monotonic() + 60)
+        assert registry.evict_idle() == 1
+        assert len(registry) == 0
+
+    def test_configure_rejects_unknown_option(self):
+        registry = EngineRegistry()
+        registry.configure(pool_size=2, max_overflow=None)
+        assert registry.pool_size == 2
+        with pytest.raises(ValueError):
+            registry.configure(bogus=1)
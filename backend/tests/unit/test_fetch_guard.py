@@ -0,0 +1,112 @@
+"""Unit tests for the row/byte budget applied to generated-code queries."""
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from app.ai.code_execution.code_execution import StreamingCodeExecutor
+from app.data_sources.clients.duckdb_client import DuckDBClient
+from app.data_sources.clients.duckdb_session_cache import duckdb_session_cache
+from app.data_sources.clients.fetch_guard import (
+    FETCH_TRUNCATED_ATTR,
+    FetchBudget,
+    FetchGuard,
+    apply_limit,
+    fetch_guard,
+    read_rows_bounded,
+    read_sql_bounded,
+)
+
+
+@pytest.fixture
+def events_csv(tmp_path):
+    path = tmp_path / "events.csv"
+    path.write_text("id,kind\n" + "".join(f"{i},k{i % 3}\n" for i in range(5000)))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def clean_duckdb_cache(tmp_path):
+    original_dir = duckdb_session_cache.cache_dir
+    duckdb_session_cache.cache_dir = str(tmp_path / "duckdb_cache")
+    yield
+    duckdb_session_cache.clear()
+    duckdb_session_cache.cache_dir = original_dir
+
+
+def _duckdb(uris, scope="conn-1"):
+    client = DuckDBClient(uris=str(uris))
+    client.engine_scope = scope
+    return client
+
+
+@pytest.mark.unit
+class TestFetchGuard:
+    def test_apply_limit_only_touches_unlimited_top_level_queries(self):
+        assert apply_limit("SELECT * FROM t;", 11) == "SELECT * FROM t\nLIMIT 11"
+        assert apply_limit("WITH x AS (SELECT 1 LIMIT 5) SELECT * FROM x -- all", 11).endswith("-- all\nLIMIT 11")
+        assert apply_limit("SELECT * FROM t WHERE s = 'limit'", 11).endswith("LIMIT 11")
+        assert apply_limit("SELECT * FROM t LIMIT 5", 11) is None
+        assert apply_limit("SELECT * FROM t ORDER BY a FETCH FIRST 5 ROWS ONLY", 11) is None
+        assert apply_limit("SELECT TOP 5 * FROM t", 11) is None
+        assert apply_limit("SHOW TABLES", 11) is None
+        assert apply_limit("SELECT 1; SELECT 2", 11) is None
+
+    def test_read_sql_bounded_stops_at_row_budget(self):
+        engine = create_engine("sqlite://")
+        with engine.connect() as conn:
+            pd.DataFrame({"a": range(100), "b": [str(i) for i in range(100)]}).to_sql("t", conn, index=False)
+            budget = FetchBudget(max_rows=25, max_bytes=0, batch_size=10)
+            df = read_sql_bounded(conn, "SELECT a, b FROM t", budget)
+            assert len(df) == 30 and budget.truncated_by == "rows"
+            assert list(df.columns) == ["a", "b"] and str(df["a"].dtype) == "int64"
+
+            budget = FetchBudget(max_rows=1000, max_bytes=0, batch_size=10)
+            assert len(read_sql_bounded(conn, "SELECT a FROM t WHERE a < 0", budget).columns) == 1
+            assert budget.truncated_by is None
+
+    def test_read_rows_bounded_batches_cursor_fetches(self):
+        rows = [(i, str(i)) for i in range(100)]
+        sizes = []
+
+        def fetchmany(size):
+            sizes.append(size)
+            batch, rows[:] = rows[:size], rows[size:]
+            return batch
+
+        budget = FetchBudget(max_rows=25, max_bytes=0, batch_size=10)
+        df = read_rows_bounded(fetchmany, ["a", "b"], budget)
+        assert len(df) == 26 and sizes == [10, 10, 6] and budget.truncated_by == "rows"
+
+        # max_rows=0 is no row cap: everything is fetched in batch_size batches
+        budget = FetchBudget(max_rows=0, max_bytes=0, batch_size=30)
+        df = read_rows_bounded(fetchmany, ["a", "b"], budget)
+        assert len(df) == 74 and budget.truncated_by is None
+        assert list(df.columns) == ["a", "b"] and str(df["a"].dtype) == "int64"
+
+    def test_limit_pushdown_truncates_and_reports(self, events_csv):
+        guard = FetchGuard(max_rows=100)
+        notices = []
+        df = guard.execute(_duckdb(events_csv), "SELECT * FROM events ORDER BY id", notices=notices)
+        assert len(df) == 100 and df["id"].iloc[-1] == 99
+        assert df.attrs[FETCH_TRUNCATED_ATTR] == {"reason": "rows", "rows": 100}
+        assert notices[0]["reason"] == "rows"
+
+        df = guard.execute(_duckdb(events_csv), "SELECT kind, COUNT(*) AS n FROM events GROUP BY kind", notices=notices)
+        assert FETCH_TRUNCATED_ATTR not in df.attrs and len(notices) == 1
+
+    def test_byte_budget_stops_chunked_fetch(self, events_csv):
+        guard = FetchGuard(max_rows=0, max_bytes=1024, batch_size=2048, push_down_limit=False)
+        notices = []
+        df = guard.execute(_duckdb(events_csv), "SELECT * FROM events", notices=notices)
+        assert len(df) == 2048
+        assert notices[0]["reason"] == "bytes"
+
+    def test_truncation_reaches_log_and_widget_info(self, events_csv, monkeypatch):
+        monkeypatch.setattr(fetch_guard, "max_rows", 10)
+        code = "def generate_df(db_clients, excel_files):\n    return db_clients['events'].execute_query('SELECT * FROM events')\n"
+        executor = StreamingCodeExecutor()
+        df, log, queries = executor.execute_code(code=code, ds_clients={"events": _duckdb(events_csv)}, excel_files=[])
+        assert len(df) == 10 and "truncated to 10 rows" in log
+        info = executor.format_df_for_widget(df)["info"]
+        assert info["fetch_truncated"][0]["query"] == "SELECT * FROM events"
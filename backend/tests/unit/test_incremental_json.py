@@ -0,0 +1,91 @@
+"""Unit tests for the incremental JSON parser used by PlannerV2."""
+
+import json
+import random
+
+import pytest
+
+from app.ai.agents.planner.incremental_json import IncrementalJSONParser, JSONDelta
+
+
+DOC = {
+    "analysis_complete": False,
+    "plan_type": "action",
+    "reasoning_message": "Look at \"orders\" first.\nThen join – café ✓ 😀",
+    "assistant_message": "Checking orders",
+    "action": {
+        "name": "create_artifact",
+        "arguments": {"code": "const x = [1, 2, 3];\n" * 20, "limit": 100, "ratio": -1.5e-3, "tags": [], "meta": None, "ok": True},
+    },
+    "final_answer": None,
+}
+
+
+def _feed_in_chunks(text, sizes):
+    parser = IncrementalJSONParser()
+    deltas = []
+    i = 0
+    for size in sizes:
+        deltas.extend(parser.feed(text[i:i + size]))
+        i += size
+    deltas.extend(parser.feed(text[i:]))
+    deltas.extend(parser.finish())
+    return parser, deltas
+
+
+@pytest.mark.unit
+class TestIncrementalJSONParser:
+    @pytest.mark.parametrize("ensure_ascii", [True, False])
+    def test_any_chunking_matches_json_loads(self, ensure_ascii):
+        text = json.dumps(DOC, ensure_ascii=ensure_ascii, indent=1)
+        rng = random.Random(7)
+        for _ in range(25):
+            sizes = [rng.randint(1, 9) for _ in range(len(text) // 3)]
+            parser, _ = _feed_in_chunks(text, sizes)
+            assert parser.error is None
+            assert parser.done
+            assert parser.value == DOC
+
+    def test_partial_value_is_visible_while_streaming(self):
+        parser = IncrementalJSONParser()
+        parser.feed('{"reasoning_message": "Look at ord')
+        assert parser.value == {"reasoning_message": "Look at ord"}
+        parser.feed('ers", "action": {"name": "crea')
+        assert parser.value == {"reasoning_message": "Look at orders", "action": {"name": "crea"}}
+        # Incomplete keys and literals are not exposed
+        parser.feed('te_data"}, "analysis_complete": fal')
+        assert "analysis_complete" not in parser.value
+        parser.feed('se, "plan')
+        assert parser.value["analysis_complete"] is False
+        assert "plan" not in parser.value
+
+    def test_deltas_report_text_and_completed_values(self):
+        parser = IncrementalJSONParser()
+        assert parser.feed('{"assistant_message": "Hel') == [JSONDelta("text", ("assistant_message",), "Hel")]
+        assert parser.feed('lo", "n": 4') == [
+            JSONDelta("text", ("assistant_message",), "lo"),
+            JSONDelta("value", ("assistant_message",), "Hello"),
+        ]
+        assert parser.feed('2, "xs": [1]}') == [
+            JSONDelta("value", ("n",), 42),
+            JSONDelta("value", ("xs", 0), 1),
+            JSONDelta("value", ("xs",), [1]),
+            JSONDelta("value", (), {"assistant_message": "Hello", "n": 42, "xs": [1]}),
+        ]
+        assert parser.done
+
+    def test_leading_fence_and_trailing_text_are_ignored(self):
+        parser, _ = _feed_in_chunks('```json\n{"a": [1, 2]}\n```', [3, 5, 4])
+        assert parser.value == {"a": [1, 2]}
+        assert parser.error is None
+
+    def test_split_unicode_escape_and_surrogate_pair(self):
+        parser, _ = _feed_in_chunks('{"s": "x\\u00e9\\ud83d\\ude00y"}', [8, 2, 5, 7])
+        assert parser.value == {"s": "xé😀y"}
+
+    def test_malformed_input_sets_error_and_keeps_prefix(self):
+        parser = IncrementalJSONParser()
+        parser.feed('{"a": 1, "b": oops}')
+        assert parser.error
+        assert parser.value == {"a": 1}
+        assert parser.feed('{"c": 2}') == []
@@ -0,0 +1,104 @@
+"""Unit tests for the compiled instruction build index."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai.context.builders.instruction_build_index import (
+    BuildIndexCache,
+    compile_build_index,
+    extract_keywords,
+    searchable_text,
+)
+
+
+STOPWORDS = {"the", "of", "for", "by", "show", "me"}
+
+
+def _row(n, text, load_mode="intelligent", title=None, structured_data=None):
+    return SimpleNamespace(
+        instruction_id=f"inst-{n}",
+        version_id=f"ver-{n}",
+        version_number=1,
+        content_hash=f"hash-{n}",
+        text=text,
+        title=title,
+        load_mode=load_mode,
+        structured_data=structured_data,
+    )
+
+
+def _reference_score(searchable, keywords):
+    """Scan-based scoring the index replaces (Jaccard, or 0.8 x substring hit share)."""
+    searchable_lower = searchable.lower()
+    searchable_keywords = extract_keywords(searchable, STOPWORDS)
+    if not keywords:
+        return 0.0
+    union = len(keywords | searchable_keywords) if searchable_keywords else 1
+    jaccard = len(keywords & searchable_keywords) / union
+    substring = sum(1 for kw in keywords if len(kw) >= 3 and kw in searchable_lower) / len(keywords)
+    return max(jaccard, substring * 0.8)
+
+
+ROWS = [
+    _row(1, "Revenue is recognized net of refunds", title="Revenue"),
+    _row(2, "Use fiscal_quarter for quarterly reporting"),
+    _row(3, "Always answer in English", load_mode="always"),
+    _row(4, "Churned customers: no order in 90 days", structured_data={"name": "customer_churn", "description": "Churn"}),
+    _row(5, "Hidden", load_mode="disabled"),
+    _row(6, "Legacy rows count as always", load_mode=None),
+    _row(7, "Quarterly revenue targets by region"),
+]
+
+
+@pytest.mark.unit
+class TestBuildIndex:
+    def test_always_and_disabled_entries(self):
+        index = compile_build_index("b1", ROWS, STOPWORDS)
+        assert [e.instruction_id for e in index.always] == ["inst-3", "inst-6"]
+        assert [e.instruction_id for e in index.intelligent] == ["inst-1", "inst-2", "inst-4", "inst-7"]
+        assert len(index) == 6
+
+    @pytest.mark.parametrize("query", [
+        "show me revenue by quarter",
+        "churn of customers",
+        "fiscal quarterly",
+        "region",
+        "refund",
+        "nothing matches here",
+    ])
+    def test_rank_matches_scan_scoring(self, query):
+        index = compile_build_index("b1", ROWS, STOPWORDS)
+        keywords = extract_keywords(query, STOPWORDS)
+
+        expected = []
+        for position, row in enumerate(r for r in ROWS if r.load_mode == "intelligent"):
+            score = _reference_score(searchable_text(row.text, row.title, row.structured_data), keywords)
+            if score > 0:
+                expected.append((row.instruction_id, score, position))
+        expected.sort(key=lambda x: (-x[1], x[2]))
+
+        ranked = [(entry.instruction_id, score) for entry, score in index.rank(keywords)]
+        assert ranked == [(inst_id, pytest.approx(score)) for inst_id, score, _ in expected]
+
+    def test_substring_match_inside_joined_words(self):
+        index = compile_build_index("b1", ROWS, STOPWORDS)
+        ranked = index.rank(extract_keywords("quarter", STOPWORDS))
+        # "quarterly" only contains the keyword; both score 0.8 and keep build order
+        assert [(entry.instruction_id, score) for entry, score in ranked] == [("inst-2", 0.8), ("inst-7", 0.8)]
+
+
+@pytest.mark.unit
+class TestBuildIndexCache:
+    def test_lru_bound(self):
+        cache = BuildIndexCache(max_builds=2)
+        for build_id in ("a", "b"):
+            cache.put(compile_build_index(build_id, ROWS, STOPWORDS))
+        assert cache.get("a") is not None  # "b" is now least recently used
+        cache.put(compile_build_index("c", ROWS, STOPWORDS))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        assert len(cache) == 1
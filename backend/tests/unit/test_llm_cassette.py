@@ -0,0 +1,96 @@
+"""Unit tests for LLM cassette record/replay."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.ai.llm.cassette import Cassette, CassetteClient, CassetteMiss, prompt_fingerprint, use_cassette, wrap_client
+from app.ai.llm.clients.base import LLMClient
+from app.ai.llm.types import LLMResponse, LLMUsage
+
+
+class _FakeProvider(LLMClient):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def inference(self, model_id, prompt, images=None):
+        self.calls += 1
+        return LLMResponse(text=f"answer to {prompt}", usage=LLMUsage(prompt_tokens=7, completion_tokens=3))
+
+    async def inference_stream(self, model_id, prompt, images=None):
+        self.calls += 1
+        for chunk in ['{"final_answer": ', '"hel', 'lo"}']:
+            await asyncio.sleep(0.01)
+            yield chunk
+        self._set_last_usage(LLMUsage(prompt_tokens=11, completion_tokens=4))
+
+
+class _Unreachable(LLMClient):
+    def inference(self, model_id, prompt, images=None):
+        raise AssertionError("replay must not call the provider")
+
+    def inference_stream(self, model_id, prompt, images=None):
+        raise AssertionError("replay must not call the provider")
+
+
+async def _collect(client, prompt):
+    return [chunk async for chunk in client.inference_stream(model_id="m", prompt=prompt)]
+
+
+def _record(path):
+    provider = _FakeProvider()
+    with use_cassette(Cassette(str(path), "record")) as cassette:
+        client = wrap_client(provider, "openai")
+        assert client.inference(model_id="m", prompt="title for report 1b4e28ba-2fa1-11d2-883f-0016d3cca427").text
+        assert asyncio.run(_collect(client, "plan at 2025-01-02T10:00:00Z")) == ['{"final_answer": ', '"hel', 'lo"}']
+        assert client.pop_last_usage().completion_tokens == 4
+    assert wrap_client(provider, "openai") is provider
+    return cassette
+
+
+@pytest.mark.unit
+class TestCassette:
+    def test_record_then_replay_from_disk(self, tmp_path):
+        path = tmp_path / "cassette.json"
+        recorded = _record(path)
+        assert recorded.stats()["recorded"] == 2
+
+        cassette = Cassette(str(path), "replay", time_scale=0).load()
+        client = CassetteClient(_Unreachable(), "openai", cassette)
+        # Different run: other report id and timestamp, same fingerprint
+        response = client.inference(model_id="m", prompt="title for report 9f0c3a1e-0000-4000-8000-000000000001")
+        assert response.text == "answer to title for report 1b4e28ba-2fa1-11d2-883f-0016d3cca427"
+        assert client.pop_last_usage().prompt_tokens == 7
+        assert asyncio.run(_collect(client, "plan at 2026-03-04T08:30:00Z")) == ['{"final_answer": ', '"hel', 'lo"}']
+        assert client.pop_last_usage().prompt_tokens == 11
+        assert cassette.stats()["unmatched"] == 0
+
+    def test_unmatched_calls_fall_back_in_order_unless_strict(self, tmp_path):
+        path = tmp_path / "cassette.json"
+        _record(path)
+        assert prompt_fingerprint("openai", "m", "a") != prompt_fingerprint("openai", "m", "b")
+
+        lenient = CassetteClient(_Unreachable(), "openai", Cassette(str(path), time_scale=0).load())
+        assert asyncio.run(_collect(lenient, "a different plan prompt"))[-1] == 'lo"}'
+        with pytest.raises(CassetteMiss):
+            asyncio.run(_collect(lenient, "one call too many"))
+        lenient.cassette.rewind()
+        assert asyncio.run(_collect(lenient, "next benchmark round"))[-1] == 'lo"}'
+
+        strict = CassetteClient(_Unreachable(), "openai", Cassette(str(path), strict=True).load())
+        with pytest.raises(CassetteMiss):
+            strict.inference(model_id="m", prompt="not recorded")
+
+    def test_fixed_token_timing(self, tmp_path):
+        path = tmp_path / "cassette.json"
+        _record(path)
+        cassette = Cassette(str(path), timing="fixed", first_token_ms=50, token_ms=20).load()
+        client = CassetteClient(_Unreachable(), "openai", cassette)
+
+        started = time.monotonic()
+        asyncio.run(_collect(client, "plan at 2025-01-02T10:00:00Z"))
+        assert time.monotonic() - started >= 0.09  # 50 ms + 2 x 20 ms
+        assert cassette.chunk_delays(cassette.interactions[1]) == [0.05, 0.02, 0.02]
+        assert cassette.response_delay(cassette.interactions[0]) == pytest.approx(0.11)  # 50 ms + 3 tokens x 20 ms
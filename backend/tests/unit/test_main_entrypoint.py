@@ -0,0 +1,43 @@
+"""Smoke tests for the API entrypoint: main.py imports and its startup wiring resolves."""
+
+import ast
+import os
+
+import pytest
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "main.py")
+
+
+def _scheduled_job_names():
+    """Names passed as the job callable to ``scheduler.add_job`` in main.py."""
+    with open(MAIN_PATH, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "add_job"
+            and node.args
+            and isinstance(node.args[0], ast.Name)
+        ):
+            names.append(node.args[0].id)
+    return names
+
+
+@pytest.mark.unit
+class TestMainEntrypoint:
+    def test_main_imports(self):
+        import main
+
+        assert main.app is not None
+        assert main.startup_event in main.app.router.on_startup
+        assert main.shutdown_event in main.app.router.on_shutdown
+
+    def test_scheduled_jobs_resolve(self):
+        import main
+
+        names = _scheduled_job_names()
+        assert "prune_slide_preview_store" in names
+        missing = [name for name in names if not callable(getattr(main, name, None))]
+        assert missing == []
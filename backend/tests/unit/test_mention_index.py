@@ -0,0 +1,86 @@
+"""Unit tests for the @-mention search index."""
+
+import pytest
+
+from app.services.mention_index import MentionDoc, MentionIndex, MentionIndexCache, decode_cursor, paginate
+
+
+def _doc(name, rank=0, columns=()):
+    return MentionDoc(id=f"id-{name}", name=name, payload={"name": name}, rank=rank, columns=list(columns))
+
+
+def _names(hits):
+    return [h.doc.name for h in hits]
+
+
+@pytest.mark.unit
+class TestMentionIndex:
+    def test_exact_and_prefix_rank_above_segment_and_substring(self):
+        index = MentionIndex([
+            _doc("sales.orders"),
+            _doc("orders"),
+            _doc("orders_archive"),
+            _doc("preorders"),
+        ])
+        assert _names(index.search("orders")) == ["orders", "orders_archive", "sales.orders", "preorders"]
+
+    def test_usage_breaks_ties(self):
+        index = MentionIndex([_doc("customers", rank=1), _doc("customer_events", rank=50)])
+        assert _names(index.search("cust")) == ["customer_events", "customers"]
+
+    def test_column_matches_report_the_column(self):
+        index = MentionIndex([_doc("payments", columns=["invoice_id", "amount"]), _doc("invoices")])
+        hits = index.search("invoice")
+        assert _names(hits) == ["invoices", "payments"]
+        assert hits[1].matched_columns == ["invoice_id"]
+
+    def test_fuzzy_match_tolerates_typos(self):
+        index = MentionIndex([_doc("subscriptions"), _doc("users")])
+        assert _names(index.search("subscriptoins")) == ["subscriptions"]
+
+    def test_empty_query_returns_everything_by_rank(self):
+        index = MentionIndex([_doc("a", rank=1), _doc("b", rank=3), _doc("c", rank=2)])
+        assert _names(index.search("")) == ["b", "c", "a"]
+
+
+@pytest.mark.unit
+class TestPagination:
+    def test_cursor_walks_all_pages_without_overlap(self):
+        index = MentionIndex([_doc(f"table_{i:02d}", rank=i % 3) for i in range(25)])
+        hits = index.search("table")
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginate(hits, 10, cursor)
+            seen.extend(_names(page))
+            if cursor is None:
+                break
+        assert seen == _names(hits)
+        assert len(set(seen)) == 25
+
+    def test_entity_ranks_keep_cursors_valid_when_entities_are_added(self):
+        from app.services.mention_service import entity_rank
+        entities = [("popular", 5, 1_700_000_000.0), ("newer", 1, 1_750_000_000.0), ("older", 1, 1_600_000_000.0)]
+        docs = [_doc(name, rank=entity_rank(count, created)) for name, count, created in entities]
+        page, cursor = paginate(MentionIndex(docs).search(""), 2, None)
+        assert _names(page) == ["popular", "newer"]
+        # A newly created entity with no mentions must not shift the next page
+        docs.append(_doc("brand_new", rank=entity_rank(0, 1_800_000_000.0)))
+        page, _ = paginate(MentionIndex(docs).search(""), 2, cursor)
+        assert _names(page) == ["older", "brand_new"]
+
+    def test_invalid_cursor_starts_from_the_top(self):
+        hits = MentionIndex([_doc("a"), _doc("b")]).search("")
+        assert decode_cursor("not-a-cursor") is None
+        page, _ = paginate(hits, 1, "not-a-cursor")
+        assert _names(page) == ["a"]
+
+
+@pytest.mark.unit
+class TestMentionIndexCache:
+    def test_revision_mismatch_misses(self):
+        cache = MentionIndexCache()
+        index = MentionIndex([_doc("a")])
+        cache.put("ds-1", None, (0, 1), index)
+        assert cache.get("ds-1", None, (0, 1)) is index
+        assert cache.get("ds-1", "user-1", (0, 1)) is None
+        assert cache.get("ds-1", None, (0, 2)) is None
@@ -0,0 +1,78 @@
+"""Unit tests for the metadata resource search index (tokenizing and BM25 scoring)."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.metadata_search_index import (
+    MAX_TERMS_PER_RESOURCE,
+    bm25_postings,
+    normalize_term,
+    query_terms,
+    resource_fields,
+    term_frequencies,
+    tokenize,
+)
+
+
+def _resource(name, description="", columns=None, sql_content="", path="", resource_type="model"):
+    return SimpleNamespace(
+        name=name,
+        description=description,
+        columns=columns,
+        sql_content=sql_content,
+        path=path,
+        resource_type=resource_type,
+    )
+
+
+def _rank(documents, text):
+    terms = set(query_terms(text))
+    scores = {}
+    for doc_id, term, score in bm25_postings(documents):
+        if term in terms:
+            scores[doc_id] = scores.get(doc_id, 0.0) + score
+    return sorted(scores, key=lambda doc_id: -scores[doc_id])
+
+
+@pytest.mark.unit
+class TestTokenize:
+    def test_identifiers_are_kept_whole_and_split(self):
+        assert tokenize("fct_customer_orders") == ["fct_customer_order", "fct", "customer", "order"]
+        assert tokenize("totalRevenue") == ["totalrevenue", "total", "revenue"]
+
+    def test_plurals_stopwords_and_numbers(self):
+        assert normalize_term("Categories") == "category"
+        assert normalize_term("address") == "address"
+        assert query_terms("Show me the orders by category for 2024 orders") == ["order", "category"]
+
+    def test_sql_comments_and_literals_are_not_indexed(self):
+        fields = resource_fields(_resource("m", sql_content="select id -- secret_note\nfrom t where x = 'literal_value'"))
+        terms = tokenize(fields["sql"])
+        assert "secret_note" not in terms
+        assert "literal_value" not in terms
+        assert "id" in terms
+
+
+@pytest.mark.unit
+class TestBm25:
+    def test_name_match_outranks_description_mention(self):
+        documents = {
+            "orders": term_frequencies(resource_fields(_resource("fct_orders", columns=[{"name": "order_id"}]))),
+            "payments": term_frequencies(resource_fields(_resource("stg_payments", description="payments of an order"))),
+            "customers": term_frequencies(resource_fields(_resource("dim_customers"))),
+        }
+        assert _rank(documents, "how many orders last week") == ["orders", "payments"]
+
+    def test_rare_terms_weigh_more(self):
+        documents = {
+            "a": term_frequencies({"name": "revenue churn"}),
+            "b": term_frequencies({"name": "revenue"}),
+            "c": term_frequencies({"name": "revenue"}),
+        }
+        assert _rank(documents, "churn revenue")[0] == "a"
+
+    def test_terms_per_resource_are_capped(self):
+        fields = {"description": " ".join(f"term{n}x" for n in range(MAX_TERMS_PER_RESOURCE + 50))}
+        assert len(term_frequencies(fields)) == MAX_TERMS_PER_RESOURCE
+        assert list(bm25_postings({})) == []
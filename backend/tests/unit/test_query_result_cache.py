@@ -0,0 +1,126 @@
+"""Unit tests for the data source query result cache."""
+
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from app.ai.code_execution.code_execution import QueryCapturingClientWrapper
+from app.data_sources.clients.query_result_cache import QueryResultCache, normalize_sql
+
+
+class _CountingClient:
+    def __init__(self, scope="conn-1", credential_scope="system", policy=None):
+        self.engine_scope = scope
+        self.credential_scope = credential_scope
+        self.query_cache_policy = policy
+        self.calls = 0
+
+    def execute_query(self, sql):
+        self.calls += 1
+        return pd.DataFrame({"n": [self.calls], "label": ["x"]})
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return QueryResultCache(enabled=True, cache_dir=str(tmp_path / "query_cache"), default_ttl=60)
+
+
+@pytest.mark.unit
+class TestQueryResultCache:
+    def test_normalize_sql_ignores_comments_and_whitespace_only(self):
+        assert normalize_sql("SELECT  a\n  FROM t -- note\n;") == "SELECT a FROM t"
+        assert normalize_sql("SELECT /* x */ 'a  b' FROM t") == "SELECT 'a  b' FROM t"
+        assert normalize_sql("select a from t") != normalize_sql("SELECT a FROM t")
+
+    def test_hit_is_served_from_disk(self, cache):
+        client = _CountingClient()
+        first = cache.execute(client, "SELECT n FROM t")
+        second = cache.execute(client, "SELECT n\n  FROM t;")
+        assert client.calls == 1
+        pd.testing.assert_frame_equal(first, second)
+        assert cache.stats()["hits"] == 1
+
+    def test_scopes_and_policy_separate_entries(self, cache):
+        system = _CountingClient()
+        alice = _CountingClient(credential_scope="user:alice")
+        other_conn = _CountingClient(scope="conn-2")
+        for client in (system, alice, other_conn):
+            cache.execute(client, "SELECT 1")
+        assert (system.calls, alice.calls, other_conn.calls) == (1, 1, 1)
+
+        opted_out = _CountingClient(policy={"enabled": False})
+        cache.execute(opted_out, "SELECT 1")
+        cache.execute(opted_out, "SELECT 1")
+        assert opted_out.calls == 2
+
+    def test_ttl_expiry_and_invalidation(self, cache):
+        client = _CountingClient(policy={"ttl": 1})
+        cache.execute(client, "SELECT 1")
+        path = os.path.join(cache.cache_dir, os.listdir(cache.cache_dir)[0])
+        os.utime(path, (time.time() - 5, time.time() - 5))
+        cache.execute(client, "SELECT 1")
+        assert client.calls == 2
+
+        cache.execute(_CountingClient(scope="conn-2"), "SELECT 1")
+        assert cache.invalidate("conn-1") == 1
+        assert len(os.listdir(cache.cache_dir)) == 1
+
+    def test_evict_enforces_size_budget_oldest_first(self, cache):
+        for i in range(3):
+            cache.execute(_CountingClient(scope=f"conn-{i}"), "SELECT 1")
+            path = max((os.path.join(cache.cache_dir, n) for n in os.listdir(cache.cache_dir)), key=os.path.getmtime)
+            os.utime(path, (time.time() - 30 + i, time.time() - 30 + i))
+        sizes = sorted(os.path.getsize(os.path.join(cache.cache_dir, n)) for n in os.listdir(cache.cache_dir))
+        cache.max_bytes = sum(sizes[:2])
+        assert cache.evict() == 1
+        cache.max_bytes = 0
+        cache.max_age = 10
+        assert cache.evict() == 2
+
+    def test_key_locks_are_released_after_errors_and_waiters(self, cache):
+        class _FailingClient(_CountingClient):
+            def execute_query(self, sql):
+                super().execute_query(sql)
+                raise RuntimeError("warehouse unavailable")
+
+        with pytest.raises(RuntimeError):
+            cache.execute(_FailingClient(), "SELECT n FROM t")
+        assert cache._key_locks == {}
+
+        started = threading.Event()
+        release = threading.Event()
+
+        class _SlowClient(_CountingClient):
+            def execute_query(self, sql):
+                started.set()
+                release.wait(5)
+                return super().execute_query(sql)
+
+        client = _SlowClient()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.execute(client, "SELECT n FROM t"))) for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert client.calls == 1 and len(results) == 3
+        assert cache._key_locks == {}
+
+    def test_capturing_wrapper_goes_through_cache(self, cache, monkeypatch):
+        import app.data_sources.clients.query_result_cache as query_result_cache
+
+        monkeypatch.setattr(query_result_cache, "query_result_cache", cache)
+        client = _CountingClient()
+        captured = []
+        wrapped = QueryCapturingClientWrapper(client, captured)
+        wrapped.execute_query("SELECT 1")
+        wrapped.execute_query("SELECT 1")
+        assert captured == ["SELECT 1", "SELECT 1"]
+        assert client.calls == 1
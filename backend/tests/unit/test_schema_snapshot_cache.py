@@ -0,0 +1,90 @@
+"""Unit tests for the schema snapshot cache used by SchemaContextBuilder."""
+
+import pytest
+
+from app.ai.context.builders.schema_snapshot_cache import (
+    SchemaSnapshot,
+    SchemaSnapshotCache,
+    name_matcher,
+)
+
+
+def _item(name, active=True, columns=None):
+    return {
+        "name": name,
+        "table_id": f"id-{name}",
+        "columns": columns or [{"name": "id", "dtype": "int"}],
+        "pks": [],
+        "fks": [],
+        "is_active": active,
+    }
+
+
+@pytest.fixture
+def snapshot():
+    return SchemaSnapshot([
+        _item("sales.orders"),
+        _item("sales.order_items"),
+        _item("hr.employees", active=False),
+        _item("sales.customers"),
+    ])
+
+
+@pytest.mark.unit
+class TestSchemaSnapshot:
+    def test_no_filter_returns_all_items_in_order(self, snapshot):
+        assert snapshot.select(None, None) is snapshot.items
+
+    def test_exact_prefix_and_regex_lookups_keep_original_order(self, snapshot):
+        names = lambda items: [i["name"] for i in items]
+        assert names(snapshot.select(["sales.customers", "missing"], None)) == ["sales.customers"]
+        assert names(snapshot.select(None, ["^sales.order"])) == ["sales.orders", "sales.order_items"]
+        assert names(snapshot.select(None, ["^sales_"])) == []
+        assert names(snapshot.select(["hr.employees"], ["customers$"])) == ["hr.employees", "sales.customers"]
+
+    def test_invalid_patterns_alone_do_not_filter(self, snapshot):
+        assert snapshot.select(None, ["(unclosed"]) is snapshot.items
+        assert name_matcher(None, ["(unclosed"])("anything")
+
+    def test_name_matcher_agrees_with_index(self, snapshot):
+        match = name_matcher(["hr.employees"], ["^sales.c", "items$"])
+        expected = [i["name"] for i in snapshot.select(["hr.employees"], ["^sales.c", "items$"])]
+        assert [i["name"] for i in snapshot.items if match(i["name"])] == expected
+
+    def test_prompt_parts_memoized_only_for_snapshot_items(self, snapshot):
+        item = snapshot.items[0]
+        assert snapshot.prompt_parts_for(item) is snapshot.prompt_parts_for(item)
+        copy = dict(item)
+        assert snapshot.prompt_parts_for(copy) is not snapshot.prompt_parts_for(item)
+        assert snapshot.prompt_parts_for(copy)[0][0].name == "id"
+
+
+@pytest.mark.unit
+class TestSchemaSnapshotCache:
+    def test_revision_mismatch_is_a_miss(self):
+        cache = SchemaSnapshotCache()
+        cache.put("schema", "ds-1", (0, 10), "snap")
+        assert cache.get("schema", "ds-1", (0, 10)) == "snap"
+        assert cache.get("schema", "ds-1", (0, 11)) is None
+        assert len(cache) == 0
+
+    def test_invalidate_bumps_local_revision_per_kind(self):
+        cache = SchemaSnapshotCache()
+        cache.put("schema", "ds-1", (0,), "schema")
+        cache.put("signals", "ds-1", (0,), "signals")
+        cache.invalidate("ds-1", schema=False)
+        assert cache.local_revision("signals", "ds-1") == 1
+        assert cache.local_revision("schema", "ds-1") == 0
+        assert cache.get("schema", "ds-1", (0,)) == "schema"
+        assert cache.get("signals", "ds-1", (0,)) is None
+
+    def test_ttl_and_lru_bound(self, monkeypatch):
+        cache = SchemaSnapshotCache(max_entries=2, ttl=10)
+        for ds in ("a", "b", "c"):
+            cache.put("schema", ds, (0,), ds)
+        assert len(cache) == 2
+        assert cache.get("schema", "a", (0,)) is None
+        import app.ai.context.builders.schema_snapshot_cache as module
+        real_monotonic = module.time.monotonic
+        monkeypatch.setattr(module.time, "monotonic", lambda: real_monotonic() + 60)
+        assert cache.get("schema", "c", (0,)) is None
@@ -0,0 +1,156 @@
+"""Unit tests for the LibreOffice converter pool and the slide preview store."""
+
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from app.ai.code_execution.slide_previews import (
+    OfficeConversionError,
+    OfficeConverter,
+    SlidePreviewStore,
+    link_or_copy,
+)
+
+
+def _fake_soffice(tmp_path, body='touch "$outdir/$(basename "${src%.*}").pdf"'):
+    """A stand-in ``soffice`` that honours ``--outdir`` and logs its profile argument."""
+    script = tmp_path / "soffice"
+    script.write_text(f"""#!/bin/sh
+echo "$1" >> "{tmp_path}/calls.log"
+while [ $# -gt 0 ]; do
+  case "$1" in
+    --outdir) outdir="$2"; shift ;;
+    -*) ;;
+    *) src="$1" ;;
+  esac
+  shift
+done
+{body}
+""")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+@pytest.mark.unit
+class TestOfficeConverter:
+    def test_subprocess_mode_converts_with_per_slot_profile(self, tmp_path):
+        converter = OfficeConverter(mode="subprocess", soffice_binary=_fake_soffice(tmp_path), profile_dir=str(tmp_path / "profiles"))
+        source = tmp_path / "deck.pptx"
+        source.write_bytes(b"pptx")
+        out_dir = tmp_path / "out"
+        out_dir.mkdir()
+
+        assert converter.convert_to_pdf(source, out_dir) == out_dir / "deck.pdf"
+        assert (out_dir / "deck.pdf").exists()
+        assert "slot-0" in (tmp_path / "calls.log").read_text()
+        assert converter.stats()["conversions"] == 1
+
+    def test_failed_conversion_raises_and_frees_the_slot(self, tmp_path):
+        converter = OfficeConverter(mode="subprocess", soffice_binary=_fake_soffice(tmp_path, "exit 3"), profile_dir=str(tmp_path))
+        source = tmp_path / "deck.pptx"
+        source.write_bytes(b"pptx")
+
+        for _ in range(2):
+            with pytest.raises(OfficeConversionError):
+                converter.convert_to_pdf(source, tmp_path)
+        assert converter.stats()["failed"] == 2
+        assert converter.stats()["idle"] == 1
+
+    def test_conversions_are_queued_behind_busy_instances(self, tmp_path):
+        body = 'sleep 0.2; touch "$outdir/$(basename "${src%.*}").pdf"'
+        converter = OfficeConverter(mode="subprocess", instances=1, soffice_binary=_fake_soffice(tmp_path, body), profile_dir=str(tmp_path))
+        errors = []
+
+        def convert(i):
+            source = tmp_path / f"deck{i}.pptx"
+            source.write_bytes(b"pptx")
+            try:
+                converter.convert_to_pdf(source, tmp_path)
+            except Exception as e:
+                errors.append(e)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=convert, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not errors
+        assert time.monotonic() - started >= 0.6  # one instance → serialized
+        assert converter.stats()["conversions"] == 3
+
+    def test_missing_binary_reports_install_hint(self, tmp_path):
+        converter = OfficeConverter(mode="subprocess", soffice_binary=str(tmp_path / "nope"), profile_dir=str(tmp_path))
+        with pytest.raises(OfficeConversionError, match="LibreOffice not found"):
+            converter.convert_to_pdf(tmp_path / "deck.pptx", tmp_path)
+
+
+@pytest.mark.unit
+class TestSlidePreviewStore:
+    def test_put_and_get_by_hash_and_dpi(self, tmp_path):
+        store = SlidePreviewStore(cache_dir=str(tmp_path / "cache"))
+        rendered = tmp_path / "page-1.png"
+        rendered.write_bytes(b"png")
+
+        cached = store.put_file("abcdef", 150, rendered)
+        assert not rendered.exists()
+        assert store.get("abcdef", 150) == cached
+        assert store.get("abcdef", 300) is None
+
+        target = tmp_path / "slide-01.png"
+        link_or_copy(cached, target)
+        assert target.read_bytes() == b"png"
+
+    def test_prune_removes_least_recently_used(self, tmp_path):
+        store = SlidePreviewStore(cache_dir=str(tmp_path / "cache"), max_bytes=10)
+        for i, name in enumerate(("aa1", "bb2", "cc3")):
+            rendered = tmp_path / f"{name}.png"
+            rendered.write_bytes(b"12345")
+            path = store.put_file(name, 150, rendered)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        assert store.prune() == 1
+        assert store.get("aa1", 150) is None
+        assert store.get("cc3", 150) is not None
+
+
+def _deck(tmp_path, numbered=(), hidden=()):
+    """Four identical text slides; ``numbered`` ones also show a slide-number field."""
+    from pptx import Presentation
+    from pptx.oxml.ns import qn
+    from pptx.util import Inches
+    from lxml import etree
+
+    prs = Presentation()
+    for i in range(4):
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        paragraph = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.paragraphs[0]
+        paragraph.text = "Quarterly revenue"
+        if i in numbered:
+            field = etree.SubElement(paragraph._p, qn("a:fld"), id="{B6F15528-21DE-4FAA-801E-634DDDAF4B2B}", type="slidenum")
+            etree.SubElement(field, qn("a:t")).text = str(i + 1)
+        if i in hidden:
+            slide._element.set("show", "0")
+    path = tmp_path / "deck.pptx"
+    prs.save(str(path))
+    return path
+
+
+@pytest.mark.unit
+class TestSlideFingerprints:
+    def test_identical_slides_share_a_fingerprint(self, tmp_path):
+        from app.ai.code_execution.pptx_executor import slide_fingerprints
+        fingerprints = slide_fingerprints(_deck(tmp_path))
+        assert len(fingerprints) == 4 and len(set(fingerprints)) == 1
+
+    def test_slide_number_fields_include_the_position(self, tmp_path):
+        from app.ai.code_execution.pptx_executor import slide_fingerprints
+        fingerprints = slide_fingerprints(_deck(tmp_path, numbered=(2, 3)))
+        assert fingerprints[0] == fingerprints[1]
+        assert len({fingerprints[1], fingerprints[2], fingerprints[3]}) == 3
+        # A hidden slide drops out of the PDF but still shifts the numbers after it
+        shifted = slide_fingerprints(_deck(tmp_path, numbered=(2, 3), hidden=(0,)))
+        assert shifted == fingerprints[1:]
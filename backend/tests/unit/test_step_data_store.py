@@ -0,0 +1,153 @@
+"""Unit tests for columnar step result storage."""
+
+import io
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from app.services.step_data_store import ARTIFACT_KEY, StepDataStore, StepDataUnavailable, artifact_path
+
+
+def _payload(n_rows):
+    return {
+        "rows": [{"id": i, "name": f"row {i}", "amount": i * 1.5, "flag": None} for i in range(n_rows)],
+        "columns": [
+            {"headerName": "ID", "field": "id"},
+            {"headerName": "Name", "field": "name"},
+            {"headerName": "Amount", "field": "amount"},
+            {"headerName": "Flag", "field": "flag"},
+        ],
+        "loadingColumn": False,
+        "info": {"total_rows": n_rows, "total_columns": 4},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StepDataStore(base_dir=str(tmp_path / "step_data"), inline_rows=10, row_group_size=16)
+
+
+@pytest.mark.unit
+class TestStepDataStore:
+    def test_small_payload_stays_inline(self, store):
+        data = _payload(5)
+        assert store.offload("step-1", data) is data
+        assert store.hydrate(data) is data
+        assert store.row_count(data) == 5
+
+    def test_offload_keeps_preview_and_hydrates(self, store):
+        data = _payload(50)
+        slim = store.offload("step-1", data)
+        assert len(slim["rows"]) == 10
+        assert slim["info"] == data["info"]
+        assert slim[ARTIFACT_KEY]["rows"] == 50
+        assert os.path.exists(slim[ARTIFACT_KEY]["path"])
+        assert store.row_count(slim) == 50
+
+        store.clear_cache()
+        hydrated = store.hydrate(slim)
+        assert ARTIFACT_KEY not in hydrated
+        assert hydrated == data
+
+    def test_read_rows_window_and_projection(self, store):
+        slim = store.offload("step-1", _payload(50))
+        store.clear_cache()
+        page = store.read_rows(slim, offset=14, limit=5, columns=["name"])
+        assert page["rows"] == [{"name": f"row {i}"} for i in range(14, 19)]
+        assert [c["field"] for c in page["columns"]] == ["name"]
+        assert page["total_rows"] == 50
+        assert store.read_rows(slim, offset=48, limit=10)["rows"][-1]["id"] == 49
+        assert store.read_rows(slim, offset=60, limit=10)["rows"] == []
+
+    def test_exports_use_headers(self, store):
+        slim = store.offload("step-1", _payload(20))
+        df = pd.read_csv(io.BytesIO(store.export_csv(slim)))
+        assert list(df.columns) == ["ID", "Name", "Amount", "Flag"]
+        assert len(df) == 20 and df["Amount"].iloc[-1] == 28.5
+        xlsx = pd.read_excel(io.BytesIO(store.export_xlsx(slim)))
+        assert len(xlsx) == 20 and xlsx["Name"].iloc[0] == "row 0"
+
+    def test_mixed_types_stay_inline(self, store):
+        data = _payload(20)
+        data["rows"][3]["name"] = 7
+        assert store.offload("step-1", data) is data
+
+    def test_read_rows_sorted(self, store):
+        slim = store.offload("step-1", _payload(50))
+        store.clear_cache()
+        page = store.read_rows(slim, offset=0, limit=3, columns=["id"], sort="amount", descending=True)
+        assert page["rows"] == [{"id": 49}, {"id": 48}, {"id": 47}]
+        inline = _payload(5)
+        inline["rows"][2]["amount"] = None
+        page = store.read_rows(inline, sort="amount", columns=["id"])
+        assert page["rows"] == [{"id": 0}, {"id": 1}, {"id": 3}, {"id": 4}, {"id": 2}]
+        assert store.read_rows(inline, limit=2, sort="nope")["rows"][1]["id"] == 1
+
+    def test_missing_artifact_is_flagged(self, store):
+        slim = store.offload("step-1", _payload(20))
+        assert store.delete_for_step("step-1") == 1
+        store.clear_cache()
+        hydrated = store.hydrate(slim)
+        assert len(hydrated["rows"]) == 10
+        assert hydrated["info"]["artifact_missing"] is True
+        assert "artifact_missing" not in slim["info"]
+        with pytest.raises(StepDataUnavailable):
+            store.read_rows(slim, offset=0, limit=5)
+        with pytest.raises(StepDataUnavailable):
+            store.export_csv(slim)
+        with pytest.raises(StepDataUnavailable):
+            store.export_xlsx(slim)
+
+    def test_list_artifacts(self, store):
+        step_id = "8c1f6a52-3d2e-4b7a-9f10-2a4b6c8d0e12"
+        first = store.offload(step_id, _payload(20))
+        second = store.offload(step_id, _payload(30))
+        listed = sorted((sid, path) for sid, path, _ in store.list_artifacts())
+        assert listed == sorted([(step_id, artifact_path(first)), (step_id, artifact_path(second))])
+        assert store.delete_path(artifact_path(first)) is True
+        assert store.delete_path(artifact_path(first)) is False
+
+
+def _session(**pending):
+    from app.models.step import _PENDING_ARTIFACTS_KEY
+    entry = {"written": [], "replaced": [], "deleted_steps": []}
+    entry.update(pending)
+    return SimpleNamespace(info={_PENDING_ARTIFACTS_KEY: entry})
+
+
+@pytest.mark.unit
+class TestStepArtifactTransactions:
+    """Artifacts are only removed once the transaction that replaced them has committed."""
+
+    @pytest.fixture(autouse=True)
+    def _use_store(self, store, monkeypatch):
+        monkeypatch.setattr("app.services.step_data_store.step_data_store", store)
+
+    def test_commit_removes_replaced_artifact(self, store):
+        from app.models.step import after_commit_step_artifacts
+        old = store.offload("step-1", _payload(20))
+        new = store.offload("step-1", _payload(30))
+        session = _session(written=[artifact_path(new)], replaced=[old])
+        after_commit_step_artifacts(session)
+        assert not os.path.exists(artifact_path(old))
+        assert os.path.exists(artifact_path(new))
+        assert session.info == {}
+
+    def test_rollback_keeps_committed_artifact(self, store):
+        from app.models.step import after_rollback_step_artifacts
+        old = store.offload("step-1", _payload(20))
+        new = store.offload("step-1", _payload(30))
+        after_rollback_step_artifacts(_session(written=[artifact_path(new)], replaced=[old]))
+        assert os.path.exists(artifact_path(old))
+        assert not os.path.exists(artifact_path(new))
+        store.clear_cache()
+        assert len(store.hydrate(old)["rows"]) == 20
+
+    def test_commit_removes_deleted_step_artifacts(self, store):
+        from app.models.step import after_commit_step_artifacts
+        store.offload("step-1", _payload(20))
+        kept = store.offload("step-2", _payload(20))
+        after_commit_step_artifacts(_session(deleted_steps=["step-1"]))
+        assert [path for _, path, _ in store.list_artifacts()] == [artifact_path(kept)]
@@ -0,0 +1,102 @@
+"""Unit tests for compact, coalesced step WebSocket events."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.step_events import StepEventPublisher, data_version
+from app.websocket_manager import websocket_manager
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    messages = []
+
+    async def fake_broadcast(report_id, message):
+        messages.append((report_id, json.loads(message)))
+
+    monkeypatch.setattr(websocket_manager, "broadcast_to_report", fake_broadcast)
+    return messages
+
+
+def _event(status, **extra):
+    return {"event": "update_step", "id": "s1", "step_id": "s1", "widget_id": "w1", "report_id": "r1", "status": status, **extra}
+
+
+@pytest.mark.unit
+class TestStepEventPublisher:
+    def test_rapid_updates_are_coalesced(self, sent):
+        publisher = StepEventPublisher(window=0.02)
+
+        async def main():
+            publisher.publish(_event("running"), ["code"])
+            publisher.publish(_event("running", data_version="abc"), ["data"])
+            publisher.publish(_event("success"), ["status"])
+            await asyncio.sleep(0.1)
+
+        asyncio.run(main())
+        assert len(sent) == 1
+        report_id, event = sent[0]
+        assert report_id == "r1"
+        assert event["status"] == "success"
+        assert event["changed"] == ["code", "data", "status"]
+        assert event["data_version"] == "abc"
+        assert "data" not in event and "code" not in event
+
+    def test_separate_steps_and_windows(self, sent):
+        publisher = StepEventPublisher(window=0.01)
+
+        async def main():
+            publisher.publish(_event("running"), ["status"])
+            publisher.publish({**_event("running"), "id": "s2", "step_id": "s2"}, ["status"])
+            await asyncio.sleep(0.05)
+            publisher.publish(_event("success"), ["status"])
+            await publisher.flush()
+
+        asyncio.run(main())
+        assert [(e["step_id"], e["status"]) for _, e in sent] == [("s1", "running"), ("s2", "running"), ("s1", "success")]
+
+    def test_data_version(self):
+        assert data_version(None) is None
+        assert data_version({"rows": [1]}) == data_version({"rows": [1]})
+        assert data_version({"rows": [1]}) != data_version({"rows": [2]})
+        assert data_version({"rows": [], "artifact": {"path": "uploads/step_data/s1-0a1b2c3d.parquet"}}) == "0a1b2c3d"
+
+
+@pytest.mark.unit
+class TestStepEventTransactions:
+    """Step hooks only queue events; they are published when the transaction commits."""
+
+    @pytest.fixture
+    def published(self, monkeypatch):
+        events = []
+        monkeypatch.setattr(
+            "app.models.step.step_event_publisher",
+            SimpleNamespace(publish=lambda event, changed: events.append((event["step_id"], list(changed)))),
+        )
+        return events
+
+    def _session(self):
+        return SimpleNamespace(info={"step_events": {
+            "events": [(_event("running"), ["code"]), (_event("success"), ["data", "status"])],
+            "succeeded": [],
+        }})
+
+    def test_commit_publishes_queued_events(self, published):
+        from app.models.step import after_commit_step_events
+
+        session = self._session()
+        after_commit_step_events(session)
+        assert published == [("s1", ["code"]), ("s1", ["data", "status"])]
+        assert session.info == {}
+
+    def test_rollback_drops_queued_events(self, published):
+        from app.models.step import after_commit_step_events, after_rollback_step_events
+
+        session = self._session()
+        after_rollback_step_events(session)
+        after_commit_step_events(session)
+        assert published == []
+        assert session.info == {}
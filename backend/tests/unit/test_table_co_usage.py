@@ -0,0 +1,105 @@
+"""Unit tests for the table co-usage index behind the joins heatmap."""
+
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.exc import IntegrityError
+
+from app.models.organization import Organization  # noqa: F401  (registers FK target)
+from app.models.table_co_usage import TableCoUsage
+from app.services import table_co_usage_service
+from app.services.table_co_usage_service import (
+    apply_co_usage_deltas,
+    co_usage_deltas,
+    rows_for_steps,
+    table_pairs,
+)
+
+
+def _dm(*sources):
+    return {"columns": [{"source": s} for s in sources]}
+
+
+@pytest.fixture
+def connection():
+    engine = create_engine("sqlite://")
+    TableCoUsage.__table__.create(engine)
+    with engine.begin() as conn:
+        yield conn
+
+
+def _totals(conn, day=date(2026, 1, 5)):
+    t = TableCoUsage.__table__
+    rows = conn.execute(
+        select(t.c.table1, t.c.table2, func.sum(t.c.join_count))
+        .where(t.c.org_id == "org-1", t.c.day == day)
+        .group_by(t.c.table1, t.c.table2)
+    ).all()
+    return {(r[0], r[1]): r[2] for r in rows}
+
+
+@pytest.mark.unit
+class TestTableCoUsage:
+    def test_pairs_are_sorted_and_deduplicated(self):
+        dm = _dm("db.orders.id", "SUM(db.payments.amount)", "customers.name", "db.orders.total")
+        assert table_pairs(dm) == {
+            ("customers", "db.orders"),
+            ("customers", "db.payments"),
+            ("db.orders", "db.payments"),
+        }
+        assert table_pairs(_dm("orders.id", "orders.total")) == set()
+        assert table_pairs('{"columns": [{"source": "a.x"}, {"source": "b.y"}]}') == {("a", "b")}
+        assert table_pairs(None) == set()
+
+    def test_deltas_between_versions(self):
+        old = _dm("a.x", "b.y")
+        new = _dm("a.x", "c.z")
+        assert co_usage_deltas(old, new) == {("a", "c"): 1, ("a", "b"): -1}
+        assert co_usage_deltas(None, new) == {("a", "c"): 1, None: 1}
+        assert co_usage_deltas(new, _dm("a.x")) == {("a", "c"): -1, None: -1}
+        assert co_usage_deltas(old, old) == {}
+
+    def test_apply_deltas_upserts_and_decrements(self, connection):
+        day = date(2026, 1, 5)
+        apply_co_usage_deltas(connection, "org-1", day, co_usage_deltas(None, _dm("a.x", "b.y")))
+        apply_co_usage_deltas(connection, "org-1", day, co_usage_deltas(None, _dm("a.x", "b.y")))
+        assert _totals(connection) == {("a", "b"): 2, (None, None): 2}
+
+        apply_co_usage_deltas(connection, "org-1", day, co_usage_deltas(_dm("a.x", "b.y"), _dm("a.x")))
+        assert _totals(connection) == {("a", "b"): 1, (None, None): 1}
+
+    def test_rows_are_unique_per_key(self, connection):
+        day = date(2026, 1, 5)
+        for _ in range(3):
+            apply_co_usage_deltas(connection, "org-1", day, co_usage_deltas(None, _dm("a.x", "b.y", "c.z")))
+        t = TableCoUsage.__table__
+        assert connection.execute(select(func.count()).select_from(t)).scalar() == 4
+        assert _totals(connection) == {("a", "b"): 3, ("a", "c"): 3, ("b", "c"): 3, (None, None): 3}
+
+        for table1 in ("a", None):
+            with pytest.raises(IntegrityError):
+                with connection.begin_nested():
+                    connection.execute(insert(t).values(
+                        id=f"dupe-{table1}", org_id="org-1", day=day, table1=table1, table2="b" if table1 else None, join_count=1,
+                    ))
+
+    def test_update_then_insert_fallback(self, connection, monkeypatch):
+        monkeypatch.setattr(table_co_usage_service, "_supports_upsert", lambda dialect_name: False)
+        day = date(2026, 1, 5)
+        apply_co_usage_deltas(connection, "org-1", day, co_usage_deltas(None, _dm("a.x", "b.y")))
+        apply_co_usage_deltas(connection, "org-1", day, co_usage_deltas(None, _dm("a.x", "b.y")))
+        apply_co_usage_deltas(connection, "org-1", day, co_usage_deltas(_dm("a.x", "b.y"), None))
+        assert _totals(connection) == {("a", "b"): 1, (None, None): 1}
+
+    def test_rows_for_steps_backfill(self):
+        counts = rows_for_steps([
+            ("org-1", datetime(2026, 1, 5, 10), _dm("a.x", "b.y")),
+            ("org-1", "2026-01-05 11:00:00", _dm("b.y", "a.x")),
+            ("org-1", datetime(2026, 1, 6), _dm("a.x")),
+            (None, datetime(2026, 1, 6), _dm("a.x", "b.y")),
+        ])
+        assert counts == {
+            ("org-1", date(2026, 1, 5), ("a", "b")): 2,
+            ("org-1", date(2026, 1, 5), None): 2,
+        }
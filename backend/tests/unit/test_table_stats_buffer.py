@@ -0,0 +1,180 @@
+"""Unit tests for the batched table usage/feedback stats pipeline."""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.organization import Organization  # noqa: F401  (registers FK targets)
+from app.models.report import Report  # noqa: F401
+from app.models.data_source import DataSource  # noqa: F401
+from app.models.datasource_table import DataSourceTable  # noqa: F401
+from app.models.step import Step  # noqa: F401
+from app.models.user import User  # noqa: F401
+from app.models.completion_feedback import CompletionFeedback  # noqa: F401
+from app.models.table_feedback_event import TableFeedbackEvent
+from app.models.table_stats import TableStats
+from app.models.table_usage_event import TableUsageEvent
+from app.services import table_stats_buffer as buffer_module
+from app.services.table_stats_buffer import StatsDelta, TableStatsBuffer, compact_table_stats
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def session_maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+
+    async def create():
+        async with engine.begin() as conn:
+            for model in (TableStats, TableUsageEvent, TableFeedbackEvent):
+                await conn.run_sync(model.__table__.create)
+
+    _run(create())
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def fk_session_maker(tmp_path):
+    """Like ``session_maker`` but with foreign keys enforced and minimal parent tables."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats_fk.db'}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _enable_foreign_keys(dbapi_connection, _record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    parents = {
+        "organizations": "org-1", "reports": "rep-1", "data_sources": "ds-1", "steps": "step-1",
+        "users": "user-1", "datasource_tables": None, "completion_feedbacks": None,
+    }
+
+    async def create():
+        async with engine.begin() as conn:
+            for name, row_id in parents.items():
+                await conn.execute(text(f"CREATE TABLE {name} (id VARCHAR(36) PRIMARY KEY)"))
+                if row_id:
+                    await conn.execute(text(f"INSERT INTO {name} (id) VALUES (:id)"), {"id": row_id})
+            for model in (TableStats, TableUsageEvent, TableFeedbackEvent):
+                await conn.run_sync(model.__table__.create)
+
+    _run(create())
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+def _usage(step_id="step-1", table_fqn="public.orders", ds_id="ds-1"):
+    now = datetime.utcnow()
+    return {
+        "id": f"{step_id}:{table_fqn}", "org_id": "org-1", "report_id": "rep-1", "data_source_id": ds_id,
+        "step_id": step_id, "user_id": "user-1", "table_fqn": table_fqn, "datasource_table_id": None,
+        "source_type": "sql", "columns": [], "success": True, "user_role": "admin", "role_weight": 1.5,
+        "used_at": now, "created_at": now, "updated_at": now,
+    }
+
+
+def _success_delta():
+    return StatsDelta(usage_count=1, success_count=1, weighted_usage_count=1.5, unique_users=1,
+                      trusted_usage_count=1, last_used_at=datetime.utcnow())
+
+
+async def _stats(session_maker):
+    async with session_maker() as session:
+        rows = (await session.execute(select(TableStats))).scalars().all()
+        return {(r.data_source_id, r.table_fqn): r for r in rows}
+
+
+@pytest.mark.unit
+class TestTableStatsBuffer:
+    def test_deltas_are_folded_and_upserted(self, session_maker):
+        buf = TableStatsBuffer()
+        buf.add_usage(_usage("step-1"), ("org-1", "ds-1", "public.orders"), _success_delta())
+        buf.add_usage(_usage("step-2"), ("org-1", "ds-1", "public.orders"), _success_delta())
+        buf.add_usage(_usage("step-3"), ("org-1", "ds-1", "public.orders"), StatsDelta(usage_count=1, failure_count=1))
+        assert _run(buf.flush(session_maker)) == 3
+
+        buf.add_usage(_usage("step-4"), ("org-1", "ds-1", "public.orders"), _success_delta())
+        _run(buf.flush(session_maker))
+
+        stats = _run(_stats(session_maker))
+        assert len(stats) == 1
+        row = stats[("ds-1", "public.orders")]
+        assert (row.usage_count, row.success_count, row.failure_count) == (4, 3, 1)
+        assert row.weighted_usage_count == pytest.approx(4.5)
+        assert row.last_used_at is not None
+
+    def test_fallback_without_native_upsert(self, session_maker, monkeypatch):
+        monkeypatch.setattr(buffer_module, "_supports_upsert", lambda dialect_name: False)
+        buf = TableStatsBuffer()
+        for step in ("step-1", "step-2"):
+            buf.add_usage(_usage(step), ("org-1", "ds-1", "public.orders"), _success_delta())
+            _run(buf.flush(session_maker))
+        row = _run(_stats(session_maker))[("ds-1", "public.orders")]
+        assert row.usage_count == 2
+
+    def test_duplicate_event_does_not_fail_batch(self, session_maker):
+        buf = TableStatsBuffer()
+        buf.add_usage(_usage("step-1"), ("org-1", "ds-1", "public.orders"), _success_delta())
+        _run(buf.flush(session_maker))
+        duplicate = dict(_usage("step-1"), id="other-id")
+        buf.add_usage(duplicate, ("org-1", "ds-1", "public.orders"), _success_delta())
+        buf.add_usage(_usage("step-2", "public.users"), ("org-1", "ds-1", "public.users"), _success_delta())
+        assert _run(buf.flush(session_maker)) == 2
+
+        async def count_events():
+            async with session_maker() as session:
+                return len((await session.execute(select(TableUsageEvent.id))).all())
+
+        assert _run(count_events()) == 2
+        assert set(_run(_stats(session_maker))) == {("ds-1", "public.orders"), ("ds-1", "public.users")}
+
+    def test_failed_flush_is_retried(self, session_maker):
+        class _Broken:
+            def __call__(self):
+                raise RuntimeError("database unavailable")
+
+        buf = TableStatsBuffer()
+        buf.add_usage(_usage(), ("org-1", "ds-1", "public.orders"), _success_delta())
+        assert _run(buf.flush(_Broken())) == 0
+        assert buf.pending() == 1
+        assert _run(buf.flush(session_maker)) == 1
+        assert _run(_stats(session_maker))[("ds-1", "public.orders")].usage_count == 1
+
+    def test_event_for_deleted_step_is_dropped_alone(self, fk_session_maker):
+        buf = TableStatsBuffer(max_failed_flushes=1)
+        buf.add_usage(_usage("step-1"), ("org-1", "ds-1", "public.orders"), _success_delta())
+        buf.add_usage(_usage("step-deleted"), ("org-1", "ds-1", "public.orders"), _success_delta())
+        assert _run(buf.flush(fk_session_maker)) == 1
+        assert buf.pending() == 0
+
+        async def event_steps():
+            async with fk_session_maker() as session:
+                return [row[0] for row in (await session.execute(select(TableUsageEvent.step_id))).all()]
+
+        assert _run(event_steps()) == ["step-1"]
+        # Stats are committed on their own and keep both deltas
+        assert _run(_stats(fk_session_maker))[("ds-1", "public.orders")].usage_count == 2
+
+    def test_compaction_merges_duplicate_rollups(self, session_maker):
+        async def seed():
+            async with session_maker() as session:
+                for i, count in enumerate((2, 3)):
+                    await session.execute(insert(TableStats.__table__).values(
+                        id=f"row-{i}", org_id="org-1", report_id=None, data_source_id=None,
+                        table_fqn="public.orders", usage_count=count, success_count=count,
+                        weighted_usage_count=float(count), pos_feedback_count=0, neg_feedback_count=0,
+                        weighted_pos_feedback=0.0, weighted_neg_feedback=0.0, unique_users=1,
+                        trusted_usage_count=0, failure_count=0, updated_at_stats=datetime.utcnow(),
+                        created_at=datetime(2026, 1, 1 + i),
+                    ))
+                await session.commit()
+
+        _run(seed())
+        assert _run(compact_table_stats(session_maker)) == 1
+        stats = _run(_stats(session_maker))
+        row = stats[(None, "public.orders")]
+        assert row.id == "row-0"
+        assert row.usage_count == 5
+        assert row.unique_users == 2
@@ -0,0 +1,91 @@
+"""Unit tests for cross-worker WebSocket fan-out."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.websocket_manager import WebSocketManager
+from app.websocket_pubsub import (
+    InProcessPubSub,
+    LocalBus,
+    NotificationAssembler,
+    asyncpg_dsn,
+    create_backend,
+    encode_notifications,
+)
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.sent.append(message)
+
+
+@pytest.mark.unit
+class TestWebSocketFanOut:
+    def test_broadcast_reaches_sockets_on_other_workers(self):
+        bus = LocalBus()
+        worker_a = WebSocketManager(backend=InProcessPubSub(bus))
+        worker_b = WebSocketManager(backend=InProcessPubSub(bus))
+        on_a, on_b, other_report = RecordingSocket(), RecordingSocket(), RecordingSocket()
+        handled = []
+
+        async def handler(message):
+            handled.append(message)
+
+        async def main():
+            await worker_a.start()
+            await worker_b.start()
+            await worker_a.connect(on_a, "r1")
+            await worker_b.connect(on_b, "r1")
+            await worker_b.connect(other_report, "r2")
+            worker_b.add_handler(handler)
+            await worker_a.broadcast_to_report("r1", "hello")
+            await worker_b.stop()
+            await worker_a.broadcast_to_report("r1", "after stop")
+            await worker_a.stop()
+
+        asyncio.run(main())
+        assert on_a.sent == ["hello", "after stop"]
+        assert on_b.sent == ["hello"]
+        assert other_report.sent == []
+        assert handled == ["hello"]
+
+    def test_failing_socket_is_disconnected(self):
+        manager = WebSocketManager(backend=InProcessPubSub(LocalBus()))
+
+        class BrokenSocket(RecordingSocket):
+            async def send_text(self, message):
+                raise RuntimeError("gone")
+
+        async def main():
+            await manager.connect(BrokenSocket(), "r1")
+            await manager.broadcast_to_report("r1", "hello")
+
+        asyncio.run(main())
+        assert manager.active_connections == {}
+
+    def test_notification_chunks_roundtrip(self):
+        message = json.dumps({"event": "update_completion", "content": "é\"\\n" * 5000})
+        payloads = encode_notifications("origin-1", "r1", message, max_chunk=1000)
+        assert len(payloads) > 1
+        assert all(len(p.encode("utf-8")) < 1200 for p in payloads)
+        assembler = NotificationAssembler()
+        results = [assembler.feed(p) for p in reversed(payloads)]
+        assert results[:-1] == [None] * (len(payloads) - 1)
+        assert results[-1] == ("origin-1", "r1", message)
+
+    def test_backend_factory(self):
+        assert isinstance(create_backend("inprocess"), InProcessPubSub)
+        assert create_backend("postgres", dsn="postgresql+asyncpg://u:p@db/app").dsn == "postgresql://u:p@db/app"
+        assert asyncpg_dsn("postgres://u@db/app") == "postgresql://u@db/app"
+        with pytest.raises(ValueError):
+            create_backend("postgres")
+        with pytest.raises(ValueError):
+            create_backend("redis")
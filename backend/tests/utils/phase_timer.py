@@ -0,0 +1,134 @@
+"""Per-phase wall-clock timing of the agent loop for benchmarks.
+
+``PhaseTimer`` patches the methods each phase goes through (restored on
+exit) and records the duration of every call. A phase that is re-entered
+while it is already running in the same task or thread (e.g. ``put`` ->
+``append`` on the event log) is only counted once.
+
+Phases overlap by design: commits made by a tool count towards both
+``tool_execution`` and ``db_writes``, and ``context_priming`` includes the
+queries it runs.
+"""
+import inspect
+import time
+from contextvars import ContextVar
+from statistics import median
+from typing import Any, Callable, Dict, List, Tuple
+
+_active_phases: ContextVar[frozenset] = ContextVar("benchmark_active_phases", default=frozenset())
+
+
+def agent_loop_phases() -> List[Tuple[str, Any, str]]:
+    """``(phase, owner, attribute)`` targets timed for ``AgentV2.main_execution``."""
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.ai.agent_v2 import AgentV2
+    from app.ai.agents.planner.incremental_json import IncrementalJSONParser
+    from app.ai.agents.planner.planner_v2 import PlannerV2
+    from app.ai.context.context_hub import ContextHub
+    from app.ai.runner.tool_runner import ToolRunner
+    from app.streaming import completion_stream
+    from app.streaming.completion_stream import CompletionEventQueue
+
+    return [
+        ("context_priming", ContextHub, "prime_static"),
+        ("context_priming", ContextHub, "refresh_warm"),
+        ("planner_parsing", IncrementalJSONParser, "feed"),
+        ("planner_parsing", IncrementalJSONParser, "finish"),
+        ("planner_parsing", PlannerV2, "_create_decision"),
+        ("tool_execution", ToolRunner, "run"),
+        ("db_writes", AsyncSession, "commit"),
+        ("db_writes", AsyncSession, "flush"),
+        ("sse_emission", AgentV2, "_emit_sse_event"),
+        ("sse_emission", CompletionEventQueue, "append"),
+        ("sse_emission", completion_stream, "format_sse_event"),
+    ]
+
+
+class PhaseTimer:
+    """Records call durations (in ms) per phase while patched in."""
+
+    def __init__(self, targets: List[Tuple[str, Any, str]]):
+        self.targets = targets
+        self.samples: Dict[str, List[float]] = {phase: [] for phase, _, _ in targets}
+        self._originals: List[Tuple[Any, str, Any]] = []
+
+    def __enter__(self) -> "PhaseTimer":
+        for phase, owner, name in self.targets:
+            original = inspect.getattr_static(owner, name)
+            self._originals.append((owner, name, original))
+            setattr(owner, name, self._wrap(phase, original))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        while self._originals:
+            owner, name, original = self._originals.pop()
+            setattr(owner, name, original)
+
+    def reset(self) -> None:
+        for samples in self.samples.values():
+            samples.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for phase, samples in self.samples.items():
+            values = list(samples)
+            result[phase] = {
+                "calls": len(values),
+                "total_ms": round(sum(values), 3),
+                "p50_ms": round(median(values), 3) if values else 0.0,
+                "max_ms": round(max(values), 3) if values else 0.0,
+            }
+        return result
+
+    def _wrap(self, phase: str, original: Any) -> Any:
+        if isinstance(original, staticmethod):
+            return staticmethod(self._wrap(phase, original.__func__))
+        if isinstance(original, classmethod):
+            return classmethod(self._wrap(phase, original.__func__))
+        samples = self.samples[phase]
+
+        if inspect.iscoroutinefunction(original):
+            async def timed_async(*args, **kwargs):
+                active = _active_phases.get()
+                if phase in active:
+                    return await original(*args, **kwargs)
+                token = _active_phases.set(active | {phase})
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    samples.append((time.perf_counter() - started) * 1000.0)
+                    _active_phases.reset(token)
+            return timed_async
+
+        def timed(*args, **kwargs):
+            active = _active_phases.get()
+            if phase in active:
+                return original(*args, **kwargs)
+            token = _active_phases.set(active | {phase})
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append((time.perf_counter() - started) * 1000.0)
+                _active_phases.reset(token)
+        return timed
+
+
+def format_phase_table(title: str, rounds: List[Dict[str, Any]]) -> str:
+    """Plain-text table of per-phase medians over benchmark rounds."""
+    if not rounds:
+        return f"{title}: no rounds"
+    phases = list(rounds[0]["phases"])
+    lines = [title, f"  {'phase':<18}{'calls':>8}{'total ms (p50)':>18}{'call p50 ms':>14}{'call max ms':>14}"]
+    for phase in phases:
+        stats = [r["phases"][phase] for r in rounds]
+        lines.append(
+            f"  {phase:<18}{int(median(s['calls'] for s in stats)):>8}"
+            f"{median(s['total_ms'] for s in stats):>18.1f}"
+            f"{median(s['p50_ms'] for s in stats):>14.2f}"
+            f"{max(s['max_ms'] for s in stats):>14.2f}"
+        )
+    lines.append(f"  {'wall':<18}{'':>8}{median(r['wall_ms'] for r in rounds):>18.1f}")
+    return "\n".join(lines)
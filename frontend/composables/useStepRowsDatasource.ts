@@ -0,0 +1,48 @@
+/**
+ * AG Grid infinite-model datasource backed by GET /api/steps/{id}/rows.
+ * Large results live in a server-side columnar artifact, so the grid pages and
+ * sorts them on the server instead of holding every row in the browser.
+ */
+import type { IDatasource, IGetRowsParams } from 'ag-grid-community'
+
+export function useStepRowsDatasource() {
+  const { token } = useAuth()
+  const { organization } = useOrganization()
+  const config = useRuntimeConfig()
+
+  function createDatasource(stepId: string, onError?: (status: number | null) => void): IDatasource {
+    return {
+      getRows: async (params: IGetRowsParams) => {
+        const query = new URLSearchParams({
+          offset: String(params.startRow),
+          limit: String(params.endRow - params.startRow),
+        })
+        const sort = params.sortModel?.[0]
+        if (sort) {
+          query.set('sort', sort.colId)
+          query.set('order', sort.sort)
+        }
+
+        const headers: Record<string, string> = {
+          'Authorization': `${token.value}`
+        }
+        if (organization.value?.id) {
+          headers['X-Organization-Id'] = organization.value.id
+        }
+
+        try {
+          const page: any = await $fetch(`/api/steps/${stepId}/rows?${query.toString()}`, {
+            baseURL: config.public.baseURL,
+            headers,
+          })
+          params.successCallback(page?.rows || [], page?.total_rows ?? 0)
+        } catch (error: any) {
+          params.failCallback()
+          onError?.(error?.response?.status ?? error?.statusCode ?? null)
+        }
+      }
+    }
+  }
+
+  return { createDatasource }
+}